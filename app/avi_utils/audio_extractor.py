@@ -1,7 +1,8 @@
 from datetime import datetime
 from pathlib import Path
 import subprocess
-import ffmpeg
+
+from avi_utils.media_metadata import get_media_metadata_cache
 
 
 class AudioExtractor:
@@ -58,17 +59,12 @@ class AudioExtractor:
         Raises:
             ValueError: If no audio stream is found for the specified language.
         """
-        # Get the index of the audio stream of the given language
-        audio_stream_index = None
-        streams = ffmpeg.probe(str(video_file))["streams"]
-        for i, stream in enumerate(streams):
-            if (
-                stream["codec_type"] == "audio"
-                and stream["tags"].get("language") == audio_track_name
-            ):
-                audio_stream_index = i - 1
-                break
-        if audio_stream_index is None:
+        # Get the index of the audio stream of the given language, from the probe shared with the startup dialog
+        try:
+            audio_stream_index = get_media_metadata_cache().find_audio_stream_index(
+                video_file, audio_track_name
+            )
+        except ValueError:
             raise ValueError(f"No audio stream found for {language}")
 
         audio_track = self.output_folder / f"{video_file.stem}-{language}.mp3"
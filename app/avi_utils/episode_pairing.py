@@ -0,0 +1,170 @@
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+VIDEO_EXTENSIONS = [".mp4", ".mkv", ".avi"]
+SUBTITLE_EXTENSIONS = [".srt"]
+
+# e.g. "[Dutch] Daddy loses his glasses.srt"
+BRACKETED_TAG_PATTERN = re.compile(r"^\[(?P<tag>[^\]]+)\]\s*(?P<name>.+)$")
+# e.g. "Gilmore Girls_S01E01_Pilot.es.srt", or "...zh-Hans.srt"
+SUFFIX_TAG_PATTERN = re.compile(r"^(?P<name>.+)\.(?P<tag>[A-Za-z]{2,3}(-[A-Za-z]+)?)$")
+
+# The tags commonly marking each language's subtitles: its name, and its ISO 639-1 and 639-2 codes
+LANGUAGE_TAGS = {
+    "Arabic": ["Arabic", "ar", "ara"],
+    "Bulgarian": ["Bulgarian", "bg", "bul"],
+    "Chinese": ["Chinese", "zh", "zho", "chi", "zh-Hans", "zh-Hant"],
+    "Czech": ["Czech", "cs", "ces", "cze"],
+    "Danish": ["Danish", "da", "dan"],
+    "Dutch": ["Dutch", "nl", "nld", "dut"],
+    "English": ["English", "en", "eng"],
+    "Estonian": ["Estonian", "et", "est"],
+    "Finnish": ["Finnish", "fi", "fin"],
+    "French": ["French", "fr", "fra", "fre"],
+    "German": ["German", "de", "deu", "ger"],
+    "Greek": ["Greek", "el", "ell", "gre"],
+    "Hungarian": ["Hungarian", "hu", "hun"],
+    "Indonesian": ["Indonesian", "id", "ind"],
+    "Italian": ["Italian", "it", "ita"],
+    "Japanese": ["Japanese", "ja", "jpn"],
+    "Korean": ["Korean", "ko", "kor"],
+    "Latvian": ["Latvian", "lv", "lav"],
+    "Lithuanian": ["Lithuanian", "lt", "lit"],
+    "Norwegian": ["Norwegian", "no", "nor", "nb", "nob"],
+    "Polish": ["Polish", "pl", "pol"],
+    "Portuguese": ["Portuguese", "pt", "por", "pt-BR", "pt-PT"],
+    "Romanian": ["Romanian", "ro", "ron", "rum"],
+    "Russian": ["Russian", "ru", "rus"],
+    "Slovak": ["Slovak", "sk", "slk", "slo"],
+    "Slovenian": ["Slovenian", "sl", "slv"],
+    "Spanish": ["Spanish", "es", "spa", "es-ES"],
+    "Swedish": ["Swedish", "sv", "swe"],
+    "Turkish": ["Turkish", "tr", "tur"],
+    "Ukrainian": ["Ukrainian", "uk", "ukr"],
+}
+
+# Every tag of LANGUAGE_TAGS, to tell subtitles in other languages from names that just look tagged
+KNOWN_LANGUAGE_TAGS = {
+    tag.casefold() for tags in LANGUAGE_TAGS.values() for tag in tags
+}
+
+
+def split_subtitle_name(
+    subtitle_file: Path, language_tags: Dict[str, List[str]]
+) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Splits a subtitle file's name into its episode name and language, from a "[Language] " prefix
+    or a ".code" suffix before the extension.
+
+    Brackets and dotted parts that aren't language tags, e.g. "[HorribleSubs] Show - 01" or "Oceans.Ten",
+    are part of the episode name.
+
+    Args:
+        subtitle_file (Path): The subtitle file.
+        language_tags (Dict[str, List[str]]): The tags that mark each language's subtitles, e.g. {"Spanish": ["es", "Spanish"]}.
+                                              Tags are matched ignoring case.
+
+    Returns:
+        Optional[Tuple[str, Optional[str]]]: The episode name and the language, with no language if the name has no tag.
+            None if the name is tagged with another language, see LANGUAGE_TAGS.
+    """
+    tag_languages = {
+        tag.casefold(): language
+        for language, tags in language_tags.items()
+        for tag in tags
+    }
+
+    name = subtitle_file.stem
+    for pattern in (BRACKETED_TAG_PATTERN, SUFFIX_TAG_PATTERN):
+        match = pattern.match(name)
+        if match is None:
+            continue
+        tag = match.group("tag").casefold()
+        if tag in tag_languages:
+            return match.group("name").strip(), tag_languages[tag]
+        if tag in KNOWN_LANGUAGE_TAGS:
+            return None  # Subtitles in a language we aren't interested in
+        # E.g. a release group, which may come before a language suffix
+
+    return name, None
+
+
+def find_episode_subtitles(
+    video_file_name: str,
+    subtitle_file_names: Iterable[str],
+    language_tags: Dict[str, List[str]] = LANGUAGE_TAGS,
+    untagged_language: Optional[str] = None,
+) -> Dict[str, str]:
+    """
+    Picks out the subtitle files of one video by name, from the file names of the folder it's in.
+
+    Args:
+        video_file_name (str): The video's file name, e.g. "Gilmore Girls_S01E01_Pilot.mp4".
+        subtitle_file_names (Iterable[str]): The subtitle file names to choose from.
+        language_tags (Dict[str, List[str]], optional): The tags that mark each language's subtitles, see
+                                                        `split_subtitle_name`. Defaults to LANGUAGE_TAGS.
+        untagged_language (Optional[str], optional): The language of subtitles named just like the video.
+                                                     Defaults to None, to skip them.
+
+    Returns:
+        Dict[str, str]: The subtitle file name of each language found, e.g. {"Spanish": "Gilmore Girls_S01E01_Pilot.es.srt"}.
+            If a language has several, the first is kept.
+    """
+    episode_name = Path(video_file_name).stem.casefold()
+    subtitle_files = {}
+    for subtitle_file_name in subtitle_file_names:
+        split_name = split_subtitle_name(Path(subtitle_file_name), language_tags)
+        if split_name is None:
+            continue
+        name, language = split_name
+        language = language or untagged_language
+        if language is not None and name.casefold() == episode_name:
+            subtitle_files.setdefault(language, subtitle_file_name)
+    return subtitle_files
+
+
+def pair_episodes(
+    folder: Union[Path, str],
+    language_tags: Dict[str, List[str]],
+    untagged_language: Optional[str] = None,
+) -> Dict[str, Dict]:
+    """
+    Finds every episode in a folder (and its subfolders), pairing each video with its subtitle files by name.
+
+    Args:
+        folder (Union[Path, str]): The folder holding a series, e.g. with a subfolder per season.
+        language_tags (Dict[str, List[str]]): The tags that mark each language's subtitles, see `split_subtitle_name`.
+        untagged_language (Optional[str], optional): The language of subtitles named just like their video
+                                                     (e.g. "1x01 - El retorno del fugitivo.srt"). Defaults to None, to skip them.
+
+    Returns:
+        Dict[str, Dict]: Each episode's "Video File" (or None) and "Subtitle Files" by language, keyed by the episode's
+            path relative to the folder without extension (e.g. "S01/Gilmore Girls_S01E01_Pilot"), in order.
+            Episodes without subtitles are left out.
+    """
+    folder = Path(folder)
+    episodes = {}
+
+    def episode(name: str, parent: Path) -> Dict:
+        key = (parent.relative_to(folder) / name).as_posix()
+        return episodes.setdefault(key, {"Video File": None, "Subtitle Files": {}})
+
+    for file in sorted(folder.rglob("*")):
+        suffix = file.suffix.lower()
+        if suffix in VIDEO_EXTENSIONS:
+            episode(file.stem, file.parent)["Video File"] = file
+        elif suffix in SUBTITLE_EXTENSIONS:
+            split_name = split_subtitle_name(file, language_tags)
+            if split_name is None:
+                continue
+            name, language = split_name
+            language = language or untagged_language
+            if language is not None:
+                episode(name, file.parent)["Subtitle Files"][language] = file
+
+    return {
+        name: files
+        for name, files in sorted(episodes.items())
+        if files["Subtitle Files"]
+    }
@@ -0,0 +1,208 @@
+import threading
+from typing import List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+from avi_utils.folder_scanner import (
+    FolderScanCache,
+    FolderScanCancelled,
+    get_folder_scan_cache,
+)
+
+
+class FolderScanWorker(QObject):
+    """
+    Lists a folder's video and subtitle files on a worker thread, so a slow folder (e.g. on a network share) doesn't
+    freeze the window choosing from it.
+
+    The worker is moved to a QThread and `run` is connected to the thread's `started` signal.
+
+    Every signal starts with the scan's generation, telling scans of the same folder apart.
+
+    Signals:
+        batch_signal (pyqtSignal): Emitted with the generation and each batch of video and subtitle file names found.
+        finished_signal (pyqtSignal): Emitted with the generation and the folder when all its files have been found.
+        failed_signal (pyqtSignal): Emitted with the generation and an error message when the folder can't be read.
+        done_signal (pyqtSignal): Emitted after the scan ends, whatever the outcome.
+    """
+
+    batch_signal = pyqtSignal(int, list, list)
+    finished_signal = pyqtSignal(int, str)
+    failed_signal = pyqtSignal(int, str)
+    done_signal = pyqtSignal()
+
+    def __init__(self, folder: str, cache: FolderScanCache, generation: int) -> None:
+        """
+        Initialises the FolderScanWorker.
+
+        Args:
+            folder (str): The folder to scan.
+            cache (FolderScanCache): The cache reading the folder, and remembering its files.
+            generation (int): The scan's generation, see `FolderScanner`.
+        """
+        super().__init__()
+        self.folder = folder
+        self.cache = cache
+        self.generation = generation
+        self.cancel_event = threading.Event()
+
+    def run(self) -> None:
+        """
+        Scans the folder and emits the signals matching the outcome.
+        """
+        try:
+            self.cache.scan(
+                self.folder,
+                batch_callback=lambda video_files, subtitle_files: self.batch_signal.emit(
+                    self.generation, video_files, subtitle_files
+                ),
+                should_stop=self.cancel_event.is_set,
+            )
+            self.finished_signal.emit(self.generation, self.folder)
+        except FolderScanCancelled:
+            pass
+        except Exception as e:
+            print(f"Error scanning folder {self.folder}: {e}")
+            self.failed_signal.emit(self.generation, str(e))
+        finally:
+            self.done_signal.emit()
+
+    def cancel(self) -> None:
+        """
+        Requests cancelling the scan. Must be called directly (not queued), as the worker's thread is busy scanning.
+        """
+        self.cancel_event.set()
+
+
+class FolderScanner(QObject):
+    """
+    Runs one folder scan at a time for a window, cancelling the previous scan when another folder is chosen.
+
+    Each scan (or cancelling) moves on to the next generation number, and only the current generation's files are
+    passed on. So a cancelled scan still finishing can't add its files to the window's dropdowns, even when the same
+    folder is scanned again.
+
+    Attributes:
+        cache (FolderScanCache): The cache reading folders, shared by the whole app by default.
+        folder (Optional[str]): The folder being (or last) scanned.
+        generation (int): The current generation, of the latest scan unless it was cancelled.
+        scans (List[Tuple[QThread, FolderScanWorker]]): The scans whose threads haven't finished yet.
+
+    Signals:
+        files_found_signal (pyqtSignal): Emitted with each batch of video and subtitle file names in the latest folder.
+        scan_finished_signal (pyqtSignal): Emitted with the folder when all its files have been found.
+        scan_failed_signal (pyqtSignal): Emitted with an error message when the latest folder can't be read.
+    """
+
+    files_found_signal = pyqtSignal(list, list)
+    scan_finished_signal = pyqtSignal(str)
+    scan_failed_signal = pyqtSignal(str)
+
+    def __init__(
+        self, parent: Optional[QObject] = None, cache: Optional[FolderScanCache] = None
+    ) -> None:
+        """
+        Initialises the FolderScanner.
+
+        Args:
+            parent (Optional[QObject], optional): The window owning the scanner. Defaults to None.
+            cache (Optional[FolderScanCache], optional): The cache reading folders. Defaults to None, for the shared one.
+        """
+        super().__init__(parent)
+        self.cache = cache or get_folder_scan_cache()
+        self.folder = None
+        self.generation = 0
+        self.scans = []
+
+    def scan(self, folder: str) -> None:
+        """
+        Starts scanning a folder in the background, cancelling any scan already running.
+
+        Args:
+            folder (str): The folder.
+        """
+        self.cancel()
+        self.folder = folder
+
+        thread = QThread()
+        worker = FolderScanWorker(folder, self.cache, self.generation)
+        worker.moveToThread(thread)
+        scan = (thread, worker)
+        self.scans.append(scan)
+
+        thread.started.connect(worker.run)
+        worker.batch_signal.connect(self.files_found)
+        worker.finished_signal.connect(self.scan_finished)
+        worker.failed_signal.connect(self.scan_failed)
+        worker.done_signal.connect(thread.quit)
+        thread.finished.connect(lambda: self.scan_ended(scan))
+
+        thread.start()
+
+    def files_found(
+        self, generation: int, video_files: List[str], subtitle_files: List[str]
+    ) -> None:
+        """
+        Passes on a batch of files found, if they're from the current generation's scan.
+
+        Args:
+            generation (int): The generation of the scan that found them.
+            video_files (List[str]): The video file names.
+            subtitle_files (List[str]): The subtitle file names.
+        """
+        if generation == self.generation:
+            self.files_found_signal.emit(video_files, subtitle_files)
+
+    def scan_finished(self, generation: int, folder: str) -> None:
+        """
+        Passes on that a folder's files have all been found, if it's the current generation's scan.
+
+        Args:
+            generation (int): The generation of the scan.
+            folder (str): The folder.
+        """
+        if generation == self.generation:
+            self.scan_finished_signal.emit(folder)
+
+    def scan_failed(self, generation: int, error_message: str) -> None:
+        """
+        Passes on that a folder couldn't be read, if it's the current generation's scan.
+
+        Args:
+            generation (int): The generation of the scan.
+            error_message (str): The error.
+        """
+        if generation == self.generation:
+            self.scan_failed_signal.emit(error_message)
+
+    def scan_ended(self, scan: Tuple[QThread, FolderScanWorker]) -> None:
+        """
+        Tidies up a scan's worker thread once it has ended.
+
+        Args:
+            scan (Tuple[QThread, FolderScanWorker]): The scan's thread and worker.
+        """
+        thread, worker = scan
+        if scan in self.scans:
+            self.scans.remove(scan)
+        worker.deleteLater()
+        thread.deleteLater()
+
+    def cancel(self) -> None:
+        """
+        Requests cancelling every running scan, without waiting for them.
+
+        Moves on to the next generation, so files the scans already found aren't passed on either.
+        """
+        self.generation += 1
+        for _, worker in self.scans:
+            worker.cancel()
+
+    def stop(self) -> None:
+        """
+        Cancels every running scan and waits for their threads to finish, e.g. when the window closes.
+        """
+        self.cancel()
+        for thread, _ in list(self.scans):
+            thread.quit()
+            thread.wait()
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from avi_utils.episode_pairing import SUBTITLE_EXTENSIONS
+
+# The dialogs only offer MP4 videos
+VIDEO_EXTENSIONS = [".mp4"]
+# Files are reported in batches, so a slow folder fills the dropdowns as it's read
+DEFAULT_BATCH_SIZE = 50
+# ...or every so often, whichever comes first
+DEFAULT_BATCH_INTERVAL_SECONDS = 0.25
+
+# A folder's video file names and subtitle file names
+FolderListing = Tuple[List[str], List[str]]
+
+
+class FolderScanCancelled(Exception):
+    """Raised when a folder scan is cancelled before it finishes."""
+
+
+class FolderScanCache:
+    """
+    Lists the video and subtitle files in folders, remembering each folder's files until the folder changes.
+
+    A folder is read with a single `os.scandir` pass, which on a network share is far quicker than globbing it once
+    per extension. Reading it again is skipped while its modification time, which changes whenever a file is added,
+    removed or renamed, stays the same.
+
+    Attributes:
+        listings (Dict[str, Tuple[int, List[str], List[str]]]): The modification time, video file names and subtitle
+                                                                 file names of each folder read so far, by absolute path.
+        scan_count (int): How many times a folder has actually been read.
+        lock (threading.Lock): Guards the attributes above, as folders are scanned on worker threads.
+    """
+
+    def __init__(self) -> None:
+        self.listings = {}
+        self.scan_count = 0
+        self.lock = threading.Lock()
+
+    def get_listing(self, folder: str) -> Optional[FolderListing]:
+        """
+        Gets a folder's files if it hasn't changed since it was last read.
+
+        Args:
+            folder (str): The folder.
+
+        Returns:
+            Optional[FolderListing]: The video and subtitle file names, or None if the folder has to be read.
+        """
+        path = os.path.abspath(folder)
+        mtime_ns = os.stat(path).st_mtime_ns
+        with self.lock:
+            cached = self.listings.get(path)
+        if cached is None or cached[0] != mtime_ns:
+            return None
+        return list(cached[1]), list(cached[2])
+
+    def scan(
+        self,
+        folder: str,
+        batch_callback: Optional[Callable[[List[str], List[str]], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        batch_interval: float = DEFAULT_BATCH_INTERVAL_SECONDS,
+    ) -> FolderListing:
+        """
+        Lists a folder's video and subtitle files, reporting them in batches as they're found.
+
+        Args:
+            folder (str): The folder.
+            batch_callback (Optional[Callable[[List[str], List[str]], None]], optional): Called with each batch of video
+                                                                                        and subtitle file names. Defaults to None.
+            should_stop (Optional[Callable[[], bool]], optional): Polled between files, cancels the scan when it returns True.
+                                                                  Defaults to None.
+            batch_size (int, optional): The most files in a batch. Defaults to DEFAULT_BATCH_SIZE.
+            batch_interval (float, optional): The most seconds found files wait before being reported.
+                                              Defaults to DEFAULT_BATCH_INTERVAL_SECONDS.
+
+        Returns:
+            FolderListing: All the folder's video and subtitle file names, in directory order.
+
+        Raises:
+            FolderScanCancelled: If `should_stop` returned True.
+            OSError: If the folder can't be read.
+        """
+        path = os.path.abspath(folder)
+
+        listing = self.get_listing(path)
+        if listing is not None:
+            if batch_callback is not None:
+                batch_callback(*listing)
+            return listing
+
+        # Taken before reading, so a file added mid-scan makes the next scan read the folder again
+        mtime_ns = os.stat(path).st_mtime_ns
+        video_files, subtitle_files = [], []
+        batch_videos, batch_subtitles = [], []
+        last_batch_time = time.monotonic()
+
+        def report_batch() -> None:
+            nonlocal batch_videos, batch_subtitles, last_batch_time
+            if batch_callback is not None and (batch_videos or batch_subtitles):
+                batch_callback(batch_videos, batch_subtitles)
+            batch_videos, batch_subtitles = [], []
+            last_batch_time = time.monotonic()
+
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if should_stop is not None and should_stop():
+                    raise FolderScanCancelled()
+
+                extension = os.path.splitext(entry.name)[1].lower()
+                if extension in VIDEO_EXTENSIONS:
+                    found, batch = video_files, batch_videos
+                elif extension in SUBTITLE_EXTENSIONS:
+                    found, batch = subtitle_files, batch_subtitles
+                else:
+                    continue
+                # Checked last, as on some systems it needs another round trip to the share
+                if not entry.is_file():
+                    continue
+                found.append(entry.name)
+                batch.append(entry.name)
+
+                if (
+                    len(batch_videos) + len(batch_subtitles) >= batch_size
+                    or time.monotonic() - last_batch_time >= batch_interval
+                ):
+                    report_batch()
+        report_batch()
+
+        with self.lock:
+            self.scan_count += 1
+            self.listings[path] = (mtime_ns, video_files, subtitle_files)
+        return list(video_files), list(subtitle_files)
+
+
+folder_scan_cache = None
+
+
+def get_folder_scan_cache() -> FolderScanCache:
+    """
+    Gets the cache shared by the whole app, creating it the first time.
+
+    Returns:
+        FolderScanCache: The shared cache.
+    """
+    global folder_scan_cache
+    if folder_scan_cache is None:
+        folder_scan_cache = FolderScanCache()
+    return folder_scan_cache
@@ -0,0 +1,496 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import threading
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+DEFAULT_QUEUE_FILE = Path("../media/flashcards/media_queue.sqlite3")
+DEFAULT_STAGING_FOLDER = Path("../media/flashcards/staging")
+
+# Screenshots are staged uncompressed, as that's the quickest format to save on the UI thread
+STAGED_IMAGE_SUFFIX = ".bmp"
+
+IMAGE_EXTENSIONS = {"webp": ".webp", "avif": ".avif", "jpg": ".jpg"}
+AUDIO_EXTENSIONS = {"opus": ".opus", "mp3": ".mp3"}
+
+# Jobs that fail this many times are left in the queue (with their staged file) instead of being retried forever
+MAX_ATTEMPTS = 3
+
+# Trims silence at the start and end of a clip: trim the start, reverse, trim the (new) start, and reverse back
+TRIM_SILENCE_FILTER = ",".join(
+    [
+        "silenceremove=start_periods=1:start_threshold=-45dB:start_silence=0.1",
+        "areverse",
+        "silenceremove=start_periods=1:start_threshold=-45dB:start_silence=0.1",
+        "areverse",
+    ]
+)
+
+
+def image_encode_command(
+    source: Path, destination: Path, image_format: str, max_width: int, quality: int
+) -> List[str]:
+    """
+    Builds an ffmpeg command that recompresses a screenshot, scaling it down to a maximum width.
+
+    Args:
+        source (Path): The staged screenshot.
+        destination (Path): The file to write.
+        image_format (str): "webp", "avif" or "jpg".
+        max_width (int): The maximum width in pixels. Smaller screenshots aren't scaled up.
+        quality (int): The quality, from 0 (smallest) to 100 (best).
+
+    Returns:
+        List[str]: The ffmpeg command as a list of strings.
+    """
+    command = [
+        "ffmpeg",
+        "-y",
+        "-loglevel",
+        "error",
+        "-i",
+        str(source),
+        "-vf",
+        f"scale='min({max_width},iw)':-2",
+        "-frames:v",
+        "1",
+    ]
+    if image_format == "webp":
+        command += ["-c:v", "libwebp", "-quality", str(quality), "-f", "webp"]
+    elif image_format == "avif":
+        # Quality maps onto the AV1 constant rate factor, where lower is better (0-63)
+        crf = round((100 - quality) * 63 / 100)
+        command += [
+            "-c:v",
+            "libaom-av1",
+            "-still-picture",
+            "1",
+            "-crf",
+            str(crf),
+            "-f",
+            "avif",
+        ]
+    elif image_format == "jpg":
+        # Quality maps onto the JPEG quantiser scale, where lower is better (2-31)
+        q_scale = round(2 + (100 - quality) * 29 / 100)
+        command += ["-q:v", str(q_scale), "-f", "image2"]
+    else:
+        raise ValueError(f"Unsupported image format: {image_format}")
+    return command + [str(destination)]
+
+
+def audio_encode_command(
+    source: Path,
+    destination: Path,
+    audio_format: str,
+    bitrate: str,
+    trim_silence: bool = False,
+) -> List[str]:
+    """
+    Builds an ffmpeg command that recompresses an audio clip to mono.
+
+    Args:
+        source (Path): The staged audio clip.
+        destination (Path): The file to write.
+        audio_format (str): "opus" or "mp3".
+        bitrate (str): The audio bitrate, e.g. "32k".
+        trim_silence (bool, optional): Whether to trim silence at the start and end of the clip. Defaults to False.
+
+    Returns:
+        List[str]: The ffmpeg command as a list of strings.
+    """
+    command = ["ffmpeg", "-y", "-loglevel", "error", "-i", str(source), "-vn"]
+    if trim_silence:
+        command += ["-filter:a", TRIM_SILENCE_FILTER]
+    command += ["-ac", "1", "-b:a", bitrate]
+    if audio_format == "opus":
+        command += ["-c:a", "libopus", "-f", "opus"]
+    elif audio_format == "mp3":
+        command += ["-c:a", "libmp3lame", "-f", "mp3"]
+    else:
+        raise ValueError(f"Unsupported audio format: {audio_format}")
+    return command + [str(destination)]
+
+
+def stage_file(source: Path, staged_file: Path) -> None:
+    """
+    Puts a file in the staging folder, hard linking it if possible so nothing needs copying.
+
+    Args:
+        source (Path): The file to stage.
+        staged_file (Path): Where to stage it.
+    """
+    staged_file.unlink(missing_ok=True)
+    try:
+        os.link(source, staged_file)
+    except OSError:
+        # E.g. the staging folder is on a different drive
+        shutil.copy(source, staged_file)
+
+
+class MediaEncodingQueue:
+    """
+    Saves flashcard media on a background thread, recompressing screenshots and audio clips to smaller formats.
+
+    Adding a card only stages the media (saving the screenshot uncompressed, and hard linking the audio clip)
+    and records a job in a SQLite queue, so it returns immediately. Jobs are encoded in order on a worker thread,
+    and any left when the app closes (or crashes) are picked up again the next time the queue starts.
+
+    Attributes:
+        queue_file (Path): The SQLite database holding the queue.
+        staging_folder (Path): Where media waits to be encoded.
+        image_format (str): The screenshot format, "webp", "avif" or "jpg".
+        image_max_width (int): The maximum screenshot width in pixels.
+        image_quality (int): The screenshot quality, from 0 to 100.
+        audio_format (str): The audio format, "opus" or "mp3".
+        audio_bitrate (str): The audio bitrate, e.g. "48k".
+        trim_silence (bool): Whether to trim silence at the start and end of audio clips.
+    """
+
+    def __init__(
+        self,
+        queue_file: Path = DEFAULT_QUEUE_FILE,
+        staging_folder: Path = DEFAULT_STAGING_FOLDER,
+        image_format: str = "webp",
+        image_max_width: int = 640,
+        image_quality: int = 75,
+        audio_format: str = "mp3",
+        audio_bitrate: str = "48k",
+        trim_silence: bool = False,
+        run_command: Optional[Callable[[List[str]], Any]] = None,
+    ) -> None:
+        """
+        Opens the queue. Call `start` to start encoding.
+
+        Args:
+            queue_file (Path, optional): The SQLite database holding the queue. Defaults to DEFAULT_QUEUE_FILE.
+            staging_folder (Path, optional): Where media waits to be encoded. Defaults to DEFAULT_STAGING_FOLDER.
+            image_format (str, optional): The screenshot format, "webp", "avif" or "jpg". Defaults to "webp".
+            image_max_width (int, optional): The maximum screenshot width in pixels. Defaults to 640.
+            image_quality (int, optional): The screenshot quality, from 0 to 100. Defaults to 75.
+            audio_format (str, optional): The audio format, "opus" or "mp3" (Opus is smaller, MP3 plays everywhere). Defaults to "mp3".
+            audio_bitrate (str, optional): The audio bitrate, plenty for speech at low values. Defaults to "48k".
+            trim_silence (bool, optional): Whether to trim silence at the start and end of audio clips. Defaults to False.
+            run_command (Optional[Callable[[List[str]], Any]], optional): Runs an encoding command, raising an exception if it fails.
+                                                               Defaults to None, to run ffmpeg.
+        """
+        if image_format not in IMAGE_EXTENSIONS:
+            raise ValueError(f"Unsupported image format: {image_format}")
+        if audio_format not in AUDIO_EXTENSIONS:
+            raise ValueError(f"Unsupported audio format: {audio_format}")
+
+        self.queue_file = Path(queue_file)
+        self.staging_folder = Path(staging_folder)
+        self.image_format = image_format
+        self.image_max_width = image_max_width
+        self.image_quality = image_quality
+        self.audio_format = audio_format
+        self.audio_bitrate = audio_bitrate
+        self.trim_silence = trim_silence
+        self.run_command = run_command or run_ffmpeg
+
+        self.queue_file.parent.mkdir(parents=True, exist_ok=True)
+        self.staging_folder.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(self.queue_file), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS media_jobs (
+                id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                source TEXT NOT NULL,
+                destination TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )
+            """)
+        self.connection.commit()
+
+        self.jobs_available = threading.Condition(self.lock)
+        self.closing = False
+        self.idle = threading.Event()
+        self.thread = None
+
+    @property
+    def image_extension(self) -> str:
+        """The file extension of encoded screenshots, e.g. ".webp"."""
+        return IMAGE_EXTENSIONS[self.image_format]
+
+    @property
+    def audio_extension(self) -> str:
+        """The file extension of encoded audio clips, e.g. ".mp3"."""
+        return AUDIO_EXTENSIONS[self.audio_format]
+
+    def start(self) -> None:
+        """
+        Starts encoding on a background thread, including any jobs left from last time.
+        """
+        # Jobs that failed last time get another chance, e.g. if a drive was unplugged
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE media_jobs SET attempts = 0")
+
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def enqueue_image(
+        self, save_image: Callable[[Path], Any], destination: Path
+    ) -> None:
+        """
+        Stages a screenshot and queues it to be encoded.
+
+        Args:
+            save_image (Callable[[Path], Any]): Saves the screenshot to the given path, e.g. `ScreenshotViewer.save_screenshot`.
+            destination (Path): Where the encoded screenshot should be saved.
+        """
+        self.enqueue("image", self.stage_image(save_image, destination), destination)
+
+    def enqueue_audio(self, audio_file: Path, destination: Path) -> None:
+        """
+        Stages an audio clip and queues it to be encoded.
+
+        Args:
+            audio_file (Path): The audio clip, e.g. in the temporary audio folder (which is emptied when the app closes).
+            destination (Path): Where the encoded audio clip should be saved.
+        """
+        self.enqueue("audio", self.stage_audio(audio_file, destination), destination)
+
+    def stage_image(self, save_image: Callable[[Path], Any], destination: Path) -> Path:
+        """
+        Saves a screenshot uncompressed in the staging folder, ready to be queued with `enqueue`.
+
+        Staging and queueing are separate so the staged file can be hashed (or discarded) before the worker thread
+        encodes and deletes it.
+
+        Args:
+            save_image (Callable[[Path], Any]): Saves the screenshot to the given path, e.g. `ScreenshotViewer.save_screenshot`.
+            destination (Path): Where the encoded screenshot should be saved.
+
+        Returns:
+            Path: The staged screenshot.
+        """
+        staged_file = self.staging_folder / (
+            Path(destination).name + STAGED_IMAGE_SUFFIX
+        )
+        save_image(staged_file)
+        return staged_file
+
+    def stage_audio(self, audio_file: Path, destination: Path) -> Path:
+        """
+        Puts an audio clip in the staging folder, ready to be queued with `enqueue`. See `stage_image`.
+
+        Args:
+            audio_file (Path): The audio clip, e.g. in the temporary audio folder (which is emptied when the app closes).
+            destination (Path): Where the encoded audio clip should be saved.
+
+        Returns:
+            Path: The staged audio clip.
+        """
+        staged_file = self.staging_folder / (
+            Path(destination).name + Path(audio_file).suffix
+        )
+        stage_file(Path(audio_file), staged_file)
+        return staged_file
+
+    def enqueue(self, kind: str, source: Path, destination: Path) -> None:
+        """
+        Records an encoding job, which is kept until it's been done.
+
+        Args:
+            kind (str): "image" or "audio".
+            source (Path): The staged file.
+            destination (Path): Where the encoded file should be saved.
+        """
+        with self.jobs_available:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT INTO media_jobs (kind, source, destination) VALUES (?, ?, ?)",
+                    (kind, str(source), str(destination)),
+                )
+            self.idle.clear()
+            self.jobs_available.notify()
+
+    def media_file(self, destination: Path) -> Optional[Path]:
+        """
+        Finds the file currently holding a piece of media, which is the staged file until it has been encoded.
+
+        Args:
+            destination (Path): Where the encoded file is (or will be) saved.
+
+        Returns:
+            Optional[Path]: The encoded file if it exists, otherwise the staged file of its queued job,
+                or None if there is neither.
+        """
+        destination = Path(destination)
+        if destination.exists():
+            return destination
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT source FROM media_jobs WHERE destination = ? ORDER BY id DESC LIMIT 1",
+                (str(destination),),
+            ).fetchone()
+        if row is not None:
+            return Path(row[0])
+        # Encoded between the two checks
+        return destination if destination.exists() else None
+
+    def discard(self, destination: Path) -> None:
+        """
+        Deletes a piece of media that is no longer used, whether it has been encoded yet or not.
+
+        Args:
+            destination (Path): Where the encoded file is (or will be) saved.
+        """
+        with self.lock, self.connection:
+            staged_files = self.connection.execute(
+                "SELECT source FROM media_jobs WHERE destination = ?",
+                (str(destination),),
+            ).fetchall()
+            self.connection.execute(
+                "DELETE FROM media_jobs WHERE destination = ?", (str(destination),)
+            )
+        for (staged_file,) in staged_files:
+            Path(staged_file).unlink(missing_ok=True)
+        Path(destination).unlink(missing_ok=True)
+
+    def pending_job_count(self) -> int:
+        """
+        Counts the jobs waiting to be encoded, including ones that have failed too often to be retried.
+
+        Returns:
+            int: The number of jobs.
+        """
+        with self.lock:
+            return self.connection.execute(
+                "SELECT COUNT(*) FROM media_jobs"
+            ).fetchone()[0]
+
+    def next_job(self) -> Optional[tuple]:
+        """
+        Gets the oldest job that can still be tried. Must be called with the lock held.
+
+        Returns:
+            Optional[tuple]: The job's id, kind, source and destination, or None if there are none.
+        """
+        return self.connection.execute(
+            """
+            SELECT id, kind, source, destination FROM media_jobs
+            WHERE attempts < ? ORDER BY id LIMIT 1
+            """,
+            (MAX_ATTEMPTS,),
+        ).fetchone()
+
+    def work(self) -> None:
+        """
+        Encodes jobs until the queue is closed, waiting for new jobs when there are none.
+        """
+        while True:
+            with self.jobs_available:
+                job = self.next_job()
+                while job is None:
+                    self.idle.set()
+                    if self.closing:
+                        return
+                    self.jobs_available.wait()
+                    job = self.next_job()
+
+            job_id, kind, source, destination = job
+            try:
+                self.encode(kind, Path(source), Path(destination))
+            except Exception as e:
+                print(f"Unable to encode {source} to {destination}. {e}")
+                with self.lock, self.connection:
+                    self.connection.execute(
+                        "UPDATE media_jobs SET attempts = attempts + 1 WHERE id = ?",
+                        (job_id,),
+                    )
+                continue
+
+            with self.lock, self.connection:
+                discarded = (
+                    self.connection.execute(
+                        "DELETE FROM media_jobs WHERE id = ?", (job_id,)
+                    ).rowcount
+                    == 0
+                )
+                if discarded:
+                    # The media was discarded while it was being encoded
+                    Path(destination).unlink(missing_ok=True)
+            Path(source).unlink(missing_ok=True)
+
+    def encode(self, kind: str, source: Path, destination: Path) -> None:
+        """
+        Encodes a staged file, writing it under a temporary name first so a half-written file is never used.
+
+        Args:
+            kind (str): "image" or "audio".
+            source (Path): The staged file.
+            destination (Path): Where the encoded file should be saved.
+        """
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        partial_file = destination.with_name(destination.name + ".part")
+
+        if kind == "image":
+            command = image_encode_command(
+                source,
+                partial_file,
+                self.image_format,
+                self.image_max_width,
+                self.image_quality,
+            )
+        else:
+            command = audio_encode_command(
+                source,
+                partial_file,
+                self.audio_format,
+                self.audio_bitrate,
+                self.trim_silence,
+            )
+
+        self.run_command(command)
+        partial_file.replace(destination)
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until every job that can be tried has been encoded.
+
+        Args:
+            timeout (Optional[float], optional): The most seconds to wait. Defaults to None, to wait as long as needed.
+
+        Returns:
+            bool: True if the queue is idle, False if the timeout passed first.
+        """
+        return self.idle.wait(timeout)
+
+    def close(self) -> None:
+        """
+        Finishes the queued jobs and stops the worker thread.
+
+        Jobs that keep failing stay in the queue, with their staged files, to be tried again next time.
+        """
+        with self.jobs_available:
+            self.closing = True
+            self.jobs_available.notify()
+        if self.thread is not None:
+            self.thread.join()
+
+        remaining_jobs = self.pending_job_count()
+        if remaining_jobs:
+            print(f"{remaining_jobs} flashcard media files couldn't be encoded yet.")
+        with self.lock:
+            self.connection.close()
+
+
+def run_ffmpeg(command: List[str]) -> None:
+    """
+    Runs an ffmpeg command.
+
+    Args:
+        command (List[str]): The command as a list of strings.
+
+    Raises:
+        RuntimeError: If ffmpeg fails, with its error output.
+    """
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
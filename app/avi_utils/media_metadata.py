@@ -0,0 +1,266 @@
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import ffmpeg
+
+DEFAULT_CACHE_FILE = Path("../media/media_metadata.sqlite3")
+# ffprobe mostly waits on the disk (or network share), so a few run at once
+DEFAULT_PROBE_WORKERS = 4
+# The language tag ffmpeg uses for streams without one
+UNDETERMINED_LANGUAGE = "und"
+
+
+class MediaMetadataCache:
+    """
+    Probes media files with ffprobe once, and remembers their streams, codecs, durations and language tags.
+
+    Results are kept in memory and in an SQLite database, so they last across runs. A file is probed again if its
+    size or modification time changes. Every part of the app asking about the same video shares the cache
+    (see `get_media_metadata_cache`), and folders of episodes can be probed in parallel in the background.
+
+    Attributes:
+        cache_file (Path): The SQLite database holding the results.
+        probe (Callable[[str], Dict[str, Any]]): Probes a file, returning ffprobe's output. Defaults to `ffmpeg.probe`.
+        metadata (Dict[str, Tuple[int, int, Dict[str, Any]]]): The size, modification time and probe result of each file
+                                                                looked up so far, by absolute path.
+        pending (Dict[str, Future]): The files being probed in the background.
+        probe_count (int): How many times a file has actually been probed.
+        lock (threading.Lock): Guards the attributes above and the database connection.
+    """
+
+    def __init__(
+        self,
+        cache_file: Path = DEFAULT_CACHE_FILE,
+        probe: Optional[Callable[[str], Dict[str, Any]]] = None,
+        probe_workers: int = DEFAULT_PROBE_WORKERS,
+    ) -> None:
+        """
+        Opens the cache, creating it if needed.
+
+        Args:
+            cache_file (Path, optional): The SQLite database holding the results. Defaults to DEFAULT_CACHE_FILE.
+            probe (Optional[Callable[[str], Dict[str, Any]]], optional): Probes a file. Defaults to None, for `ffmpeg.probe`.
+            probe_workers (int, optional): How many files are probed at once in the background. Defaults to DEFAULT_PROBE_WORKERS.
+        """
+        self.cache_file = Path(cache_file)
+        self.probe = probe or ffmpeg.probe
+        self.metadata = {}
+        self.pending = {}
+        self.probe_count = 0
+        self.lock = threading.Lock()
+
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.cache_file), check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS media_metadata (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                metadata TEXT NOT NULL
+            )
+            """)
+        self.connection.commit()
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=probe_workers, thread_name_prefix="media-probe"
+        )
+
+    def close(self) -> None:
+        """
+        Stops probing in the background, without waiting for running probes, and closes the cache's database.
+        """
+        self.executor.shutdown(wait=False)
+        with self.lock:
+            self.connection.close()
+
+    def get_metadata(
+        self, media_file: Union[Path, str], wait_for_pending: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Gets a file's probe result, probing it only if it hasn't been probed since it last changed.
+
+        Args:
+            media_file (Union[Path, str]): The video or audio file.
+            wait_for_pending (bool, optional): Whether to wait for a background probe of the file rather than probing it
+                                               again. Defaults to True.
+
+        Returns:
+            Dict[str, Any]: ffprobe's output, with the file's "streams" and "format".
+        """
+        path = os.path.abspath(media_file)
+        status = os.stat(path)
+
+        with self.lock:
+            cached = self.metadata.get(path)
+            if cached is None:
+                row = self.connection.execute(
+                    "SELECT size, mtime_ns, metadata FROM media_metadata WHERE path = ?",
+                    (path,),
+                ).fetchone()
+                if row is not None:
+                    cached = self.metadata[path] = (row[0], row[1], json.loads(row[2]))
+            if cached is not None and cached[:2] == (
+                status.st_size,
+                status.st_mtime_ns,
+            ):
+                return cached[2]
+            pending = self.pending.get(path) if wait_for_pending else None
+
+        if pending is not None:
+            # Already being probed in the background. If that failed, probing again raises the error here
+            metadata = pending.result()
+            if metadata is not None:
+                return metadata
+
+        metadata = self.probe(path)
+        with self.lock:
+            self.probe_count += 1
+            self.metadata[path] = (status.st_size, status.st_mtime_ns, metadata)
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO media_metadata (path, size, mtime_ns, metadata) VALUES (?, ?, ?, ?)",
+                    (path, status.st_size, status.st_mtime_ns, json.dumps(metadata)),
+                )
+        return metadata
+
+    def probe_in_background(
+        self, media_files: Iterable[Union[Path, str]]
+    ) -> List[Future]:
+        """
+        Starts probing files in parallel in the background, e.g. every episode in a folder, so later lookups are instant.
+
+        Args:
+            media_files (Iterable[Union[Path, str]]): The files.
+
+        Returns:
+            List[Future]: A future for each file that wasn't already being probed, giving its probe result.
+        """
+        futures = []
+        for media_file in media_files:
+            path = os.path.abspath(media_file)
+            with self.lock:
+                if path in self.pending:
+                    continue
+                future = self.pending[path] = self.executor.submit(
+                    self.probe_pending, path
+                )
+            futures.append(future)
+        return futures
+
+    def probe_pending(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Probes a file queued by `probe_in_background`.
+
+        Args:
+            path (str): The file's absolute path.
+
+        Returns:
+            Optional[Dict[str, Any]]: The probe result, or None if the file couldn't be probed.
+        """
+        try:
+            # Lookups of the file wait for this probe, so it mustn't wait for itself
+            return self.get_metadata(path, wait_for_pending=False)
+        except Exception as e:
+            print(f"Could not probe {path}: {e}")
+            return None
+        finally:
+            with self.lock:
+                self.pending.pop(path, None)
+
+    def get_streams(self, media_file: Union[Path, str]) -> List[Dict[str, Any]]:
+        """
+        Gets the streams of a file, see `get_metadata`.
+
+        Args:
+            media_file (Union[Path, str]): The video or audio file.
+
+        Returns:
+            List[Dict[str, Any]]: The ffprobe description of each stream, in order.
+        """
+        return self.get_metadata(media_file)["streams"]
+
+    def get_audio_streams(self, media_file: Union[Path, str]) -> List[Dict[str, Any]]:
+        """
+        Gets the audio streams of a file, see `get_metadata`.
+
+        Args:
+            media_file (Union[Path, str]): The video or audio file.
+
+        Returns:
+            List[Dict[str, Any]]: The ffprobe description of each audio stream, in order.
+        """
+        return [
+            stream
+            for stream in self.get_streams(media_file)
+            if stream["codec_type"] == "audio"
+        ]
+
+    def get_audio_tracks(self, media_file: Union[Path, str]) -> List[str]:
+        """
+        Gets the language tag of each audio stream of a file, e.g. ["spa", "eng"].
+
+        Args:
+            media_file (Union[Path, str]): The video or audio file.
+
+        Returns:
+            List[str]: The language tags, in stream order. Untagged streams are UNDETERMINED_LANGUAGE.
+        """
+        return [
+            stream.get("tags", {}).get("language", UNDETERMINED_LANGUAGE)
+            for stream in self.get_audio_streams(media_file)
+        ]
+
+    def find_audio_stream_index(
+        self, media_file: Union[Path, str], audio_track: str
+    ) -> int:
+        """
+        Finds the index of an audio track among a file's audio streams.
+
+        Args:
+            media_file (Union[Path, str]): The video or audio file.
+            audio_track (str): The audio track's language tag, e.g. "eng" for English.
+
+        Returns:
+            int: The index of the audio stream, as used in ffmpeg's "0:a:<index>" stream specifier.
+
+        Raises:
+            ValueError: If no audio stream has the language tag.
+        """
+        audio_tracks = self.get_audio_tracks(media_file)
+        if audio_track not in audio_tracks:
+            raise ValueError(f"No audio stream found for audio track {audio_track}")
+        return audio_tracks.index(audio_track)
+
+    def get_duration(self, media_file: Union[Path, str]) -> Optional[float]:
+        """
+        Gets a file's duration.
+
+        Args:
+            media_file (Union[Path, str]): The video or audio file.
+
+        Returns:
+            Optional[float]: The duration in seconds, or None if ffprobe couldn't tell.
+        """
+        duration = self.get_metadata(media_file).get("format", {}).get("duration")
+        return float(duration) if duration is not None else None
+
+
+media_metadata_cache = None
+
+
+def get_media_metadata_cache() -> MediaMetadataCache:
+    """
+    Gets the cache shared by the whole app, opening it the first time.
+
+    Returns:
+        MediaMetadataCache: The shared cache.
+    """
+    global media_metadata_cache
+    if media_metadata_cache is None:
+        media_metadata_cache = MediaMetadataCache()
+    return media_metadata_cache
@@ -0,0 +1,344 @@
+import subprocess
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+# Audio is kept in memory as mono signed 16-bit PCM. 24 kHz is plenty for speech and matches what
+# libmp3lame uses for 48k mono output, while keeping an hour of audio around 170 MB.
+SAMPLE_RATE = 24000
+CHANNELS = 1
+SAMPLE_FORMAT = "s16le"
+SAMPLE_DTYPE = np.int16
+
+PIPE_CHUNK_SIZE = 1 << 16  # Bytes read from or written to an ffmpeg pipe at a time
+
+# Subtitle times are datetimes on this date, see `model.model.parse_subtitle_timing`
+SUBTITLE_ZERO_TIME = datetime(1900, 1, 1)
+
+
+def raw_pcm_format_args() -> List[str]:
+    """
+    Returns the ffmpeg arguments describing the raw PCM format used in memory.
+
+    Returns:
+        List[str]: The format, channel and sample rate arguments.
+    """
+    return ["-f", SAMPLE_FORMAT, "-ac", str(CHANNELS), "-ar", str(SAMPLE_RATE)]
+
+
+def decode_command(
+    input_file: Path,
+    audio_stream_index: Optional[int] = None,
+    audio_filter: Optional[str] = None,
+    start_seconds: Optional[float] = None,
+    duration_seconds: Optional[float] = None,
+) -> List[str]:
+    """
+    Builds an ffmpeg command that decodes an audio stream to raw PCM on stdout.
+
+    Args:
+        input_file (Path): The video or audio file to decode.
+        audio_stream_index (Optional[int], optional): The index of the audio stream among the file's audio streams. Defaults to the first one.
+        audio_filter (Optional[str], optional): An ffmpeg audio filter to apply while decoding. Defaults to None.
+        start_seconds (Optional[float], optional): Where to start decoding, seeking in the input. Defaults to None, for the start.
+        duration_seconds (Optional[float], optional): How much to decode. Defaults to None, for all the rest.
+
+    Returns:
+        List[str]: The ffmpeg command as a list of strings.
+    """
+    command = [
+        "ffmpeg",
+        "-loglevel",
+        "error",  # Only show errors
+    ]
+    # As input options, so ffmpeg seeks rather than decoding everything before the start
+    if start_seconds is not None:
+        command += ["-ss", f"{start_seconds:.3f}"]
+    if duration_seconds is not None:
+        command += ["-t", f"{duration_seconds:.3f}"]
+    command += [
+        "-i",
+        str(input_file),
+        "-map",
+        f"0:a:{audio_stream_index or 0}",
+        "-vn",
+    ]
+    if audio_filter:
+        command += ["-filter:a", audio_filter]
+    return command + raw_pcm_format_args() + ["pipe:1"]
+
+
+def change_speed_command(speed: float) -> List[str]:
+    """
+    Builds an ffmpeg command that changes the speed of raw PCM read from stdin and writes raw PCM to stdout.
+
+    Args:
+        speed (float): The speed multiplier, between 0.5 and 100 (the range of ffmpeg's atempo filter).
+
+    Returns:
+        List[str]: The ffmpeg command as a list of strings.
+    """
+    return (
+        ["ffmpeg", "-loglevel", "error"]
+        + raw_pcm_format_args()
+        + ["-i", "pipe:0", "-filter:a", f"atempo={speed}"]
+        + raw_pcm_format_args()
+        + ["pipe:1"]
+    )
+
+
+def encode_command(
+    output_file: Path, bitrate: str, output_format: str = "mp3"
+) -> List[str]:
+    """
+    Builds an ffmpeg command that encodes raw PCM read from stdin to an audio file.
+
+    Args:
+        output_file (Path): The file to write.
+        bitrate (str): The audio bitrate, e.g. "48k".
+        output_format (str, optional): The ffmpeg output format. Defaults to "mp3".
+
+    Returns:
+        List[str]: The ffmpeg command as a list of strings.
+    """
+    return (
+        ["ffmpeg", "-y", "-loglevel", "error"]
+        + raw_pcm_format_args()
+        + ["-i", "pipe:0", "-b:a", bitrate, "-f", output_format, str(output_file)]
+    )
+
+
+def run_pipe(
+    command: List[str],
+    input_chunks: Optional[Iterable] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> bytearray:
+    """
+    Runs a command, feeding it data on stdin and collecting everything it writes to stdout.
+
+    Stdin is written on a separate thread so a process that reads and writes at the same time
+    (like an ffmpeg filter) cannot deadlock on full pipes.
+
+    Args:
+        command (List[str]): The command as a list of strings.
+        input_chunks (Optional[Iterable], optional): Bytes-like chunks (e.g. numpy arrays) to write to stdin. Defaults to None, for no input.
+        should_stop (Optional[Callable[[], bool]], optional): Polled while running; if it returns True the process is killed
+            and whatever was read so far is returned. Defaults to None.
+
+    Returns:
+        bytearray: Everything the process wrote to stdout.
+
+    Raises:
+        subprocess.CalledProcessError: If the process fails without being stopped.
+    """
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE if input_chunks is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+    )
+
+    stopped = threading.Event()
+
+    def stop_requested() -> bool:
+        if should_stop is not None and should_stop():
+            stopped.set()
+        return stopped.is_set()
+
+    def write_input() -> None:
+        try:
+            for chunk in input_chunks:
+                view = memoryview(chunk).cast("B")
+                for offset in range(0, len(view), PIPE_CHUNK_SIZE):
+                    if stop_requested():
+                        return
+                    process.stdin.write(view[offset : offset + PIPE_CHUNK_SIZE])
+        except (BrokenPipeError, OSError):
+            # The process exited early, its return code tells us why
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    writer = None
+    if input_chunks is not None:
+        writer = threading.Thread(target=write_input, daemon=True)
+        writer.start()
+
+    output = bytearray()
+    try:
+        while True:
+            chunk = process.stdout.read1(PIPE_CHUNK_SIZE)
+            if not chunk or stop_requested():
+                break
+            output += chunk
+    finally:
+        if stopped.is_set():
+            process.kill()
+        process.stdout.close()
+        return_code = process.wait()
+        if writer is not None:
+            writer.join()
+
+    if return_code != 0 and not stopped.is_set():
+        raise subprocess.CalledProcessError(return_code, command)
+    return output
+
+
+def bytes_to_samples(data: Union[bytes, bytearray]) -> np.ndarray:
+    """
+    Converts raw PCM bytes to an array of samples, without copying them.
+
+    Args:
+        data (Union[bytes, bytearray]): Raw PCM in the in-memory format.
+
+    Returns:
+        np.ndarray: The samples. An odd trailing byte is dropped.
+    """
+    sample_count = len(data) // np.dtype(SAMPLE_DTYPE).itemsize
+    return np.frombuffer(data, dtype=SAMPLE_DTYPE, count=sample_count)
+
+
+def decode_audio(
+    input_file: Path,
+    audio_stream_index: Optional[int] = None,
+    audio_filter: Optional[str] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> np.ndarray:
+    """
+    Decodes an audio stream of a file into memory.
+
+    Args:
+        input_file (Path): The video or audio file to decode.
+        audio_stream_index (Optional[int], optional): The index of the audio stream among the file's audio streams. Defaults to the first one.
+        audio_filter (Optional[str], optional): An ffmpeg audio filter to apply while decoding. Defaults to None.
+        should_stop (Optional[Callable[[], bool]], optional): Polled while decoding, see `run_pipe`. Defaults to None.
+
+    Returns:
+        np.ndarray: The decoded samples.
+    """
+    data = run_pipe(
+        decode_command(input_file, audio_stream_index, audio_filter),
+        should_stop=should_stop,
+    )
+    return bytes_to_samples(data)
+
+
+def decode_segment(
+    input_file: Path,
+    start_time: datetime,
+    end_time: datetime,
+    audio_filter: Optional[str] = None,
+) -> np.ndarray:
+    """
+    Decodes just the part of an audio file between two subtitle times, e.g. while the whole file is still being decoded.
+
+    Args:
+        input_file (Path): The audio file to decode.
+        start_time (datetime): The subtitle time to start at.
+        end_time (datetime): The subtitle time to end at.
+        audio_filter (Optional[str], optional): An ffmpeg audio filter to apply while decoding. Defaults to None.
+
+    Returns:
+        np.ndarray: The decoded samples.
+    """
+    start_seconds = max((start_time - SUBTITLE_ZERO_TIME).total_seconds(), 0)
+    end_seconds = max((end_time - SUBTITLE_ZERO_TIME).total_seconds(), start_seconds)
+    data = run_pipe(
+        decode_command(
+            input_file,
+            audio_filter=audio_filter,
+            start_seconds=start_seconds,
+            duration_seconds=end_seconds - start_seconds,
+        )
+    )
+    return bytes_to_samples(data)
+
+
+def time_to_sample(time: datetime) -> int:
+    """
+    Converts a subtitle time to a sample index.
+
+    Args:
+        time (datetime): The subtitle time.
+
+    Returns:
+        int: The index of the sample at that time.
+    """
+    return max(round((time - SUBTITLE_ZERO_TIME).total_seconds() * SAMPLE_RATE), 0)
+
+
+def slice_lines(
+    samples: np.ndarray,
+    timings: List[Tuple[datetime, datetime]],
+    speed: float = 1.0,
+) -> List[np.ndarray]:
+    """
+    Cuts the lines of dialogue out of decoded audio.
+
+    Args:
+        samples (np.ndarray): The decoded audio track.
+        timings (List[Tuple[datetime, datetime]]): The start and end time of each line.
+        speed (float, optional): The speed the track was decoded at, which the timings are scaled by. Defaults to 1.0.
+
+    Returns:
+        List[np.ndarray]: The samples of each line, as views into `samples`.
+    """
+    lines = []
+    for start_time, end_time in timings:
+        start = min(round(time_to_sample(start_time) / speed), len(samples))
+        end = min(max(round(time_to_sample(end_time) / speed), start), len(samples))
+        lines.append(samples[start:end])
+    return lines
+
+
+def join_with_gaps(pieces: List[np.ndarray], gap_seconds: float = 0) -> np.ndarray:
+    """
+    Joins pieces of audio into one buffer, with silence between them.
+
+    Args:
+        pieces (List[np.ndarray]): The samples of each piece.
+        gap_seconds (float, optional): The silence between pieces in seconds. Defaults to 0.
+
+    Returns:
+        np.ndarray: The joined samples.
+    """
+    gap_length = max(round(gap_seconds * SAMPLE_RATE), 0)
+    joined = np.zeros(
+        sum(len(piece) for piece in pieces) + gap_length * max(len(pieces) - 1, 0),
+        dtype=SAMPLE_DTYPE,
+    )
+    position = 0
+    for piece in pieces:
+        joined[position : position + len(piece)] = piece
+        position += len(piece) + gap_length
+    return joined
+
+
+def split_at_proportional_boundaries(
+    samples: np.ndarray, original_lengths: List[int]
+) -> List[np.ndarray]:
+    """
+    Splits audio into pieces whose lengths are proportional to the given original lengths.
+
+    Used after changing the speed of several joined lines at once, to recover each line.
+
+    Args:
+        samples (np.ndarray): The joined audio after processing.
+        original_lengths (List[int]): The length in samples of each piece before processing.
+
+    Returns:
+        List[np.ndarray]: The pieces, as views into `samples`.
+    """
+    total_length = sum(original_lengths)
+    if total_length == 0:
+        return [samples[:0] for _ in original_lengths]
+
+    boundaries = np.rint(
+        np.cumsum([0] + list(original_lengths)) * (len(samples) / total_length)
+    ).astype(int)
+    return [samples[start:end] for start, end in zip(boundaries[:-1], boundaries[1:])]
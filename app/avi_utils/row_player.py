@@ -0,0 +1,212 @@
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice
+from PyQt5.QtMultimedia import QAudio, QAudioFormat, QAudioOutput
+
+from avi_utils import pcm_audio
+
+# A line to play: its language (i.e. audio track), start and end time
+RowLine = Tuple[str, datetime, datetime]
+
+
+class RowPlayer:
+    """
+    Plays lines from several audio tracks back to back as one gapless stream, e.g. a whole aligned row of subtitles
+    in every language.
+
+    Each track is decoded into memory once, in the background, so playing a row only slices and joins samples and
+    hands them to a QAudioOutput, without running ffmpeg or writing files. A track played at another speed is decoded
+    again at that speed in the background; until it's ready, the row's lines are sped up with a single ffmpeg pipe.
+    Lines of a track that is still being decoded (or couldn't be) are cut out of its audio file with ffmpeg instead.
+
+    Only the normal speed and the latest other speed of each language are kept, as an hour of audio takes around
+    170 MB at normal speed (and twice that at half speed).
+
+    Attributes:
+        audio_tracks (Dict[str, Path]): The audio file of each language, e.g. from `AudioExtractor.audio_tracks`.
+        tracks (Dict[Tuple[str, float], np.ndarray]): The decoded samples of each language at normal speed and its
+                                                      latest other speed.
+        decoders (Dict[Tuple[str, float], threading.Thread]): The threads decoding each track.
+        lock (threading.Lock): Guards `tracks` and `decoders`.
+        audio_output (QAudioOutput): Plays the raw PCM.
+        buffer (QBuffer): The row being played.
+    """
+
+    def __init__(self) -> None:
+        self.audio_tracks = {}
+        self.tracks = {}
+        self.decoders = {}
+        self.lock = threading.Lock()
+
+        audio_format = QAudioFormat()
+        audio_format.setSampleRate(pcm_audio.SAMPLE_RATE)
+        audio_format.setChannelCount(pcm_audio.CHANNELS)
+        audio_format.setSampleSize(16)
+        audio_format.setSampleType(QAudioFormat.SignedInt)
+        audio_format.setByteOrder(QAudioFormat.LittleEndian)
+        audio_format.setCodec("audio/pcm")
+        self.audio_output = QAudioOutput(audio_format)
+        self.buffer = QBuffer()
+
+    def load_tracks(self, audio_tracks: Dict[str, Path]) -> None:
+        """
+        Starts decoding audio tracks in the background, so rows play straight away later.
+
+        Args:
+            audio_tracks (Dict[str, Path]): The audio file of each language.
+        """
+        self.audio_tracks.update(audio_tracks)
+        for language in audio_tracks:
+            self.start_decoding(language, 1.0)
+
+    def start_decoding(self, language: str, speed: float) -> threading.Thread:
+        """
+        Starts decoding a track at a speed on a background thread, unless it's already decoded or being decoded.
+
+        The language's track at any other speed (apart from normal speed) is dropped, and stops being decoded.
+
+        Args:
+            language (str): The track's language.
+            speed (float): The speed, between 0.5 and 100.
+
+        Returns:
+            threading.Thread: The thread decoding the track.
+        """
+        key = (language, speed)
+        with self.lock:
+            decoder = self.decoders.get(key)
+            if decoder is not None:
+                return decoder
+
+            for other_key in list(self.decoders):
+                if other_key[0] == language and other_key[1] not in [1.0, speed]:
+                    del self.decoders[other_key]
+                    self.tracks.pop(other_key, None)
+
+            def is_dropped() -> bool:
+                with self.lock:
+                    return self.decoders.get(key) is not decoder
+
+            def decode() -> None:
+                try:
+                    samples = pcm_audio.decode_audio(
+                        self.audio_tracks[language],
+                        audio_filter=f"atempo={speed}" if speed != 1.0 else None,
+                        should_stop=is_dropped,
+                    )
+                except Exception as e:
+                    # Left missing, so the track's lines are still cut out of its audio file one at a time
+                    print(f"Could not decode {language} audio track: {e}")
+                    return
+                with self.lock:
+                    if self.decoders.get(key) is decoder:
+                        self.tracks[key] = samples
+
+            decoder = self.decoders[key] = threading.Thread(target=decode, daemon=True)
+            decoder.start()
+            return decoder
+
+    def get_track(self, language: str, speed: float) -> Optional[np.ndarray]:
+        """
+        Gets a decoded track.
+
+        Args:
+            language (str): The track's language.
+            speed (float): The speed it was decoded at.
+
+        Returns:
+            Optional[np.ndarray]: The track's samples, or None if it hasn't been decoded (yet, or at all).
+        """
+        with self.lock:
+            return self.tracks.get((language, speed))
+
+    def build_row(
+        self,
+        lines: List[RowLine],
+        speeds: Optional[Dict[str, float]] = None,
+        gap_seconds: float = 0,
+    ) -> np.ndarray:
+        """
+        Cuts lines out of the decoded tracks at their languages' speeds, and joins them into one buffer.
+
+        Args:
+            lines (List[RowLine]): The lines, in the order to play them.
+            speeds (Optional[Dict[str, float]], optional): The speed of each language. Defaults to None, for normal speed.
+            gap_seconds (float, optional): The silence between lines. Defaults to 0.
+
+        Returns:
+            np.ndarray: The row's samples.
+        """
+        speeds = speeds or {}
+        pieces = []
+        for language, start_time, end_time in lines:
+            if language not in self.audio_tracks:
+                continue
+            speed = round(speeds.get(language, 1.0), 2)
+
+            samples = self.get_track(language, speed)
+            if samples is not None:
+                pieces += pcm_audio.slice_lines(
+                    samples, [(start_time, end_time)], speed
+                )
+                continue
+
+            if speed != 1.0:
+                self.start_decoding(language, speed)  # Ready for next time
+            samples = self.get_track(language, 1.0)
+            if samples is None:
+                # The track is still being decoded (e.g. a row played straight after loading) or failed to, so rather
+                # than waiting for all of it, only this line is decoded
+                pieces.append(
+                    pcm_audio.decode_segment(
+                        self.audio_tracks[language],
+                        start_time,
+                        end_time,
+                        audio_filter=f"atempo={speed}" if speed != 1.0 else None,
+                    )
+                )
+                continue
+            line = pcm_audio.slice_lines(samples, [(start_time, end_time)])[0]
+            if speed != 1.0 and len(line) > 0:
+                line = pcm_audio.bytes_to_samples(
+                    pcm_audio.run_pipe(
+                        pcm_audio.change_speed_command(speed), input_chunks=[line]
+                    )
+                )
+            pieces.append(line)
+
+        return pcm_audio.join_with_gaps(pieces, gap_seconds)
+
+    def play_row(
+        self,
+        lines: List[RowLine],
+        speeds: Optional[Dict[str, float]] = None,
+        gap_seconds: float = 0,
+    ) -> None:
+        """
+        Plays lines back to back, stopping whatever was playing. See `build_row`.
+
+        Args:
+            lines (List[RowLine]): The lines, in the order to play them.
+            speeds (Optional[Dict[str, float]], optional): The speed of each language. Defaults to None, for normal speed.
+            gap_seconds (float, optional): The silence between lines. Defaults to 0.
+        """
+        samples = self.build_row(lines, speeds, gap_seconds)
+        self.stop()
+        if len(samples) == 0:
+            return
+
+        self.buffer.setData(QByteArray(samples.tobytes()))
+        self.buffer.open(QIODevice.ReadOnly)
+        self.audio_output.start(self.buffer)
+
+    def stop(self) -> None:
+        """Stops playback."""
+        if self.audio_output.state() != QAudio.StoppedState:
+            self.audio_output.stop()
+        if self.buffer.isOpen():
+            self.buffer.close()
@@ -0,0 +1,49 @@
+import re
+import subprocess
+from pathlib import Path
+from typing import List
+
+DEFAULT_SCENE_THRESHOLD = 0.4  # How different (0 to 1) a frame must be from the previous one to count as a scene cut
+
+PTS_TIME_PATTERN = re.compile(r"pts_time:\s*([0-9.]+)")
+
+
+def detect_scene_cuts(
+    video_file: Path, threshold: float = DEFAULT_SCENE_THRESHOLD
+) -> List[float]:
+    """
+    Finds the scene cuts of a video with ffmpeg's scene change detection.
+
+    Args:
+        video_file (Path): The video to analyse.
+        threshold (float, optional): The minimum scene change score for a frame to count as a cut. Defaults to DEFAULT_SCENE_THRESHOLD.
+
+    Returns:
+        List[float]: The times of the scene cuts in seconds, in order.
+    """
+    command = [
+        "ffmpeg",
+        "-hide_banner",
+        "-i",
+        str(video_file),
+        "-an",
+        "-filter:v",
+        f"select='gt(scene,{threshold})',showinfo",
+        "-f",
+        "null",
+        "-",
+    ]
+
+    # showinfo logs one line per selected frame on stderr
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Error detecting scene cuts: {result.stderr.strip()}")
+        return []
+
+    return [
+        float(match.group(1))
+        for line in result.stderr.splitlines()
+        if "Parsed_showinfo" in line
+        for match in [PTS_TIME_PATTERN.search(line)]
+        if match
+    ]
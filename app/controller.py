@@ -1,12 +1,12 @@
 ## Standard library imports
 import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime
 
 
 ## Third-party imports
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread
 from PyQt5.QtWidgets import QApplication, QDialog, QShortcut
 from PyQt5.QtGui import QKeySequence
 
@@ -16,11 +16,14 @@ import pyperclip  # For clipboard operations
 
 ## Local imports
 from media_exporter.media_exporter import MediaExporter
+from media_exporter.export_worker import ExportWorker
 
 from model.model import AVIModel
 
 # Translator/Dictionaries
 from deep_l.translator import load_translator
+from deep_l.translation_service import TranslationService
+from deep_l.pretranslation_worker import PretranslationWorker
 from lexilogos.dictionaries import load_all_target_to_english_dictionaries
 
 # UI imports
@@ -29,15 +32,25 @@ from ui.media_exporter_window import MediaExporterWindow
 from ui.view import MainWindow
 from ui.flashcard_workspace import ScreenshotViewer, AudioViewer
 from ui.sentence_bin import SentenceBin
-from ui.study_materials import SegmentHeader, SavedSentenceEntry
+from ui.study_materials import SavedSentenceEntry
+from ui.subtitle_table import iterate_workspace_rows
 
 # Flashcard creation functionality
 from flashcards.flashcard_templates import read_flashcard_templates
 from flashcards.flashcard_creator import FlashcardCreator
+from flashcards.deck_packager import DeckPackager
+from flashcards.flashcard_store import (
+    DuplicateFlashcardError,
+    FlashcardStore,
+    hash_files,
+    media_file_name,
+)
 
 from avi_utils.screenshot_extractor import ScreenshotExtractor
 from avi_utils.audio_player import AudioPlayer
+from avi_utils.row_player import RowPlayer
 from avi_utils.audio_extractor import AudioExtractor
+from avi_utils.media_encoder import MediaEncodingQueue
 
 # Shortcuts for trying different startup options
 from startup_options import (
@@ -47,6 +60,8 @@ from startup_options import (
     gg_startup_options,
 )
 
+MAXIMUM_SEARCH_HITS = 1000  # Searching as you type stops after this many subtitles
+
 # Two below to make scaling bigger on small high-res screens
 if hasattr(Qt, "AA_EnableHighDpiScaling"):
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
@@ -114,23 +129,31 @@ class Controller:
 
             # Load the media exporter UI
             self.app = QApplication([])
-            media_exporter_window = MediaExporterWindow()
+            self.media_exporter_window = MediaExporterWindow()
 
             # Create an instance of the backend media exporter
-            media_exporter = MediaExporter(
+            self.media_exporter = MediaExporter(
                 temporary_audio_folder=self.temporary_audio_folder,
                 avi_practice_audio_folder=self.avi_practice_audio_folder,
             )
-
-            # Connect the UI signal to the backend export function
-            media_exporter_window.export_signal.connect(media_exporter.export_media)
+            self.export_thread = None
+            self.export_worker = None
+
+            # Connect the UI signals to the backend, with exports running on a worker thread
+            self.media_exporter_window.export_signal.connect(self.start_export)
+            # Cancelling is called directly, as the worker thread is busy exporting
+            self.media_exporter_window.cancel_export_signal.connect(
+                self.media_exporter.request_cancel
+            )
 
             try:
                 # Run the application window
-                media_exporter_window.show()
+                self.media_exporter_window.show()
                 self.app.exec_()
 
             finally:
+                # Make sure a running export has stopped before cleaning up
+                self.stop_export()
                 # Clean temporary files after the operation
                 self.clean_temporary_files()
 
@@ -138,6 +161,8 @@ class Controller:
 
         # Otherwise, set up for study in Text/AVI Mode :)
         self.translator = load_translator()
+        # Translations run in the background so the UI never waits on the network
+        self.translation_service = TranslationService(self.translator)
 
         # TODO: Probably refactor this.
         ## Get ready to make flashcards
@@ -155,6 +180,9 @@ class Controller:
         # Setup AVI Mode
         if self.mode == "AVI":
             self.temporary_audio_folder = "../temp/audio"
+            self.translated_subtitles_folder = "../media/translated_subtitles"
+            self.pretranslation_thread = None
+            self.pretranslation_worker = None
             self.flashcard_audio_folder = "../media/flashcards/flashcard_audio"
             self.flashcard_image_folder = "../media/flashcards/flashcard_images"
 
@@ -164,6 +192,16 @@ class Controller:
 
             # To play and export subtitle audio
             self.audio_player = AudioPlayer()
+            # To play whole rows of aligned subtitles from audio decoded into memory in the background
+            self.row_player = RowPlayer()
+            self.row_player.load_tracks(self.audio_extractor.audio_tracks)
+
+            # Flashcard media is recompressed and saved in the background, resuming anything left from last time
+            self.media_queue = MediaEncodingQueue()
+            self.media_queue.start()
+
+        # All flashcards are also kept in an indexed database, to find duplicates and edit previous cards
+        self.set_up_flashcard_store()
 
         try:
             # Set up the model and the view
@@ -175,11 +213,74 @@ class Controller:
             self.app.exec_()
         finally:
             # Clean up our work
+            if self.mode == "AVI":
+                self.stop_pretranslation()
+            self.translation_service.close()
             self.delete_empty_decks()
             if self.mode == "AVI":
+                # Waits for the flashcard media to be saved, before packaging it
+                self.media_queue.close()
+            self.package_decks()
+            self.flashcard_store.close()
+            if self.mode == "AVI":
+                self.row_player.stop()
                 self.clean_temporary_files()
             pass
 
+    def start_export(self, export_options: dict) -> None:
+        """
+        Starts exporting practice audio on a worker thread, so the Media Exporter window doesn't freeze.
+
+        Args:
+            export_options (dict): The export options chosen in the Media Exporter window.
+        """
+        if self.export_thread is not None:
+            print("An export is already running.")
+            return
+
+        self.export_thread = QThread()
+        self.export_worker = ExportWorker(self.media_exporter, export_options)
+        self.export_worker.moveToThread(self.export_thread)
+
+        self.export_thread.started.connect(self.export_worker.run)
+        self.export_worker.progress_signal.connect(
+            self.media_exporter_window.update_export_progress
+        )
+        self.export_worker.finished_signal.connect(
+            self.media_exporter_window.export_finished
+        )
+        self.export_worker.failed_signal.connect(
+            self.media_exporter_window.export_failed
+        )
+        self.export_worker.cancelled_signal.connect(
+            self.media_exporter_window.export_cancelled
+        )
+        self.export_worker.done_signal.connect(self.export_thread.quit)
+        self.export_thread.finished.connect(self.export_finished)
+
+        self.media_exporter_window.export_started()
+        self.export_thread.start()
+
+    def export_finished(self) -> None:
+        """
+        Tidies up the worker thread once an export has ended.
+        """
+        self.media_exporter_window.export_done()
+        self.export_worker.deleteLater()
+        self.export_thread.deleteLater()
+        self.export_worker = None
+        self.export_thread = None
+
+    def stop_export(self) -> None:
+        """
+        Cancels the running export, if any, and waits for its thread to finish.
+        """
+        if self.export_thread is None:
+            return
+        self.media_exporter.request_cancel()
+        self.export_thread.quit()
+        self.export_thread.wait()
+
     def run_startup_dialog(self) -> dict:
         """
         Runs the startup dialog to allow the user to select their startup options.
@@ -261,6 +362,32 @@ class Controller:
 
         return flashcard_creators
 
+    def set_up_flashcard_store(self) -> None:
+        """
+        Opens the flashcard store, which keeps every flashcard made for finding duplicates and editing.
+
+        Only flashcards made in this session can be edited, as earlier ones have already been exported to Anki.
+        """
+        media_folders = {}
+        if self.mode == "AVI":
+            media_folders = {
+                "Picture": Path(self.flashcard_image_folder),
+                "Audio": Path(self.flashcard_audio_folder),
+            }
+        self.flashcard_store = FlashcardStore(media_folders=media_folders)
+
+        # Decks with new flashcards are packaged for Anki, media included, when the app closes
+        flashcard_field_names = [
+            field_name for field_name in self.flashcard_fields if field_name != "Tags"
+        ]
+        self.deck_packager = DeckPackager(self.flashcard_store, flashcard_field_names)
+
+        self.session_start_time = time.time()
+        self.session_flashcard_ids = {deck: [] for deck in self.decks}
+        self.editing_flashcard_id = None
+        # The media the flashcard being edited had: each media field's widget contents when loaded, and field data
+        self.editing_media = {}
+
     def set_up_screenshot_extractor(self) -> None:
         """
         Sets up the screenshot extractor for extracting screenshots from the video file.
@@ -381,13 +508,31 @@ class Controller:
         if question_language == answer_language or question_text == "":
             return
 
-        answer_text = self.translator.translate_text(
+        def show_translation(translations: List[str]) -> None:
+            self.ui.flashcard_workspace.fields["Answer Text"].setText(translations[0])
+
+        self.translation_service.translate(
+            channel="question_text",
             texts=[question_text],
             source_lang=question_language,
             target_lang=answer_language,
-        )[0]
+            callback=show_translation,
+            error_callback=lambda error: self.show_translation_error(
+                [self.ui.flashcard_workspace.fields["Answer Text"]], error
+            ),
+        )
 
-        self.ui.flashcard_workspace.fields["Answer Text"].setText(answer_text)
+    def show_translation_error(self, text_edits: list, error: Exception) -> None:
+        """
+        Shows that a translation failed in the fields that were waiting for it, rather than leaving them quietly empty.
+
+        Args:
+            text_edits (list): The text edits (QTextEdit or QPlainTextEdit) the translation was meant for.
+            error (Exception): The error the translation failed with.
+        """
+        for text_edit in text_edits:
+            text_edit.clear()
+            text_edit.setPlaceholderText(f"Translation failed: {error}")
 
     def play_flashcard_audio(self, audio_path: str) -> None:
         """
@@ -401,6 +546,11 @@ class Controller:
         """
         self.audio_player.stop()
 
+        # A flashcard's audio is in the staging folder until it has been encoded
+        media_file = self.media_queue.media_file(Path(audio_path))
+        if media_file is not None:
+            audio_path = str(media_file)
+
         if audio_path != self.audio_player.get_audio_path():
             self.audio_player.reset_player()
             self.audio_player.update_audio(audio_path)
@@ -440,10 +590,21 @@ class Controller:
         timestamp = time.strftime("%Y%m%d_%H%M%S")  # For uniquely naming files
 
         flashcard = {}
+        media_jobs = []
+        kept_media_files = []
         for field_name, field_info in self.flashcard_fields.items():
             if field_info["type"] == "Media":
-                if self.mode == "AVI":
-                    media_path = self.save_card_media(field_name, timestamp)
+                if self.mode == "AVI" and self.media_unchanged(field_name):
+                    # An edit keeps the media it didn't change, rather than encoding it again
+                    field_data = self.editing_media[field_name][1]
+                    kept_media_files.append(
+                        self.media_queue.media_file(
+                            self.flashcard_store.media_folders[field_name]
+                            / media_file_name(field_data)
+                        )
+                    )
+                elif self.mode == "AVI":
+                    media_path = self.save_card_media(field_name, timestamp, media_jobs)
                     field_data = media_path
                     if field_name == "Audio":
                         # Ensuring the audio file reference is correctly formatted to work in Anki
@@ -462,22 +623,56 @@ class Controller:
         # Ensuring all our required fields have some data
         for required_field in self.required_fields:
             if flashcard[required_field] == "":
-                # TODO: If required fields blank, still might have saved card media that needs to be deleted.
                 print(
                     f"{required_field} is a required field but is blank! Rejecting card..."
                 )
+                self.finish_card_media(media_jobs, False)
                 return
 
         # Retrieving the chosen deck
         deck = self.ui.flashcard_workspace.deck_dropdown.currentText()
 
+        # The media hasn't been encoded yet, so duplicates are found by the staged files
+        media_hash = hash_files(
+            [staged_file for _, staged_file, _ in media_jobs]
+            + [file for file in kept_media_files if file is not None]
+        )
+
+        if self.editing_flashcard_id is not None:
+            replaced_media = [
+                self.flashcard_store.media_folders[field_name]
+                / media_file_name(field_data)
+                for field_name, (_, field_data) in self.editing_media.items()
+                if field_data and not self.media_unchanged(field_name)
+            ]
+            saved = self.save_edited_flashcard(deck, flashcard, media_hash)
+            self.finish_card_media(media_jobs, saved)
+            if saved:
+                for media_file in replaced_media:
+                    self.media_queue.discard(media_file)
+            return
+
+        # Recording the card, unless it's already in the deck
+        try:
+            flashcard_id = self.flashcard_store.add_flashcard(
+                deck, flashcard, media_hash=media_hash
+            )
+        except DuplicateFlashcardError as e:
+            print(f"{e} Rejecting card...")
+            self.finish_card_media(media_jobs, False)
+            return
+        self.finish_card_media(media_jobs, True)
+        self.session_flashcard_ids[deck].append(flashcard_id)
+
         # Adding our card to the appropriate deck
         self.flashcard_creators[deck].add_flashcard(flashcard)
 
         # Resetting the Flashcard Workspace
         self.ui.flashcard_workspace.reset_flashcard_fields()
 
-    def save_card_media(self, field_name: str, timestamp: str) -> str:
+    def save_card_media(
+        self, field_name: str, timestamp: str, media_jobs: List[Tuple[str, Path, Path]]
+    ) -> str:
         """
         Saves the media associated with the given field and returns the filename.
 
@@ -487,6 +682,8 @@ class Controller:
         Args:
             field_name (str): The name of the field containing the media.
             timestamp (str): A unique timestamp to ensure filenames are unique.
+            media_jobs (List[Tuple[str, Path, Path]]): The kind, staged file and destination of each piece of media
+                                                       to encode once the card is saved, added to here.
 
         Returns:
             str: The filename of the saved media.
@@ -498,30 +695,161 @@ class Controller:
             isinstance(media_widget, ScreenshotViewer)
             and media_widget.has_screenshots()
         ):
-            file_extension = ".jpg"
+            file_extension = self.media_queue.image_extension
             # Note: "_languages_" is used to be able to find created media easily in Anki's media folder
             filename = "_languages_" + timestamp + file_extension
             path = Path(self.flashcard_image_folder) / filename
-            media_widget.save_screenshot(path)
+            # The screenshot is encoded in the background once the card is saved, so adding it returns immediately
+            staged_file = self.media_queue.stage_image(
+                media_widget.save_screenshot, path
+            )
+            media_jobs.append(("image", staged_file, path))
 
         elif isinstance(media_widget, AudioViewer) and media_widget.has_audio():
             audio_path = self.ui.flashcard_workspace.fields["Audio"].get_audio_path()
 
-            if self.audio_player.get_audio_path != audio_path:
-                # In case we have played other media, e.g. from parallel text, in the meantime
-                self.audio_player.update_audio(audio_path)
-
-            file_extension = ".mp3"
+            file_extension = self.media_queue.audio_extension
             # "_languages_" is code to be able to find language card pictures easily in Anki media folder
             filename = "_languages_" + timestamp + file_extension
             path = Path(self.flashcard_audio_folder) / filename
-            self.audio_player.save_audio(path)
+            staged_file = self.media_queue.stage_audio(Path(audio_path), path)
+            media_jobs.append(("audio", staged_file, path))
 
         return filename
 
+    def finish_card_media(
+        self, media_jobs: List[Tuple[str, Path, Path]], card_saved: bool
+    ) -> None:
+        """
+        Queues a flashcard's staged media to be encoded if the card was saved, or deletes it if the card was rejected.
+
+        Args:
+            media_jobs (List[Tuple[str, Path, Path]]): The card's media, see `save_card_media`.
+            card_saved (bool): Whether the card was saved.
+        """
+        for kind, staged_file, destination in media_jobs:
+            if card_saved:
+                self.media_queue.enqueue(kind, staged_file, destination)
+            else:
+                staged_file.unlink(missing_ok=True)
+
     def edit_previous_flashcards(self) -> None:
-        # TODO: Implement ability to edit previously made flashcards
-        pass
+        """
+        Loads the previous flashcard made this session into the Flashcard Workspace to be edited.
+
+        Pressing "Edit Previous" again goes back another flashcard. Pressing the Add button then saves the changes in place.
+        """
+        flashcard_id = self.flashcard_store.previous_flashcard_id(
+            before_id=self.editing_flashcard_id, since=self.session_start_time
+        )
+        if flashcard_id is None:
+            print("No earlier flashcards made this session to edit.")
+            return
+
+        deck, flashcard = self.flashcard_store.get_flashcard(flashcard_id)
+
+        media_paths = {}
+        if self.mode == "AVI":
+            for field_name, folder in self.flashcard_store.media_folders.items():
+                file_name = media_file_name(flashcard.get(field_name, ""))
+                if not file_name:
+                    media_paths[field_name] = ""
+                elif field_name == "Audio":
+                    # Found in the staging folder when played, if it hasn't been encoded yet
+                    media_paths[field_name] = str(folder / file_name)
+                else:
+                    media_file = self.media_queue.media_file(folder / file_name)
+                    media_paths[field_name] = str(media_file) if media_file else ""
+
+        self.editing_flashcard_id = flashcard_id
+        self.ui.flashcard_workspace.load_flashcard(flashcard, media_paths)
+        self.ui.flashcard_workspace.deck_dropdown.setCurrentText(deck)
+        self.ui.flashcard_workspace.set_editing(True)
+
+        self.editing_media = {
+            field_name: (
+                self.media_widget_contents(field_name),
+                flashcard.get(field_name, ""),
+            )
+            for field_name in media_paths
+        }
+
+    def media_widget_contents(self, field_name: str) -> Union[List, str]:
+        """
+        Gets what a media field's widget holds, to tell whether an edit changed it.
+
+        Args:
+            field_name (str): The media field's name.
+
+        Returns:
+            Union[List, str]: The screenshots of a ScreenshotViewer, or the audio path of an AudioViewer.
+        """
+        media_widget = self.ui.flashcard_workspace.fields[field_name]
+        if isinstance(media_widget, ScreenshotViewer):
+            return list(media_widget.screenshots)
+        return media_widget.get_audio_path()
+
+    def media_unchanged(self, field_name: str) -> bool:
+        """
+        Checks whether the flashcard being edited still has the media it was loaded with in a field.
+
+        Args:
+            field_name (str): The media field's name.
+
+        Returns:
+            bool: True if a flashcard is being edited and the field's media is the same, non-empty media.
+        """
+        if self.editing_flashcard_id is None or field_name not in self.editing_media:
+            return False
+        contents, field_data = self.editing_media[field_name]
+        return bool(field_data) and self.media_widget_contents(field_name) == contents
+
+    def save_edited_flashcard(
+        self, deck: str, flashcard: Dict[str, str], media_hash: Optional[str]
+    ) -> bool:
+        """
+        Saves changes to the flashcard being edited, updating the decks' CSV files.
+
+        Args:
+            deck (str): The deck the flashcard should be in (it may have been moved).
+            flashcard (Dict[str, str]): The flashcard's new fields.
+            media_hash (Optional[str]): The hash of the flashcard's staged media, see `FlashcardStore.add_flashcard`.
+
+        Returns:
+            bool: Whether the changes were saved.
+        """
+        flashcard_id = self.editing_flashcard_id
+        previous_deck, _ = self.flashcard_store.get_flashcard(flashcard_id)
+
+        try:
+            self.flashcard_store.update_flashcard(
+                flashcard_id, flashcard, deck=deck, media_hash=media_hash
+            )
+        except DuplicateFlashcardError as e:
+            print(f"{e} Not saving the edit...")
+            return False
+
+        if deck != previous_deck:
+            self.session_flashcard_ids[previous_deck].remove(flashcard_id)
+            self.session_flashcard_ids[deck] = sorted(
+                self.session_flashcard_ids[deck] + [flashcard_id]
+            )
+
+        # The CSV files only hold this session's flashcards, so they are quick to rewrite
+        for changed_deck in {previous_deck, deck}:
+            self.flashcard_creators[changed_deck].rewrite_flashcards(
+                card
+                for _, card in self.flashcard_store.iterate_flashcards(
+                    changed_deck,
+                    flashcard_ids=self.session_flashcard_ids[changed_deck],
+                )
+            )
+
+        self.editing_flashcard_id = None
+        self.editing_media = {}
+        self.ui.flashcard_workspace.set_editing(False)
+        self.ui.flashcard_workspace.reset_flashcard_fields()
+        return True
 
     def set_up_translation_workspace(self) -> None:
         """
@@ -550,10 +878,10 @@ class Controller:
         Translates text from the source language to the target language using the translator.
 
         Retrieves the source language text from the translation workspace, performs the translation,
-        and sets the translated text in the target language field. If the source and target languages
-        are the same or if the source text is empty, no action is taken.
+        and sets the translated text in the target language field once the translation arrives. If the source
+        and target languages are the same or if the source text is empty, no action is taken.
 
-        Exceptions during translation are handled, setting the translation to an empty string in case of failure.
+        If the translation fails, the target language field is cleared and shows the error instead.
         """
         source_language_text = self.ui.translation_workspace.get_source_language_text()
         if source_language_text == "":
@@ -565,17 +893,20 @@ class Controller:
         if source_language == target_language:
             return  # Don't do anything if translating between same language
 
-        try:
-            # In translation the source language is translated to the target language
-            translation = self.translator.translate_text(
-                texts=[source_language_text],
-                source_lang=source_language,
-                target_lang=target_language,
-            )[0]
-        except:
-            translation = ""
-
-        self.ui.translation_workspace.set_target_language_text(translation)
+        def show_translation(translations: List[str]) -> None:
+            self.ui.translation_workspace.set_target_language_text(translations[0])
+
+        # In translation the source language is translated to the target language
+        self.translation_service.translate(
+            channel="translation_workspace",
+            texts=[source_language_text],
+            source_lang=source_language,
+            target_lang=target_language,
+            callback=show_translation,
+            error_callback=lambda error: self.show_translation_error(
+                [self.ui.translation_workspace.target_language_textedit], error
+            ),
+        )
 
     def make_flashcard_from_workspace(self) -> None:
         """
@@ -689,7 +1020,8 @@ class Controller:
 
             self.set_up_subtitle_workspace()
 
-            # TODO: Implement choosing segment parameters while setting up the application, and changing it while the application is running.
+            # TODO: Implement choosing segment parameters while setting up the application.
+            # Segments can be changed while the application is running with the Subtitle Workspace's slider
             # self.model.create_segments(maximum_seconds_between_segments=3)
 
             # Building the alignment in the Model
@@ -720,6 +1052,135 @@ class Controller:
         self.ui.study_materials.subtitle_workspace.listen_requested_signal.connect(
             self.play_subtitle_audio
         )
+        self.ui.study_materials.subtitle_workspace.row_listen_requested_signal.connect(
+            self.play_row_audio
+        )
+        self.ui.study_materials.subtitle_workspace.set_row_playback_languages(
+            self.ui.study_materials.subtitle_workspace.languages_with_audio_tracks
+        )
+        self.ui.study_materials.subtitle_workspace.segment_listen_requested_signal.connect(
+            self.play_segment_audio
+        )
+
+        # Subtitles in the target languages can be translated into the source language ahead of time
+        self.ui.study_materials.subtitle_workspace.set_pretranslation_languages(
+            [
+                language
+                for language in self.target_languages
+                if self.subtitle_files.get(language)
+            ]
+        )
+        self.ui.study_materials.subtitle_workspace.pretranslation_requested_signal.connect(
+            self.start_pretranslation
+        )
+        self.ui.study_materials.subtitle_workspace.segment_gap_changed_signal.connect(
+            self.resegment_subtitles
+        )
+        self.ui.study_materials.subtitle_workspace.search_requested_signal.connect(
+            self.search_subtitles
+        )
+
+    def start_pretranslation(self, language: str) -> None:
+        """
+        Starts translating every subtitle of a language into the source language on a worker thread.
+
+        When done, the translated subtitles are added to the Subtitle Workspace as an extra language column.
+
+        Args:
+            language (str): The language whose subtitles to translate.
+        """
+        if self.pretranslation_thread is not None:
+            print("Subtitles are already being pre-translated.")
+            return
+
+        translated_language = f"{self.source_language} (DeepL, from {language})"
+        if translated_language in self.model.languages:
+            print(f"{language} subtitles have already been pre-translated.")
+            return
+
+        subtitle_file = Path(self.subtitle_files[language])
+        output_file = (
+            Path(self.translated_subtitles_folder)
+            / f"{subtitle_file.stem} ({translated_language}).srt"
+        )
+
+        self.pretranslation_thread = QThread()
+        self.pretranslation_worker = PretranslationWorker(
+            self.translator,
+            self.model.subtitle_models[language].subtitles,
+            source_lang=language,
+            target_lang=self.source_language,
+            output_file=output_file,
+        )
+        self.pretranslation_worker.moveToThread(self.pretranslation_thread)
+
+        subtitle_workspace = self.ui.study_materials.subtitle_workspace
+        self.pretranslation_thread.started.connect(self.pretranslation_worker.run)
+        self.pretranslation_worker.progress_signal.connect(
+            lambda done, total: subtitle_workspace.set_pretranslation_status(
+                f"Translating {language} subtitles: {done}/{total} lines", True
+            )
+        )
+        self.pretranslation_worker.finished_signal.connect(
+            lambda language, output_file: self.add_pretranslated_subtitles(
+                language, translated_language, output_file
+            )
+        )
+        self.pretranslation_worker.failed_signal.connect(
+            lambda error: subtitle_workspace.set_pretranslation_status(
+                f"Pre-translation failed: {error}", False
+            )
+        )
+        self.pretranslation_worker.done_signal.connect(self.pretranslation_thread.quit)
+        self.pretranslation_thread.finished.connect(self.pretranslation_finished)
+
+        subtitle_workspace.set_pretranslation_status(
+            f"Translating {language} subtitles...", True
+        )
+        self.pretranslation_thread.start()
+
+    def add_pretranslated_subtitles(
+        self, language: str, translated_language: str, subtitle_file: str
+    ) -> None:
+        """
+        Adds pre-translated subtitles to the model and shows them as an extra column in the Subtitle Workspace.
+
+        Args:
+            language (str): The language that was translated.
+            translated_language (str): The name of the new language column.
+            subtitle_file (str): The translated SRT file.
+        """
+        self.model.add_language(
+            translated_language, Path(subtitle_file), aligned_like=language
+        )
+        self.subtitle_files[translated_language] = Path(subtitle_file)
+
+        subtitle_workspace = self.ui.study_materials.subtitle_workspace
+        subtitle_workspace.languages_with_subtitles.append(translated_language)
+        self.set_subtitle_alignment(self.model.get_alignment())
+        subtitle_workspace.set_pretranslation_status(
+            f"Added {translated_language} subtitles, saved to {subtitle_file}", False
+        )
+
+    def pretranslation_finished(self) -> None:
+        """
+        Tidies up the worker thread once pre-translating has ended.
+        """
+        self.ui.study_materials.subtitle_workspace.pretranslate_button.setEnabled(True)
+        self.pretranslation_worker.deleteLater()
+        self.pretranslation_thread.deleteLater()
+        self.pretranslation_worker = None
+        self.pretranslation_thread = None
+
+    def stop_pretranslation(self) -> None:
+        """
+        Cancels pre-translating, if running, and waits for its thread to finish.
+        """
+        if self.pretranslation_thread is None:
+            return
+        self.pretranslation_worker.cancel()
+        self.pretranslation_thread.quit()
+        self.pretranslation_thread.wait()
 
     def make_flashcard_from_subtitle(self, language: str, index: int) -> None:
         """
@@ -751,7 +1212,8 @@ class Controller:
         self.ui.flashcard_workspace.fields["Question Language"].setCurrentText(language)
         self.ui.flashcard_workspace.fields["Picture"].update_screenshots(screenshots)
 
-        if self.audio_tracks[language] != "None":
+        # Pre-translated subtitles have no audio track
+        if self.audio_tracks.get(language, "None") != "None":
             self.audio_player.stop()
             self.audio_player.reset_player()  # Otherwise we can't extract the segment if the last audio played was also for a flashcard
             audio_segment_path = self.audio_extractor.extract_segment(
@@ -776,6 +1238,7 @@ class Controller:
         if self.audio_tracks[language] == "None":
             return
 
+        self.row_player.stop()
         self.audio_player.stop()
         self.audio_player.reset_player()
 
@@ -810,6 +1273,7 @@ class Controller:
         if self.audio_tracks[language] == "None":
             return
 
+        self.row_player.stop()
         self.audio_player.stop()
         self.audio_player.reset_player()
 
@@ -820,6 +1284,40 @@ class Controller:
         self.audio_player.update_audio(str(audio_segment_path))
         self.audio_player.play()
 
+    def play_row_audio(self, language: str, index: int) -> None:
+        """
+        Plays the audio of a subtitle's whole aligned row in every language with an audio track, one after another
+        in a single stream, with the gap and speeds chosen in the Subtitle Workspace.
+
+        Args:
+            language (str): The language of the subtitle.
+            index (int): The index of the subtitle in the specified language.
+        """
+        entry_index = self.model.get_entry_index(language, index)
+        if entry_index is None:
+            return
+        entry = self.model.get_alignment()[entry_index]
+
+        lines = []
+        subtitle_workspace = self.ui.study_materials.subtitle_workspace
+        for row_language in subtitle_workspace.languages_with_audio_tracks:
+            subtitle_indices = entry["subtitle_indices"].get(row_language, [])
+            if subtitle_indices:
+                start_time = self.model.get_subtitle(
+                    row_language, subtitle_indices[0]
+                ).start_time
+                end_time = self.model.get_subtitle(
+                    row_language, subtitle_indices[-1]
+                ).end_time
+            else:
+                # The line may still be spoken without a subtitle, so play it at the row's timings
+                start_time, end_time = entry["timings"]
+            lines.append((row_language, start_time, end_time))
+
+        gap_seconds, speeds = subtitle_workspace.get_row_playback_options()
+        self.audio_player.stop()
+        self.row_player.play_row(lines, speeds, gap_seconds)
+
     # TODO: Is this in the right place?
     def set_subtitle_alignment(self, alignment: List[Dict]) -> None:
         """
@@ -828,68 +1326,36 @@ class Controller:
         Args:
             alignment (List[Dict]): A list of alignment entries containing timings, subtitle indices, and segments.
         """
-        self.ui.study_materials.subtitle_workspace.clear_workspace()
-
-        num_segments = alignment[-1]["segment"]
+        # Rows are produced lazily, so the workspace can show the first screen before the rest are gathered
+        rows = iterate_workspace_rows(alignment, self._gather_subtitles)
+        self.ui.study_materials.subtitle_workspace.set_rows(rows)
 
-        current_segment = 1
-        segment_start_time, segment_end_time = alignment[0]["timings"]
+    def resegment_subtitles(self, maximum_seconds_between_segments: float) -> None:
+        """
+        Re-segments the alignment at silences longer than the given gap, only updating the segment headers that changed.
 
-        segment_header = self.ui.study_materials.subtitle_workspace.add_segment_header(
-            current_segment, num_segments
+        Args:
+            maximum_seconds_between_segments (float): The longest silence within a segment, infinite for one segment.
+        """
+        added_segment_starts, removed_segment_starts = self.model.create_segments(
+            maximum_seconds_between_segments
         )
+        alignment = self.model.get_alignment()
+        if not self.ui.study_materials.subtitle_workspace.update_segments(
+            alignment, added_segment_starts, removed_segment_starts
+        ):
+            # The workspace is still being filled with the old segments
+            self.set_subtitle_alignment(alignment)
 
-        # Loop through each reference subtitle
-        for idx, entry in enumerate(alignment):
-            if entry["segment"] != current_segment:
-                ## Start a new segment
-
-                # First finalise the previous segment
-                self._finalise_segment(
-                    segment_header, segment_start_time, segment_end_time
-                )
-
-                # Track new segment start time
-                current_segment = entry["segment"]
-                segment_start_time, segment_end_time = entry["timings"]
-
-                # Add segment header for the new segment
-                segment_header = (
-                    self.ui.study_materials.subtitle_workspace.add_segment_header(
-                        current_segment, num_segments
-                    )
-                )
-            else:
-                segment_end_time = entry["timings"][
-                    1
-                ]  # Otherwise keep extending current segment end time
-
-            if idx == len(alignment) - 1:
-                # If handling last entry. It's ok if we finalise the segment again in case the last entry is also a separate segment.
-                self._finalise_segment(
-                    segment_header, segment_start_time, segment_end_time
-                )
-
-            # Gathering all subtitle indices and texts of the current entry to add them to the Subtitle Workspace
-            subtitles = self._gather_subtitles(entry)
-            self.ui.study_materials.subtitle_workspace.add_entry(subtitles)
-
-    def _finalise_segment(
-        self,
-        segment_header: SegmentHeader,
-        segment_start_time: float,
-        segment_end_time: float,
-    ) -> None:
+    def search_subtitles(self, query: str) -> None:
         """
-        Finalises a segment by adding timings to the segment header and connecting the signal.
+        Searches every language's subtitles as the query is typed, and shows the hits in the Subtitle Workspace.
 
         Args:
-            segment_header (SegmentHeader): The segment header in the UI to be finalised.
-            segment_start_time (float): The start time of the segment.
-            segment_end_time (float): The end time of the segment.
+            query (str): The text to search for.
         """
-        segment_header.add_timings(segment_start_time, segment_end_time)
-        segment_header.listen_requested_signal.connect(self.play_segment_audio)
+        hits = self.model.search_subtitles(query, limit=MAXIMUM_SEARCH_HITS)
+        self.ui.study_materials.subtitle_workspace.show_search_results(hits)
 
     # TODO: Perhaps refactor this or place elsewhere.
     def _gather_subtitles(self, entry: Dict) -> Dict[str, Dict[str, List]]:
@@ -955,13 +1421,19 @@ class Controller:
             return
 
         # TODO: Allow multiple languages in parallel in text mode, then retrieve language of specific entry
-        translation = self.translator.translate_text(
+        def show_translation(translations: List[str]) -> None:
+            entry_widget.set_source_language_text(translations[0])
+
+        self.translation_service.translate(
+            channel=f"saved_sentence_{id(entry_widget)}",
             texts=[sentence],
             source_lang=self.target_languages[0],
             target_lang=self.source_language,
-        )[0]
-
-        entry_widget.set_source_language_text(translation)
+            callback=show_translation,
+            error_callback=lambda error: self.show_translation_error(
+                [entry_widget.source_language_textedit], error
+            ),
+        )
 
     def make_flashcard_from_entry(self, entry_widget: SavedSentenceEntry) -> None:
         """
@@ -999,14 +1471,29 @@ class Controller:
         if entry_indices == [] or sentences == []:
             return
 
-        translations = self.translator.translate_text(
+        saved_sentences = self.ui.study_materials.saved_sentences
+
+        def show_translations(translations: List[str]) -> None:
+            saved_sentences.set_all_translations(entry_indices, translations)
+
+        def show_error(error: Exception) -> None:
+            self.show_translation_error(
+                [
+                    saved_sentences.entries_layout.itemAt(entry_index)
+                    .widget()
+                    .source_language_textedit
+                    for entry_index in entry_indices
+                ],
+                error,
+            )
+
+        self.translation_service.translate(
+            channel="all_saved_sentences",
             texts=sentences,
             source_lang=self.target_languages[0],
             target_lang=self.source_language,
-        )
-
-        self.ui.study_materials.saved_sentences.set_all_translations(
-            entry_indices, translations
+            callback=show_translations,
+            error_callback=show_error,
         )
 
     def add_entry_from_clipboard(self) -> None:
@@ -1158,8 +1645,23 @@ class Controller:
             if num_flashcards_created == 0:
                 flashcard_creator.delete_deck()
             else:
+                flashcard_creator.close()
                 print(f"Created {num_flashcards_created} for '{deck}' deck.")
 
+    def package_decks(self) -> None:
+        """
+        Builds Anki packages (.apkg files) for the decks that had flashcards added or edited this session.
+
+        Packages are rebuilt incrementally, so only this session's flashcards need processing.
+        """
+        for deck in self.decks:
+            if not self.session_flashcard_ids[deck]:
+                continue
+            package_file = self.deck_packager.build_package(
+                deck, anki_deck_name=f"({self.mode}) Languages {deck}"
+            )
+            print(f"Packaged '{deck}' deck for Anki: {package_file}")
+
     def clean_temporary_files(self) -> None:
         """
         Cleans up temporary files in the temporary audio folder.
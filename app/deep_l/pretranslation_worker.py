@@ -0,0 +1,83 @@
+import threading
+from pathlib import Path
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from deep_l.subtitle_pretranslator import (
+    PretranslationCancelled,
+    pretranslate_subtitles,
+)
+
+
+class PretranslationWorker(QObject):
+    """
+    Pre-translates the subtitles of a language on a worker thread, so the application stays responsive.
+
+    The worker is moved to a QThread and `run` is connected to the thread's `started` signal.
+
+    Signals:
+        progress_signal (pyqtSignal): Emitted with the number of distinct texts translated so far and the total.
+        finished_signal (pyqtSignal): Emitted with the language and the path of the translated SRT file when done.
+        failed_signal (pyqtSignal): Emitted with an error message when pre-translating fails.
+        done_signal (pyqtSignal): Emitted after pre-translating ends, whatever the outcome.
+    """
+
+    progress_signal = pyqtSignal(int, int)
+    finished_signal = pyqtSignal(str, str)
+    failed_signal = pyqtSignal(str)
+    done_signal = pyqtSignal()
+
+    def __init__(
+        self,
+        translator,
+        subtitles: list,
+        source_lang: str,
+        target_lang: str,
+        output_file: Path,
+    ) -> None:
+        """
+        Initialises the PretranslationWorker.
+
+        Args:
+            translator (Translator): The translator used to translate the subtitles.
+            subtitles (list): The subtitles to translate, i.e. `SubtitleModel.subtitles`.
+            source_lang (str): The language of the subtitles.
+            target_lang (str): The language to translate to.
+            output_file (Path): Where to save the translated SRT file.
+        """
+        super().__init__()
+        self.translator = translator
+        self.subtitles = subtitles
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.output_file = output_file
+        self.cancel_event = threading.Event()
+
+    def run(self) -> None:
+        """
+        Pre-translates the subtitles and emits the signal matching the outcome.
+        """
+        try:
+            output_file = pretranslate_subtitles(
+                self.subtitles,
+                self.translator,
+                self.source_lang,
+                self.target_lang,
+                self.output_file,
+                progress_callback=self.progress_signal.emit,
+                should_stop=self.cancel_event.is_set,
+            )
+            self.finished_signal.emit(self.source_lang, str(output_file))
+        except PretranslationCancelled:
+            print("Pre-translation cancelled.")
+        except Exception as e:
+            print(f"Error pre-translating subtitles: {e}")
+            self.failed_signal.emit(str(e))
+        finally:
+            self.done_signal.emit()
+
+    def cancel(self) -> None:
+        """
+        Requests cancelling the pre-translation. Must be called directly (not queued), as the worker's thread is busy.
+        """
+        self.cancel_event.set()
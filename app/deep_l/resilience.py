@@ -0,0 +1,503 @@
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from deep_l.translation_backends import TranslationBackend
+
+# DeepL's free plan allows a few requests per second, bursts above that get 429 "Too Many Requests" responses
+DEFAULT_REQUESTS_PER_SECOND = 5
+DEFAULT_BURST_SIZE = 10
+
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BASE_DELAY_SECONDS = 0.5
+DEFAULT_MAX_DELAY_SECONDS = 30
+
+DEFAULT_FAILURE_THRESHOLD = 5  # Consecutive failures before a circuit opens
+DEFAULT_RESET_SECONDS = 30  # How long a circuit stays open before trying again
+
+# The latencies kept per language pair, so long bulk runs don't grow the metrics without bound
+MAX_LATENCY_SAMPLES = 1000
+
+# (source language code, target language code)
+LanguagePair = Tuple[str, str]
+
+
+class CircuitOpenError(Exception):
+    """Raised when requests for a language pair are refused because too many of them failed recently."""
+
+
+def is_transient_error(exception: Exception) -> bool:
+    """
+    Decides whether a failed request is worth retrying.
+
+    Rate limiting (429), server errors (5xx), timeouts and dropped connections are transient.
+    Errors like an invalid API key, an unsupported language or an exceeded quota (456) are not.
+
+    Args:
+        exception (Exception): The exception raised by the backend.
+
+    Returns:
+        bool: True if the request may succeed when retried.
+    """
+    status_code = getattr(exception, "http_status_code", None)
+    if status_code is not None:
+        return status_code == 429 or status_code >= 500
+    if isinstance(exception, (ConnectionError, TimeoutError)):
+        return True
+    # The DeepL SDK marks network errors it considers retryable
+    return getattr(exception, "should_retry", False)
+
+
+def is_rate_limited(exception: Exception) -> bool:
+    """
+    Decides whether a request failed because of rate limiting (429), which backing off is enough to handle.
+
+    Args:
+        exception (Exception): The exception raised by the backend.
+
+    Returns:
+        bool: True if the request was rate limited.
+    """
+    return getattr(exception, "http_status_code", None) == 429
+
+
+def backoff_delay(
+    attempt: int,
+    base_delay: float = DEFAULT_BASE_DELAY_SECONDS,
+    max_delay: float = DEFAULT_MAX_DELAY_SECONDS,
+    rng: Optional[random.Random] = None,
+) -> float:
+    """
+    Calculates how long to wait before retrying, with exponential backoff and "full jitter".
+
+    The jitter spreads out retries from concurrent requests, so they don't all hit the API again at once.
+
+    Args:
+        attempt (int): The number of the retry, starting from 0.
+        base_delay (float, optional): The delay cap of the first retry. Defaults to DEFAULT_BASE_DELAY_SECONDS.
+        max_delay (float, optional): The largest delay cap. Defaults to DEFAULT_MAX_DELAY_SECONDS.
+        rng (Optional[random.Random], optional): The random number generator. Defaults to None, for the shared one.
+
+    Returns:
+        float: A random delay in seconds between 0 and min(max_delay, base_delay * 2 ** attempt).
+    """
+    rng = rng or random
+    return rng.uniform(0, min(max_delay, base_delay * 2**attempt))
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket rate limiter.
+
+    Tokens are added at a steady rate up to the bucket's capacity, and each request takes one,
+    so short bursts are allowed while the average rate is kept below the limit.
+
+    Attributes:
+        rate (float): The number of tokens added per second.
+        capacity (float): The maximum number of tokens, i.e. the largest burst.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_REQUESTS_PER_SECOND,
+        capacity: float = DEFAULT_BURST_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Initialises a full token bucket.
+
+        Args:
+            rate (float, optional): The number of tokens added per second. Defaults to DEFAULT_REQUESTS_PER_SECOND.
+            capacity (float, optional): The maximum number of tokens. Defaults to DEFAULT_BURST_SIZE.
+            clock (Callable[[], float], optional): Returns the current time in seconds. Defaults to time.monotonic.
+            sleep (Callable[[float], None], optional): Waits for a number of seconds. Defaults to time.sleep.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+
+        self.tokens = capacity
+        self.last_refill = clock()
+        self.lock = threading.Lock()
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """
+        Takes tokens from the bucket if there are enough.
+
+        Args:
+            tokens (float, optional): The number of tokens to take. Defaults to 1.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise how many seconds until there will be enough.
+        """
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.last_refill) * self.rate
+            )
+            self.last_refill = now
+
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Takes tokens from the bucket, waiting until there are enough.
+
+        Args:
+            tokens (float, optional): The number of tokens to take. Defaults to 1.
+
+        Returns:
+            float: The total time spent waiting, in seconds.
+        """
+        waited = 0
+        while True:
+            wait_seconds = self.try_acquire(tokens)
+            if wait_seconds == 0:
+                return waited
+            self.sleep(wait_seconds)
+            waited += wait_seconds
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests that are bound to fail, e.g. while the API is down or the quota is used up.
+
+    The circuit is "closed" (requests allowed) until `failure_threshold` requests fail in a row, when it "opens"
+    and refuses requests for `reset_seconds`. Then it lets one trial request through ("half-open"):
+    the circuit closes again if it succeeds, and reopens if it fails.
+
+    Attributes:
+        failure_threshold (int): The number of consecutive failures that opens the circuit.
+        reset_seconds (float): How long the circuit stays open.
+        state (str): "closed", "open" or "half-open".
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_seconds: float = DEFAULT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialises a closed circuit breaker.
+
+        Args:
+            failure_threshold (int, optional): The number of consecutive failures that opens the circuit. Defaults to DEFAULT_FAILURE_THRESHOLD.
+            reset_seconds (float, optional): How long the circuit stays open. Defaults to DEFAULT_RESET_SECONDS.
+            clock (Callable[[], float], optional): Returns the current time in seconds. Defaults to time.monotonic.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0
+        self.lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """
+        Checks whether a request may be sent.
+
+        Returns:
+            bool: True if the circuit is closed, or if this is the trial request after the circuit was open.
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if (
+                self.state == self.OPEN
+                and self.clock() - self.opened_at >= self.reset_seconds
+            ):
+                self.state = self.HALF_OPEN
+                return True
+            # Open, or half-open with the trial request still running
+            return False
+
+    def record_success(self) -> None:
+        """
+        Records a successful request, closing the circuit.
+        """
+        with self.lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+
+    def release_trial(self) -> None:
+        """
+        Records a request that says nothing about the service's health, e.g. one that was rate limited.
+
+        The failure count is left alone, and if it was the trial request, the next request becomes the trial instead.
+        """
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                # Reset time has already passed, so the next request is let through as the trial
+                self.state = self.OPEN
+
+    def record_failure(self) -> None:
+        """
+        Records a failed request, opening the circuit if too many failed in a row (or if the trial request failed).
+        """
+        with self.lock:
+            self.consecutive_failures += 1
+            if (
+                self.state == self.HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+
+class TranslationMetrics:
+    """
+    Thread-safe counters and latencies of translation requests, per language pair.
+
+    Only the latest MAX_LATENCY_SAMPLES latencies of each language pair are kept, so its percentiles describe
+    recent requests.
+
+    Attributes:
+        pairs (Dict[str, Dict]): The metrics of each language pair, keyed "SOURCE->TARGET".
+    """
+
+    COUNTERS = ["requests", "successes", "failures", "retries", "rejected"]
+
+    def __init__(self) -> None:
+        """
+        Initialises empty metrics.
+        """
+        self.pairs = {}
+        self.lock = threading.Lock()
+
+    def get_pair(self, language_pair: LanguagePair) -> Dict:
+        """
+        Gets the metrics of a language pair, creating them if needed. Must be called with the lock held.
+
+        Args:
+            language_pair (LanguagePair): The source and target language codes.
+
+        Returns:
+            Dict: The language pair's counters and latencies.
+        """
+        key = "->".join(language_pair)
+        if key not in self.pairs:
+            self.pairs[key] = {counter: 0 for counter in self.COUNTERS}
+            self.pairs[key]["latencies"] = deque(maxlen=MAX_LATENCY_SAMPLES)
+        return self.pairs[key]
+
+    def increment(self, language_pair: LanguagePair, counter: str) -> None:
+        """
+        Adds one to a counter.
+
+        Args:
+            language_pair (LanguagePair): The source and target language codes.
+            counter (str): One of COUNTERS.
+        """
+        with self.lock:
+            self.get_pair(language_pair)[counter] += 1
+
+    def record_latency(self, language_pair: LanguagePair, seconds: float) -> None:
+        """
+        Records how long a request attempt took.
+
+        Args:
+            language_pair (LanguagePair): The source and target language codes.
+            seconds (float): The attempt's duration.
+        """
+        with self.lock:
+            self.get_pair(language_pair)["latencies"].append(seconds)
+
+    def report(self) -> Dict[str, Dict]:
+        """
+        Summarises the metrics.
+
+        Returns:
+            Dict[str, Dict]: For each language pair, its counters and the mean, median and 95th percentile latency in seconds
+                of its latest requests.
+        """
+        with self.lock:
+            report = {}
+            for key, pair in self.pairs.items():
+                latencies = sorted(pair["latencies"])
+                report[key] = {counter: pair[counter] for counter in self.COUNTERS}
+                report[key]["latency_seconds"] = {
+                    "mean": sum(latencies) / len(latencies) if latencies else 0,
+                    "p50": percentile(latencies, 0.5),
+                    "p95": percentile(latencies, 0.95),
+                }
+            return report
+
+    def summary_lines(self) -> List[str]:
+        """
+        Formats the metrics for printing.
+
+        Returns:
+            List[str]: One line per language pair.
+        """
+        return [
+            f"{key}: {pair['requests']} requests, {pair['failures']} failed, {pair['retries']} retries, "
+            f"{pair['rejected']} rejected, p50 {pair['latency_seconds']['p50'] * 1000:.0f} ms, "
+            f"p95 {pair['latency_seconds']['p95'] * 1000:.0f} ms"
+            for key, pair in self.report().items()
+        ]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Finds a percentile of sorted values (nearest-rank).
+
+    Args:
+        sorted_values (List[float]): The values, sorted.
+        fraction (float): The percentile as a fraction, e.g. 0.95.
+
+    Returns:
+        float: The percentile, or 0 if there are no values.
+    """
+    if not sorted_values:
+        return 0
+    rank = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class ResilientBackend(TranslationBackend):
+    """
+    Wraps a translation backend so bulk translation holds up when the API is busy or failing.
+
+    Every request waits for the rate limiter, is refused straight away while its language pair's circuit is open,
+    and is retried with exponential backoff and jitter if it fails with a transient error.
+
+    Attributes:
+        backend (TranslationBackend): The backend that requests are sent to.
+        rate_limiter (TokenBucket): Limits the rate of requests (including retries).
+        max_retries (int): The number of retries of a request with a transient error.
+        base_delay (float): The delay cap of the first retry, in seconds.
+        max_delay (float): The largest delay cap, in seconds.
+        metrics (TranslationMetrics): Counts and latencies of the requests.
+    """
+
+    def __init__(
+        self,
+        backend: TranslationBackend,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = DEFAULT_BASE_DELAY_SECONDS,
+        max_delay: float = DEFAULT_MAX_DELAY_SECONDS,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_seconds: float = DEFAULT_RESET_SECONDS,
+        sleep: Callable[[float], None] = time.sleep,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Initialises the resilient backend.
+
+        Args:
+            backend (TranslationBackend): The backend that requests are sent to.
+            rate_limiter (Optional[TokenBucket], optional): Limits the rate of requests. Defaults to None, for a TokenBucket with the default rate.
+            max_retries (int, optional): The number of retries of a request with a transient error. Defaults to DEFAULT_MAX_RETRIES.
+            base_delay (float, optional): The delay cap of the first retry, in seconds. Defaults to DEFAULT_BASE_DELAY_SECONDS.
+            max_delay (float, optional): The largest delay cap, in seconds. Defaults to DEFAULT_MAX_DELAY_SECONDS.
+            failure_threshold (int, optional): Consecutive failures that open a language pair's circuit. Defaults to DEFAULT_FAILURE_THRESHOLD.
+            reset_seconds (float, optional): How long a circuit stays open. Defaults to DEFAULT_RESET_SECONDS.
+            sleep (Callable[[float], None], optional): Waits between retries. Defaults to time.sleep.
+            seed (Optional[int], optional): The random seed for the jitter. Defaults to None.
+        """
+        self.backend = backend
+        self.rate_limiter = rate_limiter if rate_limiter is not None else TokenBucket()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.sleep = sleep
+        self.random = random.Random(seed)
+
+        self.circuit_breakers: Dict[LanguagePair, CircuitBreaker] = {}
+        self.metrics = TranslationMetrics()
+        self.lock = threading.Lock()
+
+    def get_circuit_breaker(self, language_pair: LanguagePair) -> CircuitBreaker:
+        """
+        Gets the circuit breaker of a language pair, creating it if needed.
+
+        Args:
+            language_pair (LanguagePair): The source and target language codes.
+
+        Returns:
+            CircuitBreaker: The language pair's circuit breaker.
+        """
+        with self.lock:
+            if language_pair not in self.circuit_breakers:
+                self.circuit_breakers[language_pair] = CircuitBreaker(
+                    self.failure_threshold, self.reset_seconds
+                )
+            return self.circuit_breakers[language_pair]
+
+    def translate(
+        self,
+        texts: List[str],
+        source_lang_code: str,
+        target_lang_code: str,
+        split_sentences: str,
+        formality: str,
+    ) -> List[str]:
+        """
+        See `TranslationBackend.translate`.
+
+        Raises:
+            CircuitOpenError: If the language pair's circuit is open.
+            Exception: The backend's last error, if the request failed with a permanent error or ran out of retries.
+        """
+        language_pair = (source_lang_code, target_lang_code)
+        circuit_breaker = self.get_circuit_breaker(language_pair)
+
+        attempt = 0
+        while True:
+            if not circuit_breaker.allow_request():
+                self.metrics.increment(language_pair, "rejected")
+                raise CircuitOpenError(
+                    f"Too many recent failures translating {source_lang_code} to {target_lang_code}, try again later."
+                )
+
+            self.rate_limiter.acquire()
+            self.metrics.increment(language_pair, "requests")
+            start = time.perf_counter()
+            try:
+                translations = self.backend.translate(
+                    texts,
+                    source_lang_code,
+                    target_lang_code,
+                    split_sentences,
+                    formality,
+                )
+            except Exception as e:
+                self.metrics.record_latency(language_pair, time.perf_counter() - start)
+                self.metrics.increment(language_pair, "failures")
+                # Only outages open (or keep open) the circuit, rate limiting is handled by backing off
+                if is_rate_limited(e):
+                    circuit_breaker.release_trial()
+                else:
+                    circuit_breaker.record_failure()
+
+                if not is_transient_error(e) or attempt >= self.max_retries:
+                    raise
+
+                self.metrics.increment(language_pair, "retries")
+                self.sleep(
+                    backoff_delay(attempt, self.base_delay, self.max_delay, self.random)
+                )
+                attempt += 1
+                continue
+
+            self.metrics.record_latency(language_pair, time.perf_counter() - start)
+            self.metrics.increment(language_pair, "successes")
+            circuit_breaker.record_success()
+            return translations
@@ -0,0 +1,225 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+from urllib.parse import parse_qs
+
+
+def tag_translation(text: str, source_lang: str, target_lang: str) -> str:
+    """
+    The stand-in server's default "translation", which marks the text with its target language.
+
+    Args:
+        text (str): The text to translate.
+        source_lang (str): The DeepL source language code.
+        target_lang (str): The DeepL target language code.
+
+    Returns:
+        str: E.g. "[EN-GB] ¿Qué?".
+    """
+    return f"[{target_lang}] {text}"
+
+
+class DeepLStandInServer:
+    """
+    A local HTTP server that mimics the DeepL REST API's translate endpoint, for testing without a network.
+
+    Point a `DeepLBackend` at `url` to exercise the real SDK, batching, caching and retry behaviour.
+    The server can add latency and fail a share of requests (with 429 "Too Many Requests" or 503 responses),
+    and counts the requests and texts it receives.
+
+    Example:
+        with DeepLStandInServer(latency_seconds=0.05, failure_rate=0.1) as server:
+            translator = Translator(backend=DeepLBackend("stand-in-key", server_url=server.url))
+
+    Attributes:
+        translate_function (Callable[[str, str, str], str]): Translates one text, given the text and the DeepL source and target language codes.
+        latency_seconds (float): How long each request takes.
+        failure_rate (float): The share of translate requests that fail.
+        failure_status (int): The HTTP status code of failed requests.
+        request_count (int): The number of translate requests received.
+        text_count (int): The number of texts received in successful requests.
+        max_texts_per_request (int): The most texts received in a single request.
+    """
+
+    def __init__(
+        self,
+        translate_function: Callable[[str, str, str], str] = tag_translation,
+        latency_seconds: float = 0,
+        failure_rate: float = 0,
+        failure_status: int = 429,
+        port: int = 0,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Initialises the stand-in server. Call `start` (or use it as a context manager) to start serving.
+
+        Args:
+            translate_function (Callable[[str, str, str], str], optional): Translates one text. Defaults to tag_translation.
+            latency_seconds (float, optional): How long each request takes. Defaults to 0.
+            failure_rate (float, optional): The share of translate requests that fail. Defaults to 0.
+            failure_status (int, optional): The HTTP status code of failed requests. Defaults to 429.
+            port (int, optional): The port to listen on. Defaults to 0, for any free port.
+            seed (Optional[int], optional): The random seed deciding which requests fail. Defaults to None.
+        """
+        self.translate_function = translate_function
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.random = random.Random(seed)
+
+        self.request_count = 0
+        self.text_count = 0
+        self.max_texts_per_request = 0
+        self.lock = threading.Lock()
+
+        self.http_server = ThreadingHTTPServer(
+            ("127.0.0.1", port), self.create_request_handler()
+        )
+        self.http_server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        """The server's URL, to pass as a DeepL `server_url`."""
+        host, port = self.http_server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "DeepLStandInServer":
+        """
+        Starts serving requests on a background thread.
+
+        Returns:
+            DeepLStandInServer: The server itself.
+        """
+        self.thread = threading.Thread(
+            target=self.http_server.serve_forever, daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the server.
+        """
+        self.http_server.shutdown()
+        self.http_server.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self) -> "DeepLStandInServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def handle_translate(self, parameters: dict) -> Optional[dict]:
+        """
+        Answers a translate request.
+
+        Args:
+            parameters (dict): The request's parameters, with "text" as a list of texts.
+
+        Returns:
+            Optional[dict]: The response body, or None if the request should fail.
+        """
+        with self.lock:
+            self.request_count += 1
+            fails = self.random.random() < self.failure_rate
+
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        if fails:
+            return None
+
+        texts: List[str] = parameters.get("text", [])
+        source_lang = parameters.get("source_lang", "")
+        target_lang = parameters.get("target_lang", "")
+
+        with self.lock:
+            self.text_count += len(texts)
+            self.max_texts_per_request = max(self.max_texts_per_request, len(texts))
+
+        return {
+            "translations": [
+                {
+                    "detected_source_language": source_lang,
+                    "text": self.translate_function(text, source_lang, target_lang),
+                    "billed_characters": len(text),
+                }
+                for text in texts
+            ]
+        }
+
+    def create_request_handler(self) -> type:
+        """
+        Creates the request handler class, which passes requests on to this server.
+
+        Returns:
+            type: The BaseHTTPRequestHandler subclass.
+        """
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                if self.path.rstrip("/") != "/v2/translate":
+                    self.send_json(404, {"message": "Not found"})
+                    return
+
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                parameters = parse_body(body, self.headers.get("Content-Type", ""))
+                response = server.handle_translate(parameters)
+
+                if response is None:
+                    self.send_json(
+                        server.failure_status, {"message": "Stand-in failure"}
+                    )
+                else:
+                    self.send_json(200, response)
+
+            def do_GET(self) -> None:
+                if self.path.rstrip("/") == "/v2/usage":
+                    self.send_json(
+                        200, {"character_count": 0, "character_limit": 500000}
+                    )
+                else:
+                    self.send_json(404, {"message": "Not found"})
+
+            def send_json(self, status: int, body: dict) -> None:
+                content = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format: str, *args) -> None:
+                pass  # Keep test output quiet
+
+        return RequestHandler
+
+
+def parse_body(body: bytes, content_type: str) -> dict:
+    """
+    Parses a translate request's parameters, which the DeepL SDK sends as JSON (or as a form in older versions).
+
+    Args:
+        body (bytes): The request body.
+        content_type (str): The request's Content-Type header.
+
+    Returns:
+        dict: The parameters, with "text" always as a list of texts.
+    """
+    if "application/json" in content_type:
+        parameters = json.loads(body or b"{}")
+    else:
+        parameters = {
+            key: values if key == "text" else values[0]
+            for key, values in parse_qs(body.decode("utf-8")).items()
+        }
+
+    if isinstance(parameters.get("text"), str):
+        parameters["text"] = [parameters["text"]]
+    return parameters
@@ -0,0 +1,128 @@
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from deep_l.translation_batcher import MAX_TEXTS_PER_REQUEST
+from deep_l.translation_cache import normalise_text
+
+# Several requests' worth of texts per step, so progress is reported often without slowing the translation down
+TEXTS_PER_STEP = 4 * MAX_TEXTS_PER_REQUEST
+
+
+class PretranslationCancelled(Exception):
+    """Raised when pre-translating subtitles is cancelled before it finishes."""
+
+
+def deduplicate_texts(texts: List[str]) -> Tuple[List[str], List[int]]:
+    """
+    Finds the distinct texts among subtitles, since episodes repeat many short lines (e.g. "Yes." or "What?").
+
+    Args:
+        texts (List[str]): The text of each subtitle.
+
+    Returns:
+        Tuple[List[str], List[int]]: The distinct normalised texts, and for each subtitle the position of its text among them.
+    """
+    positions = {}
+    text_positions = []
+    for text in texts:
+        normalised_text = normalise_text(text)
+        text_positions.append(positions.setdefault(normalised_text, len(positions)))
+    return list(positions), text_positions
+
+
+def format_srt_timing(time) -> str:
+    """
+    Formats a subtitle time the way SRT files write it.
+
+    Args:
+        time (datetime): The start or end time of a subtitle.
+
+    Returns:
+        str: The time as "HH:MM:SS,mmm".
+    """
+    return time.strftime("%H:%M:%S,%f")[:-3]  # Truncate microseconds to milliseconds
+
+
+def write_srt_file(subtitles: list, texts: List[str], output_file: Path) -> None:
+    """
+    Writes subtitles with new texts to an SRT file, keeping their original timings.
+
+    The file is written under a temporary name first, so an interrupted run never leaves a partial file behind.
+
+    Args:
+        subtitles (list): The subtitles (`model.Subtitle`) whose timings to use.
+        texts (List[str]): The text of each subtitle.
+        output_file (Path): Where to save the SRT file.
+    """
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    partial_file = output_file.with_name(output_file.name + ".part")
+
+    with open(partial_file, "w", encoding="utf-8") as f:
+        for subtitle_number, (subtitle, text) in enumerate(
+            zip(subtitles, texts), start=1
+        ):
+            f.write(f"{subtitle_number}\n")
+            f.write(
+                f"{format_srt_timing(subtitle.start_time)} --> {format_srt_timing(subtitle.end_time)}\n"
+            )
+            f.write(f"{text}\n\n")
+
+    partial_file.replace(output_file)
+
+
+def pretranslate_subtitles(
+    subtitles: list,
+    translator,
+    source_lang: str,
+    target_lang: str,
+    output_file: Path,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Path:
+    """
+    Translates every subtitle of a language and saves the translations as an SRT file with the same timings.
+
+    Each distinct text is only translated once, and the translations go through the translator's cache,
+    so pre-translating an episode again (or one sharing many lines with it) is quick.
+
+    Args:
+        subtitles (list): The subtitles (`model.Subtitle`) to translate, i.e. `SubtitleModel.subtitles`.
+        translator (Translator): The translator used to translate the texts.
+        source_lang (str): The language of the subtitles.
+        target_lang (str): The language to translate to.
+        output_file (Path): Where to save the translated SRT file.
+        progress_callback (Optional[Callable[[int, int], None]], optional): Called with the number of distinct texts translated so far and the total. Defaults to None.
+        should_stop (Optional[Callable[[], bool]], optional): Checked between steps, stops translating when it returns True. Defaults to None.
+
+    Returns:
+        Path: The translated SRT file.
+
+    Raises:
+        PretranslationCancelled: If `should_stop` returned True before the translation finished.
+        Exception: The translator's error, if a request failed. No file is written then.
+    """
+    unique_texts, text_positions = deduplicate_texts(
+        [subtitle.text for subtitle in subtitles]
+    )
+
+    translations = []
+    for step_start in range(0, len(unique_texts), TEXTS_PER_STEP):
+        if should_stop is not None and should_stop():
+            raise PretranslationCancelled()
+
+        if progress_callback is not None:
+            progress_callback(step_start, len(unique_texts))
+
+        translations += translator.translate_text(
+            texts=unique_texts[step_start : step_start + TEXTS_PER_STEP],
+            source_lang=source_lang,
+            target_lang=target_lang,
+        )
+
+    if progress_callback is not None:
+        progress_callback(len(unique_texts), len(unique_texts))
+
+    translated_texts = [translations[position] for position in text_positions]
+    write_srt_file(subtitles, translated_texts, output_file)
+
+    return output_file
@@ -0,0 +1,198 @@
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_GLOSSARY_FOLDER = Path("resources/deepl/glossaries")
+
+# Words (including accented letters and apostrophes within words), or any single other character
+WORD_PATTERN = re.compile(r"\w+(?:'\w+)*|\W", re.UNICODE)
+
+
+class TranslationBackend:
+    """
+    The interface the Translator uses to send texts to a translation service.
+
+    Backends receive texts that fit in a single request (see `chunk_texts`) and DeepL language codes,
+    and raise an exception if a request fails. Caching, chunking and error handling are left to the Translator.
+    """
+
+    def translate(
+        self,
+        texts: List[str],
+        source_lang_code: str,
+        target_lang_code: str,
+        split_sentences: str,
+        formality: str,
+    ) -> List[str]:
+        """
+        Translates texts in a single request.
+
+        Args:
+            texts (List[str]): List of texts to be translated.
+            source_lang_code (str): The DeepL source language code.
+            target_lang_code (str): The DeepL target language code.
+            split_sentences (str): Sentence splitting option for translation.
+            formality (str): Formality level for the translations.
+
+        Returns:
+            List[str]: List of translated texts.
+        """
+        raise NotImplementedError
+
+
+class DeepLBackend(TranslationBackend):
+    """
+    Translates with the DeepL API through the official SDK.
+
+    Attributes:
+        translator (deepl.Translator): An instance of the DeepL Translator.
+    """
+
+    def __init__(
+        self,
+        auth_key: str,
+        server_url: Optional[str] = None,
+        max_sdk_retries: Optional[int] = None,
+    ) -> None:
+        """
+        Initialises the DeepL backend.
+
+        Args:
+            auth_key (str): The API key for authenticating with the DeepL API.
+            server_url (Optional[str], optional): A different server to send requests to, e.g. a `DeepLStandInServer`.
+                                                  Defaults to None, for DeepL's own servers.
+            max_sdk_retries (Optional[int], optional): How many times the SDK itself retries failed requests, e.g. 0 when
+                                                       wrapped in a `ResilientBackend`. This is a global SDK setting.
+                                                       Defaults to None, to keep the SDK's default.
+        """
+        import deepl
+
+        if max_sdk_retries is not None:
+            deepl.http_client.max_network_retries = max_sdk_retries
+
+        self.translator = deepl.Translator(auth_key, server_url=server_url)
+
+    def translate(
+        self,
+        texts: List[str],
+        source_lang_code: str,
+        target_lang_code: str,
+        split_sentences: str,
+        formality: str,
+    ) -> List[str]:
+        """See `TranslationBackend.translate`."""
+        results = self.translator.translate_text(
+            text=texts,
+            source_lang=source_lang_code,
+            target_lang=target_lang_code,
+            split_sentences=split_sentences,
+            formality=formality,
+        )
+        return [result.text for result in results]
+
+
+class GlossaryBackend(TranslationBackend):
+    """
+    Translates offline, word by word, with local glossaries.
+
+    The translations are rough, but need no network or API key, so they're useful for tests and offline study.
+    Glossaries are JSON files named after their DeepL language codes, e.g. "ES-EN-GB.json", mapping
+    lowercase words (or short phrases) to their translation. Words without an entry are kept as they are.
+
+    Attributes:
+        glossary_folder (Path): The folder containing the glossary files.
+        glossaries (Dict[str, Dict[str, str]]): The glossaries loaded so far, by language pair.
+    """
+
+    def __init__(self, glossary_folder: Path = DEFAULT_GLOSSARY_FOLDER) -> None:
+        """
+        Initialises the glossary backend. Glossaries are loaded when first needed.
+
+        Args:
+            glossary_folder (Path, optional): The folder containing the glossary files. Defaults to DEFAULT_GLOSSARY_FOLDER.
+        """
+        self.glossary_folder = Path(glossary_folder)
+        self.glossaries = {}
+
+    def get_glossary(
+        self, source_lang_code: str, target_lang_code: str
+    ) -> Dict[str, str]:
+        """
+        Loads the glossary for a language pair.
+
+        Args:
+            source_lang_code (str): The DeepL source language code.
+            target_lang_code (str): The DeepL target language code.
+
+        Returns:
+            Dict[str, str]: The glossary, empty if there is no glossary file for the pair.
+        """
+        language_pair = f"{source_lang_code}-{target_lang_code}"
+        if language_pair not in self.glossaries:
+            glossary_file = self.glossary_folder / f"{language_pair}.json"
+            if glossary_file.is_file():
+                with open(glossary_file, "r", encoding="utf-8") as f:
+                    glossary = json.load(f)
+                self.glossaries[language_pair] = {
+                    entry.lower(): translation
+                    for entry, translation in glossary.items()
+                }
+            else:
+                print(
+                    f"No glossary found for {language_pair} in {self.glossary_folder}"
+                )
+                self.glossaries[language_pair] = {}
+        return self.glossaries[language_pair]
+
+    def translate(
+        self,
+        texts: List[str],
+        source_lang_code: str,
+        target_lang_code: str,
+        split_sentences: str,
+        formality: str,
+    ) -> List[str]:
+        """See `TranslationBackend.translate`."""
+        glossary = self.get_glossary(source_lang_code, target_lang_code)
+        return [translate_with_glossary(text, glossary) for text in texts]
+
+
+def translate_with_glossary(text: str, glossary: Dict[str, str]) -> str:
+    """
+    Translates a text word by word with a glossary, preferring the longest phrase with an entry.
+
+    Args:
+        text (str): The text to translate.
+        glossary (Dict[str, str]): Lowercase words and phrases mapped to their translation.
+
+    Returns:
+        str: The translated text, keeping punctuation, spacing and words without an entry.
+    """
+    tokens = WORD_PATTERN.findall(text)
+    longest_phrase = max((entry.count(" ") + 1 for entry in glossary), default=1)
+
+    translated_tokens = []
+    position = 0
+    while position < len(tokens):
+        if not tokens[position][0].isalnum():
+            translated_tokens.append(tokens[position])
+            position += 1
+            continue
+
+        # A phrase of n words spans 2n - 1 tokens, including the spaces between them
+        for words in range(longest_phrase, 0, -1):
+            phrase_tokens = tokens[position : position + 2 * words - 1]
+            phrase = "".join(phrase_tokens).lower()
+            if len(phrase_tokens) == 2 * words - 1 and phrase in glossary:
+                translation = glossary[phrase]
+                if tokens[position][0].isupper():
+                    translation = translation[:1].upper() + translation[1:]
+                translated_tokens.append(translation)
+                position += len(phrase_tokens)
+                break
+        else:
+            translated_tokens.append(tokens[position])
+            position += 1
+
+    return "".join(translated_tokens)
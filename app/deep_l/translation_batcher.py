@@ -0,0 +1,216 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Tuple
+from urllib.parse import quote
+
+# DeepL accepts at most 50 texts and 128 KiB per translation request, a little is kept back for the other parameters
+MAX_TEXTS_PER_REQUEST = 50
+MAX_REQUEST_BYTES = 120 * 1024
+MAX_CONCURRENT_REQUESTS = 4
+
+COALESCING_WINDOW_SECONDS = 0.02  # How long to wait for other requests to join a batch
+
+# (source language, target language, split_sentences, formality)
+BatchOptions = Tuple[str, str, str, str]
+
+
+def request_size(text: str) -> int:
+    """
+    Estimates how many bytes a text adds to a translation request, as a form-encoded "text" parameter.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The size in bytes.
+    """
+    return len("&text=") + len(quote(text, safe=""))
+
+
+def chunk_texts(
+    texts: List[str],
+    max_texts: int = MAX_TEXTS_PER_REQUEST,
+    max_bytes: int = MAX_REQUEST_BYTES,
+) -> List[List[str]]:
+    """
+    Splits texts into consecutive chunks that each fit in a single translation request.
+
+    A single text that is too big on its own still gets its own chunk.
+
+    Args:
+        texts (List[str]): The texts to translate.
+        max_texts (int, optional): The maximum number of texts per chunk. Defaults to MAX_TEXTS_PER_REQUEST.
+        max_bytes (int, optional): The maximum request size per chunk. Defaults to MAX_REQUEST_BYTES.
+
+    Returns:
+        List[List[str]]: The chunks, in order.
+    """
+    chunks = []
+    current_chunk = []
+    current_bytes = 0
+
+    for text in texts:
+        size = request_size(text)
+        if current_chunk and (
+            len(current_chunk) >= max_texts or current_bytes + size > max_bytes
+        ):
+            chunks.append(current_chunk)
+            current_chunk = []
+            current_bytes = 0
+        current_chunk.append(text)
+        current_bytes += size
+
+    if current_chunk:
+        chunks.append(current_chunk)
+
+    return chunks
+
+
+class TranslationBatcher:
+    """
+    Coalesces translation requests made at about the same time (e.g. from several threads) into shared batches.
+
+    Requests are collected for a short window, grouped by their languages and options, and sent together
+    through `Translator.translate_text`, which chunks them to the API's limits, sends the chunks concurrently
+    and uses the translation cache. Each request gets its own translations back through a Future.
+
+    Attributes:
+        translator (Translator): The translator used to send the batches.
+        window_seconds (float): How long to wait for other requests to join a batch.
+    """
+
+    def __init__(
+        self, translator, window_seconds: float = COALESCING_WINDOW_SECONDS
+    ) -> None:
+        """
+        Starts the batcher's dispatching thread.
+
+        Args:
+            translator (Translator): The translator used to send the batches.
+            window_seconds (float, optional): How long to wait for other requests to join a batch. Defaults to COALESCING_WINDOW_SECONDS.
+        """
+        self.translator = translator
+        self.window_seconds = window_seconds
+
+        self.pending = {}
+        self.condition = threading.Condition()
+        self.closed = False
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        split_sentences: str = "off",
+        formality: str = "default",
+    ) -> Future:
+        """
+        Queues texts to be translated in the next batch.
+
+        Args:
+            texts (List[str]): List of texts to be translated.
+            source_lang (str): The source language name.
+            target_lang (str): The target language name.
+            split_sentences (str, optional): Sentence splitting option for translation. Defaults to "off".
+            formality (str, optional): Formality level for the translations. Defaults to "default".
+
+        Returns:
+            Future: Resolves to the list of translated texts. Cancelling it before the batch is sent drops the request.
+        """
+        future = Future()
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("The translation batcher has been closed.")
+            options = (source_lang, target_lang, split_sentences, formality)
+            self.pending.setdefault(options, []).append((list(texts), future))
+            self.condition.notify()
+        return future
+
+    def translate(
+        self, texts: List[str], source_lang: str, target_lang: str
+    ) -> List[str]:
+        """
+        Translates texts as part of the next batch, waiting for the result.
+
+        Args:
+            texts (List[str]): List of texts to be translated.
+            source_lang (str): The source language name.
+            target_lang (str): The target language name.
+
+        Returns:
+            List[str]: List of translated texts.
+        """
+        return self.submit(texts, source_lang, target_lang).result()
+
+    def run(self) -> None:
+        """
+        Sends the pending requests in batches until the batcher is closed.
+        """
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending and self.closed:
+                    return
+
+            # Give requests made at about the same time the chance to join this batch
+            time.sleep(self.window_seconds)
+
+            with self.condition:
+                batches, self.pending = self.pending, {}
+
+            for options, requests in batches.items():
+                self.dispatch(options, requests)
+
+    def dispatch(
+        self, options: BatchOptions, requests: List[Tuple[List[str], Future]]
+    ) -> None:
+        """
+        Translates a batch of requests with one `translate_text` call and hands each request its results.
+
+        Args:
+            options (BatchOptions): The source language, target language, split_sentences and formality of the batch.
+            requests (List[Tuple[List[str], Future]]): The texts and future of each request.
+        """
+        # Skip requests that were cancelled while waiting
+        requests = [
+            (texts, future)
+            for texts, future in requests
+            if future.set_running_or_notify_cancel()
+        ]
+        if not requests:
+            return
+
+        all_texts = [text for texts, _ in requests for text in texts]
+        source_lang, target_lang, split_sentences, formality = options
+
+        try:
+            translations = self.translator.translate_text(
+                texts=all_texts,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                split_sentences=split_sentences,
+                formality=formality,
+            )
+        except Exception as e:
+            for _, future in requests:
+                future.set_exception(e)
+            return
+
+        position = 0
+        for texts, future in requests:
+            future.set_result(translations[position : position + len(texts)])
+            position += len(texts)
+
+    def close(self) -> None:
+        """
+        Sends any pending requests, then stops the dispatching thread.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
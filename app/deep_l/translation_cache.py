@@ -0,0 +1,170 @@
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+DEFAULT_CACHE_FILE = Path("deep_l/translation_cache.sqlite3")
+DEFAULT_MEMORY_CACHE_SIZE = 10000  # Number of translations kept in memory
+
+# (normalised text, source language code, target language code, formality, split_sentences)
+CacheKey = Tuple[str, str, str, str, str]
+
+
+def normalise_text(text: str) -> str:
+    """
+    Normalises text before translating it, so that trivially different copies of a line share one translation.
+
+    Removes soft hyphens, applies Unicode NFC normalisation, collapses runs of whitespace and strips the ends.
+
+    Args:
+        text (str): The text to normalise.
+
+    Returns:
+        str: The normalised text.
+    """
+    text = unicodedata.normalize("NFC", text.replace("­", ""))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class TranslationCache:
+    """
+    A persistent cache of translations, with an in-memory LRU layer in front of an SQLite database.
+
+    Translations are keyed by the normalised text, the source and target language codes, the formality
+    and the sentence splitting option, since each of them can change the translation.
+    The cache can be shared between threads.
+
+    Attributes:
+        database_file (Union[Path, str]): The SQLite database file, or ":memory:" for a cache that isn't saved.
+        memory_cache_size (int): The maximum number of translations kept in memory.
+        hits (int): The number of lookups answered by the cache.
+        misses (int): The number of lookups the cache couldn't answer.
+    """
+
+    def __init__(
+        self,
+        database_file: Union[Path, str] = DEFAULT_CACHE_FILE,
+        memory_cache_size: int = DEFAULT_MEMORY_CACHE_SIZE,
+    ) -> None:
+        """
+        Opens (and if needed creates) the translation cache.
+
+        Args:
+            database_file (Union[Path, str], optional): The SQLite database file. Defaults to DEFAULT_CACHE_FILE.
+            memory_cache_size (int, optional): The maximum number of translations kept in memory. Defaults to DEFAULT_MEMORY_CACHE_SIZE.
+        """
+        self.database_file = database_file
+        self.memory_cache_size = memory_cache_size
+        self.memory_cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        if database_file != ":memory:":
+            Path(database_file).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(database_file), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                text TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                formality TEXT NOT NULL,
+                split_sentences TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                PRIMARY KEY (text, source_lang, target_lang, formality, split_sentences)
+            ) WITHOUT ROWID
+            """)
+        self.connection.commit()
+
+    def get_many(self, keys: List[CacheKey]) -> Dict[CacheKey, str]:
+        """
+        Looks up the translations of several texts.
+
+        Args:
+            keys (List[CacheKey]): The cache keys to look up.
+
+        Returns:
+            Dict[CacheKey, str]: The cached translation of each key found.
+        """
+        found = {}
+        with self.lock:
+            missing = []
+            for key in keys:
+                translation = self.memory_cache.get(key)
+                if translation is None:
+                    missing.append(key)
+                else:
+                    self.memory_cache.move_to_end(key)
+                    found[key] = translation
+
+            for key in dict.fromkeys(missing):
+                row = self.connection.execute(
+                    "SELECT translation FROM translations WHERE text = ? AND source_lang = ? AND target_lang = ? AND formality = ? AND split_sentences = ?",
+                    key,
+                ).fetchone()
+                if row is not None:
+                    found[key] = row[0]
+                    self.remember(key, row[0])
+
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+
+        return found
+
+    def put_many(self, translations: Dict[CacheKey, str]) -> None:
+        """
+        Stores translations in the cache. Empty translations (i.e. failed requests) are not stored.
+
+        Args:
+            translations (Dict[CacheKey, str]): The translation of each cache key.
+        """
+        rows = [
+            key + (translation,)
+            for key, translation in translations.items()
+            if translation
+        ]
+        if not rows:
+            return
+
+        with self.lock:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+            for row in rows:
+                self.remember(row[:5], row[5])
+
+    def remember(self, key: CacheKey, translation: str) -> None:
+        """
+        Adds a translation to the in-memory layer, evicting the least recently used one if full.
+        Must be called with the lock held.
+
+        Args:
+            key (CacheKey): The cache key.
+            translation (str): The translation.
+        """
+        self.memory_cache[key] = translation
+        self.memory_cache.move_to_end(key)
+        while len(self.memory_cache) > self.memory_cache_size:
+            self.memory_cache.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Removes every translation from the cache.
+        """
+        with self.lock:
+            with self.connection:
+                self.connection.execute("DELETE FROM translations")
+            self.memory_cache.clear()
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+        """
+        with self.lock:
+            self.connection.close()
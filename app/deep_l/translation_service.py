@@ -0,0 +1,142 @@
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from deep_l.translation_batcher import TranslationBatcher
+
+
+class TranslationService(QObject):
+    """
+    Translates text in the background so the UI never waits on the DeepL API.
+
+    Requests are sent through a TranslationBatcher, so they are cached, chunked and coalesced,
+    and the results are handed back on the GUI thread by calling the request's callback.
+
+    Each request belongs to a channel, e.g. "workspace" or one saved sentence entry. A new request on a channel
+    makes the previous one stale: it is cancelled if it hasn't been sent yet, and its result is ignored otherwise.
+
+    Signals:
+        result_signal (pyqtSignal): Internal, carries a finished request from the batcher's thread to the GUI thread.
+    """
+
+    result_signal = pyqtSignal(str, int, object)
+
+    def __init__(self, translator, parent: Optional[QObject] = None) -> None:
+        """
+        Initialises the TranslationService. Must be created on the GUI thread.
+
+        Args:
+            translator (Translator): The translator to send requests with.
+            parent (Optional[QObject], optional): The parent QObject. Defaults to None.
+        """
+        super().__init__(parent)
+        self.batcher = TranslationBatcher(translator)
+
+        self.next_request_id = 0
+        self.latest_requests = {}  # Channel -> latest request id
+        self.futures: Dict[str, Future] = {}
+        self.callbacks = {}  # Request id -> (callback, error callback)
+
+        self.result_signal.connect(self.deliver_result)
+
+    def translate(
+        self,
+        channel: str,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        callback: Callable[[List[str]], None],
+        error_callback: Optional[Callable[[Exception], None]] = None,
+    ) -> Future:
+        """
+        Starts translating texts without blocking.
+
+        Args:
+            channel (str): What the request is for. A newer request on the same channel replaces this one.
+            texts (List[str]): List of texts to be translated.
+            source_lang (str): The source language name.
+            target_lang (str): The target language name.
+            callback (Callable[[List[str]], None]): Called on the GUI thread with the translations.
+            error_callback (Optional[Callable[[Exception], None]], optional): Called on the GUI thread if translating fails. Defaults to None.
+
+        Returns:
+            Future: Resolves to the translations.
+        """
+        self.cancel(channel)
+
+        request_id = self.next_request_id
+        self.next_request_id += 1
+        self.latest_requests[channel] = request_id
+        self.callbacks[request_id] = (callback, error_callback)
+
+        future = self.batcher.submit(texts, source_lang, target_lang)
+        self.futures[channel] = future
+        # Runs on the batcher's thread, the signal queues the result to the GUI thread
+        future.add_done_callback(
+            lambda done_future: self.result_signal.emit(
+                channel, request_id, done_future
+            )
+        )
+        return future
+
+    def cancel(self, channel: str) -> None:
+        """
+        Makes the latest request on a channel stale, so its callback is never called.
+
+        Args:
+            channel (str): The channel.
+        """
+        future = self.futures.pop(channel, None)
+        if future is not None:
+            future.cancel()
+        self.latest_requests.pop(channel, None)
+
+    def is_pending(self, channel: str) -> bool:
+        """
+        Checks whether a channel is waiting for a translation.
+
+        Args:
+            channel (str): The channel.
+
+        Returns:
+            bool: True if the channel's latest request hasn't been delivered yet.
+        """
+        return channel in self.latest_requests
+
+    @pyqtSlot(str, int, object)
+    def deliver_result(self, channel: str, request_id: int, future: Future) -> None:
+        """
+        Calls the callback of a finished request on the GUI thread, unless the request has gone stale.
+
+        Args:
+            channel (str): The request's channel.
+            request_id (int): The request's id.
+            future (Future): The finished request.
+        """
+        callback, error_callback = self.callbacks.pop(request_id, (None, None))
+
+        if self.latest_requests.get(channel) != request_id or future.cancelled():
+            return
+        del self.latest_requests[channel]
+        self.futures.pop(channel, None)
+
+        exception = future.exception()
+        try:
+            if exception is None:
+                callback(future.result())
+            else:
+                print(f"Error translating: {exception}")
+                if error_callback is not None:
+                    error_callback(exception)
+        except RuntimeError as e:
+            # The widget waiting for the translation was deleted in the meantime
+            print(f"Couldn't show translation: {e}")
+
+    def close(self) -> None:
+        """
+        Cancels every request and stops the background thread.
+        """
+        for channel in list(self.futures):
+            self.cancel(channel)
+        self.batcher.close()
@@ -1,23 +1,32 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
-from dotenv import load_dotenv
-import deepl
+from deep_l.resilience import ResilientBackend
+from deep_l.translation_backends import (
+    DeepLBackend,
+    GlossaryBackend,
+    TranslationBackend,
+)
+from deep_l.translation_batcher import MAX_CONCURRENT_REQUESTS, chunk_texts
+from deep_l.translation_cache import TranslationCache, normalise_text
 
+DOTENV_PATH = Path("deep_l/.env")
 
-# Retrieving API key
-dotenv_path = Path("deep_l/.env")
-load_dotenv(dotenv_path=dotenv_path)
-DEEPL_AUTH_KEY = os.getenv("DEEPL_AUTH_KEY")
+# Which backend `load_translator` uses, set with the TRANSLATION_BACKEND environment variable
+DEEPL_BACKEND = "deepl"
+GLOSSARY_BACKEND = "glossary"
+DEFAULT_BACKEND = DEEPL_BACKEND
 
 
 class Translator:
     """
-    A wrapper class around the DeepL API to translate text between various languages.
+    A wrapper class around the DeepL API (or another translation backend) to translate text between various languages.
 
     Attributes:
-        translator (deepl.Translator): An instance of the DeepL Translator.
+        backend (TranslationBackend): The backend that translation requests are sent to.
+        cache (Optional[TranslationCache]): The cache of earlier translations, if caching.
         source_language_codes (dict): A dictionary mapping language names to their DeepL source language codes.
         target_language_codes (dict): A dictionary mapping language names to their DeepL target language codes.
 
@@ -25,14 +34,22 @@ class Translator:
         DeepL API documentation: https://developers.deepl.com/docs/api-reference/translate
     """
 
-    def __init__(self, auth_key: str) -> None:
+    def __init__(
+        self,
+        auth_key: Optional[str] = None,
+        cache: Optional[TranslationCache] = None,
+        backend: Optional[TranslationBackend] = None,
+    ) -> None:
         """
-        Initializes the Translator class with the provided authentication key.
+        Initializes the Translator class with the provided authentication key or translation backend.
 
         Args:
-            auth_key (str): The API key for authenticating with the DeepL API.
+            auth_key (Optional[str], optional): The API key for authenticating with the DeepL API, if no backend is given. Defaults to None.
+            cache (Optional[TranslationCache], optional): A cache of earlier translations to use. Defaults to None, for no caching.
+            backend (Optional[TranslationBackend], optional): The backend to translate with. Defaults to None, for DeepL.
         """
-        self.translator = deepl.Translator(auth_key)
+        self.backend = backend if backend is not None else DeepLBackend(auth_key)
+        self.cache = cache
 
         # Translation goes from a source language (which is often the learner's "target language", the language of their study material) to a target language
         self.source_language_codes = {
@@ -115,6 +132,9 @@ class Translator:
         """
         Translates a list of texts from the source language to the target language.
 
+        Texts are normalised (see `normalise_text`) first. If a cache is set, cached translations are reused
+        and only the remaining unique texts are sent to DeepL.
+
         Args:
             texts (List[str]): List of texts to be translated.
             source_lang (str): The source language name.
@@ -124,12 +144,15 @@ class Translator:
 
         Returns:
             List[str]: List of translated texts.
+
+        Raises:
+            Exception: The backend's error, if a request failed (see `request_chunk`). Nothing is cached then.
         """
         if not all(isinstance(text, str) for text in texts):
             raise ValueError("All items in the 'texts' list must be strings.")
 
-        # Removing soft hyphens
-        texts = [text.replace("­", "") for text in texts]
+        # Removing soft hyphens and extra whitespace
+        texts = [normalise_text(text) for text in texts]
 
         source_lang_code = self.source_language_codes.get(source_lang)
         target_lang_code = self.target_language_codes.get(target_lang)
@@ -137,35 +160,173 @@ class Translator:
         if not source_lang_code or not target_lang_code:
             raise ValueError(f"Invalid source or target language code provided.")
 
-        try:
-            # Call the DeepL API
-            results = self.translator.translate_text(
-                text=texts,
-                source_lang=source_lang_code,
-                target_lang=target_lang_code,
-                split_sentences=split_sentences,
-                formality=formality,
+        if self.cache is None:
+            return self.request_translations(
+                texts, source_lang_code, target_lang_code, split_sentences, formality
+            )
+
+        keys = [
+            (text, source_lang_code, target_lang_code, formality, split_sentences)
+            for text in texts
+        ]
+        translations = self.cache.get_many(keys)
+
+        # Only translate each missing text once, e.g. repeated phrases within an episode
+        missing_keys = [key for key in dict.fromkeys(keys) if key not in translations]
+        if missing_keys:
+            new_translations = dict(
+                zip(
+                    missing_keys,
+                    self.request_translations(
+                        [key[0] for key in missing_keys],
+                        source_lang_code,
+                        target_lang_code,
+                        split_sentences,
+                        formality,
+                    ),
+                )
+            )
+            self.cache.put_many(new_translations)
+            translations.update(new_translations)
+
+        return [translations[key] for key in keys]
+
+    def request_translations(
+        self,
+        texts: List[str],
+        source_lang_code: str,
+        target_lang_code: str,
+        split_sentences: str,
+        formality: str,
+    ) -> List[str]:
+        """
+        Sends texts to the DeepL API to be translated.
+
+        The texts are split into chunks within the API's per-request limits, which are sent concurrently.
+
+        Args:
+            texts (List[str]): List of texts to be translated.
+            source_lang_code (str): The DeepL source language code.
+            target_lang_code (str): The DeepL target language code.
+            split_sentences (str): Sentence splitting option for translation.
+            formality (str): Formality level for the translations.
+
+        Returns:
+            List[str]: List of translated texts.
+
+        Raises:
+            Exception: The backend's error, if any chunk's request failed.
+        """
+        if not texts:
+            return []
+
+        def request_chunk(chunk: List[str]) -> List[str]:
+            return self.request_chunk(
+                chunk, source_lang_code, target_lang_code, split_sentences, formality
             )
 
-            # Extract text from results
-            translated_texts = [result.text for result in results]
+        chunks = chunk_texts(texts)
+        if len(chunks) == 1:
+            return request_chunk(chunks[0])
+
+        with ThreadPoolExecutor(
+            max_workers=min(MAX_CONCURRENT_REQUESTS, len(chunks))
+        ) as executor:
+            # map keeps the chunks in order
+            chunk_translations = list(executor.map(request_chunk, chunks))
 
-            return translated_texts
+        return [
+            translation
+            for translations in chunk_translations
+            for translation in translations
+        ]
 
-        except deepl.DeepLException as e:
-            print(f"DeepL API error: {e}")
-            return [""] * len(texts)
+    def request_chunk(
+        self,
+        texts: List[str],
+        source_lang_code: str,
+        target_lang_code: str,
+        split_sentences: str,
+        formality: str,
+    ) -> List[str]:
+        """
+        Sends a single translation request to the backend.
+
+        Args:
+            See `request_translations`. The texts must fit in one request (see `chunk_texts`).
+
+        Returns:
+            List[str]: List of translated texts.
+
+        Raises:
+            Exception: The backend's error, e.g. once a `ResilientBackend` has run out of retries. Failures aren't
+                hidden behind empty translations, so callers can show them.
+        """
+        try:
+            return self.backend.translate(
+                texts, source_lang_code, target_lang_code, split_sentences, formality
+            )
         except Exception as e:
-            print(f"Unexpected error: {e}")
-            return [""] * len(texts)
+            print(f"Translation error ({type(self.backend).__name__}): {e}")
+            raise
 
 
-def load_translator():
+def load_environment() -> None:
+    """
+    Loads the settings in "deep_l/.env" (e.g. the DeepL API key) into the environment.
+    Settings already in the environment are kept, so they can be overridden, e.g. in tests.
     """
-    Loads a Translator instance with a DeepL API key.
+    from dotenv import load_dotenv
+
+    load_dotenv(dotenv_path=DOTENV_PATH)
+
+
+def load_backend(backend_name: Optional[str] = None) -> TranslationBackend:
+    """
+    Creates the translation backend chosen in the environment.
+
+    The environment variables used are:
+    - TRANSLATION_BACKEND: "deepl" (the default) or "glossary", for offline word-by-word translation.
+    - DEEPL_AUTH_KEY: The DeepL API key.
+    - DEEPL_SERVER_URL: A different server for DeepL requests, e.g. a local `DeepLStandInServer`.
+
+    DeepL requests are rate limited, retried and circuit broken by a `ResilientBackend`.
+
+    Args:
+        backend_name (Optional[str], optional): The backend to use instead of TRANSLATION_BACKEND. Defaults to None.
+
+    Returns:
+        TranslationBackend: The translation backend.
+    """
+    load_environment()
+    backend_name = backend_name or os.getenv("TRANSLATION_BACKEND", DEFAULT_BACKEND)
+
+    if backend_name == GLOSSARY_BACKEND:
+        return GlossaryBackend()
+    if backend_name != DEEPL_BACKEND:
+        print(f"Unknown translation backend {backend_name}, using DeepL.")
+
+    # Retries are left to the resilient backend, which also rate limits and stops requests during outages
+    return ResilientBackend(
+        DeepLBackend(
+            os.getenv("DEEPL_AUTH_KEY"),
+            server_url=os.getenv("DEEPL_SERVER_URL"),
+            max_sdk_retries=0,
+        )
+    )
+
+
+def load_translator(backend_name: Optional[str] = None) -> Translator:
+    """
+    Loads a Translator instance with the backend chosen in the environment, caching translations on disk.
+
+    Args:
+        backend_name (Optional[str], optional): The backend to use, see `load_backend`. Defaults to None.
 
     Returns:
         Translator: An instance of the Translator class.
     """
-    translator = Translator(DEEPL_AUTH_KEY)
+    translator = Translator(
+        backend=load_backend(backend_name), cache=TranslationCache()
+    )
     return translator
@@ -0,0 +1,747 @@
+import hashlib
+import html
+import json
+import re
+import sqlite3
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from flashcards.flashcard_store import (
+    HTML_TAG_PATTERN,
+    SOUND_REFERENCE_PATTERN,
+    FlashcardStore,
+    hash_files,
+    media_file_name,
+)
+
+DEFAULT_PACKAGE_FOLDER = Path("../media/flashcards/packages")
+
+# Note: "_languages_" is used to be able to find created media easily in Anki's media folder
+MEDIA_PREFIX = "_languages_"
+FIELD_SEPARATOR = "\x1f"
+DEFAULT_NOTE_TYPE_NAME = "Languages (AVI)"
+
+# Audio fields are shown as Anki [sound:...] references, other media fields as pictures
+SOUND_FIELD_NAMES = re.compile(r"audio|sound", re.IGNORECASE)
+
+# The schema of Anki collections (version 11), which every Anki version can import
+ANKI_SCHEMA = """
+    CREATE TABLE col (
+        id INTEGER PRIMARY KEY, crt INTEGER NOT NULL, mod INTEGER NOT NULL, scm INTEGER NOT NULL,
+        ver INTEGER NOT NULL, dty INTEGER NOT NULL, usn INTEGER NOT NULL, ls INTEGER NOT NULL,
+        conf TEXT NOT NULL, models TEXT NOT NULL, decks TEXT NOT NULL, dconf TEXT NOT NULL, tags TEXT NOT NULL
+    );
+    CREATE TABLE notes (
+        id INTEGER PRIMARY KEY, guid TEXT NOT NULL, mid INTEGER NOT NULL, mod INTEGER NOT NULL,
+        usn INTEGER NOT NULL, tags TEXT NOT NULL, flds TEXT NOT NULL, sfld TEXT NOT NULL,
+        csum INTEGER NOT NULL, flags INTEGER NOT NULL, data TEXT NOT NULL
+    );
+    CREATE TABLE cards (
+        id INTEGER PRIMARY KEY, nid INTEGER NOT NULL, did INTEGER NOT NULL, ord INTEGER NOT NULL,
+        mod INTEGER NOT NULL, usn INTEGER NOT NULL, type INTEGER NOT NULL, queue INTEGER NOT NULL,
+        due INTEGER NOT NULL, ivl INTEGER NOT NULL, factor INTEGER NOT NULL, reps INTEGER NOT NULL,
+        lapses INTEGER NOT NULL, left INTEGER NOT NULL, odue INTEGER NOT NULL, odid INTEGER NOT NULL,
+        flags INTEGER NOT NULL, data TEXT NOT NULL
+    );
+    CREATE TABLE revlog (
+        id INTEGER PRIMARY KEY, cid INTEGER NOT NULL, usn INTEGER NOT NULL, ease INTEGER NOT NULL,
+        ivl INTEGER NOT NULL, lastIvl INTEGER NOT NULL, factor INTEGER NOT NULL, time INTEGER NOT NULL,
+        type INTEGER NOT NULL
+    );
+    CREATE TABLE graves (usn INTEGER NOT NULL, oid INTEGER NOT NULL, type INTEGER NOT NULL);
+    CREATE INDEX ix_notes_usn ON notes (usn);
+    CREATE INDEX ix_cards_usn ON cards (usn);
+    CREATE INDEX ix_revlog_usn ON revlog (usn);
+    CREATE INDEX ix_cards_nid ON cards (nid);
+    CREATE INDEX ix_cards_sched ON cards (did, queue, due);
+    CREATE INDEX ix_revlog_cid ON revlog (cid);
+    CREATE INDEX ix_notes_csum ON notes (csum);
+    """
+
+# What the packager remembers between builds, so rebuilds only add new and edited flashcards. "deck" is the Anki deck name
+STATE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS state.builds (
+        deck TEXT PRIMARY KEY,
+        built_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS state.packaged_notes (
+        deck TEXT NOT NULL,
+        flashcard_id INTEGER NOT NULL,
+        note_id INTEGER NOT NULL,
+        PRIMARY KEY (deck, flashcard_id)
+    );
+    CREATE TABLE IF NOT EXISTS state.note_media (
+        deck TEXT NOT NULL,
+        flashcard_id INTEGER NOT NULL,
+        package_name TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS state.note_media_deck ON note_media (deck, flashcard_id);
+    CREATE TABLE IF NOT EXISTS state.incomplete_notes (
+        deck TEXT NOT NULL,
+        flashcard_id INTEGER NOT NULL,
+        PRIMARY KEY (deck, flashcard_id)
+    );
+    CREATE TABLE IF NOT EXISTS state.media_files (
+        source TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        modified_ns INTEGER NOT NULL,
+        package_name TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS state.media_files_name ON media_files (package_name);
+    """
+
+
+def stable_id(name: str) -> int:
+    """
+    Creates an Anki id that stays the same between builds, so re-importing a package updates the same deck and note type.
+
+    Args:
+        name (str): What the id is for, e.g. the deck name.
+
+    Returns:
+        int: An id between 2^30 and 2^31, as Anki recommends for ids that aren't timestamps.
+    """
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+    return (1 << 30) + int(digest[:8], 16) % (1 << 30)
+
+
+def strip_html(text: str) -> str:
+    """
+    Removes HTML formatting from a field, as Anki does for its sort field and duplicate checksums.
+
+    Args:
+        text (str): The field's data.
+
+    Returns:
+        str: The plain text.
+    """
+    return html.unescape(HTML_TAG_PATTERN.sub("", text)).strip()
+
+
+def field_checksum(text: str) -> int:
+    """
+    Calculates Anki's checksum of a note's first field, used to find duplicate notes.
+
+    Args:
+        text (str): The first field's data.
+
+    Returns:
+        int: The checksum.
+    """
+    return int(hashlib.sha1(strip_html(text).encode("utf-8")).hexdigest()[:8], 16)
+
+
+def create_note_type(
+    note_type_id: int,
+    note_type_name: str,
+    fields: List[str],
+    media_fields: List[str],
+    deck_id: int,
+) -> dict:
+    """
+    Creates a simple Anki note type for the flashcard fields, with the first field and media on the front.
+
+    The card layout can be changed in Anki after importing.
+
+    Args:
+        note_type_id (int): The note type's id.
+        note_type_name (str): The note type's name.
+        fields (List[str]): The flashcard fields, in order.
+        media_fields (List[str]): The fields holding media file references.
+        deck_id (int): The deck new cards go into.
+
+    Returns:
+        dict: The note type, as stored in an Anki collection.
+    """
+    front_parts = [f"{{{{{fields[0]}}}}}"]
+    back_parts = ["{{FrontSide}}", '<hr id="answer">']
+    for field_name in fields[1:]:
+        if field_name not in media_fields:
+            back_parts.append(
+                f"{{{{#{field_name}}}}}<div>{{{{{field_name}}}}}</div>{{{{/{field_name}}}}}"
+            )
+    for field_name in media_fields:
+        if SOUND_FIELD_NAMES.search(field_name):
+            front_parts.append(f"{{{{{field_name}}}}}")
+        else:
+            front_parts.append(
+                f'{{{{#{field_name}}}}}<div><img src="{{{{{field_name}}}}}"></div>{{{{/{field_name}}}}}'
+            )
+
+    return {
+        "id": note_type_id,
+        "name": note_type_name,
+        "type": 0,
+        "mod": int(time.time()),
+        "usn": -1,
+        "sortf": 0,
+        "did": deck_id,
+        "tmpls": [
+            {
+                "name": "Card 1",
+                "ord": 0,
+                "qfmt": "\n".join(front_parts),
+                "afmt": "\n".join(back_parts),
+                "did": None,
+                "bqfmt": "",
+                "bafmt": "",
+            }
+        ],
+        "flds": [
+            {
+                "name": field_name,
+                "ord": index,
+                "sticky": False,
+                "rtl": False,
+                "font": "Arial",
+                "size": 20,
+                "media": [],
+            }
+            for index, field_name in enumerate(fields)
+        ],
+        "css": ".card { font-family: arial; font-size: 20px; text-align: center; }",
+        "latexPre": "\\documentclass[12pt]{article}\n\\begin{document}\n",
+        "latexPost": "\\end{document}",
+        "tags": [],
+        "vers": [],
+        # Cards are made when any field on the front has data
+        "req": [
+            [
+                0,
+                "any",
+                [0] + [fields.index(field_name) for field_name in media_fields],
+            ]
+        ],
+    }
+
+
+def create_deck(deck_id: int, deck_name: str) -> dict:
+    """
+    Creates an Anki deck.
+
+    Args:
+        deck_id (int): The deck's id.
+        deck_name (str): The deck's name in Anki.
+
+    Returns:
+        dict: The deck, as stored in an Anki collection.
+    """
+    return {
+        "id": deck_id,
+        "name": deck_name,
+        "desc": "",
+        "mod": int(time.time()),
+        "usn": -1,
+        "dyn": 0,
+        "conf": 1,
+        "collapsed": False,
+        "extendNew": 10,
+        "extendRev": 50,
+        "newToday": [0, 0],
+        "revToday": [0, 0],
+        "lrnToday": [0, 0],
+        "timeToday": [0, 0],
+    }
+
+
+class DeckPackager:
+    """
+    Builds Anki .apkg packages straight from the flashcard store, so decks no longer need importing from CSV
+    and their media copying into Anki by hand.
+
+    Each Anki deck has a working Anki collection in the package folder, which rebuilds only add new (and edited) flashcards
+    to. Collections are kept per Anki deck name rather than per deck, as the same deck is packaged under different
+    names (and with different media) in AVI and Text mode.
+    Media files are renamed after a hash of their contents, so identical screenshots and audio are stored once, and
+    files are streamed into the package without loading them into memory.
+
+    Attributes:
+        store (FlashcardStore): The flashcards to package.
+        fields (List[str]): The flashcard fields, in order.
+        media_folders (Dict[str, Path]): The folder where each media field's files are saved.
+        package_folder (Path): Where the packages and working collections are saved.
+        note_type_name (str): The name of the Anki note type.
+    """
+
+    def __init__(
+        self,
+        store: FlashcardStore,
+        fields: List[str],
+        media_folders: Optional[Dict[str, Path]] = None,
+        package_folder: Path = DEFAULT_PACKAGE_FOLDER,
+        note_type_name: str = DEFAULT_NOTE_TYPE_NAME,
+    ) -> None:
+        """
+        Initialises the deck packager.
+
+        Args:
+            store (FlashcardStore): The flashcards to package.
+            fields (List[str]): The flashcard fields, in order.
+            media_folders (Optional[Dict[str, Path]], optional): The folder where each media field's files are saved.
+                                                                 Defaults to None, to use the store's media folders.
+            package_folder (Path, optional): Where packages are saved. Defaults to DEFAULT_PACKAGE_FOLDER.
+            note_type_name (str, optional): The name of the Anki note type. Defaults to DEFAULT_NOTE_TYPE_NAME.
+        """
+        self.store = store
+        self.fields = fields
+        if media_folders is None:
+            media_folders = store.media_folders
+        self.media_folders = {
+            field_name: Path(folder) for field_name, folder in media_folders.items()
+        }
+        self.package_folder = Path(package_folder)
+        self.note_type_name = note_type_name
+
+    def collection_file(self, anki_deck_name: str) -> Path:
+        """
+        Gets the path of an Anki deck's working collection.
+
+        Args:
+            anki_deck_name (str): The deck's name in Anki.
+
+        Returns:
+            Path: The collection file.
+        """
+        return self.package_folder / f"{anki_deck_name}.anki2"
+
+    def open_collection(self, anki_deck_name: str) -> sqlite3.Connection:
+        """
+        Opens an Anki deck's working collection, with the packager's state attached as "state".
+
+        The collection is created (again) if it doesn't exist or the flashcard fields have changed.
+
+        Args:
+            anki_deck_name (str): The deck's name in Anki.
+
+        Returns:
+            sqlite3.Connection: The connection to the collection.
+        """
+        self.package_folder.mkdir(parents=True, exist_ok=True)
+        collection_file = self.collection_file(anki_deck_name)
+
+        connection = sqlite3.connect(str(collection_file))
+        connection.execute(
+            "ATTACH DATABASE ? AS state",
+            (str(self.package_folder / "package_state.sqlite3"),),
+        )
+        connection.executescript(STATE_SCHEMA)
+
+        note_type_id = stable_id(f"{self.note_type_name}\n" + "\n".join(self.fields))
+        row = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'col'"
+        ).fetchone()
+        if row is not None:
+            models = json.loads(
+                connection.execute("SELECT models FROM col").fetchone()[0]
+            )
+            if str(note_type_id) in models:
+                return connection
+
+            # The fields have changed, so every flashcard needs packaging again
+            connection.close()
+            collection_file.unlink()
+            connection = sqlite3.connect(str(collection_file))
+            connection.execute(
+                "ATTACH DATABASE ? AS state",
+                (str(self.package_folder / "package_state.sqlite3"),),
+            )
+
+        self.create_collection(connection, anki_deck_name, note_type_id)
+        return connection
+
+    def create_collection(
+        self,
+        connection: sqlite3.Connection,
+        anki_deck_name: str,
+        note_type_id: int,
+    ) -> None:
+        """
+        Creates an empty Anki collection with the deck and note type, and forgets what was packaged into it.
+
+        Args:
+            connection (sqlite3.Connection): The connection to the new collection.
+            anki_deck_name (str): The deck's name in Anki.
+            note_type_id (int): The note type's id.
+        """
+        deck_id = stable_id(anki_deck_name)
+        media_fields = [field for field in self.fields if field in self.media_folders]
+        models = {
+            str(note_type_id): create_note_type(
+                note_type_id, self.note_type_name, self.fields, media_fields, deck_id
+            )
+        }
+        decks = {
+            "1": create_deck(1, "Default"),
+            str(deck_id): create_deck(deck_id, anki_deck_name),
+        }
+        deck_options = {
+            "1": {
+                "id": 1,
+                "name": "Default",
+                "mod": 0,
+                "usn": 0,
+                "maxTaken": 60,
+                "autoplay": True,
+                "timer": 0,
+                "replayq": True,
+                "dyn": False,
+                "new": {
+                    "bury": True,
+                    "delays": [1, 10],
+                    "initialFactor": 2500,
+                    "ints": [1, 4, 7],
+                    "order": 1,
+                    "perDay": 20,
+                    "separate": True,
+                },
+                "lapse": {
+                    "delays": [10],
+                    "leechAction": 0,
+                    "leechFails": 8,
+                    "minInt": 1,
+                    "mult": 0,
+                },
+                "rev": {
+                    "bury": True,
+                    "ease4": 1.3,
+                    "fuzz": 0.05,
+                    "ivlFct": 1,
+                    "maxIvl": 36500,
+                    "minSpace": 1,
+                    "perDay": 100,
+                },
+            }
+        }
+        configuration = {
+            "activeDecks": [1],
+            "curDeck": 1,
+            "newSpread": 0,
+            "collapseTime": 1200,
+            "timeLim": 0,
+            "estTimes": True,
+            "dueCounts": True,
+            "curModel": str(note_type_id),
+            "nextPos": 1,
+            "sortType": "noteFld",
+            "sortBackwards": False,
+            "addToCur": True,
+        }
+        now = int(time.time())
+
+        with connection:
+            connection.executescript(ANKI_SCHEMA)
+            connection.execute(
+                "INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, '{}')",
+                (
+                    now - now % 86400,
+                    now * 1000,
+                    now * 1000,
+                    json.dumps(configuration),
+                    json.dumps(models),
+                    json.dumps(decks),
+                    json.dumps(deck_options),
+                ),
+            )
+            for table in ["builds", "packaged_notes", "note_media", "incomplete_notes"]:
+                connection.execute(
+                    f"DELETE FROM state.{table} WHERE deck = ?", (anki_deck_name,)
+                )
+
+    def package_media(
+        self, connection: sqlite3.Connection, field_name: str, field_data: str
+    ) -> Optional[str]:
+        """
+        Finds the content-hashed name a media file is packaged under. Files are only hashed again if they've changed.
+
+        Args:
+            connection (sqlite3.Connection): The connection to the working collection.
+            field_name (str): The media field's name.
+            field_data (str): The media field's data, e.g. "[sound:_languages_20240101_120000.mp3]".
+
+        Returns:
+            Optional[str]: The packaged file name, or None if the file is missing.
+        """
+        file_name = media_file_name(field_data)
+        if not file_name:
+            return None
+        source = self.media_folders[field_name] / file_name
+        if not source.is_file():
+            print(f"Media file {source} is missing, so can't be packaged.")
+            return None
+
+        stat = source.stat()
+        row = connection.execute(
+            "SELECT size, modified_ns, package_name FROM state.media_files WHERE source = ?",
+            (str(source),),
+        ).fetchone()
+        if row is not None and row[:2] == (stat.st_size, stat.st_mtime_ns):
+            return row[2]
+
+        package_name = MEDIA_PREFIX + hash_files([source])[:20] + source.suffix.lower()
+        connection.execute(
+            "INSERT OR REPLACE INTO state.media_files VALUES (?, ?, ?, ?)",
+            (str(source), stat.st_size, stat.st_mtime_ns, package_name),
+        )
+        return package_name
+
+    def package_fields(
+        self, connection: sqlite3.Connection, card: Dict[str, str]
+    ) -> Tuple[List[str], List[str], bool]:
+        """
+        Gets a flashcard's field values for Anki, with media references renamed to their packaged names.
+
+        Args:
+            connection (sqlite3.Connection): The connection to the working collection.
+            card (Dict[str, str]): The flashcard's fields.
+
+        Returns:
+            Tuple[List[str], List[str], bool]: The field values in order, the packaged media file names, and whether
+                any media file was missing (its field is left blank).
+        """
+        values = []
+        media_names = []
+        media_missing = False
+        for field_name in self.fields:
+            field_data = card.get(field_name, "")
+            if field_name in self.media_folders and field_data:
+                package_name = self.package_media(connection, field_name, field_data)
+                if package_name is None:
+                    field_data = ""
+                    media_missing = True
+                else:
+                    media_names.append(package_name)
+                    if SOUND_REFERENCE_PATTERN.fullmatch(field_data):
+                        field_data = f"[sound:{package_name}]"
+                    else:
+                        field_data = package_name
+            values.append(field_data)
+        return values, media_names, media_missing
+
+    def build_package(
+        self,
+        deck: str,
+        anki_deck_name: Optional[str] = None,
+        output_file: Optional[Path] = None,
+    ) -> Path:
+        """
+        Brings a deck's working collection up to date and writes it, with its media, to an .apkg package.
+
+        Only flashcards added or edited since the last build are processed. Flashcards deleted from the deck
+        (or moved to another deck) are removed from the package.
+
+        Args:
+            deck (str): The deck name.
+            anki_deck_name (Optional[str], optional): The deck's name in Anki. Defaults to None, for the deck name.
+            output_file (Optional[Path], optional): Where to save the package. Defaults to None, for
+                                                    "<Anki deck name>.apkg" in the package folder.
+
+        Returns:
+            Path: The package file.
+        """
+        anki_deck_name = anki_deck_name or deck
+        output_file = Path(
+            output_file or self.package_folder / f"{anki_deck_name}.apkg"
+        )
+        build_started_at = time.time()
+
+        connection = self.open_collection(anki_deck_name)
+        try:
+            with connection:
+                self.update_collection(connection, deck, anki_deck_name)
+                connection.execute(
+                    "INSERT OR REPLACE INTO state.builds VALUES (?, ?)",
+                    (anki_deck_name, build_started_at),
+                )
+            media_files = connection.execute(
+                """
+                SELECT media.package_name, MIN(media_files.source)
+                FROM (SELECT DISTINCT package_name FROM state.note_media WHERE deck = ?) AS media
+                JOIN state.media_files ON media_files.package_name = media.package_name
+                GROUP BY media.package_name
+                ORDER BY media.package_name
+                """,
+                (anki_deck_name,),
+            ).fetchall()
+        finally:
+            connection.close()
+
+        write_package(self.collection_file(anki_deck_name), media_files, output_file)
+        return output_file
+
+    def update_collection(
+        self, connection: sqlite3.Connection, deck: str, anki_deck_name: str
+    ) -> None:
+        """
+        Adds a deck's new and edited flashcards to its Anki deck's working collection, and removes deleted ones.
+
+        Flashcards packaged while some of their media was missing (e.g. still being encoded, or failing to) are
+        packaged again on every build until all their media is found.
+
+        Args:
+            connection (sqlite3.Connection): The connection to the working collection, in a transaction.
+            deck (str): The deck name.
+            anki_deck_name (str): The deck's name in Anki.
+        """
+        row = connection.execute(
+            "SELECT built_at FROM state.builds WHERE deck = ?", (anki_deck_name,)
+        ).fetchone()
+        last_built_at = row[0] if row else 0
+
+        packaged_notes = dict(
+            connection.execute(
+                "SELECT flashcard_id, note_id FROM state.packaged_notes WHERE deck = ?",
+                (anki_deck_name,),
+            ).fetchall()
+        )
+        incomplete_ids = {
+            row[0]
+            for row in connection.execute(
+                "SELECT flashcard_id FROM state.incomplete_notes WHERE deck = ?",
+                (anki_deck_name,),
+            )
+        }
+        removed_ids = set(packaged_notes) - set(self.store.flashcard_ids(deck))
+        for flashcard_id in removed_ids:
+            note_id = packaged_notes.pop(flashcard_id)
+            connection.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+            connection.execute("DELETE FROM cards WHERE nid = ?", (note_id,))
+            connection.execute(
+                "DELETE FROM state.packaged_notes WHERE deck = ? AND flashcard_id = ?",
+                (anki_deck_name, flashcard_id),
+            )
+            connection.execute(
+                "DELETE FROM state.note_media WHERE deck = ? AND flashcard_id = ?",
+                (anki_deck_name, flashcard_id),
+            )
+            connection.execute(
+                "DELETE FROM state.incomplete_notes WHERE deck = ? AND flashcard_id = ?",
+                (anki_deck_name, flashcard_id),
+            )
+            incomplete_ids.discard(flashcard_id)
+
+        note_type_id = int(
+            next(
+                iter(
+                    json.loads(
+                        connection.execute("SELECT models FROM col").fetchone()[0]
+                    )
+                )
+            )
+        )
+        deck_id = stable_id(anki_deck_name)
+        now = int(time.time())
+        next_due = connection.execute(
+            "SELECT COALESCE(MAX(due), 0) + 1 FROM cards"
+        ).fetchone()[0]
+
+        def flashcards_to_package() -> Iterator[Tuple[int, float, Dict[str, str]]]:
+            changed_ids = set()
+            for flashcard in self.store.iterate_changed_flashcards(
+                deck, since=last_built_at
+            ):
+                changed_ids.add(flashcard[0])
+                yield flashcard
+            # Unchanged flashcards still missing media. They're already in the collection, so need no creation time
+            retry_ids = sorted(incomplete_ids - changed_ids)
+            if retry_ids:
+                for flashcard_id, card in self.store.iterate_flashcards(
+                    deck, flashcard_ids=retry_ids
+                ):
+                    yield flashcard_id, 0, card
+
+        for flashcard_id, created_at, card in flashcards_to_package():
+            values, media_names, media_missing = self.package_fields(connection, card)
+            if media_missing:
+                connection.execute(
+                    "INSERT OR IGNORE INTO state.incomplete_notes VALUES (?, ?)",
+                    (anki_deck_name, flashcard_id),
+                )
+            elif flashcard_id in incomplete_ids:
+                connection.execute(
+                    "DELETE FROM state.incomplete_notes WHERE deck = ? AND flashcard_id = ?",
+                    (anki_deck_name, flashcard_id),
+                )
+            flds = FIELD_SEPARATOR.join(values)
+            sort_field = strip_html(values[0]) if values else ""
+            checksum = field_checksum(values[0]) if values else 0
+
+            note_id = packaged_notes.get(flashcard_id)
+            if note_id is not None:
+                connection.execute(
+                    "UPDATE notes SET flds = ?, sfld = ?, csum = ?, mod = ? WHERE id = ?",
+                    (flds, sort_field, checksum, now, note_id),
+                )
+                connection.execute(
+                    "DELETE FROM state.note_media WHERE deck = ? AND flashcard_id = ?",
+                    (anki_deck_name, flashcard_id),
+                )
+            else:
+                # Anki ids are creation times in milliseconds, and must be unique
+                note_id = int(created_at * 1000)
+                while connection.execute(
+                    "SELECT 1 FROM notes WHERE id = ?", (note_id,)
+                ).fetchone():
+                    note_id += 1
+                guid = hashlib.sha1(
+                    f"{flashcard_id}:{created_at}".encode()
+                ).hexdigest()[:16]
+                connection.execute(
+                    "INSERT INTO notes VALUES (?, ?, ?, ?, -1, '', ?, ?, ?, 0, '')",
+                    (note_id, guid, note_type_id, now, flds, sort_field, checksum),
+                )
+                connection.execute(
+                    "INSERT INTO cards VALUES (?, ?, ?, 0, ?, -1, 0, 0, ?, 0, 0, 0, 0, 0, 0, 0, 0, '')",
+                    (note_id, note_id, deck_id, now, next_due),
+                )
+                next_due += 1
+                connection.execute(
+                    "INSERT INTO state.packaged_notes VALUES (?, ?, ?)",
+                    (anki_deck_name, flashcard_id, note_id),
+                )
+                packaged_notes[flashcard_id] = note_id
+
+            connection.executemany(
+                "INSERT INTO state.note_media VALUES (?, ?, ?)",
+                [
+                    (anki_deck_name, flashcard_id, package_name)
+                    for package_name in media_names
+                ],
+            )
+
+        connection.execute("UPDATE col SET mod = ?", (now * 1000,))
+
+
+def write_package(
+    collection_file: Path, media_files: List[Tuple[str, str]], output_file: Path
+) -> None:
+    """
+    Writes an .apkg package: a zip of the Anki collection, the media files (numbered) and a "media" file naming them.
+
+    Files are streamed into the zip, and media is stored uncompressed as pictures and audio are already compressed.
+    The package is written under a temporary name first, so an interrupted build never leaves a partial package behind.
+
+    Args:
+        collection_file (Path): The Anki collection.
+        media_files (List[Tuple[str, str]]): Each media file's packaged name and the file to read it from.
+        output_file (Path): Where to save the package.
+    """
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    partial_file = output_file.with_name(output_file.name + ".part")
+
+    media_names = {}
+    with zipfile.ZipFile(
+        partial_file, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True
+    ) as package:
+        package.write(collection_file, "collection.anki2")
+        for package_name, source in media_files:
+            if not Path(source).is_file():
+                print(f"Media file {source} is missing, so can't be packaged.")
+                continue
+            index = str(len(media_names))
+            package.write(source, index, compress_type=zipfile.ZIP_STORED)
+            media_names[index] = package_name
+        package.writestr("media", json.dumps(media_names))
+
+    partial_file.replace(output_file)
@@ -1,8 +1,8 @@
+import csv
 import os
 import time  # To timestamp created csvs
-from typing import Dict, List
+from typing import Dict, Iterable, List
 
-import pandas as pd  # For easy manipulation and exporting of flashcard data
 from pathlib import Path  # For writing flashcards to the "Flashcards" folder
 
 
@@ -10,10 +10,14 @@ class FlashcardCreator:
     """
     A class to manage the creation and manipulation of flashcard decks.
 
+    Flashcards are appended through a CSV writer that stays open, and each committed card is flushed and
+    synced to disk so no cards are lost if the application crashes. The number of cards is counted in memory.
+
     Attributes:
         deck_name (str): The name of the flashcard deck.
         flashcard_fields (List[str]): The names of the fields of the flashcards.
         file_path (Path): The path to the CSV file where flashcards are stored.
+        flashcard_count (int): The number of flashcards in the CSV file.
     """
 
     def __init__(self, deck_name: str, fields: List[str], output_folder: str) -> None:
@@ -28,6 +32,11 @@ class FlashcardCreator:
         self.deck_name = deck_name
         self.flashcard_fields = fields
         self.file_path = self.create_flashcard_deck(fields, output_folder)
+        self.flashcard_count = count_csv_rows(self.file_path)
+
+        # Opened when the first card is added, so decks that stay empty can be deleted without closing anything
+        self.file = None
+        self.writer = None
 
     def create_flashcard_deck(self, fields: List[str], output_folder: str) -> Path:
         """
@@ -49,7 +58,7 @@ class FlashcardCreator:
 
         # Create the file if it doesn't exist
         if not file_path.exists():
-            pd.DataFrame(columns=fields).to_csv(file_path, index=False, header=False)
+            file_path.touch()
 
         return file_path
 
@@ -60,18 +69,17 @@ class FlashcardCreator:
         Returns:
         int: The number of flashcards in the file. Returns 0 if the file does not exist.
         """
-        try:
-            with open(self.file_path, "r", encoding="utf-8") as file:
-                return sum(1 for row in file)
-        except FileNotFoundError:
+        if not self.file_path.exists():
             return 0  # Return 0 if the file doesn't exist
+        return self.flashcard_count
 
-    def add_flashcard(self, card_as_dict: Dict[str, str]) -> None:
+    def add_flashcard(self, card_as_dict: Dict[str, str], commit: bool = True) -> None:
         """
         Add a new flashcard to the CSV file.
 
         Parameters:
         card_as_dict (Dict[str, str]): A dictionary representing the flashcard - keys are field names, entries are the field data.
+        commit (bool): Whether to sync the card to disk straight away. When adding many cards, pass False and call `commit` after the last one.
         """
         assert (
             list(card_as_dict.keys()) == self.flashcard_fields
@@ -80,8 +88,59 @@ class FlashcardCreator:
             [field == "" for field in card_as_dict.values()]
         ), "All field values are empty."
 
-        new_card = pd.DataFrame([card_as_dict])
-        new_card.to_csv(self.file_path, mode="a", header=False, index=False)
+        if self.writer is None:
+            # newline="" lets the CSV writer handle line breaks inside fields
+            self.file = open(self.file_path, "a", encoding="utf-8", newline="")
+            self.writer = csv.writer(self.file, lineterminator=os.linesep)
+
+        self.writer.writerow([card_as_dict[field] for field in self.flashcard_fields])
+        self.flashcard_count += 1
+
+        if commit:
+            self.commit()
+
+    def commit(self) -> None:
+        """
+        Flush the added flashcards and sync them to disk.
+        """
+        if self.file is None:
+            return
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def rewrite_flashcards(self, cards: Iterable[Dict[str, str]]) -> None:
+        """
+        Replace every flashcard in the CSV file, e.g. after one of them was edited.
+
+        Parameters:
+        cards (Iterable[Dict[str, str]]): The flashcards, in order.
+        """
+        self.close()
+        partial_file_path = self.file_path.with_name(self.file_path.name + ".part")
+
+        with open(partial_file_path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file, lineterminator=os.linesep)
+            self.flashcard_count = 0
+            for card in cards:
+                writer.writerow(
+                    [card.get(field, "") for field in self.flashcard_fields]
+                )
+                self.flashcard_count += 1
+            file.flush()
+            os.fsync(file.fileno())
+
+        partial_file_path.replace(self.file_path)
+
+    def close(self) -> None:
+        """
+        Commit the added flashcards and close the CSV file.
+        """
+        if self.file is None:
+            return
+        self.commit()
+        self.file.close()
+        self.file = None
+        self.writer = None
 
     def retrieve_all_flashcards_created(self):
         """
@@ -90,6 +149,10 @@ class FlashcardCreator:
         Returns:
         pd.DataFrame: A DataFrame containing all flashcards. Returns an empty DataFrame if no flashcards are found or if an error occurs.
         """
+        # Only imported when needed, as pandas is slow to import
+        import pandas as pd
+
+        self.commit()
         try:
             # Read the CSV file into a DataFrame
             flashcards_df = pd.read_csv(self.file_path, encoding="utf-8")
@@ -110,6 +173,7 @@ class FlashcardCreator:
         Returns:
         bool: True if the file was successfully deleted, False otherwise.
         """
+        self.close()
         try:
             file_path = Path(self.file_path)
             # Check if the file exists
@@ -125,3 +189,20 @@ class FlashcardCreator:
                 f"An error occurred while deleting the flashcard deck {self.deck_name}: {e}"
             )
             return False
+
+
+def count_csv_rows(file_path: Path) -> int:
+    """
+    Count the rows of a CSV file, allowing for line breaks inside fields.
+
+    Parameters:
+    file_path (Path): The path to the CSV file.
+
+    Returns:
+    int: The number of rows. Returns 0 if the file does not exist.
+    """
+    try:
+        with open(file_path, "r", encoding="utf-8", newline="") as file:
+            return sum(1 for row in csv.reader(file))
+    except FileNotFoundError:
+        return 0
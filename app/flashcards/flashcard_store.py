@@ -0,0 +1,514 @@
+import csv
+import hashlib
+import html
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+DEFAULT_DATABASE_FILE = Path("../media/flashcards/flashcards.sqlite3")
+
+QUESTION_FIELD = "Question Text"
+SOUND_REFERENCE_PATTERN = re.compile(r"\[sound:(.*?)\]")
+HTML_TAG_PATTERN = re.compile(r"<[^>]+>")
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class DuplicateFlashcardError(ValueError):
+    """
+    Raised when adding a flashcard that is already in its deck.
+
+    Attributes:
+        flashcard_id (int): The id of the existing flashcard.
+    """
+
+    def __init__(self, message: str, flashcard_id: int) -> None:
+        super().__init__(message)
+        self.flashcard_id = flashcard_id
+
+
+def question_key(card: Dict[str, str]) -> Optional[str]:
+    """
+    Creates the key used to find flashcards with the same question, ignoring formatting, case and spacing.
+
+    Args:
+        card (Dict[str, str]): The flashcard's fields.
+
+    Returns:
+        Optional[str]: The key, or None if the card has no question text (so it can't be a duplicate by question).
+    """
+    text = html.unescape(HTML_TAG_PATTERN.sub(" ", card.get(QUESTION_FIELD, "")))
+    text = re.sub(r"\s+", " ", text).strip().casefold()
+    return text or None
+
+
+def media_file_name(field_data: str) -> str:
+    """
+    Gets the file name referenced by a media field, e.g. "[sound:_languages_1.mp3]" -> "_languages_1.mp3".
+
+    Args:
+        field_data (str): The media field's data.
+
+    Returns:
+        str: The file name, or "" if there is none.
+    """
+    match = SOUND_REFERENCE_PATTERN.fullmatch(field_data)
+    return match.group(1) if match else field_data
+
+
+def hash_files(files: List[Path]) -> Optional[str]:
+    """
+    Hashes the contents of media files, reading them in blocks.
+
+    Args:
+        files (List[Path]): The files to hash. Missing files are skipped.
+
+    Returns:
+        Optional[str]: The SHA-1 hex digest, or None if none of the files exist.
+    """
+    digest = hashlib.sha1()
+    hashed_any = False
+    for file in files:
+        if not file.is_file():
+            continue
+        hashed_any = True
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+    return digest.hexdigest() if hashed_any else None
+
+
+class FlashcardStore:
+    """
+    Stores flashcards in an indexed SQLite database, so they can be found, edited and exported quickly.
+
+    Each deck has a unique index on the (normalised) question text, and cards with the same media (by content hash)
+    are also treated as duplicates, so the same subtitle isn't made into a card twice.
+    Cards keep their field values as JSON, so flashcard templates can change without changing the database.
+
+    Attributes:
+        database_file (Union[Path, str]): The SQLite database file, or ":memory:" for a store that isn't saved.
+        media_folders (Dict[str, Path]): The folder where each media field's files are saved.
+    """
+
+    def __init__(
+        self,
+        database_file: Union[Path, str] = DEFAULT_DATABASE_FILE,
+        media_folders: Optional[Dict[str, Path]] = None,
+    ) -> None:
+        """
+        Opens (and if needed creates) the flashcard store.
+
+        Args:
+            database_file (Union[Path, str], optional): The SQLite database file. Defaults to DEFAULT_DATABASE_FILE.
+            media_folders (Optional[Dict[str, Path]], optional): The folder where each media field's files are saved,
+                                                                 e.g. {"Audio": Path("../media/flashcards/flashcard_audio")}.
+                                                                 Defaults to None, for no media duplicate detection.
+        """
+        self.database_file = database_file
+        self.media_folders = {
+            field_name: Path(folder)
+            for field_name, folder in (media_folders or {}).items()
+        }
+        self.lock = threading.Lock()
+
+        if database_file != ":memory:":
+            Path(database_file).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(database_file), check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS decks (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS flashcards (
+                id INTEGER PRIMARY KEY,
+                deck_id INTEGER NOT NULL REFERENCES decks (id),
+                question_key TEXT,
+                media_hash TEXT,
+                fields TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                exported_at REAL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS flashcards_deck_question
+                ON flashcards (deck_id, question_key);
+            CREATE INDEX IF NOT EXISTS flashcards_deck_media
+                ON flashcards (deck_id, media_hash);
+            """)
+        self.connection.commit()
+
+    def get_deck_id(self, deck: str) -> int:
+        """
+        Gets the id of a deck, creating the deck if needed. Must be called with the lock held.
+
+        Args:
+            deck (str): The deck name.
+
+        Returns:
+            int: The deck's id.
+        """
+        self.connection.execute(
+            "INSERT OR IGNORE INTO decks (name) VALUES (?)", (deck,)
+        )
+        return self.connection.execute(
+            "SELECT id FROM decks WHERE name = ?", (deck,)
+        ).fetchone()["id"]
+
+    def media_hash(self, card: Dict[str, str]) -> Optional[str]:
+        """
+        Hashes the contents of a flashcard's media files.
+
+        Args:
+            card (Dict[str, str]): The flashcard's fields.
+
+        Returns:
+            Optional[str]: The hash, or None if the card has no media.
+        """
+        files = [
+            folder / media_file_name(card[field_name])
+            for field_name, folder in self.media_folders.items()
+            if card.get(field_name)
+        ]
+        return hash_files(files)
+
+    def find_duplicate(
+        self,
+        deck_id: int,
+        key: Optional[str],
+        media_hash: Optional[str],
+        ignore_id: Optional[int] = None,
+    ) -> Optional[int]:
+        """
+        Finds a flashcard in a deck with the same question or media. Must be called with the lock held.
+
+        Args:
+            deck_id (int): The deck's id.
+            key (Optional[str]): The question key, see `question_key`.
+            media_hash (Optional[str]): The media hash, see `media_hash`.
+            ignore_id (Optional[int], optional): A flashcard to leave out, e.g. the one being edited. Defaults to None.
+
+        Returns:
+            Optional[int]: The id of the duplicate flashcard, or None if there is none.
+        """
+        row = self.connection.execute(
+            """
+            SELECT id FROM flashcards
+            WHERE deck_id = ? AND (question_key = ? OR media_hash = ?) AND id IS NOT ?
+            LIMIT 1
+            """,
+            (deck_id, key, media_hash, ignore_id),
+        ).fetchone()
+        return row["id"] if row else None
+
+    def add_flashcard(
+        self, deck: str, card: Dict[str, str], media_hash: Optional[str] = None
+    ) -> int:
+        """
+        Adds a flashcard to a deck.
+
+        Args:
+            deck (str): The deck name.
+            card (Dict[str, str]): The flashcard's fields.
+            media_hash (Optional[str], optional): The hash of the card's media, e.g. of its staged files while they're
+                                                  still being encoded (see `hash_files`). Defaults to None, to hash the
+                                                  card's files in the media folders.
+
+        Returns:
+            int: The new flashcard's id.
+
+        Raises:
+            DuplicateFlashcardError: If the deck already has a flashcard with the same question or media.
+        """
+        key = question_key(card)
+        if media_hash is None:
+            media_hash = self.media_hash(card)
+        now = time.time()
+
+        with self.lock, self.connection:
+            deck_id = self.get_deck_id(deck)
+            duplicate_id = self.find_duplicate(deck_id, key, media_hash)
+            if duplicate_id is not None:
+                raise DuplicateFlashcardError(
+                    f"The '{deck}' deck already has this flashcard.", duplicate_id
+                )
+            cursor = self.connection.execute(
+                """
+                INSERT INTO flashcards (deck_id, question_key, media_hash, fields, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (deck_id, key, media_hash, json.dumps(card), now, now),
+            )
+            return cursor.lastrowid
+
+    def update_flashcard(
+        self,
+        flashcard_id: int,
+        card: Dict[str, str],
+        deck: Optional[str] = None,
+        media_hash: Optional[str] = None,
+    ) -> None:
+        """
+        Edits a flashcard in place.
+
+        Args:
+            flashcard_id (int): The flashcard's id.
+            card (Dict[str, str]): The flashcard's new fields.
+            deck (Optional[str], optional): A deck to move the flashcard to. Defaults to None, to keep its deck.
+            media_hash (Optional[str], optional): The hash of the card's media, see `add_flashcard`. Defaults to None,
+                                                  to hash the card's files in the media folders.
+
+        Raises:
+            KeyError: If there is no flashcard with the id.
+            DuplicateFlashcardError: If the edit would make the flashcard a duplicate of another in its deck.
+        """
+        key = question_key(card)
+        if media_hash is None:
+            media_hash = self.media_hash(card)
+
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT deck_id FROM flashcards WHERE id = ?", (flashcard_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"No flashcard with id {flashcard_id}.")
+
+            deck_id = self.get_deck_id(deck) if deck is not None else row["deck_id"]
+            duplicate_id = self.find_duplicate(deck_id, key, media_hash, flashcard_id)
+            if duplicate_id is not None:
+                raise DuplicateFlashcardError(
+                    "Another flashcard in the deck has the same question or media.",
+                    duplicate_id,
+                )
+            self.connection.execute(
+                """
+                UPDATE flashcards
+                SET deck_id = ?, question_key = ?, media_hash = ?, fields = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (deck_id, key, media_hash, json.dumps(card), time.time(), flashcard_id),
+            )
+
+    def delete_flashcard(self, flashcard_id: int) -> None:
+        """
+        Deletes a flashcard.
+
+        Args:
+            flashcard_id (int): The flashcard's id.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM flashcards WHERE id = ?", (flashcard_id,)
+            )
+
+    def get_flashcard(self, flashcard_id: int) -> Optional[Tuple[str, Dict[str, str]]]:
+        """
+        Gets a flashcard.
+
+        Args:
+            flashcard_id (int): The flashcard's id.
+
+        Returns:
+            Optional[Tuple[str, Dict[str, str]]]: The flashcard's deck name and fields, or None if there is no such flashcard.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                """
+                SELECT decks.name, flashcards.fields FROM flashcards
+                JOIN decks ON decks.id = flashcards.deck_id
+                WHERE flashcards.id = ?
+                """,
+                (flashcard_id,),
+            ).fetchone()
+        return (row["name"], json.loads(row["fields"])) if row else None
+
+    def previous_flashcard_id(
+        self, before_id: Optional[int] = None, since: float = 0
+    ) -> Optional[int]:
+        """
+        Finds the most recently added flashcard, or the one added before a given flashcard.
+
+        Args:
+            before_id (Optional[int], optional): Find the flashcard added before this one. Defaults to None, for the latest.
+            since (float, optional): Only consider flashcards created since this time, e.g. this session. Defaults to 0.
+
+        Returns:
+            Optional[int]: The flashcard's id, or None if there is none.
+        """
+        query = "SELECT id FROM flashcards WHERE created_at >= ?"
+        parameters = [since]
+        if before_id is not None:
+            query += " AND id < ?"
+            parameters.append(before_id)
+        query += " ORDER BY id DESC LIMIT 1"
+
+        with self.lock:
+            row = self.connection.execute(query, parameters).fetchone()
+        return row["id"] if row else None
+
+    def count_flashcards(self, deck: str) -> int:
+        """
+        Counts the flashcards in a deck.
+
+        Args:
+            deck (str): The deck name.
+
+        Returns:
+            int: The number of flashcards.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                """
+                SELECT COUNT(*) AS count FROM flashcards
+                JOIN decks ON decks.id = flashcards.deck_id
+                WHERE decks.name = ?
+                """,
+                (deck,),
+            ).fetchone()
+        return row["count"]
+
+    def iterate_flashcards(
+        self,
+        deck: str,
+        only_unexported: bool = False,
+        flashcard_ids: Optional[List[int]] = None,
+    ) -> Iterator[Tuple[int, Dict[str, str]]]:
+        """
+        Iterates over a deck's flashcards in the order they were added, without loading them all into memory.
+
+        Args:
+            deck (str): The deck name.
+            only_unexported (bool, optional): Only include flashcards that haven't been exported yet. Defaults to False.
+            flashcard_ids (Optional[List[int]], optional): Only include these flashcards. Defaults to None, for all of them.
+
+        Yields:
+            Tuple[int, Dict[str, str]]: Each flashcard's id and fields.
+        """
+        query = """
+            SELECT flashcards.id, flashcards.fields FROM flashcards
+            JOIN decks ON decks.id = flashcards.deck_id
+            WHERE decks.name = ?
+            """
+        parameters = [deck]
+        if only_unexported:
+            query += " AND flashcards.exported_at IS NULL"
+        if flashcard_ids is not None:
+            query += " AND flashcards.id IN (SELECT value FROM json_each(?))"
+            parameters.append(json.dumps(flashcard_ids))
+        query += " ORDER BY flashcards.id"
+
+        # A separate cursor, so other queries can run while iterating
+        cursor = self.connection.cursor()
+        for row in cursor.execute(query, parameters):
+            yield row["id"], json.loads(row["fields"])
+
+    def iterate_changed_flashcards(
+        self, deck: str, since: float = 0
+    ) -> Iterator[Tuple[int, float, Dict[str, str]]]:
+        """
+        Iterates over a deck's flashcards added or edited since a given time, in the order they were added.
+
+        Args:
+            deck (str): The deck name.
+            since (float, optional): Only include flashcards updated after this time. Defaults to 0, for all of them.
+
+        Yields:
+            Tuple[int, float, Dict[str, str]]: Each flashcard's id, creation time and fields.
+        """
+        query = """
+            SELECT flashcards.id, flashcards.created_at, flashcards.fields FROM flashcards
+            JOIN decks ON decks.id = flashcards.deck_id
+            WHERE decks.name = ? AND flashcards.updated_at > ?
+            ORDER BY flashcards.id
+            """
+        cursor = self.connection.cursor()
+        for row in cursor.execute(query, (deck, since)):
+            yield row["id"], row["created_at"], json.loads(row["fields"])
+
+    def flashcard_ids(self, deck: str) -> List[int]:
+        """
+        Lists the ids of a deck's flashcards.
+
+        Args:
+            deck (str): The deck name.
+
+        Returns:
+            List[int]: The flashcards' ids, in the order they were added.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                """
+                SELECT flashcards.id FROM flashcards
+                JOIN decks ON decks.id = flashcards.deck_id
+                WHERE decks.name = ?
+                ORDER BY flashcards.id
+                """,
+                (deck,),
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def export_csv(
+        self,
+        deck: str,
+        file_path: Path,
+        fields: List[str],
+        only_unexported: bool = False,
+        flashcard_ids: Optional[List[int]] = None,
+    ) -> int:
+        """
+        Streams a deck's flashcards to a CSV file that Anki can import, and marks them as exported.
+
+        The file is written under a temporary name first, so an interrupted export never leaves a partial file behind.
+
+        Args:
+            deck (str): The deck name.
+            file_path (Path): Where to save the CSV file.
+            fields (List[str]): The fields to export, in the order of the Anki note type's fields.
+            only_unexported (bool, optional): Only export flashcards that haven't been exported yet. Defaults to False.
+            flashcard_ids (Optional[List[int]], optional): Only export these flashcards. Defaults to None, for all of them.
+
+        Returns:
+            int: The number of flashcards exported.
+        """
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        partial_file = file_path.with_name(file_path.name + ".part")
+
+        exported_ids = []
+        with open(partial_file, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, lineterminator=os.linesep)
+            for flashcard_id, card in self.iterate_flashcards(
+                deck, only_unexported, flashcard_ids
+            ):
+                writer.writerow([card.get(field, "") for field in fields])
+                exported_ids.append(flashcard_id)
+        partial_file.replace(file_path)
+
+        self.mark_exported(exported_ids)
+        return len(exported_ids)
+
+    def mark_exported(self, flashcard_ids: List[int]) -> None:
+        """
+        Records that flashcards have been exported.
+
+        Args:
+            flashcard_ids (List[int]): The flashcards' ids.
+        """
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "UPDATE flashcards SET exported_at = ? WHERE id = ?",
+                [(time.time(), flashcard_id) for flashcard_id in flashcard_ids],
+            )
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+        """
+        with self.lock:
+            self.connection.close()
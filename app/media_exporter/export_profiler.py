@@ -0,0 +1,206 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Union
+
+
+class ExportProfiler:
+    """
+    Collects per-stage timings and I/O counts of a media export.
+
+    Stages are timed with the `stage` context manager, which records wall time, CPU time of this process
+    and CPU time of finished child processes (i.e. ffmpeg). Stages can be nested; the report sums
+    the measurements per stage name, while the trace keeps every single stage for flamegraph viewers.
+
+    Attributes:
+        stages (Dict[str, Dict[str, float]]): The summed measurements of each stage name, in the order the stages first ran.
+        trace_events (List[Dict]): Every timed stage as a Chrome trace event.
+        ffmpeg_invocations (int): The number of ffmpeg processes run.
+        ffprobe_invocations (int): The number of ffprobe processes run.
+        bytes_piped_in (int): The number of bytes written to ffmpeg's stdin.
+        bytes_piped_out (int): The number of bytes read from ffmpeg's stdout.
+        bytes_written (int): The number of bytes written to output files.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialises an empty profile.
+        """
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Clears the profile for a new export.
+        """
+        self.stages = {}
+        self.trace_events = []
+        self.ffmpeg_invocations = 0
+        self.ffprobe_invocations = 0
+        self.bytes_piped_in = 0
+        self.bytes_piped_out = 0
+        self.bytes_written = 0
+        self.start_time = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, **details) -> Iterator[None]:
+        """
+        Times a stage of the export.
+
+        Args:
+            name (str): The stage name, e.g. "decode_track".
+            **details: Extra information shown with this stage in the trace, e.g. the audio track.
+        """
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        children_start = children_cpu_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            child_cpu = children_cpu_time() - children_start
+
+            with self.lock:
+                totals = self.stages.setdefault(
+                    name,
+                    {
+                        "calls": 0,
+                        "wall_seconds": 0.0,
+                        "cpu_seconds": 0.0,
+                        "child_cpu_seconds": 0.0,
+                    },
+                )
+                totals["calls"] += 1
+                totals["wall_seconds"] += wall
+                totals["cpu_seconds"] += cpu
+                totals["child_cpu_seconds"] += child_cpu
+
+                self.trace_events.append(
+                    {
+                        "name": name,
+                        "ph": "X",  # A complete event, with a start and a duration
+                        "ts": (wall_start - self.start_time) * 1e6,
+                        "dur": wall * 1e6,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident(),
+                        "args": {
+                            **{key: str(value) for key, value in details.items()},
+                            "cpu_seconds": cpu,
+                            "child_cpu_seconds": child_cpu,
+                        },
+                    }
+                )
+
+    def count_piped_input(self, chunks: Iterable) -> Iterator:
+        """
+        Passes chunks through unchanged while counting the bytes written to ffmpeg's stdin.
+
+        Args:
+            chunks (Iterable): Bytes-like chunks.
+
+        Yields:
+            The same chunks.
+        """
+        for chunk in chunks:
+            with self.lock:
+                self.bytes_piped_in += memoryview(chunk).nbytes
+            yield chunk
+
+    def record_ffmpeg(self, bytes_piped_out: int = 0) -> None:
+        """
+        Records a finished ffmpeg process.
+
+        Args:
+            bytes_piped_out (int, optional): The number of bytes it wrote to stdout. Defaults to 0.
+        """
+        with self.lock:
+            self.ffmpeg_invocations += 1
+            self.bytes_piped_out += bytes_piped_out
+
+    def record_ffprobe(self) -> None:
+        """
+        Records a finished ffprobe process.
+        """
+        with self.lock:
+            self.ffprobe_invocations += 1
+
+    def record_file_written(self, file: Path) -> None:
+        """
+        Records an output file that was written.
+
+        Args:
+            file (Path): The output file.
+        """
+        with self.lock:
+            self.bytes_written += file.stat().st_size
+
+    def report(self) -> Dict[str, Union[float, int, Dict]]:
+        """
+        Summarises the profile.
+
+        Returns:
+            Dict[str, Union[float, int, Dict]]: The total wall time, the I/O counts and the summed measurements of each stage.
+        """
+        return {
+            "total_wall_seconds": time.perf_counter() - self.start_time,
+            "ffmpeg_invocations": self.ffmpeg_invocations,
+            "ffprobe_invocations": self.ffprobe_invocations,
+            "bytes_piped_in": self.bytes_piped_in,
+            "bytes_piped_out": self.bytes_piped_out,
+            "bytes_written": self.bytes_written,
+            "stages": self.stages,
+        }
+
+    def write_report(self, report_file: Path) -> None:
+        """
+        Writes the profile summary as JSON.
+
+        Args:
+            report_file (Path): The file to write.
+        """
+        with report_file.open("w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=4)
+
+    def write_trace(self, trace_file: Path) -> None:
+        """
+        Writes every timed stage in the Chrome trace event format, which can be opened as a flamegraph
+        in e.g. chrome://tracing, Perfetto or speedscope.
+
+        Args:
+            trace_file (Path): The file to write.
+        """
+        with trace_file.open("w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.trace_events, "displayTimeUnit": "ms"}, f)
+
+    def summary_lines(self) -> List[str]:
+        """
+        Describes the time spent in each stage, for printing.
+
+        Returns:
+            List[str]: One line per stage, then one line of I/O counts.
+        """
+        lines = [
+            f"{name}: {totals['wall_seconds']:.2f}s wall, {totals['cpu_seconds']:.2f}s CPU, "
+            f"{totals['child_cpu_seconds']:.2f}s ffmpeg CPU over {totals['calls']} call(s)"
+            for name, totals in self.stages.items()
+        ]
+        lines.append(
+            f"{self.ffmpeg_invocations} ffmpeg and {self.ffprobe_invocations} ffprobe invocations, "
+            f"{self.bytes_written / 1e6:.1f} MB written"
+        )
+        return lines
+
+
+def children_cpu_time() -> float:
+    """
+    Returns the CPU time used by finished child processes of this process.
+
+    Returns:
+        float: The user and system CPU time in seconds. Always 0 on Windows, where it isn't available.
+    """
+    times = os.times()
+    return times.children_user + times.children_system
@@ -0,0 +1,144 @@
+import time
+from typing import Dict, Optional, Union
+
+# Weight of the most recent step duration when smoothing the measured throughput.
+# Track extraction is much slower than cutting single lines, so recent steps should dominate the ETA.
+THROUGHPUT_SMOOTHING = 0.2
+
+
+class ExportCancelled(Exception):
+    """Raised inside an export when the user has asked for it to be cancelled."""
+
+
+class ExportProgress:
+    """
+    Tracks the progress of a media export and estimates the remaining time from the measured throughput.
+
+    Progress is counted in steps, where a step is a single unit of work such as extracting an audio track,
+    cutting a batch of dialogue lines or writing a segment file.
+
+    Attributes:
+        total_steps (int): The number of steps the export is expected to take.
+        completed_steps (int): The number of steps completed so far.
+        start_time (float): The time (from `time.perf_counter`) the export started.
+        seconds_per_step (Optional[float]): The smoothed measured duration of a single step, None before the first step.
+    """
+
+    def __init__(self, total_steps: int = 0) -> None:
+        """
+        Initialises the progress tracker.
+
+        Args:
+            total_steps (int, optional): The number of steps the export is expected to take. Defaults to 0.
+        """
+        self.start(total_steps)
+
+    def start(self, total_steps: int) -> None:
+        """
+        Resets the tracker for a new export.
+
+        Args:
+            total_steps (int): The number of steps the export is expected to take.
+        """
+        self.total_steps = max(total_steps, 0)
+        self.completed_steps = 0
+        self.start_time = time.perf_counter()
+        self.last_step_time = self.start_time
+        self.seconds_per_step = None
+
+    def add_steps(self, steps: int) -> None:
+        """
+        Increases the expected number of steps, e.g. once the number of segments is known.
+
+        Args:
+            steps (int): The number of steps to add.
+        """
+        self.total_steps += steps
+
+    def advance(
+        self, stage: str, message: str, steps: int = 1
+    ) -> Dict[str, Union[str, int, float, None]]:
+        """
+        Marks steps as completed and returns a progress event describing the export's state.
+
+        Args:
+            stage (str): The stage of the export the steps belong to, e.g. "track", "lines", "segment" or "save".
+            message (str): A human readable description of what was just completed.
+            steps (int, optional): The number of steps completed. Defaults to 1.
+
+        Returns:
+            Dict[str, Union[str, int, float, None]]: The progress event, see `event`.
+        """
+        now = time.perf_counter()
+
+        if steps > 0:
+            step_duration = (now - self.last_step_time) / steps
+            if self.seconds_per_step is None:
+                self.seconds_per_step = step_duration
+            else:
+                self.seconds_per_step = (
+                    THROUGHPUT_SMOOTHING * step_duration
+                    + (1 - THROUGHPUT_SMOOTHING) * self.seconds_per_step
+                )
+            self.completed_steps = min(self.completed_steps + steps, self.total_steps)
+
+        self.last_step_time = now
+
+        return self.event(stage, message)
+
+    def event(
+        self, stage: str, message: str
+    ) -> Dict[str, Union[str, int, float, None]]:
+        """
+        Builds a progress event without completing any steps.
+
+        Args:
+            stage (str): The stage of the export.
+            message (str): A human readable description of the export's state.
+
+        Returns:
+            Dict[str, Union[str, int, float, None]]: A dictionary with the keys "stage", "message",
+                "completed_steps", "total_steps", "fraction", "elapsed_seconds" and "eta_seconds"
+                (None until there is a measured throughput).
+        """
+        fraction = self.completed_steps / self.total_steps if self.total_steps else 0.0
+        return {
+            "stage": stage,
+            "message": message,
+            "completed_steps": self.completed_steps,
+            "total_steps": self.total_steps,
+            "fraction": fraction,
+            "elapsed_seconds": time.perf_counter() - self.start_time,
+            "eta_seconds": self.estimate_remaining_seconds(),
+        }
+
+    def estimate_remaining_seconds(self) -> Optional[float]:
+        """
+        Estimates the remaining time of the export from the measured throughput.
+
+        Returns:
+            Optional[float]: The estimated number of seconds left, or None if no steps have been measured yet.
+        """
+        if self.seconds_per_step is None:
+            return None
+        remaining_steps = self.total_steps - self.completed_steps
+        return max(remaining_steps, 0) * self.seconds_per_step
+
+
+def format_eta(eta_seconds: Optional[float]) -> str:
+    """
+    Formats an estimated remaining time for display.
+
+    Args:
+        eta_seconds (Optional[float]): The estimated number of seconds left, or None if unknown.
+
+    Returns:
+        str: The remaining time as "M:SS" (or "H:MM:SS"), or "--:--" if unknown.
+    """
+    if eta_seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(round(eta_seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02}:{seconds:02}"
+    return f"{minutes}:{seconds:02}"
@@ -0,0 +1,58 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from media_exporter.media_exporter import MediaExporter
+from media_exporter.export_progress import ExportCancelled
+
+
+class ExportWorker(QObject):
+    """
+    Runs a media export on a worker thread so the Media Exporter window stays responsive.
+
+    The worker is moved to a QThread and `run` is connected to the thread's `started` signal.
+    Progress events from the MediaExporter are forwarded to the GUI thread with `progress_signal`.
+    Exports are cancelled with `MediaExporter.request_cancel`, which is safe to call from the GUI thread.
+
+    Signals:
+        progress_signal (pyqtSignal): Emitted with each progress event (see `ExportProgress.event`).
+        finished_signal (pyqtSignal): Emitted with the list of saved files when the export succeeds.
+        failed_signal (pyqtSignal): Emitted with an error message when the export fails.
+        cancelled_signal (pyqtSignal): Emitted when the export was cancelled.
+        done_signal (pyqtSignal): Emitted after the export ends, whatever the outcome.
+    """
+
+    progress_signal = pyqtSignal(dict)
+    finished_signal = pyqtSignal(list)
+    failed_signal = pyqtSignal(str)
+    cancelled_signal = pyqtSignal()
+    done_signal = pyqtSignal()
+
+    def __init__(self, media_exporter: MediaExporter, options: dict) -> None:
+        """
+        Initialises the ExportWorker.
+
+        Args:
+            media_exporter (MediaExporter): The media exporter that performs the export.
+            options (dict): The export options, as emitted by the Media Exporter window.
+        """
+        super().__init__()
+        self.media_exporter = media_exporter
+        self.options = options
+
+    def run(self) -> None:
+        """
+        Runs the export and emits the signal matching its outcome.
+        """
+        self.media_exporter.set_progress_callback(self.progress_signal.emit)
+
+        try:
+            saved_files = self.media_exporter.export_media(self.options)
+            self.finished_signal.emit([str(file) for file in saved_files])
+        except ExportCancelled:
+            print("Export cancelled.")
+            self.cancelled_signal.emit()
+        except Exception as e:
+            print(f"Error exporting media: {e}")
+            self.failed_signal.emit(str(e))
+        finally:
+            self.media_exporter.set_progress_callback(None)
+            self.done_signal.emit()
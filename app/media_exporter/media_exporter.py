@@ -1,12 +1,20 @@
-import subprocess
+import threading
 from pathlib import Path
 from datetime import datetime
-import ffmpeg
-from typing import Dict, List, Optional, Union, Tuple
+import numpy as np
+from typing import Callable, Dict, Iterable, List, Optional, Union, Tuple
 
+from avi_utils import pcm_audio
+from avi_utils.media_metadata import get_media_metadata_cache
+from model import segmentation
 from model.model import SubtitleModel
+from media_exporter.export_profiler import ExportProfiler
+from media_exporter.export_progress import ExportCancelled, ExportProgress
 
 BITRATE = "48k"
+LOUDNESS_FILTER = (
+    "loudnorm=I=-18:LRA=6:TP=-1"  # The loudnorm filter for volume normalization
+)
 
 
 class MediaExporter:
@@ -16,9 +24,15 @@ class MediaExporter:
     This class manages the export of media by handling tasks such as segmenting, interleaving,
     and combining audio files.
 
+    Exports can run on a worker thread: progress is reported through an optional callback,
+    and an export can be cancelled from another thread with `request_cancel`.
+
     Attributes:
-        temporary_audio_folder (Path): The path to the folder where temporary audio files will be stored.
+        temporary_audio_folder (Path): The path to the folder for temporary audio files. Exports stream audio through memory and do not write here.
         avi_practice_audio_folder (Path): The path to the folder where final AVI practice audio files will be stored.
+        progress (ExportProgress): Tracks the progress and estimated remaining time of the current export.
+        progress_callback (Optional[Callable[[Dict], None]]): Called with every progress event, if set.
+        profiler (ExportProfiler): Times the stages of the current export and counts its ffmpeg invocations and bytes written.
     """
 
     def __init__(
@@ -34,7 +48,78 @@ class MediaExporter:
         self.temporary_audio_folder = temporary_audio_folder
         self.avi_practice_audio_folder = avi_practice_audio_folder
 
-    def export_media(self, options: dict) -> None:
+        self.progress = ExportProgress()
+        self.progress_callback = None
+        self.cancel_event = threading.Event()
+        self.profiler = ExportProfiler()
+
+    def set_progress_callback(
+        self, progress_callback: Optional[Callable[[Dict], None]]
+    ) -> None:
+        """
+        Sets the function to call with progress events during an export.
+
+        Args:
+            progress_callback (Optional[Callable[[Dict], None]]): Called with each progress event (see `ExportProgress.event`), or None to stop reporting.
+        """
+        self.progress_callback = progress_callback
+
+    def request_cancel(self) -> None:
+        """
+        Asks the running export to stop as soon as possible. Safe to call from any thread.
+        """
+        self.cancel_event.set()
+
+    def check_cancelled(self) -> None:
+        """
+        Raises ExportCancelled if cancelling the current export has been requested.
+        """
+        if self.cancel_event.is_set():
+            raise ExportCancelled("Export cancelled.")
+
+    def report_progress(self, stage: str, message: str, steps: int = 1) -> None:
+        """
+        Marks steps of the export as completed and passes the progress event to the progress callback.
+
+        Args:
+            stage (str): The stage of the export, e.g. "track", "lines", "segment" or "save".
+            message (str): A description of what was just completed.
+            steps (int, optional): The number of steps completed. Defaults to 1.
+        """
+        print(message)
+        event = self.progress.advance(stage, message, steps)
+        if self.progress_callback is not None:
+            self.progress_callback(event)
+        self.check_cancelled()
+
+    def run_ffmpeg_pipe(
+        self, command: List[str], input_chunks: Optional[Iterable] = None
+    ) -> bytearray:
+        """
+        Runs an ffmpeg command with piped input and output, killing it if the export is cancelled while it is running.
+
+        Args:
+            command (List[str]): The ffmpeg command as a list of strings.
+            input_chunks (Optional[Iterable], optional): Bytes-like chunks to write to ffmpeg's stdin. Defaults to None.
+
+        Returns:
+            bytearray: Everything ffmpeg wrote to stdout.
+
+        Raises:
+            ExportCancelled: If the export was cancelled while ffmpeg was running.
+            subprocess.CalledProcessError: If ffmpeg fails.
+        """
+        self.check_cancelled()
+        if input_chunks is not None:
+            input_chunks = self.profiler.count_piped_input(input_chunks)
+        output = pcm_audio.run_pipe(
+            command, input_chunks=input_chunks, should_stop=self.cancel_event.is_set
+        )
+        self.profiler.record_ffmpeg(bytes_piped_out=len(output))
+        self.check_cancelled()
+        return output
+
+    def export_media(self, options: dict) -> List[Path]:
         """
         Processes the media export based on provided options.
 
@@ -53,6 +138,15 @@ class MediaExporter:
                 - "language_options" (List[Dict[str, Union[str, float]]]): List of dictionaries, each containing:
                     - "audio_track" (str): The audio track for the language.
                     - "speed" (float): Playback speed for the audio track.
+                - "write_profile_report" (bool, optional): Whether to save a JSON report of the time spent in each stage next to the output files. Defaults to True.
+                - "write_profile_trace" (bool, optional): Whether to also save every timed stage as a Chrome trace, viewable as a flamegraph. Defaults to False.
+
+        Returns:
+            List[Path]: The saved practice audio files.
+
+        Raises:
+            ValueError: If the video, reference subtitle file or audio tracks are missing.
+            ExportCancelled: If the export was cancelled.
         """
         video_file = options["video_file"]
         reference_subtitle_file = options["reference_subtitle_file"]
@@ -64,40 +158,49 @@ class MediaExporter:
         file_combination = options["file_combination"]
         language_options = options["language_options"]
 
-        if not video_file.exists():
-            print("Need a video.")
-            return
+        if not video_file or not video_file.exists():
+            raise ValueError("Need a video.")
 
-        if not reference_subtitle_file.exists():
-            print("Need a reference subtitle file.")
-            return
+        if not reference_subtitle_file or not reference_subtitle_file.exists():
+            raise ValueError("Need a reference subtitle file.")
 
         if not language_options:
-            print("Need at least one audio track.")
-            return
-
-        final_files = self.process_files(
-            video_file,
-            reference_subtitle_file,
-            subtitle_padding,
-            segmenting,
-            interleaving,
-            file_combination,
-            language_options,
-        )
+            raise ValueError("Need at least one audio track.")
+
+        self.cancel_event.clear()
+        self.progress.start(total_steps=0)
+        self.profiler.reset()
+
+        with self.profiler.stage("export"):
+            saved_files = self.process_files(
+                video_file,
+                reference_subtitle_file,
+                subtitle_padding,
+                segmenting,
+                interleaving,
+                file_combination,
+                language_options,
+            )
 
-        # Need to copy the final file(s) to ensure consistency! Otherwise files can be unstable, e.g. with unstable total duration/end time.
-        print("Saving files.")
+        for line in self.profiler.summary_lines():
+            print(line)
+        if options.get("write_profile_report", True):
+            self.profiler.write_report(
+                self.avi_practice_audio_folder
+                / f"{video_file.stem}-export_profile.json"
+            )
+        if options.get("write_profile_trace", False):
+            self.profiler.write_trace(
+                self.avi_practice_audio_folder / f"{video_file.stem}-export_trace.json"
+            )
 
         # TODO: Create a folder if creating lots of separate files :)
         # create_folder = file_combination == "separate_files"
         # folder_name = self.create_folder_name()
-        # self.save_files(files=final_files, output_folder=self.avi_practice_audio_folder, create_folder=create_folder)
 
-        self.save_files(files=final_files, output_folder=self.avi_practice_audio_folder)
         print("Successfully saved files.")
 
-        # TODO: Perhaps should clean temp files here instead of at end of exporting all files.
+        return saved_files
 
     def process_files(
         self,
@@ -109,9 +212,19 @@ class MediaExporter:
         file_combination: str,
         language_options: List[Dict[str, Union[str, float]]],
     ) -> List[Path]:
-        """ """
+        """
+        Creates the practice audio files for the chosen options.
+
+        All audio stays in memory: each audio track is decoded once to raw PCM through an ffmpeg pipe,
+        the lines of dialogue are cut out of it, their speed is changed with one ffmpeg pipe per language option,
+        and each output file is encoded straight from memory. No temporary files are written.
+
+        Args:
+            See `export_media`.
 
-        # TODO: Implement the actual file processing logic.
+        Returns:
+            List[Path]: The saved practice audio files.
+        """
         print("\nChosen options:")
         print(f"Video file: {video_file}")
         print(f"Using subtitle: {reference_subtitle_file}")
@@ -121,64 +234,134 @@ class MediaExporter:
         print(f"File combination: {file_combination}")
         print(f"Language options: {language_options}\n")
 
-        ### STEPS (for single condensed file) ###
-
-        # TODO: Need to refactor this/AudioExtractor in future as code is repeated in slightly different ways.
-
-        ## 1. Extract audio tracks from video
-        # TODO: Perhaps refactor this into `extract_all_audio_tracks`
-        # Extracting unique audio tracks with set comprehension
-        audio_tracks = list({option["audio_track"] for option in language_options})
-        audio_track_paths = {}
+        ## 1. Read reference subtitle file & build timings with padding
+        with self.profiler.stage("read_subtitles"):
+            subtitle_model = SubtitleModel(
+                language="Reference", filename=reference_subtitle_file
+            )
+            subtitle_timings = subtitle_model.get_all_speaking_times(
+                subtitle_padding=subtitle_padding
+            )
 
-        for audio_track in audio_tracks:
-            print(f"Extracting {audio_track} audio track.")
-            # TODO: Try simply using the audio tracks inside the video file.
-            audio_track_path = self.extract_audio_track(
-                video_file=video_file, audio_track=audio_track
+        ## 2. Decide which lines of which language option go into each output file
+        with self.profiler.stage("plan_outputs"):
+            segment_indices = None
+            if segmenting["enabled"]:
+                # TODO: Make this part of SubtitleModel probably.
+                segment_indices = self.segment_subtitle_timings(
+                    subtitle_timings=subtitle_timings,
+                    segment_length=segmenting["segment_length"],
+                )
+            outputs = self.plan_outputs(
+                video_stem=video_file.stem,
+                num_lines=len(subtitle_timings),
+                segment_indices=segment_indices,
+                segmenting=segmenting,
+                interleaving=interleaving,
+                file_combination=file_combination,
+                language_options=language_options,
             )
-            audio_track_paths[audio_track] = audio_track_path
-            print("Finished extracting audio track.")
 
-        ## 2. Read reference subtitle file & build timings with padding
-        subtitle_model = SubtitleModel(
-            language="Reference", filename=reference_subtitle_file
+        # Extracting unique audio tracks, keeping their order
+        audio_tracks = list(
+            dict.fromkeys(option["audio_track"] for option in language_options)
         )
-        subtitle_timings = subtitle_model.get_all_speaking_times(
-            subtitle_padding=subtitle_padding
+        self.progress.add_steps(
+            len(audio_tracks) + len(language_options) + len(outputs)
         )
 
-        ## 3. Extract all lines of dialogue to temp files
-        # TODO: Use ffmpeg's filter_complex to process multiple segments at once
+        ## 3. Decode the audio tracks and cut out every line of dialogue for each language option
+        track_samples = {}
+        for audio_track in audio_tracks:
+            print(f"Extracting {audio_track} audio track.")
+            with self.profiler.stage("decode_track", audio_track=audio_track):
+                track_samples[audio_track] = self.decode_audio_track(
+                    video_file=video_file, audio_track=audio_track
+                )
+            self.report_progress("track", f"Extracted {audio_track} audio track.")
+
+        option_lines = []
         for language_option in language_options:
             audio_track = language_option["audio_track"]
             speed = language_option["speed"]
-
-            print(
-                f"Extracting all lines of dialogue of {audio_track} audio track at {speed}x speed."
+            with self.profiler.stage("slice_lines", audio_track=audio_track):
+                lines = pcm_audio.slice_lines(
+                    track_samples[audio_track], subtitle_timings
+                )
+            if speed != 1.0:
+                with self.profiler.stage(
+                    "change_speed", audio_track=audio_track, speed=speed
+                ):
+                    lines = self.change_speed_of_lines(lines, speed)
+            option_lines.append(lines)
+            self.report_progress(
+                "lines",
+                f"Extracted {len(lines)} lines of {audio_track} at {speed}x speed.",
             )
 
-            for line_number, subtitle_timing in enumerate(subtitle_timings):
-                segment_name = (
-                    f"{video_file.stem}-{audio_track}-{speed}x_line{line_number}"
-                )
-                self.extract_segment(
-                    audio_file=audio_track_paths[audio_track],
-                    start_time=subtitle_timing[0],
-                    end_time=subtitle_timing[1],
-                    speed=speed,
-                    segment_name=segment_name,
+        ## 4. Encode each output file straight from the lines in memory
+        saved_files = []
+        for output_number, (file_name, pieces) in enumerate(outputs):
+            output_file = self.avi_practice_audio_folder / file_name
+            with self.profiler.stage("encode_output", file=file_name):
+                self.write_output(
+                    output_file,
+                    (
+                        option_lines[option_index][line_number]
+                        for option_index, line_numbers in pieces
+                        for line_number in line_numbers
+                    ),
                 )
+            saved_files.append(output_file)
+            self.report_progress(
+                "save",
+                f"Saved file {output_number + 1}/{len(outputs)}: {output_file.name}",
+            )
 
-            print("Finishing extracting lines of dialogue.")
+        return saved_files
 
+    def plan_outputs(
+        self,
+        video_stem: str,
+        num_lines: int,
+        segment_indices: Optional[List[List[int]]],
+        segmenting: Dict,
+        interleaving: Dict,
+        file_combination: str,
+        language_options: List[Dict[str, Union[str, float]]],
+    ) -> List[Tuple[str, List[Tuple[int, List[int]]]]]:
+        """
+        Works out the output files of an export and which lines of dialogue each is made of.
+
+        Args:
+            video_stem (str): The video's file name without its suffix, used to name the output files.
+            num_lines (int): The number of lines of dialogue.
+            segment_indices (Optional[List[List[int]]]): The line numbers of each segment, or None if not segmenting.
+            segmenting (Dict), interleaving (Dict), file_combination (str), language_options (List[Dict[str, Union[str, float]]]):
+                The export options, see `export_media`.
+
+        Returns:
+            List[Tuple[str, List[Tuple[int, List[int]]]]]: For each output file, its name and its pieces in order,
+                where each piece is the index of a language option and the line numbers taken from it.
+        """
         # For naming audio tracks alphabetically with appropriate amount of digits, e.g. lang_1, ..., lang_3
-        num_audio_tracks = len(language_options)
-        num_audio_track_digits = len(str(num_audio_tracks))
+        num_audio_track_digits = len(str(len(language_options)))
+        # E.g. eng1.2x-dut1.0x-ita0.8x
+        language_and_speed_str = "-".join(
+            [
+                f"{option['audio_track']}{option['speed']}x"
+                for option in language_options
+            ]
+        )
+
+        def language_str(option_index: int) -> str:
+            option = language_options[option_index]
+            return f"lang{option_index:0{num_audio_track_digits}}-{option['audio_track']}-{option['speed']}x"
 
-        # TODO: Major refactoring required to make this all easier to read/manage :)
+        all_lines = list(range(num_lines))
+        option_indices = range(len(language_options))
 
-        ## 4a. Combining lines to create simple condensed files
+        ## Simple condensed files
         if (
             not segmenting["enabled"]
             or (
@@ -187,324 +370,172 @@ class MediaExporter:
             or len(language_options) == 1
         ):
             if file_combination == "combine_everything" or len(language_options) == 1:
-                # Creating one file of all language 1's dialogue, then language 2, etc.
-                print("Creating a simple condensed file with all language tracks.")
-                files_to_combine = [
-                    self.temporary_audio_folder
-                    / f"{video_file.stem}-{option['audio_track']}-{option['speed']}x_line{line_number}.mp3"
-                    for option in language_options
-                    for line_number in range(len(subtitle_timings))
+                # One file of all language 1's dialogue, then language 2, etc., e.g. video_name-eng1.2x-dut1.0x-ita0.8x.mp3
+                return [
+                    (
+                        f"{video_stem}-{language_and_speed_str}.mp3",
+                        [(option_index, all_lines) for option_index in option_indices],
+                    )
                 ]
-                # TODO: Definitely refactor this first, as used 6 times.
-                language_and_speed_str = "-".join(
-                    [
-                        f"{option['audio_track']}{option['speed']}x"
-                        for option in language_options
-                    ]
-                )
-                # E.g. video_name-eng1.2x-dut1.0x-ita0.8x.mp3
-                everything_combined_file = (
-                    self.temporary_audio_folder
-                    / f"{video_file.stem}-{language_and_speed_str}.mp3"
+            # Separate files of all language 1's dialogue, language 2's dialogue, etc., e.g. video_name-lang1-eng-1.0x.mp3
+            return [
+                (
+                    f"{video_stem}-{language_str(option_index)}.mp3",
+                    [(option_index, all_lines)],
                 )
-                self.combine_audio_files(
-                    files_to_combine=files_to_combine,
-                    output_file=everything_combined_file,
-                )
-                print("Created a simple condensed file with all language tracks.")
-                return [everything_combined_file]
-            else:
-                # Creating separate files of all language 1's dialogue, language 2's dialogue, etc.
-                print("Creating simple condensed files for each language track.")
-                final_files = []
-                for audio_track_number, option in enumerate(language_options):
-                    audio_track, speed = option["audio_track"], option["speed"]
-                    files_to_combine = [
-                        self.temporary_audio_folder
-                        / f"{video_file.stem}-{audio_track}-{speed}x_line{line_number}.mp3"
-                        for line_number in range(len(subtitle_timings))
-                    ]
-                    # E.g. video_name-lang1-eng-1.0x.mp3
-                    combined_file_name = (
-                        self.temporary_audio_folder
-                        / f"{video_file.stem}-lang{audio_track_number:0{num_audio_track_digits}}-{audio_track}-{speed}x.mp3"
-                    )
-                    self.combine_audio_files(
-                        files_to_combine=files_to_combine,
-                        output_file=combined_file_name,
-                    )
-                    final_files.append(combined_file_name)
-                print("Created simple condensed files for each language track.")
-                return final_files
-
-        ## 4b. If using segmenting, create segments, then combine lines of dialogue to create segments for every audio track
-        # TODO: Make this part of SubtitleModel probably.
-        segment_indices = self.segment_subtitle_timings(
-            subtitle_timings=subtitle_timings,
-            segment_length=segmenting["segment_length"],
-        )
+                for option_index in option_indices
+            ]
 
+        ## Segmented files
         # For naming segments alphabetically with appropriate amount of digits, e.g. segment_01, ..., segment_25
-        num_segments = len(segment_indices)
-        num_segments_digits = len(str(num_segments))
+        num_segments_digits = len(str(len(segment_indices)))
+        segment_length = segmenting["segment_length"]
 
-        print("Combining lines of dialogue together.")
-        # TODO: File with í in its name couldn't be copied with ffmpeg.
-
-        for audio_track_number, language_option in enumerate(language_options):
-            audio_track = language_option["audio_track"]
-            speed = language_option["speed"]
-            for segment_number, segment in enumerate(segment_indices):
-                files_to_combine = [
-                    self.temporary_audio_folder
-                    / f"{video_file.stem}-{audio_track}-{speed}x_line{line_number}.mp3"
-                    for line_number in segment
-                ]
-                segment_file = (
-                    self.temporary_audio_folder
-                    / f"{video_file.stem}-lang{audio_track_number:0{num_audio_track_digits}}-{audio_track}-{speed}x-segment{segment_number:0{num_segments_digits}}.mp3"
-                )
-                self.combine_audio_files(
-                    files_to_combine=files_to_combine, output_file=segment_file
-                )
-
-        print("Finishing combining lines of dialogue together.")
+        def segment_str(segment_number: int) -> str:
+            return f"segment{segment_number:0{num_segments_digits}}"
 
         if not interleaving["enabled"]:
-            print("Saving separate segments for each language.")
-            # TODO: Already checked that combine all was off for this, but instead should run e.g. self.create_simple_condensed_audio_file() here instead if interleaving disabled and combine everything chosen
-            final_files = []
-            for audio_track_number, language_option in enumerate(language_options):
-                audio_track = language_option["audio_track"]
-                speed = language_option["speed"]
-                for segment_number in range(len(segment_indices)):
-                    # Ordered by language track then segment number E.g. video_name-lang2-eng-1.5x-segment05.mp3
-                    segment_file = (
-                        self.temporary_audio_folder
-                        / f"{video_file.stem}-lang{audio_track_number:0{num_audio_track_digits}}-{audio_track}-{speed}x-segment{segment_number:0{num_segments_digits}}.mp3"
-                    )
-                    final_files.append(segment_file)
-            print("Saved separate segments for each language.")
-            return final_files
+            # Ordered by language track then segment number, e.g. video_name-lang2-eng-1.5x-segment05.mp3
+            return [
+                (
+                    f"{video_stem}-{language_str(option_index)}-{segment_str(segment_number)}.mp3",
+                    [(option_index, segment)],
+                )
+                for option_index in option_indices
+                for segment_number, segment in enumerate(segment_indices)
+            ]
 
-        # Otherwise, interleaving enabled
         if file_combination == "combine_everything":
-            print("Saving interleaved file with everything combined.")
-            language_and_speed_str = "-".join(
-                [
-                    f"{option['audio_track']}{option['speed']}x"
-                    for option in language_options
-                ]
-            )
-            # E.g. video_name-interleaved_15s_segments-eng1.2x_dut1.0x_ita0.8x.mp3
-            everything_combined_file = (
-                self.temporary_audio_folder
-                / f"{video_file.stem}-interleaved_{segmenting['segment_length']}s_segments-{language_and_speed_str}.mp3"
-            )
+            # E.g. video_name-interleaved_15s_segments-eng1.2x-dut1.0x-ita0.8x.mp3
+            return [
+                (
+                    f"{video_stem}-interleaved_{segment_length}s_segments-{language_and_speed_str}.mp3",
+                    [
+                        (option_index, segment)
+                        for segment in segment_indices
+                        for option_index in option_indices
+                    ],
+                )
+            ]
 
-            files_to_combine = []
-            for segment_number in range(len(segment_indices)):
-                for audio_track_number, language_option in enumerate(language_options):
-                    audio_track = language_option["audio_track"]
-                    speed = language_option["speed"]
-                    segment_file = (
-                        self.temporary_audio_folder
-                        / f"{video_file.stem}-lang{audio_track_number:0{num_audio_track_digits}}-{audio_track}-{speed}x-segment{segment_number:0{num_segments_digits}}.mp3"
-                    )
-                    files_to_combine.append(segment_file)
+        if interleaving["combine_interleaved_segments"]:
+            # E.g. video_name-interleaved_15s_segments-segment05-eng1.2x-dut1.0x-ita0.8x.mp3
+            return [
+                (
+                    f"{video_stem}-interleaved_{segment_length}s_segments-{segment_str(segment_number)}-{language_and_speed_str}.mp3",
+                    [(option_index, segment) for option_index in option_indices],
+                )
+                for segment_number, segment in enumerate(segment_indices)
+            ]
 
-            self.combine_audio_files(
-                files_to_combine=files_to_combine,
-                output_file=everything_combined_file,
+        # Interleaved files with all segments separate, named so they sort by segment number then language track,
+        # e.g. video_name-segment05-lang2-eng-1.5x.mp3
+        return [
+            (
+                f"{video_stem}-{segment_str(segment_number)}-{language_str(option_index)}.mp3",
+                [(option_index, segment)],
             )
-            print("Saved interleaved file with everything combined.")
-            return [everything_combined_file]
+            for option_index in option_indices
+            for segment_number, segment in enumerate(segment_indices)
+        ]
 
-        # Know separate files chosen
-        if interleaving["combine_interleaved_segments"]:
-            print(
-                "Saving interleaved files with same segments in each language combined."
-            )
-            final_files = []
-            for segment_number in range(len(segment_indices)):
-                language_and_speed_str = "-".join(
-                    [
-                        f"{option['audio_track']}{option['speed']}x"
-                        for option in language_options
-                    ]
-                )
-                # E.g. video_name-interleaved_15s_segments-segment05-eng1.2x_dut1.0x_ita0.8x.mp3
-                everything_combined_file = (
-                    self.temporary_audio_folder
-                    / f"{video_file.stem}-interleaved_{segmenting['segment_length']}s_segments-segment{segment_number:0{num_segments_digits}}-{language_and_speed_str}.mp3"
-                )
+    def find_audio_stream_index(self, video_file: Path, audio_track: str) -> int:
+        """
+        Finds the index of an audio track among a video's audio streams.
 
-                files_to_combine = []
-                for audio_track_number, language_option in enumerate(language_options):
-                    audio_track = language_option["audio_track"]
-                    speed = language_option["speed"]
-                    segment_file = (
-                        self.temporary_audio_folder
-                        / f"{video_file.stem}-lang{audio_track_number:0{num_audio_track_digits}}-{audio_track}-{speed}x-segment{segment_number:0{num_segments_digits}}.mp3"
-                    )
-                    files_to_combine.append(segment_file)
+        Args:
+            video_file (Path): Path to the video file.
+            audio_track (str): The name of the audio track, e.g. "eng" for English.
 
-                self.combine_audio_files(
-                    files_to_combine=files_to_combine,
-                    output_file=everything_combined_file,
-                )
-                final_files.append(everything_combined_file)
+        Returns:
+            int: The index of the audio stream, as used in ffmpeg's "0:a:<index>" stream specifier.
 
-            print(
-                "Saved interleaved files with same segments in each language combined."
+        Raises:
+            ValueError: If no audio stream is found for the audio track.
+        """
+        metadata_cache = get_media_metadata_cache()
+        probe_count = metadata_cache.probe_count
+        with self.profiler.stage("probe_streams"):
+            audio_stream_index = metadata_cache.find_audio_stream_index(
+                video_file, audio_track
             )
-            return final_files
-
-        if not interleaving["combine_interleaved_segments"]:
-            print("Saving interleaved files with all segments separate.")
-            final_files = []
-            for audio_track_number, language_option in enumerate(language_options):
-                audio_track = language_option["audio_track"]
-                speed = language_option["speed"]
-                for segment_number in range(len(segment_indices)):
-                    segment_file = (
-                        self.temporary_audio_folder
-                        / f"{video_file.stem}-lang{audio_track_number:0{num_audio_track_digits}}-{audio_track}-{speed}x-segment{segment_number:0{num_segments_digits}}.mp3"
-                    )
-                    # Ordered by segment number then language track E.g. video_name-segment05-lang2-eng-1.5x.mp3
-                    renamed_file_for_interleaving = (
-                        self.temporary_audio_folder
-                        / f"{video_file.stem}-segment{segment_number:0{num_segments_digits}}-lang{audio_track_number:0{num_audio_track_digits}}-{audio_track}-{speed}x.mp3"
-                    )
-                    # TODO: Need to handle if that name already exists (which shouldn't be a problem if tidy up all temp files, but should leave extracted audio tracks at least :))
-                    segment_file.rename(renamed_file_for_interleaving)
-                    final_files.append(renamed_file_for_interleaving)
-            print("Renamed interleaved files with all segments separate.")
-            return final_files
-
-    # TODO: Refactor repeated code with media_exporter.audio_extractor.AudioExtractor
-    def extract_audio_track(self, video_file: Path, audio_track: str) -> Path:
+        # Usually probed already, when the video was chosen in the Media Exporter window
+        if metadata_cache.probe_count != probe_count:
+            self.profiler.record_ffprobe()
+        return audio_stream_index
+
+    def decode_audio_track(self, video_file: Path, audio_track: str) -> np.ndarray:
         """
-        Extracts a specific audio track from a video file based on the provided language and track name.
+        Decodes an audio track of a video into memory, normalising its volume.
 
         Args:
             video_file (Path): Path to the input video file.
             audio_track (str): The name of the audio track to extract, e.g. "eng" for English.
 
         Returns:
-            Path: Path to the extracted audio file.
+            np.ndarray: The decoded audio track as raw PCM samples.
 
         Raises:
-            ValueError: If no audio stream is found for the specified language.
+            ValueError: If no audio stream is found for the audio track.
         """
-        # Get the index of the audio stream of the given language
-        audio_stream_index = None
-        streams = ffmpeg.probe(str(video_file))["streams"]
-        for i, stream in enumerate(streams):
-            if (
-                stream["codec_type"] == "audio"
-                and stream["tags"].get("language") == audio_track
-            ):
-                audio_stream_index = i - 1
-                break
-        if audio_stream_index is None:
-            raise ValueError(f"No audio stream found for audio track {audio_track}")
-
-        audio_track = (
-            self.temporary_audio_folder / f"{video_file.stem}-{audio_track}.mp3"
+        audio_stream_index = self.find_audio_stream_index(video_file, audio_track)
+        command = pcm_audio.decode_command(
+            video_file,
+            audio_stream_index=audio_stream_index,
+            audio_filter=LOUDNESS_FILTER,
         )
+        return pcm_audio.bytes_to_samples(self.run_ffmpeg_pipe(command))
 
-        # Define the ffmpeg command as a list of strings
-        command = [
-            "ffmpeg",
-            "-y",  # Overwrite output file if it exists
-            "-loglevel",
-            "error",  # Only show errors
-            "-i",
-            str(video_file),
-            "-map",
-            f"0:a:{audio_stream_index}",
-            "-map_metadata",
-            "0",
-            "-movflags",
-            "use_metadata_tags",
-            "-filter:a",  # Apply the audio filter
-            "loudnorm=I=-18:LRA=6:TP=-1",  # The loudnorm filter for volume normalization
-            "-ab",
-            BITRATE,  # Audio bitrate
-            str(audio_track),  # Output file path
-        ]
-
-        # Run the command using subprocess
-        subprocess.run(command)
-
-        return audio_track
-
-    def extract_segment(
-        self,
-        audio_file: Path,
-        start_time: datetime,
-        end_time: datetime,
-        speed: float,
-        segment_name: str,
-    ) -> Path:
+    def change_speed_of_lines(
+        self, lines: List[np.ndarray], speed: float
+    ) -> List[np.ndarray]:
         """
-        Extracts a segment of an audio file between the specified start and end times.
+        Changes the speed of lines of dialogue with a single ffmpeg process.
+
+        The lines are streamed through ffmpeg's atempo filter back to back, then split again
+        in proportion to their original lengths.
 
         Args:
-            audio_file (Path): The audio file to extract the segment from.
-            start_time (datetime): The start time of the segment.
-            end_time (datetime): The end time of the segment.
-            speed (float): The speed multiplier of the segment.
-            segment_name: (str): What name to save the segment with.
+            lines (List[np.ndarray]): The samples of each line.
+            speed (float): The speed multiplier.
 
         Returns:
-            Path: Path to the extracted audio segment file.
+            List[np.ndarray]: The samples of each line at the new speed.
         """
-        start_time_str = convert_datetime_to_ffmpeg_time(start_time)
-        end_time_str = convert_datetime_to_ffmpeg_time(end_time)
-
-        audio_segment_path = self.temporary_audio_folder / f"{segment_name}.mp3"
-
-        # Define the ffmpeg command as a list of strings
-        command = [
-            "ffmpeg",
-            "-y",  # Overwrite output file if it exists
-            "-loglevel",
-            "error",  # Only show errors
-            "-ss",  # Seeking comes before input file. Otherwise, the speed is first applied then the segment is extracted which extracts the wrong part
-            start_time_str,
-            "-to",
-            end_time_str,
-            "-i",
-            str(audio_file),
-        ]
+        output = self.run_ffmpeg_pipe(
+            pcm_audio.change_speed_command(speed), input_chunks=lines
+        )
+        return pcm_audio.split_at_proportional_boundaries(
+            pcm_audio.bytes_to_samples(output), [len(line) for line in lines]
+        )
 
-        if speed != 1.0:
-            # Apply speed change and re-encode with libmp3lame, maintaining the same bitrate
-            command += [
-                "-af",
-                f"atempo={speed}",
-                "-c:a",
-                "libmp3lame",  # Re-encode with libmp3lame
-                "-b:a",
-                BITRATE,
-            ]
-        else:
-            # Simply copy audio if speed is 1.0
-            command += [
-                "-c:a",
-                "copy",
-            ]
+    def write_output(self, output_file: Path, pieces: Iterable[np.ndarray]) -> None:
+        """
+        Encodes audio from memory to an output file.
 
-        command.append(str(audio_segment_path)),
+        The audio is written to a partial file first, which is only renamed once encoding succeeds,
+        so a cancelled or failed export never leaves a truncated file behind.
 
-        # Run the command using subprocess
-        subprocess.run(command)
-        return audio_segment_path
+        Args:
+            output_file (Path): The file to write.
+            pieces (Iterable[np.ndarray]): The samples to encode, in order.
+        """
+        partial_file = output_file.with_name(output_file.name + ".part")
+        try:
+            self.run_ffmpeg_pipe(
+                pcm_audio.encode_command(partial_file, BITRATE), input_chunks=pieces
+            )
+            partial_file.replace(output_file)
+            self.profiler.record_file_written(output_file)
+        finally:
+            partial_file.unlink(missing_ok=True)
 
     def segment_subtitle_timings(
-        self, subtitle_timings: List[Tuple[datetime, datetime]], segment_length: int
+        self,
+        subtitle_timings: List[Tuple[datetime, datetime]],
+        segment_length: int,
+        policy: str = segmentation.SPEECH_LENGTH,
+        scene_cuts: Optional[List[float]] = None,
     ) -> List[List[int]]:
         """
         Segments subtitle timings into groups based on a maximum segment length.
@@ -512,112 +543,14 @@ class MediaExporter:
         Args:
             subtitle_timings (List[Tuple[datetime, datetime]]): Each tuple contains the start and end time of a subtitle.
             segment_length (int): The maximum length (in seconds) for each segment.
+            policy (str, optional): The segmenting policy, see `segmentation.SEGMENTING_POLICIES`. `segment_length` is passed as its value.
+                Defaults to segmenting by the amount of speech.
+            scene_cuts (Optional[List[float]], optional): The scene cut times in seconds, if segmenting at scene cuts. Defaults to None.
 
         Returns:
             List[List[int]]: A list where each element is a list of subtitle indices corresponding to a segment of subtitles.
         """
-        segments = []
-        current_segment = []
-        cumulative_length = 0
-
-        for i, (start_time, end_time) in enumerate(subtitle_timings):
-            duration = (end_time - start_time).total_seconds()
-
-            if cumulative_length > segment_length:
-                # Start a new segment if the current segment exceeds the segment length
-                segments.append(current_segment)
-                current_segment = []
-                cumulative_length = 0
-
-            current_segment.append(i)
-            cumulative_length += duration
-
-        # Add the last segment if it exists
-        if current_segment:
-            segments.append(current_segment)
-
-        return segments
-
-    def combine_audio_files(
-        self, files_to_combine: List[Path], output_file: Path
-    ) -> None:
-        """
-        Combines audio files into a single file using ffmpeg.
-
-        Args:
-            files_to_combine (List[Path]): List of paths to the audio files to combine.
-            output_file (Path): Path to the output file where the combined audio will be saved.
-        """
-        # Create a temporary file to list all segments
-        list_file_path = Path(self.temporary_audio_folder) / "segments.txt"
-        with list_file_path.open("w") as f:
-            for file in files_to_combine:
-                f.write(f"file '{file}'\n")
-
-        # Define the ffmpeg command for concatenating segments
-        command = [
-            "ffmpeg",
-            "-y",  # Overwrite output file if it exists
-            "-loglevel",
-            "error",  # Only show errors
-            "-f",
-            "concat",  # Use concat demuxer
-            "-safe",
-            "0",  # Allow unsafe file names
-            "-i",
-            str(list_file_path),  # Input file list
-            "-c",
-            "copy",  # Copy audio codec (no re-encoding)
-            str(output_file),  # Output file
-        ]
-
-        try:
-            # Run the command using subprocess
-            subprocess.run(command, check=True)
-        except subprocess.CalledProcessError as e:
-            print(f"Error combining audio segments: {e}")
-        finally:
-            # Clean up temporary file
-            list_file_path.unlink()
-
-    def save_files(self, files: List[Path], output_folder: Path):
-        """
-        Copies a list of audio files and save them to the output folder.
-        This function rebuilds the file headers which makes the end time stable, otherwise different players are unsure of the correct duration of the file.
-
-        Args:
-            files (List[Path]): List of Paths to the audio files to be copied.
-            output_folder (Path): Path to the folder where the copied files will be saved.
-        """
-        # Iterate through each file and re-encode it
-        for file in files:
-            output_file = output_folder / file.name  # Preserve the original filename
-            command = [
-                "ffmpeg",
-                "-y",  # Overwrite the output file if it exists
-                "-loglevel",
-                "error",  # Only show errors
-                "-i",
-                str(file),  # Input file
-                "-c",
-                "copy",
-                "-write_xing",
-                "0",  # Prevent writing the Xing header, which rebuilds the file headers
-                str(output_file),  # Output file path
-            ]
-
-            # Run the command
-            subprocess.run(command, check=True)
-
-
-def convert_datetime_to_ffmpeg_time(time: datetime) -> str:
-    """
-    Converts a datetime object to a string format suitable for use with ffmpeg.
-
-    Args:
-        time (datetime): The datetime object to convert.
-
-    Returns:
-        str: The converted time string in "H:MM:SS.sss" format.
-    """
-    return time.strftime("%H:%M:%S.%f")[:-3]
+        segment_ids = segmentation.segment_timings(
+            subtitle_timings, policy=policy, value=segment_length, scene_cuts=scene_cuts
+        )
+        return segmentation.group_segments(segment_ids)
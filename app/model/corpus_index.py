@@ -0,0 +1,379 @@
+import json
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from model.model import AVIModel
+from model.segmentation import ZERO_TIME
+from model.subtitle_search import tokenise
+
+# A subtitle line of an aligned episode: its alignment entry, language, subtitle index, start and end milliseconds, and text
+CorpusLine = Tuple[int, str, int, int, int, str]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodes (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    video_file TEXT,
+    signature TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lines (
+    id INTEGER PRIMARY KEY,
+    episode_id INTEGER NOT NULL REFERENCES episodes(id),
+    entry INTEGER NOT NULL,
+    language TEXT NOT NULL,
+    subtitle_index INTEGER NOT NULL,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lines_by_entry ON lines(episode_id, entry);
+CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5(
+    text, content='lines', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS lines_inserted AFTER INSERT ON lines BEGIN
+    INSERT INTO lines_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS lines_deleted AFTER DELETE ON lines BEGIN
+    INSERT INTO lines_fts(lines_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def align_episode(subtitle_files: Dict[str, str]) -> List[CorpusLine]:
+    """
+    Parses and aligns one episode's subtitles. Runs in a worker process, so only takes and returns plain data.
+
+    Args:
+        subtitle_files (Dict[str, str]): The path of each language's subtitle file.
+
+    Returns:
+        List[CorpusLine]: Every subtitle line of every language, with the alignment entry it's in.
+    """
+    model = AVIModel(
+        {language: Path(path) for language, path in subtitle_files.items()}
+    )
+
+    lines = []
+    for language in model.languages:
+        for subtitle_index, subtitle in enumerate(
+            model.subtitle_models[language].subtitles
+        ):
+            entry = model.get_entry_index(language, subtitle_index)
+            if entry is None:
+                continue
+            lines.append(
+                (
+                    entry,
+                    language,
+                    subtitle_index,
+                    milliseconds(subtitle.start_time - ZERO_TIME),
+                    milliseconds(subtitle.end_time - ZERO_TIME),
+                    subtitle.text,
+                )
+            )
+    return lines
+
+
+def milliseconds(duration: timedelta) -> int:
+    """
+    Converts a duration to whole milliseconds, as line times are stored.
+
+    Args:
+        duration (timedelta): The duration, e.g. a subtitle's start time since midnight.
+
+    Returns:
+        int: The duration in milliseconds.
+    """
+    return round(duration.total_seconds() * 1000)
+
+
+def episode_signature(subtitle_files: Dict[str, Path]) -> str:
+    """
+    Summarises an episode's subtitle files by their paths, sizes and modification times, to tell when to re-index it.
+
+    Args:
+        subtitle_files (Dict[str, Path]): The path of each language's subtitle file.
+
+    Returns:
+        str: The signature.
+    """
+    files = {}
+    for language, subtitle_file in sorted(subtitle_files.items()):
+        status = Path(subtitle_file).stat()
+        files[language] = [str(subtitle_file), status.st_size, status.st_mtime_ns]
+    return json.dumps(files)
+
+
+def fts_phrase(query: str, prefix: bool = False) -> Optional[str]:
+    """
+    Turns a query into an FTS5 phrase, so its words match in order and punctuation can't break the query syntax.
+
+    Args:
+        query (str): The query, e.g. "¿Qué pasa?".
+        prefix (bool, optional): Whether the last word may be partly typed. Defaults to False.
+
+    Returns:
+        Optional[str]: The phrase, e.g. '"que pasa"', or None if the query has no words.
+    """
+    words = tokenise(query)
+    if not words:
+        return None
+    phrase = '"' + " ".join(words) + '"'
+    return phrase + "*" if prefix else phrase
+
+
+class CorpusIndex:
+    """
+    An on-disk index of every aligned subtitle line across the episodes of a series, for looking up phrases in context.
+
+    Episodes are aligned in parallel by `build`, and their lines stored in SQLite with an FTS5 full-text index
+    (case and accent insensitive) over their texts. Each line keeps its alignment entry, so a query returns each
+    occurrence with its aligned lines in the other languages.
+
+    Attributes:
+        database_file (Path): The SQLite database file.
+        connection (sqlite3.Connection): The connection to the database.
+    """
+
+    def __init__(self, database_file: Union[Path, str]) -> None:
+        """
+        Opens the index, creating it if needed.
+
+        Args:
+            database_file (Union[Path, str]): The SQLite database file, e.g. "Gilmore Girls.corpus.sqlite".
+        """
+        self.database_file = Path(database_file)
+        self.connection = sqlite3.connect(str(self.database_file))
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """
+        Closes the index's database.
+        """
+        self.connection.close()
+
+    def build(
+        self, episodes: Dict[str, Dict], processes: Optional[int] = None
+    ) -> Dict[str, int]:
+        """
+        Brings the index up to date with a folder's episodes, aligning those that are new or whose subtitles changed
+        in a process pool, and removing those that are gone.
+
+        Args:
+            episodes (Dict[str, Dict]): Each episode's "Video File" and "Subtitle Files", see `pair_episodes`.
+            processes (Optional[int], optional): The number of worker processes. Defaults to None, for one per CPU.
+                                                 1 aligns episodes in this process.
+
+        Returns:
+            Dict[str, int]: The number of episodes "indexed", "unchanged", "removed" and "failed".
+        """
+        counts = {"indexed": 0, "unchanged": 0, "removed": 0, "failed": 0}
+
+        stored_signatures = {
+            row["name"]: row["signature"]
+            for row in self.connection.execute("SELECT name, signature FROM episodes")
+        }
+        with self.connection:
+            for name in set(stored_signatures) - set(episodes):
+                self.remove_episode(name)
+                counts["removed"] += 1
+
+        pending = {}
+        for name, files in episodes.items():
+            signature = episode_signature(files["Subtitle Files"])
+            if stored_signatures.get(name) == signature:
+                counts["unchanged"] += 1
+            else:
+                pending[name] = signature
+
+        def store(name: str, lines: List[CorpusLine]) -> None:
+            video_file = episodes[name]["Video File"]
+            self.store_episode(
+                name,
+                str(video_file) if video_file is not None else None,
+                pending[name],
+                lines,
+            )
+            counts["indexed"] += 1
+
+        def subtitle_files(name: str) -> Dict[str, str]:
+            return {
+                language: str(path)
+                for language, path in episodes[name]["Subtitle Files"].items()
+            }
+
+        if processes == 1:
+            for name in pending:
+                try:
+                    store(name, align_episode(subtitle_files(name)))
+                except Exception as e:
+                    print(f"Could not index {name}: {e}")
+                    counts["failed"] += 1
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                futures = {
+                    executor.submit(align_episode, subtitle_files(name)): name
+                    for name in pending
+                }
+                # Store episodes as they finish, so an interrupted build keeps its progress
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        store(name, future.result())
+                    except Exception as e:
+                        print(f"Could not index {name}: {e}")
+                        counts["failed"] += 1
+
+        return counts
+
+    def store_episode(
+        self,
+        name: str,
+        video_file: Optional[str],
+        signature: str,
+        lines: List[CorpusLine],
+    ) -> None:
+        """
+        Replaces an episode's lines in the index.
+
+        Args:
+            name (str): The episode's name.
+            video_file (Optional[str]): The episode's video file, if it has one.
+            signature (str): The signature of the episode's subtitle files, see `episode_signature`.
+            lines (List[CorpusLine]): The episode's aligned lines.
+        """
+        with self.connection:
+            self.remove_episode(name)
+            episode_id = self.connection.execute(
+                "INSERT INTO episodes (name, video_file, signature) VALUES (?, ?, ?)",
+                (name, video_file, signature),
+            ).lastrowid
+            self.connection.executemany(
+                "INSERT INTO lines (episode_id, entry, language, subtitle_index, start_ms, end_ms, text)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((episode_id,) + line for line in lines),
+            )
+
+    def remove_episode(self, name: str) -> None:
+        """
+        Removes an episode and its lines from the index, as part of the caller's transaction.
+
+        Args:
+            name (str): The episode's name.
+        """
+        self.connection.execute(
+            "DELETE FROM lines WHERE episode_id IN (SELECT id FROM episodes WHERE name = ?)",
+            (name,),
+        )
+        self.connection.execute("DELETE FROM episodes WHERE name = ?", (name,))
+
+    def episode_names(self) -> List[str]:
+        """
+        Lists the episodes in the index.
+
+        Returns:
+            List[str]: The episodes' names, in alphabetical order.
+        """
+        return [
+            row["name"]
+            for row in self.connection.execute(
+                "SELECT name FROM episodes ORDER BY name"
+            )
+        ]
+
+    def concordance(
+        self,
+        query: str,
+        language: str,
+        languages: Optional[List[str]] = None,
+        limit: Optional[int] = 50,
+        prefix: bool = False,
+    ) -> List[Dict]:
+        """
+        Finds every occurrence of a word or phrase in a language across the episodes, with its aligned lines.
+
+        Args:
+            query (str): The word or phrase, matched ignoring case, accents and punctuation.
+            language (str): The language to search.
+            languages (Optional[List[str]], optional): The languages of the aligned lines to return.
+                                                       Defaults to None, for every other language.
+            limit (Optional[int], optional): The most occurrences to return. Defaults to 50. None returns them all.
+            prefix (bool, optional): Whether the last word of the query may be partly typed. Defaults to False.
+
+        Returns:
+            List[Dict]: Each occurrence's "episode", "video_file", "entry", "language", "subtitle_index",
+                "start_time" and "end_time" (as subtitle datetimes), "text", and "aligned_texts" by language,
+                in episode and time order.
+        """
+        phrase = fts_phrase(query, prefix)
+        if phrase is None:
+            return []
+
+        rows = self.connection.execute(
+            "SELECT lines.*, episodes.name AS episode, episodes.video_file"
+            " FROM lines_fts"
+            " JOIN lines ON lines.id = lines_fts.rowid"
+            " JOIN episodes ON episodes.id = lines.episode_id"
+            " WHERE lines_fts MATCH ? AND lines.language = ?"
+            " ORDER BY episodes.name, lines.start_ms"
+            " LIMIT ?",
+            (phrase, language, -1 if limit is None else limit),
+        ).fetchall()
+
+        hits = []
+        for row in rows:
+            aligned_texts = {}
+            for aligned_row in self.connection.execute(
+                "SELECT language, text FROM lines"
+                " WHERE episode_id = ? AND entry = ? AND language != ?"
+                " ORDER BY subtitle_index",
+                (row["episode_id"], row["entry"], language),
+            ):
+                aligned_language = aligned_row["language"]
+                if languages is not None and aligned_language not in languages:
+                    continue
+                # An entry can hold several of a language's subtitles
+                aligned_texts.setdefault(aligned_language, []).append(
+                    aligned_row["text"]
+                )
+
+            hits.append(
+                {
+                    "episode": row["episode"],
+                    "video_file": row["video_file"],
+                    "entry": row["entry"],
+                    "language": language,
+                    "subtitle_index": row["subtitle_index"],
+                    "start_time": ZERO_TIME + timedelta(milliseconds=row["start_ms"]),
+                    "end_time": ZERO_TIME + timedelta(milliseconds=row["end_ms"]),
+                    "text": row["text"],
+                    "aligned_texts": {
+                        aligned_language: " ".join(texts)
+                        for aligned_language, texts in aligned_texts.items()
+                    },
+                }
+            )
+        return hits
+
+
+def flashcard_fields(hit: Dict, answer_language: str) -> Dict[str, str]:
+    """
+    Fills a flashcard's text fields from a concordance occurrence and its aligned line in another language.
+
+    Args:
+        hit (Dict): An occurrence returned by `CorpusIndex.concordance`.
+        answer_language (str): The language of the answer.
+
+    Returns:
+        Dict[str, str]: The "Question Text", "Question Language", "Answer Text" and "Answer Language" fields.
+    """
+    return {
+        "Question Text": hit["text"],
+        "Question Language": hit["language"],
+        "Answer Text": hit["aligned_texts"].get(answer_language, ""),
+        "Answer Language": answer_language,
+    }
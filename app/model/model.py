@@ -1,7 +1,10 @@
 import re
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Tuple, Dict, Union
+from typing import List, Optional, Tuple, Dict, Union
+
+from model import segmentation
+from model.subtitle_search import SubtitleSearchIndex
 
 NON_SPEAKING_SYMBOLS = ["♪", "<i>", "[", "]"]
 SPECIAL_ENCODINGS = {
@@ -330,6 +333,9 @@ class AVIModel:
         alignment (Alignment): An instance of the nested Alignment class that holds the aligned subtitle data.
         reverse_mappings (Dict[str, Dict[int, int]]): A dictionary for mapping subtitle indices from
                                                       each language into to the aligned multilingual structure.
+        segment_first_entries (List[int]): The index of the first alignment entry of each segment, in segment order.
+        alignment_milliseconds (Optional[Tuple[int, np.ndarray, np.ndarray]]): The number of alignment entries when
+            their timings were last converted for segmenting, and their start and end times in milliseconds.
     """
 
     def __init__(
@@ -353,6 +359,7 @@ class AVIModel:
         self.subtitle_files = subtitle_files
         self.subtitle_matching_method = subtitle_matching_method
         self.subtitle_timing_tolerance = subtitle_timing_tolerance
+        self.alignment_milliseconds = None
 
         self.reference_file = self.determine_reference_file()
         self.subtitle_models = {
@@ -408,6 +415,7 @@ class AVIModel:
         self.alignment = self.Alignment(
             self.languages, self.subtitle_models["Reference"].subtitles
         )
+        self.alignment_milliseconds = None
 
         # MATCHING
         # Go through each language in turn:
@@ -430,18 +438,205 @@ class AVIModel:
         # REVERSE MAPPING
         # Go through each subtitle in the multilingual structure:
         ## For each language, add current alignment index to that language's mapping into multilingual structure
-
-        # TODO: Actually implement and use reverse mappings.
-        self.reverse_mappings = {}
+        self.build_reverse_mappings()
+        self.search_index = None  # Built when first searched
 
         # ADDING NEW LANGUAGES (Future proofing)
         # If at some point a new language is added:
         ## Add subtitles to appropriate places
         ## If need to create a new dummy subtitle, need to add 1 to all reverse mappings higher than current index!
 
-    # TODO: Allow for different segmenting algorithms, e.g. by making segments of e.g. 15 seconds long.
+    def build_reverse_mappings(self) -> None:
+        """
+        Maps every subtitle of every language to the index of the alignment entry it's in, and finds where each segment
+        starts, in one pass over the alignment.
+        """
+        self.reverse_mappings = {
+            language: {} for language in ["Reference"] + self.languages
+        }
+        self.segment_first_entries = []
+        previous_segment = None
+        for entry_index, entry in enumerate(self.alignment.alignment):
+            for language, subtitle_indices in entry["subtitle_indices"].items():
+                language_mapping = self.reverse_mappings.setdefault(language, {})
+                for subtitle_index in subtitle_indices:
+                    language_mapping[subtitle_index] = entry_index
+            if entry["segment"] != previous_segment:
+                self.segment_first_entries.append(entry_index)
+                previous_segment = entry["segment"]
+
+    def get_entry_index(self, language: str, subtitle_index: int) -> Optional[int]:
+        """
+        Finds the alignment entry a subtitle is in, e.g. the row of a subtitle whose listen button was clicked.
+
+        Args:
+            language (str): The subtitle's language.
+            subtitle_index (int): The subtitle's index in that language's subtitles.
+
+        Returns:
+            Optional[int]: The index of the alignment entry, or None if the subtitle isn't aligned.
+        """
+        return self.reverse_mappings.get(language, {}).get(subtitle_index)
+
+    def get_segment(self, language: str, subtitle_index: int) -> Optional[int]:
+        """
+        Finds the segment a subtitle is in, as of the latest segmenting.
+
+        Args:
+            language (str): The subtitle's language.
+            subtitle_index (int): The subtitle's index in that language's subtitles.
+
+        Returns:
+            Optional[int]: The segment number, from 1, or None if the subtitle isn't aligned.
+        """
+        entry_index = self.get_entry_index(language, subtitle_index)
+        if entry_index is None:
+            return None
+        return self.alignment.alignment[entry_index]["segment"]
+
+    def get_aligned_subtitles(
+        self, language: str, subtitle_index: int
+    ) -> Dict[str, List[int]]:
+        """
+        Finds the subtitles of every language aligned with a subtitle, e.g. to play or show its whole row.
+
+        Args:
+            language (str): The subtitle's language.
+            subtitle_index (int): The subtitle's index in that language's subtitles.
+
+        Returns:
+            Dict[str, List[int]]: The indices of the aligned subtitles in each language, including the subtitle itself
+                (also when it's a "Reference" subtitle). Empty if the subtitle isn't aligned.
+        """
+        entry_index = self.get_entry_index(language, subtitle_index)
+        if entry_index is None:
+            return {}
+        subtitle_indices = self.alignment.alignment[entry_index]["subtitle_indices"]
+        aligned_subtitles = {
+            aligned_language: subtitle_indices[aligned_language]
+            for aligned_language in self.languages
+        }
+        aligned_subtitles.setdefault(language, subtitle_indices[language])
+        return aligned_subtitles
+
+    def get_segment_entries(self, segment: int) -> range:
+        """
+        Finds the alignment entries in a segment.
+
+        Args:
+            segment (int): The segment number, from 1.
+
+        Returns:
+            range: The indices of the segment's entries, empty if there is no such segment.
+        """
+        if not 1 <= segment <= len(self.segment_first_entries):
+            return range(0)
+        if segment == len(self.segment_first_entries):
+            return range(
+                self.segment_first_entries[segment - 1], len(self.alignment.alignment)
+            )
+        return range(
+            self.segment_first_entries[segment - 1],
+            self.segment_first_entries[segment],
+        )
+
+    def search_subtitles(
+        self,
+        query: str,
+        languages: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Union[str, int]]]:
+        """
+        Searches the text of every language's subtitles, see `SubtitleSearchIndex.search`.
+
+        Args:
+            query (str): The query, whose last word may be partly typed.
+            languages (Optional[List[str]], optional): Only search these languages. Defaults to None, for every language.
+            limit (Optional[int], optional): The most subtitles to return. Defaults to None, for every match.
+
+        Returns:
+            List[Dict[str, Union[str, int]]]: The matching subtitles, with their "language", "subtitle_index", "text",
+                and the index of the alignment "entry" they're in (None if they aren't aligned).
+        """
+        if self.search_index is None:
+            self.search_index = SubtitleSearchIndex()
+            for language in self.languages:
+                self.search_index.add_subtitles(
+                    language,
+                    (
+                        subtitle.text
+                        for subtitle in self.subtitle_models[language].subtitles
+                    ),
+                )
+
+        hits = []
+        for language, subtitle_index in self.search_index.search(
+            query, languages, limit
+        ):
+            subtitle = self.subtitle_models[language].subtitles[subtitle_index]
+            hits.append(
+                {
+                    "language": language,
+                    "subtitle_index": subtitle_index,
+                    "entry": self.get_entry_index(language, subtitle_index),
+                    "text": subtitle.text,
+                }
+            )
+        return hits
+
+    def add_language(
+        self,
+        language: str,
+        subtitle_file: Path,
+        aligned_like: Optional[str] = None,
+    ) -> None:
+        """
+        Adds another language's subtitles to the model after it has been built, e.g. a pre-translated subtitle track.
+
+        Args:
+            language (str): The name of the new language column, e.g. "English (DeepL)".
+            subtitle_file (Path): The path to the new language's subtitle file.
+            aligned_like (Optional[str], optional): A language whose subtitles have the same timings as the new ones
+                                                    (e.g. the language that was translated), whose alignment is then reused.
+                                                    Defaults to None, to align the new subtitles by their timings.
+
+        Raises:
+            ValueError: If the language is already in the model.
+        """
+        if language in self.subtitle_models:
+            raise ValueError(f"{language} subtitles have already been added.")
+
+        subtitle_model = SubtitleModel(language, subtitle_file)
+        self.subtitle_files[language] = subtitle_file
+        self.subtitle_models[language] = subtitle_model
+        self.languages.append(language)
+
+        # Subtitles only match one-to-one if none were merged or skipped while parsing
+        if (
+            aligned_like is not None
+            and subtitle_model.number_of_subtitles()
+            == self.subtitle_models[aligned_like].number_of_subtitles()
+        ):
+            self.alignment.copy_language_values(language, aligned_like)
+        else:
+            self.alignment.add_language_placeholders(language)
+            self.alignment.add_new_language(
+                language=language,
+                subtitles=subtitle_model.subtitles,
+                subtitle_matching_method=self.subtitle_matching_method,
+            )
+
+        # Aligning may have inserted entries, moving others along
+        self.build_reverse_mappings()
+        if self.search_index is not None:
+            self.search_index.add_subtitles(
+                language, (subtitle.text for subtitle in subtitle_model.subtitles)
+            )
+
     # TODO: Maybe choose a default maximum seconds value.
-    def create_segments(self, maximum_seconds_between_segments: float) -> None:
+    def create_segments(
+        self, maximum_seconds_between_segments: float
+    ) -> Tuple[List[int], List[int]]:
         """
         Segments the subtitle entries of the alignment based on maximum allowed silence duration between segments.
 
@@ -453,26 +648,61 @@ class AVIModel:
             maximum_seconds_between_segments (float): The maximum duration (in seconds) of
                                                       silence allowed between subtitles
                                                       before starting a new segment.
+
+        Returns:
+            Tuple[List[int], List[int]]: The changes to where segments start, see `segment_alignment`.
         """
+        return self.segment_alignment(
+            policy=segmentation.SILENCE_GAP, value=maximum_seconds_between_segments
+        )
 
-        # Don't need to track previous entry's start time as only compare current subtitle's start time to end time of previous subtitle
-        end_time = self.alignment.alignment[0]["timings"][1]
-        # Don't need to assign first entry's segment to 1 as it's always 1
-        segment = 1
+    def segment_alignment(
+        self,
+        policy: str,
+        value: Optional[float] = None,
+        scene_cuts: Optional[List[float]] = None,
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Segments the subtitle entries of the alignment with any of the segmenting policies.
 
-        for entry in self.alignment.alignment[1:]:
-            current_start_time, current_end_time = entry["timings"]
+        Args:
+            policy (str): One of `segmentation.SEGMENTING_POLICIES`.
+            value (Optional[float], optional): The policy's parameter, see `segmentation.segment_timings`. Defaults to None.
+            scene_cuts (Optional[List[float]], optional): The scene cut times in seconds, for `segmentation.SCENE_CUTS`. Defaults to None.
 
-            if (
-                current_start_time - end_time
-            ).total_seconds() > maximum_seconds_between_segments:
-                segment += 1
+        Returns:
+            Tuple[List[int], List[int]]: The indices of the entries that now start a segment but didn't before,
+                and of those that no longer start one, so views can update just the segments that changed.
+        """
+        entries = self.alignment.alignment
+        # Entries are only ever inserted into the alignment, never retimed, so the timings only need converting
+        # again when the number of entries changes. This keeps re-segmenting cheap enough to do live
+        if self.alignment_milliseconds is None or self.alignment_milliseconds[0] != len(
+            entries
+        ):
+            starts, ends = segmentation.timings_to_milliseconds(
+                [entry["timings"] for entry in entries]
+            )
+            self.alignment_milliseconds = (len(entries), starts, ends)
+        _, starts, ends = self.alignment_milliseconds
 
-            # Assign the segment to the entry
-            entry["segment"] = segment
+        segment_ids = segmentation.segment_milliseconds(
+            starts, ends, policy=policy, value=value, scene_cuts=scene_cuts
+        )
+        changes = segmentation.diff_segment_starts(
+            [entry["segment"] for entry in entries], segment_ids
+        )
 
-            # Update current values for the next loop
-            end_time = current_end_time
+        # Segments are numbered from 1 in the alignment
+        for entry, segment_id in zip(entries, segment_ids.tolist()):
+            entry["segment"] = segment_id + 1
+        if len(entries) > 0:
+            self.segment_first_entries = [0] + segmentation.segment_starts(
+                segment_ids
+            ).tolist()
+        else:
+            self.segment_first_entries = []
+        return changes
 
     def get_subtitle(self, language: str, subtitle_number: int) -> Subtitle:
         return self.subtitle_models[language].get_subtitle(subtitle_number)
@@ -573,6 +803,37 @@ class AVIModel:
 
             self.aligned_languages.append(language)
 
+        def copy_language_values(self, language: str, from_language: str) -> None:
+            """
+            Copies an aligned language's subtitle indices to a new language whose subtitles have the same timings.
+
+            Args:
+                language (str): The language to which values should be copied.
+                from_language (str): The already aligned language.
+            """
+            if language not in self.languages:
+                self.languages.append(language)
+
+            for entry in self.alignment:
+                entry["subtitle_indices"][language] = entry["subtitle_indices"][
+                    from_language
+                ][:]
+
+            self.aligned_languages.append(language)
+
+        def add_language_placeholders(self, language: str) -> None:
+            """
+            Adds empty subtitle indices for a language to every entry, before adding the language after initialisation.
+
+            Args:
+                language (str): The language being added.
+            """
+            if language not in self.languages:
+                self.languages.append(language)
+
+            for entry in self.alignment:
+                entry["subtitle_indices"].setdefault(language, [])
+
         def add_new_language(
             self,
             language: str,
@@ -684,7 +945,7 @@ class AVIModel:
             new_entry = {
                 "timings": (start_time, end_time),
                 "subtitle_indices": subtitle_indices,
-                "segment": 1,  # TODO: Perhaps allow for adding to already created segments dynamically :)
+                "segment": 1,  # Joins the previous entry's segment once it's placed, until re-segmenting
             }
 
             # Then find where the entry should go and insert it
@@ -699,6 +960,9 @@ class AVIModel:
                             "timings"
                         ][1]
                         assert previous_entry_end_time <= start_time
+                        new_entry["segment"] = self.alignment[entry_index - 1][
+                            "segment"
+                        ]
                     self.alignment.insert(entry_index, new_entry)
                     return
 
@@ -707,6 +971,7 @@ class AVIModel:
                     assert (
                         entry_end_time <= start_time
                     )  # Confirming the start time of the entry to add comes after the query entry's end time
+                    new_entry["segment"] = entry["segment"]
                     self.alignment.append(new_entry)
                     return
 
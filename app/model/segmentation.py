@@ -0,0 +1,293 @@
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Segmenting policies
+SPEECH_LENGTH = "speech_length"  # Start a new segment once the current one holds more than a maximum amount of speech
+SILENCE_GAP = "silence_gap"  # Start a new segment when the silence between two subtitles is longer than a maximum gap
+SEGMENT_COUNT = "segment_count"  # Split into a target number of segments with roughly equal amounts of speech
+SCENE_CUTS = "scene_cuts"  # Start a new segment at each scene cut of the video
+SEGMENTING_POLICIES = [SPEECH_LENGTH, SILENCE_GAP, SEGMENT_COUNT, SCENE_CUTS]
+
+# Subtitle times are datetimes on this date, see `model.model.parse_subtitle_timing`
+ZERO_TIME = datetime(1900, 1, 1)
+
+
+def timings_to_milliseconds(
+    timings: Sequence[Tuple[datetime, datetime]],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converts subtitle timings to arrays of start and end times in milliseconds.
+
+    Args:
+        timings (Sequence[Tuple[datetime, datetime]]): The start and end time of each subtitle.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The start times and end times in milliseconds, as int64 arrays.
+    """
+    if len(timings) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    times = np.array(timings, dtype="datetime64[ms]")
+    milliseconds = (times - np.datetime64(ZERO_TIME, "ms")).astype(np.int64)
+    return milliseconds[:, 0], milliseconds[:, 1]
+
+
+def segment_by_speech_length(
+    starts: np.ndarray, ends: np.ndarray, maximum_speech_ms: float
+) -> np.ndarray:
+    """
+    Groups subtitles so each segment holds a limited amount of speech.
+
+    A new segment starts before a subtitle once the subtitles already in the current segment
+    add up to more than the maximum, so a segment may end up slightly over it.
+
+    Args:
+        starts (np.ndarray): The start time of each subtitle in milliseconds.
+        ends (np.ndarray): The end time of each subtitle in milliseconds.
+        maximum_speech_ms (float): The amount of speech (in milliseconds) after which a new segment is started.
+
+    Returns:
+        np.ndarray: The segment number of each subtitle, starting from 0.
+    """
+    num_subtitles = len(starts)
+    # Speech before each subtitle, so a segment from subtitle a up to b holds speech_before[b] - speech_before[a]
+    speech_before = np.concatenate(([0], np.cumsum(ends - starts)[:-1]))
+
+    segment_ids = np.zeros(num_subtitles, dtype=np.int64)
+    segment_start = 0
+    segment_number = 0
+    while segment_start < num_subtitles:
+        # The first subtitle after which the segment holds more than the maximum starts the next segment
+        next_start = int(
+            np.searchsorted(
+                speech_before,
+                speech_before[segment_start] + maximum_speech_ms,
+                side="right",
+            )
+        )
+        next_start = max(next_start, segment_start + 1)
+        segment_ids[segment_start:next_start] = segment_number
+        segment_start = next_start
+        segment_number += 1
+
+    return segment_ids
+
+
+def segment_by_silence_gap(
+    starts: np.ndarray, ends: np.ndarray, maximum_gap_ms: float
+) -> np.ndarray:
+    """
+    Groups subtitles so that a new segment starts after every silence longer than the maximum gap.
+
+    Args:
+        starts (np.ndarray): The start time of each subtitle in milliseconds.
+        ends (np.ndarray): The end time of each subtitle in milliseconds.
+        maximum_gap_ms (float): The longest silence (in milliseconds) allowed within a segment.
+
+    Returns:
+        np.ndarray: The segment number of each subtitle, starting from 0.
+    """
+    if len(starts) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    gaps = starts[1:] - ends[:-1]
+    return np.concatenate(([0], np.cumsum(gaps > maximum_gap_ms)))
+
+
+def segment_by_count(
+    starts: np.ndarray, ends: np.ndarray, target_count: int
+) -> np.ndarray:
+    """
+    Splits subtitles into a target number of segments holding roughly equal amounts of speech.
+
+    Fewer segments are returned if there are fewer subtitles than the target, or if single long subtitles
+    hold more speech than a segment's share.
+
+    Args:
+        starts (np.ndarray): The start time of each subtitle in milliseconds.
+        ends (np.ndarray): The end time of each subtitle in milliseconds.
+        target_count (int): The number of segments to aim for.
+
+    Returns:
+        np.ndarray: The segment number of each subtitle, starting from 0.
+    """
+    if len(starts) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    durations = np.maximum(ends - starts, 0)
+    total_speech = durations.sum()
+    if total_speech == 0 or target_count <= 1:
+        return np.zeros(len(starts), dtype=np.int64)
+
+    # Place each subtitle by the midpoint of its speech within the whole
+    speech_midpoints = np.cumsum(durations) - durations / 2
+    shares = np.minimum(
+        (speech_midpoints * target_count // total_speech).astype(np.int64),
+        target_count - 1,
+    )
+    return renumber_segments(shares)
+
+
+def segment_at_scene_cuts(
+    starts: np.ndarray, ends: np.ndarray, scene_cuts_ms: Sequence[float]
+) -> np.ndarray:
+    """
+    Groups subtitles by the scene they start in.
+
+    Args:
+        starts (np.ndarray): The start time of each subtitle in milliseconds.
+        ends (np.ndarray): The end time of each subtitle in milliseconds.
+        scene_cuts_ms (Sequence[float]): The times of the scene cuts in milliseconds.
+
+    Returns:
+        np.ndarray: The segment number of each subtitle, starting from 0. Scenes without subtitles don't get a segment.
+    """
+    if len(starts) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    scene_cuts = np.sort(np.asarray(scene_cuts_ms, dtype=np.float64))
+    scenes = np.searchsorted(scene_cuts, starts, side="right")
+    return renumber_segments(scenes)
+
+
+def renumber_segments(segment_ids: np.ndarray) -> np.ndarray:
+    """
+    Renumbers non-decreasing segment numbers so they count up from 0 without gaps.
+
+    Args:
+        segment_ids (np.ndarray): The segment number of each subtitle.
+
+    Returns:
+        np.ndarray: The renumbered segment numbers.
+    """
+    if len(segment_ids) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(([0], np.cumsum(np.diff(segment_ids) != 0)))
+
+
+def segment_timings(
+    timings: Sequence[Tuple[datetime, datetime]],
+    policy: str,
+    value: Optional[float] = None,
+    scene_cuts: Optional[Sequence[float]] = None,
+) -> np.ndarray:
+    """
+    Segments subtitle timings with the chosen policy.
+
+    Args:
+        timings (Sequence[Tuple[datetime, datetime]]): The start and end time of each subtitle.
+        policy (str): One of SEGMENTING_POLICIES.
+        value (Optional[float], optional): The policy's parameter: the maximum speech in seconds for SPEECH_LENGTH,
+            the maximum silence in seconds for SILENCE_GAP or the number of segments for SEGMENT_COUNT. Defaults to None.
+        scene_cuts (Optional[Sequence[float]], optional): The scene cut times in seconds, for SCENE_CUTS. Defaults to None.
+
+    Returns:
+        np.ndarray: The segment number of each subtitle, starting from 0.
+
+    Raises:
+        ValueError: If the policy is unknown or its parameter is missing.
+    """
+    starts, ends = timings_to_milliseconds(timings)
+    return segment_milliseconds(starts, ends, policy, value, scene_cuts)
+
+
+def segment_milliseconds(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    policy: str,
+    value: Optional[float] = None,
+    scene_cuts: Optional[Sequence[float]] = None,
+) -> np.ndarray:
+    """
+    Segments subtitles already converted to milliseconds with the chosen policy, see `segment_timings`.
+    Converting the timings is the slowest part of segmenting, so callers re-segmenting often can convert them once.
+
+    Args:
+        starts (np.ndarray): The start time of each subtitle in milliseconds.
+        ends (np.ndarray): The end time of each subtitle in milliseconds.
+        policy (str): One of SEGMENTING_POLICIES.
+        value (Optional[float], optional): The policy's parameter, see `segment_timings`. Defaults to None.
+        scene_cuts (Optional[Sequence[float]], optional): The scene cut times in seconds, for SCENE_CUTS. Defaults to None.
+
+    Returns:
+        np.ndarray: The segment number of each subtitle, starting from 0.
+
+    Raises:
+        ValueError: If the policy is unknown or its parameter is missing.
+    """
+    if policy == SCENE_CUTS:
+        if scene_cuts is None:
+            raise ValueError("Segmenting at scene cuts needs the scene cut times.")
+        return segment_at_scene_cuts(
+            starts, ends, np.asarray(scene_cuts, dtype=np.float64) * 1000
+        )
+
+    if value is None:
+        raise ValueError(f"Segmenting policy {policy} needs a value.")
+
+    if policy == SPEECH_LENGTH:
+        return segment_by_speech_length(starts, ends, value * 1000)
+    if policy == SILENCE_GAP:
+        return segment_by_silence_gap(starts, ends, value * 1000)
+    if policy == SEGMENT_COUNT:
+        return segment_by_count(starts, ends, int(value))
+
+    raise ValueError(f"Unknown segmenting policy: {policy}")
+
+
+def group_segments(segment_ids: np.ndarray) -> List[List[int]]:
+    """
+    Turns the segment number of each subtitle into lists of subtitle indices per segment.
+
+    Args:
+        segment_ids (np.ndarray): Non-decreasing segment numbers, one per subtitle.
+
+    Returns:
+        List[List[int]]: The subtitle indices of each segment, in order.
+    """
+    if len(segment_ids) == 0:
+        return []
+    boundaries = np.flatnonzero(np.diff(segment_ids)) + 1
+    return [
+        indices.tolist()
+        for indices in np.split(np.arange(len(segment_ids)), boundaries)
+    ]
+
+
+def segment_starts(segment_ids: np.ndarray) -> np.ndarray:
+    """
+    Finds the subtitles that start a new segment, apart from the first subtitle.
+
+    Args:
+        segment_ids (np.ndarray): Non-decreasing segment numbers, one per subtitle.
+
+    Returns:
+        np.ndarray: The indices of the subtitles whose segment differs from the previous subtitle's.
+    """
+    return np.flatnonzero(np.diff(segment_ids)) + 1
+
+
+def diff_segment_starts(
+    old_segment_ids: np.ndarray, new_segment_ids: np.ndarray
+) -> Tuple[List[int], List[int]]:
+    """
+    Compares two segmentings of the same subtitles by where their segments start.
+
+    Re-segmenting with a slightly different parameter usually only moves a few boundaries, so showing the diff is much
+    cheaper than rebuilding every segment.
+
+    Args:
+        old_segment_ids (np.ndarray): The previous segment number of each subtitle.
+        new_segment_ids (np.ndarray): The new segment number of each subtitle.
+
+    Returns:
+        Tuple[List[int], List[int]]: The indices of the subtitles that now start a segment but didn't before,
+            and of those that no longer start one.
+    """
+    old_starts = segment_starts(np.asarray(old_segment_ids))
+    new_starts = segment_starts(np.asarray(new_segment_ids))
+    added = np.setdiff1d(new_starts, old_starts, assume_unique=True)
+    removed = np.setdiff1d(old_starts, new_starts, assume_unique=True)
+    return added.tolist(), removed.tolist()
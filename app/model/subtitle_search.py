@@ -0,0 +1,196 @@
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+WORD_PATTERN = re.compile(r"\w+")
+# Shorter query words only match whole words, as nearly every word would start with them
+MINIMUM_PREFIX_LENGTH = 2
+# The number of prefixes whose matching subtitles are remembered
+PREFIX_CACHE_SIZE = 256
+
+# A subtitle in the index: its language and its index in that language's subtitles
+SubtitleKey = Tuple[str, int]
+
+
+def normalise_word(word: str) -> str:
+    """
+    Normalises a word for searching, so that case and accents don't matter, e.g. "Qué" -> "que".
+
+    Args:
+        word (str): The word.
+
+    Returns:
+        str: The normalised word.
+    """
+    decomposed = unicodedata.normalize("NFKD", word.casefold())
+    return "".join(
+        character for character in decomposed if not unicodedata.combining(character)
+    )
+
+
+def tokenise(text: str) -> List[str]:
+    """
+    Splits text into normalised words, ignoring punctuation.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        List[str]: The normalised words, in order.
+    """
+    return [normalise_word(word) for word in WORD_PATTERN.findall(text)]
+
+
+class SubtitleSearchIndex:
+    """
+    An in-memory full-text index over subtitles in any number of languages, for searching as you type.
+
+    Each subtitle is a document. An inverted index maps each normalised word to the (sorted) ids of the documents
+    containing it, and a sorted vocabulary finds every word starting with a prefix by binary search, so the last word
+    of a query can be partly typed. Queries of several words match them as a phrase.
+
+    Attributes:
+        documents (List[SubtitleKey]): The language and subtitle index of each document, by document id.
+        document_words (List[List[str]]): The normalised words of each document, by document id.
+        postings (Dict[str, List[int]]): The ids of the documents containing each word, in increasing order.
+        vocabulary (List[str]): Every word in the index, sorted.
+        vocabulary_is_stale (bool): Whether subtitles have been added since the vocabulary was last sorted.
+        prefix_cache (OrderedDict[str, Set[int]]): The documents matching recently searched prefixes.
+    """
+
+    def __init__(self) -> None:
+        self.documents = []
+        self.document_words = []
+        self.postings = {}
+        self.vocabulary = []
+        self.vocabulary_is_stale = False
+        self.prefix_cache = OrderedDict()
+
+    def add_subtitles(self, language: str, texts: Iterable[str]) -> None:
+        """
+        Adds a language's subtitles to the index.
+
+        Args:
+            language (str): The language.
+            texts (Iterable[str]): The text of each subtitle, in subtitle index order.
+        """
+        for subtitle_index, text in enumerate(texts):
+            document_id = len(self.documents)
+            words = tokenise(text)
+            self.documents.append((language, subtitle_index))
+            self.document_words.append(words)
+            for word in set(words):
+                # Documents are only ever appended, so each word's postings stay sorted
+                self.postings.setdefault(word, []).append(document_id)
+
+        self.vocabulary_is_stale = True
+        self.prefix_cache.clear()
+
+    def documents_with_prefix(self, prefix: str) -> Set[int]:
+        """
+        Finds the documents containing a word that starts with a prefix.
+
+        Args:
+            prefix (str): The normalised prefix.
+
+        Returns:
+            Set[int]: The document ids.
+        """
+        documents = self.prefix_cache.get(prefix)
+        if documents is not None:
+            self.prefix_cache.move_to_end(prefix)
+            return documents
+
+        if self.vocabulary_is_stale:
+            self.vocabulary = sorted(self.postings)
+            self.vocabulary_is_stale = False
+
+        documents = set()
+        vocabulary = self.vocabulary
+        position = bisect_left(vocabulary, prefix)
+        while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+            documents.update(self.postings[vocabulary[position]])
+            position += 1
+
+        self.prefix_cache[prefix] = documents
+        while len(self.prefix_cache) > PREFIX_CACHE_SIZE:
+            self.prefix_cache.popitem(last=False)
+        return documents
+
+    def search(
+        self,
+        query: str,
+        languages: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[SubtitleKey]:
+        """
+        Finds the subtitles containing a query's words as a phrase, with the last word possibly partly typed.
+
+        Args:
+            query (str): The query, e.g. "qué pa".
+            languages (Optional[List[str]], optional): Only search these languages. Defaults to None, for every language.
+            limit (Optional[int], optional): The most subtitles to return. Defaults to None, for every match.
+
+        Returns:
+            List[SubtitleKey]: The language and subtitle index of each matching subtitle, in the order they were added.
+        """
+        words = tokenise(query)
+        if not words:
+            return []
+
+        # Intersect the rarest words' documents first, as they narrow the candidates down fastest
+        candidate_sets = [set(self.postings.get(word, ())) for word in words[:-1]]
+        last_word = words[-1]
+        last_word_is_prefix = len(last_word) >= MINIMUM_PREFIX_LENGTH
+        if last_word_is_prefix:
+            candidate_sets.append(self.documents_with_prefix(last_word))
+        else:
+            candidate_sets.append(set(self.postings.get(last_word, ())))
+        candidate_sets.sort(key=len)
+        candidates = set(candidate_sets[0])
+        for documents in candidate_sets[1:]:
+            candidates &= documents
+            if not candidates:
+                return []
+
+        results = []
+        for document_id in sorted(candidates):
+            language, subtitle_index = self.documents[document_id]
+            if languages is not None and language not in languages:
+                continue
+            if len(words) > 1 and not contains_phrase(
+                self.document_words[document_id], words, last_word_is_prefix
+            ):
+                continue
+            results.append((language, subtitle_index))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+
+def contains_phrase(
+    document_words: List[str], words: List[str], last_word_is_prefix: bool = True
+) -> bool:
+    """
+    Checks whether words appear consecutively in a document.
+
+    Args:
+        document_words (List[str]): The document's normalised words.
+        words (List[str]): The normalised words to find.
+        last_word_is_prefix (bool, optional): Whether the last word only needs to start a document word. Defaults to True.
+
+    Returns:
+        bool: True if the document contains the phrase.
+    """
+    last = len(words) - 1
+    for start in range(len(document_words) - last):
+        if document_words[start : start + last] != words[:last]:
+            continue
+        final_word = document_words[start + last]
+        if final_word == words[last] or (
+            last_word_is_prefix and final_word.startswith(words[last])
+        ):
+            return True
+    return False
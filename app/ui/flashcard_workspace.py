@@ -1,5 +1,5 @@
 import shutil  # For copying audio
-from typing import Optional, List
+from typing import Dict, Optional, List
 from bs4 import BeautifulSoup  # For parsing HTML
 
 from PyQt5.QtWidgets import (
@@ -342,6 +342,43 @@ class FlashcardWorkspace(QWidget):
             elif isinstance(widget, AudioViewer):
                 widget.reset_viewer()
 
+    def load_flashcard(self, card: Dict[str, str], media_paths: Dict[str, str]) -> None:
+        """
+        Fills the fields with a saved flashcard's data, e.g. to edit it.
+
+        Args:
+            card (Dict[str, str]): The flashcard's fields, as extracted by `extract_field_data`.
+            media_paths (Dict[str, str]): The path of each media field's file, "" if it has none.
+        """
+        self.reset_flashcard_fields()
+
+        for field_name, field_data in card.items():
+            widget = self.fields.get(field_name)
+
+            if widget is None:
+                continue
+            elif isinstance(widget, QTextEdit):
+                widget.setHtml(field_data)
+            elif isinstance(widget, QLineEdit):
+                widget.setText(field_data)
+            elif isinstance(widget, QComboBox):
+                widget.setCurrentText(field_data)
+            elif isinstance(widget, QCheckBox):
+                widget.setChecked(field_data == "y")
+            elif isinstance(widget, ScreenshotViewer) and media_paths.get(field_name):
+                widget.update_screenshots([QPixmap(media_paths[field_name])])
+            elif isinstance(widget, AudioViewer) and media_paths.get(field_name):
+                widget.update_audio(media_paths[field_name])
+
+    def set_editing(self, editing: bool) -> None:
+        """
+        Shows whether the Add button adds a new flashcard or saves changes to a previous one.
+
+        Args:
+            editing (bool): Whether a previous flashcard is being edited.
+        """
+        self.add_button.setText("Save Edit" if editing else "Add")
+
     def swap_deck(self) -> None:
         """
         Cycles to the next deck, useful for a swap deck shortcut.
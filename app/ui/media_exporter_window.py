@@ -1,7 +1,6 @@
 from typing import List
 from pathlib import Path
 
-import ffmpeg
 from PyQt5.QtWidgets import (
     QApplication,
     QWidget,
@@ -24,9 +23,15 @@ from PyQt5.QtWidgets import (
     QSizePolicy,
     QRadioButton,
     QButtonGroup,
+    QProgressBar,
 )
 from PyQt5.QtCore import Qt, QLocale, pyqtSignal
+from PyQt5.QtGui import QCloseEvent
 
+from avi_utils.episode_pairing import find_episode_subtitles
+from avi_utils.folder_scan_worker import FolderScanner
+from avi_utils.media_metadata import get_media_metadata_cache
+from media_exporter.export_progress import format_eta
 
 # Two below to make scaling bigger on small high-res screens
 if hasattr(Qt, "AA_EnableHighDpiScaling"):
@@ -95,9 +100,8 @@ sample_startup_options = {
 
 def get_audio_tracks(filename):
     """Get a list of audio stream names from a video file."""
-    tracks = ffmpeg.probe(filename)["streams"]
-    audio_tracks = [s["tags"]["language"] for s in tracks if s["codec_type"] == "audio"]
-    return audio_tracks
+    # Probed once and cached, as the dropdowns ask again on every selection change
+    return get_media_metadata_cache().get_audio_tracks(filename)
 
 
 def create_separator_line():
@@ -108,16 +112,21 @@ def create_separator_line():
     return line
 
 
-# TODO: Use threads/worker to make UI not freeze when processing files :)
 class MediaExporterWindow(QWidget):
     """
     A widget for exporting condensed practice audio from audiovisual input, with options for segmenting and interleaving multiple audio tracks at different speeds.
 
+    Exports run on a worker thread, with the window showing their progress and allowing them to be cancelled.
+    The chosen folder is scanned in the background, filling the dropdowns as its files are found, and choosing a
+    video picks the reference subtitle file named after it.
+
     Signals:
         export_signal (pyqtSignal): Emitted when media creation is requested, with the given export options.
+        cancel_export_signal (pyqtSignal): Emitted when cancelling the running export is requested.
     """
 
     export_signal = pyqtSignal(dict)
+    cancel_export_signal = pyqtSignal()
 
     def __init__(self) -> None:
         """
@@ -126,14 +135,21 @@ class MediaExporterWindow(QWidget):
         super().__init__()
         self.audio_tracks = []
         self.language_rows = []  # Keep track of language row widgets
+        self.is_exporting = False
+        # Whether the user picked the reference subtitle file themselves
+        self.reference_subtitle_chosen = False
         self.init_ui()
 
+        self.folder_scanner = FolderScanner(self)
+        self.folder_scanner.files_found_signal.connect(self.add_scanned_files)
+        self.folder_scanner.scan_finished_signal.connect(self.folder_scan_finished)
+        self.folder_scanner.scan_failed_signal.connect(self.folder_scan_failed)
+
         # Quicker testing
         # folder = "C:\\Stuff\\UniversaLearn\\LanguageRepo\\Language Learning Material\\Netflix Downloads\\Las chicas Gilmore\\S01"
         folder = "C:\\Stuff\\Peppa Pig"
         self.folder_line_edit.setText(folder)
-        self.update_video_file_dropdown(folder)
-        self.update_subtitle_file_dropdown(folder)
+        self.scan_folder(folder)
 
     def init_ui(self) -> None:
         """
@@ -155,11 +171,17 @@ class MediaExporterWindow(QWidget):
         folder_layout.addWidget(self.folder_button)
         main_layout.addLayout(folder_layout)
 
+        self.folder_scan_label = QLabel()
+        main_layout.addWidget(self.folder_scan_label)
+
         # Video file selection
         video_file_label = QLabel("Choose video file:")
         self.video_file_dropdown = QComboBox()
         self.video_file_dropdown.setMinimumWidth(400)
         self.video_file_dropdown.currentIndexChanged.connect(self.update_audio_tracks)
+        self.video_file_dropdown.currentIndexChanged.connect(
+            lambda: self.select_reference_subtitle_file()
+        )
 
         video_file_layout = QHBoxLayout()
         video_file_layout.addWidget(video_file_label)
@@ -170,6 +192,10 @@ class MediaExporterWindow(QWidget):
         subtitle_file_label = QLabel("Choose reference subtitle file:")
         self.subtitle_file_dropdown = QComboBox()
         self.subtitle_file_dropdown.setMinimumWidth(400)
+        # Only emitted for the user's choices, not when the window picks a file
+        self.subtitle_file_dropdown.activated.connect(
+            self.reference_subtitle_file_chosen
+        )
 
         subtitle_file_layout = QHBoxLayout()
         subtitle_file_layout.addWidget(subtitle_file_label)
@@ -320,13 +346,26 @@ class MediaExporterWindow(QWidget):
         self.add_language_button.clicked.connect(self.add_language_row)
         self.language_rows_layout.addWidget(self.add_language_button)
 
+        # Export progress
+        self.export_progress_bar = QProgressBar()
+        self.export_progress_bar.setRange(0, 100)
+        self.export_progress_bar.setValue(0)
+        self.export_status_label = QLabel("")
+        self.export_status_label.setWordWrap(True)
+        main_layout.addWidget(self.export_progress_bar)
+        main_layout.addWidget(self.export_status_label)
+
         bottom_buttons_layout = QHBoxLayout()
         exit_button = QPushButton("Exit")
         exit_button.clicked.connect(self.close)
-        confirm_button = QPushButton("Confirm")
-        confirm_button.clicked.connect(self.confirm_options)
+        self.cancel_button = QPushButton("Cancel Export")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_export)
+        self.confirm_button = QPushButton("Confirm")
+        self.confirm_button.clicked.connect(self.confirm_options)
         bottom_buttons_layout.addWidget(exit_button)
-        bottom_buttons_layout.addWidget(confirm_button)
+        bottom_buttons_layout.addWidget(self.cancel_button)
+        bottom_buttons_layout.addWidget(self.confirm_button)
         main_layout.addLayout(bottom_buttons_layout)
 
         self.setLayout(main_layout)
@@ -345,34 +384,121 @@ class MediaExporterWindow(QWidget):
             return
         folder = folder.replace("/", "\\\\")
         self.folder_line_edit.setText(folder)
-        self.update_video_file_dropdown(folder)
-        self.update_subtitle_file_dropdown(folder)
+        self.scan_folder(folder)
 
-    def update_video_file_dropdown(self, folder: str) -> None:
+    def scan_folder(self, folder: str) -> None:
         """
-        Clears and repopulates the video file dropdown with MP4 files from the specified folder.
+        Empties the video and subtitle file dropdowns and starts filling them from a folder in the background.
 
         Args:
-            folder (str): The path to the folder containing video files.
+            folder (str): The path to the folder containing the video and subtitle files.
         """
         self.video_file_dropdown.clear()
-        folder_path = Path(folder)
-        if folder_path.is_dir():
-            mp4_files = [file.name for file in folder_path.glob("*.mp4")]
-            self.video_file_dropdown.addItems(mp4_files)
+        self.subtitle_file_dropdown.clear()
+        self.reference_subtitle_chosen = False
+        if not Path(folder).is_dir():
+            # So the previous folder's scan doesn't fill the emptied dropdowns
+            self.folder_scanner.cancel()
+            self.folder_scan_label.clear()
+            return
+
+        self.folder_scan_label.setText("Scanning folder...")
+        self.folder_scanner.scan(folder)
 
-    def update_subtitle_file_dropdown(self, folder: str) -> None:
+    def add_scanned_files(
+        self, video_files: List[str], subtitle_files: List[str]
+    ) -> None:
         """
-        Clears and repopulates the subtitle file dropdown with SRT files from the specified folder.
+        Adds a batch of files found in the folder to the dropdowns.
 
         Args:
-            folder (str): The path to the folder containing subtitle files.
+            video_files (List[str]): The video file names found.
+            subtitle_files (List[str]): The subtitle file names found.
         """
-        self.subtitle_file_dropdown.clear()
-        folder_path = Path(folder)
-        if folder_path.is_dir():
-            subtitle_files = [file.name for file in folder_path.glob("*.srt")]
-            self.subtitle_file_dropdown.addItems(subtitle_files)
+        # Added first, so the reference subtitle can be picked when the first video is added
+        self.update_subtitle_file_dropdown(subtitle_files)
+        self.update_video_file_dropdown(video_files)
+        if subtitle_files:
+            # Subtitles found after the video was chosen are picked too, without overriding a choice made meanwhile
+            self.select_reference_subtitle_file(only_unset=True)
+
+    def folder_scan_finished(self, folder: str) -> None:
+        """
+        Shows how many files were found once the folder has been scanned.
+
+        Args:
+            folder (str): The folder.
+        """
+        self.folder_scan_label.setText(
+            f"Found {self.video_file_dropdown.count()} video files and {self.subtitle_file_dropdown.count()} subtitle files."
+        )
+
+    def folder_scan_failed(self, error_message: str) -> None:
+        """
+        Shows why the folder couldn't be scanned.
+
+        Args:
+            error_message (str): The error.
+        """
+        self.folder_scan_label.setText(f"Could not read folder: {error_message}")
+
+    def update_video_file_dropdown(self, video_files: List[str]) -> None:
+        """
+        Adds MP4 files found in the chosen folder to the video file dropdown.
+
+        Args:
+            video_files (List[str]): The video file names.
+        """
+        self.video_file_dropdown.addItems(video_files)
+        # So their audio tracks are ready by the time one is chosen
+        folder_path = Path(self.folder_line_edit.text())
+        get_media_metadata_cache().probe_in_background(
+            folder_path / file_name for file_name in video_files
+        )
+
+    def update_subtitle_file_dropdown(self, subtitle_files: List[str]) -> None:
+        """
+        Adds SRT files found in the chosen folder to the subtitle file dropdown.
+
+        Args:
+            subtitle_files (List[str]): The subtitle file names.
+        """
+        self.subtitle_file_dropdown.addItems(subtitle_files)
+
+    def select_reference_subtitle_file(self, only_unset: bool = False) -> None:
+        """
+        Picks the subtitle file named after the selected video as the reference, preferring one named just like the
+        video (e.g. the Netflix original), then the English one.
+
+        Args:
+            only_unset (bool, optional): Whether to leave the reference alone if the user already chose one.
+                                         Defaults to False.
+        """
+        video_file_name = self.video_file_dropdown.currentText()
+        if not video_file_name:
+            return
+        if only_unset and self.reference_subtitle_chosen:
+            return
+        # A new video gets its own reference subtitle, even if the user picked one for the last video
+        self.reference_subtitle_chosen = False
+
+        subtitle_file_names = [
+            self.subtitle_file_dropdown.itemText(index)
+            for index in range(self.subtitle_file_dropdown.count())
+        ]
+        episode_subtitles = find_episode_subtitles(
+            video_file_name, subtitle_file_names, untagged_language="Reference"
+        )
+        for language in ["Reference", "English"]:
+            if language in episode_subtitles:
+                self.subtitle_file_dropdown.setCurrentText(episode_subtitles[language])
+                return
+
+    def reference_subtitle_file_chosen(self) -> None:
+        """
+        Remembers that the user picked the reference subtitle file, so files found later don't replace their choice.
+        """
+        self.reference_subtitle_chosen = True
 
     def update_audio_tracks(self) -> None:
         """
@@ -532,6 +658,85 @@ class MediaExporterWindow(QWidget):
 
         self.export_signal.emit(options)
 
+    def export_started(self) -> None:
+        """
+        Resets the progress display and disables starting another export while one is running.
+        """
+        self.is_exporting = True
+        self.confirm_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.export_progress_bar.setValue(0)
+        self.export_status_label.setText("Starting export...")
+
+    def update_export_progress(self, event: dict) -> None:
+        """
+        Updates the progress bar and status label from an export progress event.
+
+        Args:
+            event (dict): The progress event, see `ExportProgress.event`.
+        """
+        self.export_progress_bar.setValue(int(event["fraction"] * 100))
+        self.export_status_label.setText(
+            f"{event['message']} ({event['completed_steps']}/{event['total_steps']}, "
+            f"time left: {format_eta(event['eta_seconds'])})"
+        )
+
+    def export_finished(self, saved_files: List[str]) -> None:
+        """
+        Shows that the export finished successfully.
+
+        Args:
+            saved_files (List[str]): The paths of the saved practice audio files.
+        """
+        self.export_progress_bar.setValue(100)
+        self.export_status_label.setText(
+            f"Export finished: saved {len(saved_files)} file(s)."
+        )
+
+    def export_failed(self, error_message: str) -> None:
+        """
+        Shows that the export failed.
+
+        Args:
+            error_message (str): A description of the error.
+        """
+        self.export_status_label.setText(f"Export failed: {error_message}")
+
+    def export_cancelled(self) -> None:
+        """
+        Shows that the export was cancelled.
+        """
+        self.export_status_label.setText("Export cancelled.")
+
+    def export_done(self) -> None:
+        """
+        Re-enables starting exports once the running export has ended.
+        """
+        self.is_exporting = False
+        self.confirm_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+    def cancel_export(self) -> None:
+        """
+        Requests cancelling the running export.
+        """
+        if not self.is_exporting:
+            return
+        self.cancel_button.setEnabled(False)
+        self.export_status_label.setText("Cancelling export...")
+        self.cancel_export_signal.emit()
+
+    def closeEvent(self, event: QCloseEvent) -> None:
+        """
+        Cancels any running export and folder scan when the window is closed.
+
+        Args:
+            event (QCloseEvent): The close event.
+        """
+        self.cancel_export()
+        self.folder_scanner.stop()
+        super().closeEvent(event)
+
     class LanguageRowWidget(QWidget):
         """
         A widget representing a row in the media exporter, containing options
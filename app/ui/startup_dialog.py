@@ -21,7 +21,9 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 
-import ffmpeg
+from avi_utils.episode_pairing import find_episode_subtitles
+from avi_utils.folder_scan_worker import FolderScanner
+from avi_utils.media_metadata import get_media_metadata_cache
 
 LANGUAGE_LEARNING_MATERIAL_PATH = (
     r"C:\Stuff\UniversaLearn\LanguageRepo\Language Learning Material"
@@ -69,9 +71,8 @@ all_target_languages = [
 # TODO: Refactor this by placing elsewhere (as used in more places than here).
 def get_audio_tracks(filename):
     """Get a list of audio stream names from a video file"""
-    tracks = ffmpeg.probe(filename)["streams"]
-    audio_tracks = [s["tags"]["language"] for s in tracks if s["codec_type"] == "audio"]
-    return audio_tracks
+    # Probed once and cached, as the dropdowns ask again on every selection change
+    return get_media_metadata_cache().get_audio_tracks(filename)
 
 
 class StartupDialog(QDialog):
@@ -277,6 +278,16 @@ class StartupDialog(QDialog):
     def get_options(self):
         return self.startup_options
 
+    def done(self, result: int) -> None:
+        """
+        Stops any folder scan still running before the dialog closes.
+
+        Args:
+            result (int): The dialog's result code.
+        """
+        self.avi_options_page.folder_scanner.stop()
+        super().done(result)
+
 
 class TextWidget(QWidget):
     """
@@ -347,6 +358,9 @@ class TextWidget(QWidget):
 class AVIWidget(QWidget):
     """
     A widget for configuring audiovisual input (AVI) options.
+
+    The chosen folder is scanned in the background, filling the dropdowns as its files are found. Choosing a video
+    picks each language's subtitle file by name, e.g. "Episode.es.srt" or "[Spanish] Episode.srt" for "Episode.mp4".
     """
 
     def __init__(self) -> None:
@@ -356,6 +370,11 @@ class AVIWidget(QWidget):
         super().__init__()
         self.initUI()
 
+        self.folder_scanner = FolderScanner(self)
+        self.folder_scanner.files_found_signal.connect(self.add_scanned_files)
+        self.folder_scanner.scan_finished_signal.connect(self.folder_scan_finished)
+        self.folder_scanner.scan_failed_signal.connect(self.folder_scan_failed)
+
     def initUI(self) -> None:
         """
         Set up the user interface of the widget.
@@ -382,6 +401,9 @@ class AVIWidget(QWidget):
         folder_layout.addWidget(self.folder_button)
         main_layout.addLayout(folder_layout)
 
+        self.folder_scan_label = QLabel()
+        main_layout.addWidget(self.folder_scan_label)
+
         # Video file selection
         self.file_label = QLabel("Choose video file:")
         self.video_file_dropdown = QComboBox()
@@ -389,6 +411,9 @@ class AVIWidget(QWidget):
         self.video_file_dropdown.currentIndexChanged.connect(
             self.update_audio_dropdowns
         )
+        self.video_file_dropdown.currentIndexChanged.connect(
+            lambda: self.select_episode_subtitles()
+        )
 
         file_layout = QHBoxLayout()
         file_layout.addWidget(self.file_label)
@@ -485,6 +510,16 @@ class AVIWidget(QWidget):
 
         self.setLayout(main_layout)
 
+        # Choosing a language picks its subtitle file for the chosen video
+        for language_dropdown in [
+            self.source_language_dropdown,
+            self.target_language_1_dropdown,
+            self.target_language_2_dropdown,
+        ]:
+            language_dropdown.currentTextChanged.connect(
+                lambda: self.select_episode_subtitles()
+            )
+
     def choose_folder(self) -> None:
         """Opens a dialog to allow the user to choose a folder, sets the folder path, and updates the dropdowns."""
         folder = QFileDialog.getExistingDirectory(
@@ -496,18 +531,68 @@ class AVIWidget(QWidget):
         folder = folder.replace("/", "\\")
 
         self.folder_line_edit.setText(folder)
-        self.update_video_file_dropdown(folder)
-        self.update_subtitle_dropdowns(folder)
+        self.scan_folder(folder)
+
+    def scan_folder(self, folder: str) -> None:
+        """
+        Empties the file dropdowns and starts filling them from a folder in the background.
 
-    def update_video_file_dropdown(self, folder: str) -> None:
-        """Updates the video file dropdown with MP4 files from the selected folder."""
+        Args:
+            folder (str): The folder.
+        """
         self.video_file_dropdown.clear()
         self.video_file_dropdown.addItem("None")
+        self.update_subtitle_dropdowns([], clear=True)
 
-        folder_path = Path(folder)
-        mp4_files = [file.name for file in folder_path.glob("*.mp4")]
+        self.folder_scan_label.setText("Scanning folder...")
+        self.folder_scanner.scan(folder)
 
-        self.video_file_dropdown.addItems(mp4_files)
+    def add_scanned_files(
+        self, video_files: List[str], subtitle_files: List[str]
+    ) -> None:
+        """
+        Adds a batch of files found in the folder to the dropdowns.
+
+        Args:
+            video_files (List[str]): The video file names found.
+            subtitle_files (List[str]): The subtitle file names found.
+        """
+        self.update_video_file_dropdown(video_files)
+        self.update_subtitle_dropdowns(subtitle_files)
+        # Subtitles found after the video was chosen are picked too, without overriding a choice made meanwhile
+        self.select_episode_subtitles(only_unset=True)
+
+    def folder_scan_finished(self, folder: str) -> None:
+        """
+        Shows how many files were found once the folder has been scanned.
+
+        Args:
+            folder (str): The folder.
+        """
+        video_count = self.video_file_dropdown.count() - 1
+        subtitle_count = self.reference_language_subtitle_dropdown.count() - 1
+        self.folder_scan_label.setText(
+            f"Found {video_count} video files and {subtitle_count} subtitle files."
+        )
+
+    def folder_scan_failed(self, error_message: str) -> None:
+        """
+        Shows why the folder couldn't be scanned.
+
+        Args:
+            error_message (str): The error.
+        """
+        self.folder_scan_label.setText(f"Could not read folder: {error_message}")
+
+    def update_video_file_dropdown(self, video_files: List[str]) -> None:
+        """Adds MP4 files found in the selected folder to the video file dropdown."""
+        self.video_file_dropdown.addItems(video_files)
+
+        # So their audio tracks are ready by the time one is chosen
+        folder_path = Path(self.folder_line_edit.text())
+        get_media_metadata_cache().probe_in_background(
+            folder_path / file_name for file_name in video_files
+        )
 
     def update_audio_dropdowns(self):
         """Updates the audio track dropdowns with audio tracks extracted from the selected video file."""
@@ -530,25 +615,60 @@ class AVIWidget(QWidget):
         self.target_language_2_audio_dropdown.addItem("None")
         self.target_language_2_audio_dropdown.addItems(audio_tracks)
 
-    def update_subtitle_dropdowns(self, folder):
-        """Updates the subtitle file dropdowns with SRT files from the selected folder."""
-        self.reference_language_subtitle_dropdown.clear()
-        self.source_language_subtitle_dropdown.clear()
-        self.target_language_1_subtitle_dropdown.clear()
-        self.target_language_2_subtitle_dropdown.clear()
-
-        self.reference_language_subtitle_dropdown.addItem("None")
-        self.source_language_subtitle_dropdown.addItem("None")
-        self.target_language_1_subtitle_dropdown.addItem("None")
-        self.target_language_2_subtitle_dropdown.addItem("None")
-
-        subtitle_files = [file.name for file in Path(folder).glob("*.srt")]
+    def update_subtitle_dropdowns(
+        self, subtitle_files: List[str], clear: bool = False
+    ) -> None:
+        """Adds SRT files found in the selected folder to the subtitle file dropdowns, first emptying them if asked."""
+        if clear:
+            self.reference_language_subtitle_dropdown.clear()
+            self.source_language_subtitle_dropdown.clear()
+            self.target_language_1_subtitle_dropdown.clear()
+            self.target_language_2_subtitle_dropdown.clear()
+
+            self.reference_language_subtitle_dropdown.addItem("None")
+            self.source_language_subtitle_dropdown.addItem("None")
+            self.target_language_1_subtitle_dropdown.addItem("None")
+            self.target_language_2_subtitle_dropdown.addItem("None")
 
         self.reference_language_subtitle_dropdown.addItems(subtitle_files)
         self.source_language_subtitle_dropdown.addItems(subtitle_files)
         self.target_language_1_subtitle_dropdown.addItems(subtitle_files)
         self.target_language_2_subtitle_dropdown.addItems(subtitle_files)
 
+    def select_episode_subtitles(self, only_unset: bool = False) -> None:
+        """
+        Picks the subtitle files named after the selected video, for the reference and each chosen language.
+
+        Args:
+            only_unset (bool, optional): Whether to leave dropdowns where a file is already chosen. Defaults to False.
+        """
+        video_file_name = self.video_file_dropdown.currentText()
+        if video_file_name in ["None", ""]:
+            return
+
+        subtitle_file_names = [
+            self.reference_language_subtitle_dropdown.itemText(index)
+            for index in range(1, self.reference_language_subtitle_dropdown.count())
+        ]
+        # Subtitles named just like the video, e.g. the Netflix original, are the reference
+        episode_subtitles = find_episode_subtitles(
+            video_file_name, subtitle_file_names, untagged_language="Reference"
+        )
+
+        subtitle_dropdowns = {
+            "Reference": self.reference_language_subtitle_dropdown,
+            self.source_language_dropdown.currentText(): self.source_language_subtitle_dropdown,
+            self.target_language_1_dropdown.currentText(): self.target_language_1_subtitle_dropdown,
+            self.target_language_2_dropdown.currentText(): self.target_language_2_subtitle_dropdown,
+        }
+        for language, subtitle_dropdown in subtitle_dropdowns.items():
+            subtitle_file_name = episode_subtitles.get(language)
+            if subtitle_file_name is None:
+                continue
+            if only_unset and subtitle_dropdown.currentText() != "None":
+                continue
+            subtitle_dropdown.setCurrentText(subtitle_file_name)
+
     def get_video_file_path(self) -> str:
         """Retrieves the full path of the selected video file."""
         video_file_name = self.video_file_dropdown.currentText()
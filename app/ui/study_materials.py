@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Dict, Union, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
 
 from PyQt5.QtWidgets import (
     QWidget,
@@ -10,13 +10,26 @@ from PyQt5.QtWidgets import (
     QPushButton,
     QScrollArea,
     QShortcut,
-    QCheckBox,
     QLabel,
     QSizePolicy,
     QFrame,
+    QComboBox,
+    QHeaderView,
+    QAbstractItemView,
+    QSlider,
+    QLineEdit,
+    QDoubleSpinBox,
 )
 from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QKeySequence, QFont, QFontMetrics, QTextOption
+from PyQt5.QtGui import QKeySequence, QFont, QTextOption
+
+from ui.subtitle_table import SubtitleDelegate, SubtitleTableModel, SubtitleTableView
+
+# The longest silence within a segment the segmenting slider goes up to
+MAXIMUM_SEGMENT_GAP_SECONDS = 30
+# The silence between languages when listening to a whole row
+DEFAULT_ROW_GAP_SECONDS = 0.5
+MAXIMUM_ROW_GAP_SECONDS = 5
 
 
 class StudyMaterials(QWidget):
@@ -69,346 +82,351 @@ class StudyMaterials(QWidget):
         self.setLayout(main_layout)
 
 
-class SegmentHeader(QWidget):
+class SubtitleWorkspace(QWidget):
     """
-    When using dialogue segmenting, this widget displays segment information for each language
-    and allows for listening to the segment in each language with an audio track.
+    Study materials widget for displaying the multilingual parallel text of AVI dialogue.
+
+    Subtitles are shown in a table view with a column per language, painted by `SubtitleDelegate`, so only the rows
+    on screen are drawn however long the episode is. Each segment of dialogue starts with a segment header row.
     """
 
-    # TODO: Request listen for the entire segment for all the languages in a row.
-    listen_requested_signal = pyqtSignal(
+    flashcard_requested_signal = pyqtSignal(str, int)  # Language, subtitle index
+    listen_requested_signal = pyqtSignal(str, int)  # Language, subtitle index
+    row_listen_requested_signal = pyqtSignal(str, int)  # Language, subtitle index
+    segment_listen_requested_signal = pyqtSignal(
         datetime, datetime, str
-    )  # DSignal emitted when a listen request is made for a language.
+    )  # Segment start time, end time, language
+    pretranslation_requested_signal = pyqtSignal(str)  # Language to pre-translate
+    # Longest silence within a segment in seconds, infinite for no segmenting
+    segment_gap_changed_signal = pyqtSignal(float)
+    search_requested_signal = pyqtSignal(str)  # Text to search the subtitles for
 
-    def __init__(
-        self,
-        segment_number: int,
-        total_segments: int,
-        languages_with_subtitles: List[str],
-        languages_with_audio_track: List[str],
-    ) -> None:
-        """
-        Initialise the SegmentHeader widget.
-
-        Args:
-            segment_number (int): The number of the current segment.
-            total_segments (int): The total number of segments.
-            languages_with_subtitles (List[str]): List of languages with subtitles.
-            languages_with_audio_track (List[str]): List of languages with an audio track.
-        """
+    def __init__(self, languages: List[str]) -> None:
         super().__init__()
-        self.segment_number = segment_number
 
-        self.layout = QVBoxLayout()
-
-        # First horizontal box for segment_number/total_segments and timings
-        self.header_info_layout = QHBoxLayout()
-        self.layout.addLayout(self.header_info_layout)
-
-        # Left label for segment info
-        segment_label = QLabel(f"Segment {segment_number}/{total_segments}:")
-        self.header_info_layout.addWidget(segment_label, 1, alignment=Qt.AlignRight)
-
-        # Right label for time range
-        self.time_label = QLabel(" -> ")
-        self.header_info_layout.addWidget(self.time_label, 1, alignment=Qt.AlignLeft)
-
-        self.languages_layout = QHBoxLayout()
-        self.layout.addLayout(self.languages_layout)
+        self.languages = languages
+        self.languages_with_subtitles = (
+            []
+        )  ##!! Perhaps pass these two in during initialisation
+        self.languages_with_audio_tracks = []
 
-        # Second horizontal box for languages
-        for language in languages_with_subtitles:
-            has_audio_track = language in languages_with_audio_track
-            language_layout = self.create_language_layout(language, has_audio_track)
-            self.languages_layout.addLayout(language_layout)
+        self.main_layout = QVBoxLayout(self)  # Main layout to hold language layouts
+        self.main_layout.setContentsMargins(0, 0, 0, 0)
+        self.main_layout.setSpacing(0)
 
-        self.setLayout(self.layout)  # Set the main layout of the widget
+        self.set_up_pretranslation_bar()
+        self.set_up_segmenting_bar()
+        self.set_up_search_bar()
+        self.set_up_row_playback_bar()
+        self.set_up_subtitle_table()
 
-    def add_timings(self, start_time: datetime, end_time: datetime) -> None:
+    def set_up_subtitle_table(self) -> None:
         """
-        Set the start and end times for the segment and update the display.
-
-        Args:
-            start_time (datetime): The start time of the segment.
-            end_time (datetime): The end time of the segment.
+        Sets up the table view showing the subtitles, with the model holding its rows and the delegate painting them.
         """
-        self.start_time = start_time
-        self.end_time = end_time
+        self.subtitle_model = SubtitleTableModel(self)
+        self.subtitle_delegate = SubtitleDelegate(self)
+        self.subtitle_delegate.flashcard_requested_signal.connect(
+            self.flashcard_requested_signal
+        )
+        self.subtitle_delegate.listen_requested_signal.connect(
+            self.listen_requested_signal
+        )
+        self.subtitle_delegate.row_listen_requested_signal.connect(
+            self.row_listen_requested_signal
+        )
+        self.subtitle_delegate.segment_listen_requested_signal.connect(
+            self.segment_listen_requested_signal
+        )
 
-        start_time_str = start_time.strftime("%H:%M:%S")
-        end_time_str = end_time.strftime("%H:%M:%S")
-        self.time_label.setText(f"{start_time_str} -> {end_time_str}")
+        self.subtitle_table = SubtitleTableView()
+        self.subtitle_table.setModel(self.subtitle_model)
+        self.subtitle_table.setItemDelegate(self.subtitle_delegate)
+        self.subtitle_table.setWordWrap(True)
+        self.subtitle_table.setShowGrid(False)
+        self.subtitle_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        # Double-clicking a subtitle opens a read-only text box to select text from
+        self.subtitle_table.setEditTriggers(QAbstractItemView.DoubleClicked)
+        self.subtitle_table.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.subtitle_table.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.subtitle_table.verticalHeader().hide()
+        self.subtitle_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
 
-    def create_language_layout(
-        self, language: str, has_audio_track: bool
-    ) -> QHBoxLayout:
-        """
-        Create a layout for a single language, including a listen button if applicable.
+        self.main_layout.addWidget(self.subtitle_table)
 
-        Args:
-            language (str): The language for which to create the layout.
-            has_audio_track (bool): Whether there is an audio track available for this language.
-
-        Returns:
-            QHBoxLayout: The layout containing the language name and listen button if applicable.
+    def set_up_pretranslation_bar(self) -> None:
         """
-        language_layout = QHBoxLayout()  # Create a QHBoxLayout for each language column
-
-        # Add empty space
-        language_layout.addStretch(1)
+        Sets up the bar for translating every subtitle of a language ahead of time.
+        """
+        pretranslation_layout = QHBoxLayout()
+        pretranslation_layout.setContentsMargins(0, 0, 0, 5)
 
-        # Add language name label
-        language_name_label = QLabel(language)
-        label_alignment = Qt.AlignRight if has_audio_track else Qt.AlignCenter
-        language_layout.addWidget(language_name_label, 1, alignment=label_alignment)
+        self.pretranslation_language_dropdown = QComboBox()
+        pretranslation_layout.addWidget(self.pretranslation_language_dropdown)
 
-        # TODO: Allow stopping the audio too.
-        if has_audio_track:
-            # Add listen button
-            listen_button = QPushButton("🔊")
-            listen_button.setFixedSize(20, 20)
-            listen_button.clicked.connect(
-                lambda _, lang=language: self.emit_listen_request(lang)
+        self.pretranslate_button = QPushButton("Pre-translate")
+        self.pretranslate_button.clicked.connect(
+            lambda: self.pretranslation_requested_signal.emit(
+                self.pretranslation_language_dropdown.currentText()
             )
-            language_layout.addWidget(listen_button, 1, alignment=Qt.AlignLeft)
+        )
+        pretranslation_layout.addWidget(self.pretranslate_button)
 
-        # Add empty space
-        language_layout.addStretch(1)
+        self.pretranslation_status_label = QLabel("")
+        pretranslation_layout.addWidget(self.pretranslation_status_label, 1)
 
-        return language_layout
+        self.main_layout.addLayout(pretranslation_layout)
 
-    def emit_listen_request(self, language: str) -> None:
+    def set_up_segmenting_bar(self) -> None:
         """
-        Emit a signal requesting to listen to the audio of this segment for the specified language.
-
-        Args:
-            language (str): The language for which to request the audio.
+        Sets up the slider for choosing the longest silence within a segment, which re-segments the subtitles live.
+        The slider counts in half seconds, with 0 meaning no segmenting.
         """
-        self.listen_requested_signal.emit(self.start_time, self.end_time, language)
+        segmenting_layout = QHBoxLayout()
+        segmenting_layout.setContentsMargins(0, 0, 0, 5)
 
+        segmenting_layout.addWidget(QLabel("Split segments at silences over:"))
 
-class SubtitleView(QWidget):
-    """
-    Widget for displaying a subtitle with a flashcard button, and audio button if audio is available.
+        self.segment_gap_slider = QSlider(Qt.Horizontal)
+        self.segment_gap_slider.setRange(0, 2 * MAXIMUM_SEGMENT_GAP_SECONDS)
+        self.segment_gap_slider.setValue(0)
+        self.segment_gap_slider.valueChanged.connect(self.change_segment_gap)
+        segmenting_layout.addWidget(self.segment_gap_slider, 1)
 
-    Attributes:
-        listen_requested_signal (pyqtSignal): Signal emitted when the listen button is clicked.
-        flashcard_requested_signal (pyqtSignal): Signal emitted when the flashcard button is clicked.
-        subtitle_view (QPlainTextEdit): Text edit widget to display the subtitle.
-    """
+        self.segment_gap_label = QLabel("Off")
+        self.segment_gap_label.setMinimumWidth(40)
+        segmenting_layout.addWidget(self.segment_gap_label)
 
-    listen_requested_signal = pyqtSignal()
-    flashcard_requested_signal = pyqtSignal()
+        self.main_layout.addLayout(segmenting_layout)
 
-    def __init__(self, text: str, has_audio_track: bool) -> None:
+    def set_up_search_bar(self) -> None:
         """
-        Initialise the SubtitleView widget.
-
-        Args:
-            text (str): The subtitle text to display.
-            has_audio_track (bool): Whether there is an audio track available for the subtitle.
+        Sets up the search box for finding subtitles in any language as you type, with buttons to step through the hits.
+        Enter also goes to the next hit, and Shift+Enter to the previous one.
         """
-        super().__init__()
-        self.initUI(text, has_audio_track)
+        self.search_hits = []
+        self.current_search_hit = -1
 
-    def initUI(self, text: str, has_audio_track: bool) -> None:
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.setSpacing(0)
+        search_layout = QHBoxLayout()
+        search_layout.setContentsMargins(0, 0, 0, 5)
 
-        # TODO: Handling selecting multiple consecutive subtitles.
-        # Add a checkbox to the left of the subtitle to allow for selecting multiple subtitles
-        checkbox = QCheckBox()
-        layout.addWidget(checkbox, alignment=Qt.AlignTop)
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search subtitles...")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(self.search_requested_signal)
+        self.search_box.returnPressed.connect(self.go_to_next_search_hit)
+        search_layout.addWidget(self.search_box, 1)
 
-        self.subtitle_view = QPlainTextEdit(text)
-        self.subtitle_view.setVerticalScrollBarPolicy(
-            Qt.ScrollBarAlwaysOff
-        )  # Turn off vertical scroll bar
-        self.subtitle_view.setReadOnly(True)
+        self.previous_search_hit_button = QPushButton("↑")
+        self.previous_search_hit_button.setFixedWidth(30)
+        self.previous_search_hit_button.clicked.connect(self.go_to_previous_search_hit)
+        search_layout.addWidget(self.previous_search_hit_button)
 
-        layout.addWidget(self.subtitle_view)
+        self.next_search_hit_button = QPushButton("↓")
+        self.next_search_hit_button.setFixedWidth(30)
+        self.next_search_hit_button.clicked.connect(self.go_to_next_search_hit)
+        search_layout.addWidget(self.next_search_hit_button)
 
-        # Vertical layout for buttons
-        buttons_layout = QVBoxLayout()
+        self.search_status_label = QLabel("")
+        self.search_status_label.setMinimumWidth(60)
+        search_layout.addWidget(self.search_status_label)
 
-        if has_audio_track:
-            listen_button = QPushButton("🔊")
-            listen_button.setFixedSize(20, 20)
-            listen_button.clicked.connect(self.listen_requested_signal.emit)
-            buttons_layout.addWidget(listen_button)
+        previous_hit_shortcut = QShortcut(QKeySequence("Shift+Return"), self.search_box)
+        previous_hit_shortcut.activated.connect(self.go_to_previous_search_hit)
 
-        flashcard_button = QPushButton("F")
-        flashcard_button.setFixedSize(20, 20)
-        flashcard_button.clicked.connect(self.flashcard_requested_signal.emit)
-        buttons_layout.addWidget(flashcard_button)
+        self.main_layout.addLayout(search_layout)
 
-        # Add buttons_layout to the main horizontal layout
-        layout.addLayout(buttons_layout)
+    def set_up_row_playback_bar(self) -> None:
+        """
+        Sets up the options for listening to a whole row: the silence between languages, and each language's speed.
+        The speeds are added by `set_row_playback_languages`.
+        """
+        self.row_speed_spinboxes = {}
 
+        self.row_playback_layout = QHBoxLayout()
+        self.row_playback_layout.setContentsMargins(0, 0, 0, 5)
 
-class SubtitleWorkspace(QWidget):
-    """
-    Study materials widget for displaying the multilingual parallel text of AVI dialogue.
-    """
+        self.row_playback_layout.addWidget(QLabel("Row playback gap:"))
+        self.row_gap_spinbox = QDoubleSpinBox()
+        self.row_gap_spinbox.setRange(0, MAXIMUM_ROW_GAP_SECONDS)
+        self.row_gap_spinbox.setSingleStep(0.25)
+        self.row_gap_spinbox.setValue(DEFAULT_ROW_GAP_SECONDS)
+        self.row_gap_spinbox.setSuffix(" s")
+        self.row_playback_layout.addWidget(self.row_gap_spinbox)
+        self.row_playback_layout.addStretch(1)
 
-    flashcard_requested_signal = pyqtSignal(str, int)  # Language, subtitle index
-    listen_requested_signal = pyqtSignal(str, int)  # Language, subtitle index
+        self.main_layout.addLayout(self.row_playback_layout)
 
-    def __init__(self, languages: List[str]) -> None:
-        super().__init__()
+    def set_row_playback_languages(self, languages: List[str]) -> None:
+        """
+        Adds a speed for each language with an audio track to the row playback options.
 
-        self.languages = languages
-        self.languages_with_subtitles = (
-            []
-        )  ##!! Perhaps pass these two in during initialisation
-        self.languages_with_audio_tracks = []
+        Args:
+            languages (List[str]): The languages with audio tracks.
+        """
+        for language in languages:
+            if language in self.row_speed_spinboxes:
+                continue
+            self.row_playback_layout.addWidget(QLabel(f"{language}:"))
+            speed_spinbox = QDoubleSpinBox()
+            # TODO: Allow for slower than 50% speed with multiple ffmpeg atempo filters stringed together
+            speed_spinbox.setRange(0.5, 2.0)
+            speed_spinbox.setDecimals(1)
+            speed_spinbox.setSingleStep(0.1)
+            speed_spinbox.setValue(1.0)
+            speed_spinbox.setSuffix("x")
+            self.row_playback_layout.addWidget(speed_spinbox)
+            self.row_speed_spinboxes[language] = speed_spinbox
+
+    def get_row_playback_options(self) -> Tuple[float, Dict[str, float]]:
+        """
+        Gets the options for listening to a whole row.
 
-        self.entry_layouts = []  # List to store layouts for each entry
-        self.main_layout = QHBoxLayout(self)  # Main layout to hold language layouts
-        self.main_layout.setContentsMargins(0, 0, 0, 0)
-        self.main_layout.setSpacing(0)
+        Returns:
+            Tuple[float, Dict[str, float]]: The silence between languages in seconds, and each language's speed.
+        """
+        speeds = {
+            language: round(speed_spinbox.value(), 1)
+            for language, speed_spinbox in self.row_speed_spinboxes.items()
+        }
+        return self.row_gap_spinbox.value(), speeds
 
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
+    def show_search_results(self, hits: List[Dict[str, Any]]) -> None:
+        """
+        Highlights the subtitles found by a search, and goes to the first one.
 
-        # Create a container widget for the layout and set it to the scroll area
-        self.container_widget = QWidget()
-        self.container_layout = QVBoxLayout(self.container_widget)
-        self.container_layout.setContentsMargins(0, 0, 0, 0)
-        self.container_layout.setSpacing(0)
-        self.scroll_area.setWidget(self.container_widget)
+        Args:
+            hits (List[Dict[str, Any]]): The matching subtitles in alignment order, with their "language",
+                                         "subtitle_index" and alignment "entry", see `AVIModel.search_subtitles`.
+        """
+        self.search_hits = [hit for hit in hits if hit["entry"] is not None]
+        self.search_hits.sort(key=lambda hit: hit["entry"])
 
-        # Add the scroll area to the main layout
-        self.main_layout.addWidget(self.scroll_area)
+        highlighted_subtitles = {}
+        for hit in self.search_hits:
+            highlighted_subtitles.setdefault(hit["language"], set()).add(
+                hit["subtitle_index"]
+            )
+        self.subtitle_model.set_highlighted_subtitles(highlighted_subtitles)
 
-    def clear_workspace(self) -> None:
-        # TODO: Implement clearing the workspace to change AVI material while the application is open.
-        pass
+        self.current_search_hit = -1
+        if self.search_hits:
+            self.go_to_next_search_hit()
+        else:
+            has_query = self.search_box.text().strip() != ""
+            self.search_status_label.setText("No results" if has_query else "")
 
-    def add_segment_header(self, current_segment: int, num_segments: int) -> QWidget:
+    def go_to_next_search_hit(self) -> None:
+        """
+        Scrolls to the next search hit, going back to the first after the last.
         """
-        Add a segment header to the workspace.
+        if self.search_hits:
+            self.go_to_search_hit((self.current_search_hit + 1) % len(self.search_hits))
 
-        Args:
-            current_segment (int): The current segment number.
-            num_segments (int): The total number of segments.
+    def go_to_previous_search_hit(self) -> None:
+        """
+        Scrolls to the previous search hit, going round to the last before the first.
+        """
+        if self.search_hits:
+            self.go_to_search_hit((self.current_search_hit - 1) % len(self.search_hits))
 
-        Returns:
-            QWidget: The created segment header widget.
+    def go_to_search_hit(self, hit_number: int) -> None:
         """
+        Scrolls to a search hit and selects its cell.
 
-        # if current_segment != 1:
-        #     # If not at first segment, can add a separator line when adding a new segment
-        #     separating_line = create_separator_line()
-        #     self.container_layout.addWidget(separating_line)
+        Args:
+            hit_number (int): The hit's position in the search results.
+        """
+        self.current_search_hit = hit_number
+        self.search_status_label.setText(f"{hit_number + 1}/{len(self.search_hits)}")
 
-        segment_header = SegmentHeader(
-            segment_number=current_segment,
-            total_segments=num_segments,
-            languages_with_subtitles=self.languages_with_subtitles,
-            languages_with_audio_track=self.languages_with_audio_tracks,
-        )
-        self.container_layout.addWidget(segment_header)
-        return segment_header
+        hit = self.search_hits[hit_number]
+        row = self.subtitle_model.entry_row(hit["entry"])
+        if row is None:
+            return  # Not shown yet, as the workspace is still being filled
+        languages = self.subtitle_model.languages
+        column = languages.index(hit["language"]) if hit["language"] in languages else 0
+        index = self.subtitle_model.index(row, column)
+        self.subtitle_table.scroll_to_centre(index)
+        self.subtitle_table.setCurrentIndex(index)
 
-    def add_entry(
-        self, entry: Dict[str, Dict[str, Union[List[int], List[str]]]]
-    ) -> None:
+    def change_segment_gap(self, value: int) -> None:
         """
-        Add a subtitle entry to the workspace.
+        Shows the segment gap chosen with the slider, and requests re-segmenting with it.
 
         Args:
-            entry (Dict[str, Dict[str, Union[List[int], List[str]]]]): Dictionary with languages as keys and dictionaries
-            containing subtitle 'indices' (to query against subtitle models) and 'texts' (subtitle texts to display) as values.
+            value (int): The slider's value in half seconds, 0 for no segmenting.
         """
-        entry_layout = QHBoxLayout()  # Create a QHBoxLayout for the entry
-        entry_layout.setContentsMargins(0, 0, 0, 0)
-        entry_layout.setSpacing(5)
+        if value == 0:
+            self.segment_gap_label.setText("Off")
+            self.segment_gap_changed_signal.emit(float("inf"))
+        else:
+            self.segment_gap_label.setText(f"{value / 2:.1f} s")
+            self.segment_gap_changed_signal.emit(value / 2)
 
-        self.container_layout.addLayout(
-            entry_layout
-        )  # Add entry layout to container layout
-        self.entry_layouts.append(entry_layout)
+    def set_pretranslation_languages(self, languages: List[str]) -> None:
+        """
+        Sets the languages that can be pre-translated, hiding the pre-translation bar if there are none.
 
-        subtitle_views = []  # List to store subtitle views
+        Args:
+            languages (List[str]): The languages with subtitles that can be translated.
+        """
+        self.pretranslation_language_dropdown.clear()
+        self.pretranslation_language_dropdown.addItems(languages)
 
-        for language in self.languages_with_subtitles:
-            has_audio_track = language in self.languages_with_audio_tracks
+        has_languages = languages != []
+        self.pretranslation_language_dropdown.setVisible(has_languages)
+        self.pretranslate_button.setVisible(has_languages)
 
-            subtitle_layout = QVBoxLayout()  # Create a QVBoxLayout for each language
-            subtitle_layout.setContentsMargins(0, 0, 0, 0)
-            subtitle_layout.setSpacing(0)
-            entry_layout.addLayout(
-                subtitle_layout
-            )  # Add language layout to entry layout
+    def set_pretranslation_status(self, status: str, running: bool) -> None:
+        """
+        Shows the state of pre-translating, only allowing one pre-translation at a time.
 
-            subtitle_indices, subtitle_texts = (
-                entry[language]["indices"],
-                entry[language]["texts"],
-            )
+        Args:
+            status (str): The text to show next to the button.
+            running (bool): Whether a pre-translation is running.
+        """
+        self.pretranslation_status_label.setText(status)
+        self.pretranslate_button.setEnabled(not running)
 
-            if subtitle_indices == []:
-                # If no subtitles for the current language to be added
-                subtitle_view = SubtitleView("", has_audio_track=False)
-                subtitle_layout.addWidget(subtitle_view)
-                subtitle_views.append(subtitle_view)
-            else:
-                # Current language might have multiple shorter subtitles matching a specific reference subtitle
-                for subtitle_index, subtitle_text in zip(
-                    subtitle_indices, subtitle_texts
-                ):
-                    subtitle_view = SubtitleView(subtitle_text, has_audio_track)
-
-                    subtitle_view.listen_requested_signal.connect(
-                        lambda language=language, index=subtitle_index: self.listen_requested_signal.emit(
-                            language, index
-                        )
-                    )
-                    subtitle_view.flashcard_requested_signal.connect(
-                        lambda language=language, index=subtitle_index: self.flashcard_requested_signal.emit(
-                            language, index
-                        )
-                    )
-                    subtitle_layout.addWidget(
-                        subtitle_view
-                    )  # Add subtitle view to the entry layout
-                    subtitle_views.append(subtitle_view)
-
-        ## TODO: In future, need to resize the subtitle views at the end of setting up the UI when they have been shrunk (then can calculate widget width accurately)
-        # Calculate the minimum height required based on the maximum content
-        max_height = 0
-        for subtitle_view in subtitle_views:
-            text = subtitle_view.subtitle_view.toPlainText()
-            font_metrics = QFontMetrics(subtitle_view.subtitle_view.font())
-            text_width = font_metrics.horizontalAdvance(text)
-
-            # Ensure the widget width is accurate at the time of calculation
-            subtitle_view.subtitle_view.adjustSize()
-            # Estimate the number of lines by dividing the text width by the widget's width
-            # widget_width = subtitle_view.subtitle_view.width()
-            # print(widget_width)
-            if len(self.languages_with_subtitles) < 3:
-                widget_width = 150
-            elif 3 <= len(self.languages_with_subtitles) <= 6:
-                widget_width = 80
-            elif 6 < len(self.languages_with_subtitles):
-                widget_width = 45
-            estimated_lines = (text_width // widget_width) + (
-                1 if text_width % widget_width else 0
-            )
+    def clear_workspace(self) -> None:
+        """
+        Removes every segment header and entry from the workspace, e.g. before showing a new alignment.
+        """
+        self.set_rows([])
 
-            line_height = font_metrics.height()
-            estimated_text_height = line_height * estimated_lines
+    def set_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Shows new rows of segment headers and subtitle entries, see `SubtitleTableModel`.
+        The first screen of rows is shown straight away, and the rest stream in without blocking the window.
 
-            # # max_height = max(max_height, document_height + content_margins)
-            max_height = int(max(max_height, estimated_text_height))
+        Args:
+            rows (Iterable[Dict[str, Any]]): The rows, e.g. from `iterate_workspace_rows`.
+        """
+        self.subtitle_model.set_rows(
+            rows, self.languages_with_subtitles, self.languages_with_audio_tracks
+        )
 
-        max_height += 22
+    def update_segments(
+        self,
+        alignment: List[Dict],
+        added_segment_starts: List[int],
+        removed_segment_starts: List[int],
+    ) -> bool:
+        """
+        Shows a re-segmented alignment by only adding and removing segment headers, see `SubtitleTableModel.update_segments`.
+
+        Args:
+            alignment (List[Dict]): The re-segmented alignment entries.
+            added_segment_starts (List[int]): The indices of the entries that now start a segment but didn't before.
+            removed_segment_starts (List[int]): The indices of the entries that no longer start a segment.
 
-        # Set the minimum height for all subtitle views
-        for subtitle_view in subtitle_views:
-            subtitle_view.subtitle_view.setMinimumHeight(max_height)
+        Returns:
+            bool: False if the rows are still being added, so the alignment should be set again instead.
+        """
+        return self.subtitle_model.update_segments(
+            alignment, added_segment_starts, removed_segment_starts
+        )
 
 
 class SavedSentences(QWidget):
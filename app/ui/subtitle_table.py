@@ -0,0 +1,879 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from PyQt5.QtWidgets import (
+    QAbstractItemView,
+    QApplication,
+    QPlainTextEdit,
+    QTableView,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionButton,
+    QStyleOptionViewItem,
+    QWidget,
+)
+from PyQt5.QtCore import (
+    QAbstractTableModel,
+    QEvent,
+    QModelIndex,
+    QRect,
+    QSize,
+    Qt,
+    QTimer,
+    pyqtSignal,
+)
+from PyQt5.QtGui import QColor, QFont, QFontMetrics, QPainter
+
+# The two kinds of row in the Subtitle Workspace
+SEGMENT_ROW = "segment"
+ENTRY_ROW = "entry"
+
+# Custom data roles, for the delegate to read rows without going through display strings
+ROW_ROLE = Qt.UserRole + 1  # The row's dict
+SUBTITLES_ROLE = Qt.UserRole + 2  # A cell's list of (subtitle index, text)
+
+BUTTON_SIZE = 20
+PADDING = 3
+MINIMUM_ROW_HEIGHT = BUTTON_SIZE + 2 * PADDING
+HIGHLIGHT_COLOUR = QColor(
+    255, 230, 120
+)  # Behind highlighted subtitles, e.g. search hits
+
+# Rows are added in time-sliced chunks so the first screen shows straight away and input isn't blocked.
+# The first chunk is enough to fill the first screen, and each later chunk may run for CHUNK_SECONDS
+FIRST_CHUNK_ROWS = 100
+CHUNK_SECONDS = 0.01
+
+# How long resizing must pause for before rows are refitted
+REFIT_DELAY_MILLISECONDS = 50
+# The number of measured (text, font, width) heights to remember
+TEXT_HEIGHT_CACHE_SIZE = 50000
+
+
+class SubtitleTableModel(QAbstractTableModel):
+    """
+    The rows of the Subtitle Workspace: a segment header row before each segment, then one row per alignment entry,
+    with a column for each language with subtitles.
+
+    Rows are plain dicts. Segment rows look like:
+        {"type": SEGMENT_ROW, "segment": 3, "total_segments": 40, "start_time": datetime, "end_time": datetime}
+    and entry rows like:
+        {"type": ENTRY_ROW, "entry": 57, "subtitles": {"Spanish": {"indices": [12, 13], "texts": ["¿Qué?", "¿Dónde?"]}, ...}}
+    where "entry" is the index of the row's alignment entry.
+
+    Rows can be given as a lazy iterable (see `iterate_workspace_rows`). The first chunk is shown straight away and
+    the rest are appended in time-sliced chunks from a timer, so long episodes don't freeze the window while loading.
+
+    Signals:
+        population_finished_signal (pyqtSignal): Emitted once every row has been added.
+
+    Attributes:
+        rows (List[Dict[str, Any]]): The rows added so far.
+        languages (List[str]): The languages with subtitles, one per column.
+        languages_with_audio_tracks (List[str]): The languages with an audio track.
+        pending_rows (Optional[Iterator[Dict[str, Any]]]): The rows still to be added, if any.
+        population_timer (QTimer): Adds the next chunk of pending rows whenever the event loop is idle.
+        highlighted_subtitles (Dict[str, Set[int]]): The subtitle indices to highlight in each language, e.g. search hits.
+    """
+
+    population_finished_signal = pyqtSignal()
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.rows = []
+        self.languages = []
+        self.languages_with_audio_tracks = []
+        self.highlighted_subtitles = {}
+
+        self.pending_rows = None
+        self.population_timer = QTimer(self)
+        self.population_timer.setInterval(0)
+        self.population_timer.timeout.connect(self.add_next_chunk)
+
+    def set_rows(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        languages: List[str],
+        languages_with_audio_tracks: List[str],
+    ) -> None:
+        """
+        Replaces every row (and the columns). The first chunk of rows is added now, and the rest in the background.
+
+        Args:
+            rows (Iterable[Dict[str, Any]]): The new rows, possibly produced lazily.
+            languages (List[str]): The languages with subtitles, one per column.
+            languages_with_audio_tracks (List[str]): The languages with an audio track.
+        """
+        self.population_timer.stop()
+        self.pending_rows = iter(rows)
+
+        self.beginResetModel()
+        self.rows = list(islice(self.pending_rows, FIRST_CHUNK_ROWS))
+        self.languages = list(languages)
+        self.languages_with_audio_tracks = list(languages_with_audio_tracks)
+        self.endResetModel()
+
+        if len(self.rows) < FIRST_CHUNK_ROWS:
+            self.finish_population()
+        else:
+            self.population_timer.start()
+
+    def add_next_chunk(self) -> None:
+        """
+        Adds pending rows until the time slice runs out, or the rows do.
+        """
+        if self.pending_rows is None:
+            self.population_timer.stop()
+            return
+
+        chunk = []
+        deadline = time.perf_counter() + CHUNK_SECONDS
+        for row_data in self.pending_rows:
+            chunk.append(row_data)
+            if time.perf_counter() >= deadline:
+                break
+        else:
+            self.pending_rows = None
+
+        if chunk:
+            self.beginInsertRows(
+                QModelIndex(), len(self.rows), len(self.rows) + len(chunk) - 1
+            )
+            self.rows.extend(chunk)
+            self.endInsertRows()
+
+        if self.pending_rows is None:
+            self.finish_population()
+
+    def finish_population(self) -> None:
+        """
+        Stops adding rows in the background, as there are none left.
+        """
+        self.population_timer.stop()
+        self.pending_rows = None
+        self.population_finished_signal.emit()
+
+    def is_populating(self) -> bool:
+        """
+        Checks whether rows are still being added in the background.
+
+        Returns:
+            bool: True if there are rows still to be added.
+        """
+        return self.pending_rows is not None
+
+    def update_segments(
+        self,
+        alignment: List[Dict],
+        added_segment_starts: List[int],
+        removed_segment_starts: List[int],
+    ) -> bool:
+        """
+        Updates the segment header rows after the alignment has been re-segmented, without touching the entry rows.
+
+        Headers are only inserted before the entries that now start a segment and removed before those that no longer
+        do. The remaining headers are then renumbered and given their segments' new timings.
+
+        Args:
+            alignment (List[Dict]): The re-segmented alignment entries.
+            added_segment_starts (List[int]): The indices of the entries that now start a segment but didn't before.
+            removed_segment_starts (List[int]): The indices of the entries that no longer start a segment.
+
+        Returns:
+            bool: False if the rows couldn't be updated because they are still being added, in which case they should
+                be set again instead.
+        """
+        if self.is_populating():
+            return False
+
+        changed_entries = set(added_segment_starts) | set(removed_segment_starts)
+        entry_rows = {
+            row_data["entry"]: row
+            for row, row_data in enumerate(self.rows)
+            if row_data["type"] == ENTRY_ROW and row_data["entry"] in changed_entries
+        }
+
+        # Working from the bottom up, so each change leaves the rows of the changes still to come where they are
+        changes = [(entry_rows[entry], True) for entry in added_segment_starts]
+        changes += [(entry_rows[entry] - 1, False) for entry in removed_segment_starts]
+        for row, is_added in sorted(changes, reverse=True):
+            if is_added:
+                self.beginInsertRows(QModelIndex(), row, row)
+                # Numbered properly by renumber_segments once every header is in place
+                start_time, end_time = alignment[self.rows[row]["entry"]]["timings"]
+                segment_row = {
+                    "type": SEGMENT_ROW,
+                    "segment": 0,
+                    "total_segments": 0,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                }
+                self.rows.insert(row, segment_row)
+                self.endInsertRows()
+            else:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.rows[row]
+                self.endRemoveRows()
+
+        self.renumber_segments(alignment)
+        return True
+
+    def renumber_segments(self, alignment: List[Dict]) -> None:
+        """
+        Sets the numbers and timings of every segment header row from the entry rows that follow it.
+
+        Args:
+            alignment (List[Dict]): The alignment entries, with timings.
+        """
+        segment_rows = [
+            row_data for row_data in self.rows if row_data["type"] == SEGMENT_ROW
+        ]
+        segment_row = None
+        for row_data in self.rows:
+            if row_data["type"] == SEGMENT_ROW:
+                segment_row = row_data
+                segment_row["start_time"] = None
+                continue
+            start_time, end_time = alignment[row_data["entry"]]["timings"]
+            if segment_row["start_time"] is None:
+                segment_row["start_time"] = start_time
+            segment_row["end_time"] = end_time
+
+        for segment, row_data in enumerate(segment_rows, start=1):
+            row_data["segment"] = segment
+            row_data["total_segments"] = len(segment_rows)
+
+        if self.rows:
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(len(self.rows) - 1, self.columnCount() - 1),
+            )
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.languages)
+
+    def entry_row(self, entry: int) -> Optional[int]:
+        """
+        Finds the row showing an alignment entry, by binary search as entry rows are in alignment order.
+
+        Args:
+            entry (int): The index of the alignment entry.
+
+        Returns:
+            Optional[int]: The row, or None if it hasn't been added (yet).
+        """
+        low, high = 0, len(self.rows)
+        while low < high:
+            middle = (low + high) // 2
+            row = middle
+            # Segment rows have no entry, so compare with the entry row after them
+            while row < high and self.rows[row]["type"] == SEGMENT_ROW:
+                row += 1
+            if row == high or self.rows[row]["entry"] >= entry:
+                high = middle
+            else:
+                low = row + 1
+        while low < len(self.rows) and self.rows[low]["type"] == SEGMENT_ROW:
+            low += 1
+        if low < len(self.rows) and self.rows[low]["entry"] == entry:
+            return low
+        return None
+
+    def set_highlighted_subtitles(
+        self, highlighted_subtitles: Dict[str, Set[int]]
+    ) -> None:
+        """
+        Sets which subtitles are highlighted, and repaints the rows on screen.
+
+        Args:
+            highlighted_subtitles (Dict[str, Set[int]]): The subtitle indices to highlight in each language.
+        """
+        self.highlighted_subtitles = highlighted_subtitles
+        if self.rows:
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(len(self.rows) - 1, self.columnCount() - 1),
+            )
+
+    def is_highlighted(self, column: int, subtitle_index: int) -> bool:
+        """
+        Checks whether a subtitle is highlighted.
+
+        Args:
+            column (int): The column of the subtitle's language.
+            subtitle_index (int): The subtitle's index in its language.
+
+        Returns:
+            bool: True if the subtitle is highlighted.
+        """
+        highlighted = self.highlighted_subtitles.get(self.languages[column])
+        return highlighted is not None and subtitle_index in highlighted
+
+    def has_audio_track(self, column: int) -> bool:
+        """
+        Checks whether a column's language has an audio track.
+
+        Args:
+            column (int): The column.
+
+        Returns:
+            bool: True if the language has an audio track.
+        """
+        return self.languages[column] in self.languages_with_audio_tracks
+
+    def subtitles(self, row: int, column: int) -> List[Tuple[int, str]]:
+        """
+        Gets the subtitles in a cell of an entry row.
+
+        Args:
+            row (int): The row.
+            column (int): The column.
+
+        Returns:
+            List[Tuple[int, str]]: Each subtitle's index (in its language's subtitle model) and text.
+                                   Empty for segment rows and languages without a subtitle in the entry.
+        """
+        row_data = self.rows[row]
+        if row_data["type"] != ENTRY_ROW:
+            return []
+        subtitles = row_data["subtitles"].get(self.languages[column])
+        if not subtitles:
+            return []
+        return list(zip(subtitles["indices"], subtitles["texts"]))
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+
+        row_data = self.rows[index.row()]
+        if role == ROW_ROLE:
+            return row_data
+        if role == SUBTITLES_ROLE:
+            return self.subtitles(index.row(), index.column())
+        if role in (Qt.DisplayRole, Qt.EditRole, Qt.ToolTipRole):
+            if row_data["type"] == SEGMENT_ROW:
+                return segment_label(row_data) if role == Qt.ToolTipRole else None
+            return "\n".join(
+                text for _, text in self.subtitles(index.row(), index.column())
+            )
+        return None
+
+    def headerData(
+        self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole
+    ) -> Any:
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.languages[section]
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if self.rows[index.row()]["type"] == ENTRY_ROW:
+            # "Editing" opens a read-only text box, so subtitle text can be selected and copied
+            flags |= Qt.ItemIsEditable
+        return flags
+
+
+class SubtitleTableView(QTableView):
+    """
+    A table view that fits its rows' heights to their contents, but only for the rows on screen.
+
+    Qt's own `ResizeToContents` measures every row whenever anything changes, which takes seconds for long episodes.
+    Instead, rows are fitted as they are scrolled into view. When the columns change width, every row is marked
+    as needing refitting, but only the visible rows are refitted, once the burst of resize events is over.
+
+    Attributes:
+        fitted_rows (Set[int]): The rows whose heights fit their contents at the current column widths.
+        refit_timer (QTimer): Coalesces the refits requested while resizing into one.
+    """
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.fitted_rows = set()
+        self.verticalHeader().setDefaultSectionSize(MINIMUM_ROW_HEIGHT)
+        self.verticalScrollBar().valueChanged.connect(self.fit_visible_rows)
+
+        self.refit_timer = QTimer(self)
+        self.refit_timer.setSingleShot(True)
+        self.refit_timer.setInterval(REFIT_DELAY_MILLISECONDS)
+        self.refit_timer.timeout.connect(self.refit_rows)
+        self.horizontalHeader().sectionResized.connect(self.refit_timer.start)
+
+    def setModel(self, model: QAbstractTableModel) -> None:
+        super().setModel(model)
+        model.modelReset.connect(self.span_segment_rows)
+        model.modelReset.connect(self.refit_rows)
+        model.rowsInserted.connect(self.show_inserted_rows)
+        model.rowsRemoved.connect(self.forget_removed_rows)
+
+    def span_segment_rows(self, first: int = 0, last: Optional[int] = None) -> None:
+        """
+        Makes each segment header row one cell spanning every column, so its label isn't squeezed into one column.
+
+        Args:
+            first (int): The first row to check. Spans are cleared first if this is 0.
+            last (Optional[int]): The last row to check, defaults to the last row.
+        """
+        model = self.model()
+        if first == 0:
+            self.clearSpans()
+        if model.columnCount() < 2:
+            return
+        last = model.rowCount() - 1 if last is None else last
+        for row in range(first, last + 1):
+            if model.rows[row]["type"] == SEGMENT_ROW:
+                self.setSpan(row, 0, 1, model.columnCount())
+
+    def show_inserted_rows(self, parent: QModelIndex, first: int, last: int) -> None:
+        """
+        Spans the segment rows among newly added rows, and fits any of them that are on screen.
+
+        Args:
+            parent (QModelIndex): Unused, the model is a table.
+            first (int): The first added row.
+            last (int): The last added row.
+        """
+        count = last - first + 1
+        self.fitted_rows = {
+            row if row < first else row + count for row in self.fitted_rows
+        }
+        self.span_segment_rows(first, last)
+        self.fit_visible_rows()
+
+    def forget_removed_rows(self, parent: QModelIndex, first: int, last: int) -> None:
+        """
+        Keeps track of which rows are fitted after rows are removed, and fits any rows moved onto the screen.
+
+        Args:
+            parent (QModelIndex): Unused, the model is a table.
+            first (int): The first removed row.
+            last (int): The last removed row.
+        """
+        count = last - first + 1
+        self.fitted_rows = {
+            row if row < first else row - count
+            for row in self.fitted_rows
+            if not first <= row <= last
+        }
+        self.fit_visible_rows()
+
+    def refit_rows(self) -> None:
+        """
+        Forgets which rows have been fitted (e.g. after the rows or column widths change), and fits the visible rows.
+        Rows off screen keep their old heights until they're scrolled to, so the rows above stay put.
+        """
+        self.refit_timer.stop()
+        self.fitted_rows.clear()
+        self.fit_visible_rows()
+
+    def fit_visible_rows(self) -> None:
+        """
+        Fits the heights of the rows on screen that haven't been fitted yet.
+        """
+        model = self.model()
+        if model is None or model.rowCount() == 0:
+            return
+
+        row = max(self.rowAt(0), 0)
+        viewport_height = self.viewport().height()
+        vertical_header = self.verticalHeader()
+        # Repaint once after every row has its new height, rather than once per row
+        self.setUpdatesEnabled(False)
+        try:
+            while (
+                row < model.rowCount()
+                and self.rowViewportPosition(row) < viewport_height
+            ):
+                if row not in self.fitted_rows:
+                    vertical_header.resizeSection(row, self.sizeHintForRow(row))
+                    self.fitted_rows.add(row)
+                row += 1
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def scroll_to_centre(self, index: QModelIndex) -> None:
+        """
+        Scrolls a cell to the middle of the view.
+
+        The rows around it are fitted first, otherwise fitting them once they're on screen would push the cell away.
+
+        Args:
+            index (QModelIndex): The cell.
+        """
+        model = self.model()
+        vertical_header = self.verticalHeader()
+        # At least half a screen of rows either side, as rows are at least MINIMUM_ROW_HEIGHT high
+        reach = self.viewport().height() // (2 * MINIMUM_ROW_HEIGHT) + 1
+        first_row = max(index.row() - reach, 0)
+        last_row = min(index.row() + reach, model.rowCount() - 1)
+        for row in range(first_row, last_row + 1):
+            if row not in self.fitted_rows:
+                vertical_header.resizeSection(row, self.sizeHintForRow(row))
+                self.fitted_rows.add(row)
+        self.scrollTo(index, QAbstractItemView.PositionAtCenter)
+
+    def resizeEvent(self, event) -> None:
+        super().resizeEvent(event)
+        # Column widths stretch with the view, so text wraps differently. Dragging the window's edge sends a stream
+        # of these, so the refit waits until it's over
+        self.refit_timer.start()
+
+
+class SubtitleDelegate(QStyledItemDelegate):
+    """
+    Paints the Subtitle Workspace's cells, and handles clicks on the buttons painted in them.
+
+    Nothing is a real widget (apart from the text box opened by double-clicking a cell), so only visible rows cost anything.
+    Entry cells show each subtitle with listen and listen-to-row buttons (if the language has an audio track) and a
+    flashcard button.
+    Segment header rows span every column, showing the segment's number and timings, and each language (under its column)
+    with a button to listen to the segment.
+
+    Signals:
+        flashcard_requested_signal (pyqtSignal): Emitted with the language and subtitle index when a flashcard button is clicked.
+        listen_requested_signal (pyqtSignal): Emitted with the language and subtitle index when a listen button is clicked.
+        row_listen_requested_signal (pyqtSignal): Emitted with the language and subtitle index when a button to listen to
+                                                  the subtitle's whole aligned row is clicked.
+        segment_listen_requested_signal (pyqtSignal): Emitted with the segment's start and end times and the language
+                                                      when a segment's listen button is clicked.
+
+    Attributes:
+        text_heights (OrderedDict[Tuple[str, str, int], int]): Measured text heights by text, font key and width.
+        font_metrics (Dict[str, QFontMetrics]): The font metrics of each font used, by font key.
+    """
+
+    flashcard_requested_signal = pyqtSignal(str, int)
+    listen_requested_signal = pyqtSignal(str, int)
+    row_listen_requested_signal = pyqtSignal(str, int)
+    segment_listen_requested_signal = pyqtSignal(datetime, datetime, str)
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.text_heights = OrderedDict()
+        self.font_metrics = {}
+
+    def text_height(self, text: str, font: QFont, width: int) -> int:
+        """
+        Measures the height of wrapped text. Cells are laid out to paint them, size them and hit-test clicks on them,
+        so heights are cached per (text, font, width), evicting the least recently used ones once the cache is full.
+
+        Args:
+            text (str): The text.
+            font (QFont): The font it's shown in.
+            width (int): The width it wraps to.
+
+        Returns:
+            int: The height in pixels.
+        """
+        width = max(width, 1)
+        font_key = font.key()
+        key = (text, font_key, width)
+        height = self.text_heights.get(key)
+        if height is not None:
+            self.text_heights.move_to_end(key)
+            return height
+
+        font_metrics = self.font_metrics.get(font_key)
+        if font_metrics is None:
+            font_metrics = self.font_metrics[font_key] = QFontMetrics(font)
+        height = font_metrics.boundingRect(
+            QRect(0, 0, width, 1 << 20), Qt.TextWordWrap, text
+        ).height()
+
+        self.text_heights[key] = height
+        while len(self.text_heights) > TEXT_HEIGHT_CACHE_SIZE:
+            self.text_heights.popitem(last=False)
+        return height
+
+    def layout_cell(
+        self, option: QStyleOptionViewItem, index: QModelIndex
+    ) -> List[Tuple[QRect, str, int, List[Tuple[QRect, str, tuple]]]]:
+        """
+        Works out where everything in a cell goes, for painting, sizing and hit-testing clicks alike.
+
+        Args:
+            option (QStyleOptionViewItem): The cell's style options, including its rectangle and font.
+            index (QModelIndex): The cell.
+
+        Returns:
+            List[Tuple[QRect, str, int, List[Tuple[QRect, str, tuple]]]]: Each block of text in the cell, with its rectangle,
+                text, alignment and buttons. Buttons are given as their rectangle, label and what clicking them requests.
+        """
+        model = index.model()
+        # Read straight from the model, as going through data() converts the row dict to a QVariant every time
+        row_data = model.rows[index.row()]
+        rect = option.rect.adjusted(PADDING, PADDING, -PADDING, -PADDING)
+
+        blocks = []
+        if row_data["type"] == SEGMENT_ROW:
+            bold_font = QFont(option.font)
+            bold_font.setBold(True)
+            line_height = QFontMetrics(bold_font).height()
+            label_rect = QRect(rect.left(), rect.top(), rect.width(), line_height)
+            blocks.append((label_rect, segment_label(row_data), Qt.AlignHCenter, []))
+            top = rect.top() + line_height + PADDING
+
+            # The row spans every column, so each language goes under its own column
+            view = option.widget
+            for column, language in enumerate(model.languages):
+                if isinstance(view, QTableView):
+                    left = view.columnViewportPosition(column) + PADDING
+                    width = view.columnWidth(column) - 2 * PADDING
+                else:
+                    width = option.rect.width() // len(model.languages) - 2 * PADDING
+                    left = option.rect.left() + column * (width + 2 * PADDING) + PADDING
+
+                buttons = []
+                has_audio_track = model.has_audio_track(column)
+                if has_audio_track:
+                    button_rect = QRect(
+                        left + width - BUTTON_SIZE, top, BUTTON_SIZE, BUTTON_SIZE
+                    )
+                    request = (
+                        "segment",
+                        row_data["start_time"],
+                        row_data["end_time"],
+                        language,
+                    )
+                    buttons.append((button_rect, "🔊", request))
+                language_rect = QRect(
+                    left,
+                    top,
+                    width - (BUTTON_SIZE + PADDING if has_audio_track else 0),
+                    max(line_height, BUTTON_SIZE),
+                )
+                alignment = Qt.AlignRight if has_audio_track else Qt.AlignHCenter
+                blocks.append((language_rect, language, alignment, buttons))
+            return blocks
+
+        has_audio_track = model.has_audio_track(index.column())
+        text_width = rect.width() - BUTTON_SIZE - PADDING
+        top = rect.top()
+        for subtitle_index, text in model.subtitles(index.row(), index.column()):
+            buttons = []
+            button_top = top
+            if has_audio_track:
+                buttons.append(
+                    (
+                        QRect(
+                            rect.right() - BUTTON_SIZE + 1,
+                            button_top,
+                            BUTTON_SIZE,
+                            BUTTON_SIZE,
+                        ),
+                        "🔊",
+                        ("listen", subtitle_index),
+                    )
+                )
+                button_top += BUTTON_SIZE
+                buttons.append(
+                    (
+                        QRect(
+                            rect.right() - BUTTON_SIZE + 1,
+                            button_top,
+                            BUTTON_SIZE,
+                            BUTTON_SIZE,
+                        ),
+                        "R",
+                        ("row", subtitle_index),
+                    )
+                )
+                button_top += BUTTON_SIZE
+            buttons.append(
+                (
+                    QRect(
+                        rect.right() - BUTTON_SIZE + 1,
+                        button_top,
+                        BUTTON_SIZE,
+                        BUTTON_SIZE,
+                    ),
+                    "F",
+                    ("flashcard", subtitle_index),
+                )
+            )
+            button_top += BUTTON_SIZE
+
+            height = max(
+                self.text_height(text, option.font, text_width), button_top - top
+            )
+            text_rect = QRect(rect.left(), top, text_width, height)
+            blocks.append((text_rect, text, Qt.AlignTop | Qt.AlignLeft, buttons))
+            top += height + PADDING
+        return blocks
+
+    def paint(
+        self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex
+    ) -> None:
+        option = QStyleOptionViewItem(option)
+        self.initStyleOption(option, index)
+        is_segment = index.model().rows[index.row()]["type"] == SEGMENT_ROW
+
+        painter.save()
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+            painter.setPen(option.palette.highlightedText().color())
+        elif is_segment:
+            painter.fillRect(option.rect, option.palette.alternateBase())
+
+        font = QFont(option.font)
+        font.setBold(is_segment)
+        painter.setFont(font)
+
+        model = index.model()
+        subtitles = model.subtitles(index.row(), index.column())
+        style = option.widget.style() if option.widget else QApplication.style()
+        for block, (text_rect, text, alignment, buttons) in enumerate(
+            self.layout_cell(option, index)
+        ):
+            painter.save()
+            if is_segment:
+                alignment |= Qt.AlignVCenter
+            elif model.is_highlighted(index.column(), subtitles[block][0]):
+                painter.fillRect(text_rect, HIGHLIGHT_COLOUR)
+                # Dark text on the highlight, even in a selected cell
+                painter.setPen(option.palette.text().color())
+            painter.drawText(text_rect, alignment | Qt.TextWordWrap, text)
+            painter.restore()
+            for button_rect, label, _ in buttons:
+                button_option = QStyleOptionButton()
+                button_option.rect = button_rect
+                button_option.text = label
+                button_option.state = QStyle.State_Enabled | QStyle.State_Raised
+                style.drawControl(QStyle.CE_PushButton, button_option, painter)
+        painter.restore()
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        blocks = self.layout_cell(option, index)
+        if not blocks:
+            return QSize(option.rect.width(), MINIMUM_ROW_HEIGHT)
+        bottom = max(text_rect.bottom() for text_rect, _, _, _ in blocks)
+        height = bottom - option.rect.top() + 1 + PADDING
+        return QSize(option.rect.width(), max(height, MINIMUM_ROW_HEIGHT))
+
+    def editorEvent(self, event: QEvent, model, option, index: QModelIndex) -> bool:
+        if event.type() != QEvent.MouseButtonRelease or event.button() != Qt.LeftButton:
+            return super().editorEvent(event, model, option, index)
+
+        language = model.languages[index.column()]
+        for _, _, _, buttons in self.layout_cell(option, index):
+            for button_rect, _, request in buttons:
+                if not button_rect.contains(event.pos()):
+                    continue
+                if request[0] == "listen":
+                    self.listen_requested_signal.emit(language, request[1])
+                elif request[0] == "row":
+                    self.row_listen_requested_signal.emit(language, request[1])
+                elif request[0] == "flashcard":
+                    self.flashcard_requested_signal.emit(language, request[1])
+                elif request[0] == "segment":
+                    self.segment_listen_requested_signal.emit(*request[1:])
+                return True
+        return super().editorEvent(event, model, option, index)
+
+    def createEditor(
+        self, parent: QWidget, option: QStyleOptionViewItem, index: QModelIndex
+    ) -> QWidget:
+        editor = QPlainTextEdit(parent)
+        editor.setReadOnly(True)
+        editor.setTextInteractionFlags(
+            Qt.TextSelectableByMouse | Qt.TextSelectableByKeyboard
+        )
+        return editor
+
+    def setEditorData(self, editor: QWidget, index: QModelIndex) -> None:
+        editor.setPlainText(index.data(Qt.EditRole))
+
+    def setModelData(self, editor: QWidget, model, index: QModelIndex) -> None:
+        pass  # Subtitles are read-only
+
+
+def segment_label(row_data: Dict[str, Any]) -> str:
+    """
+    Creates the label of a segment header row, e.g. "Segment 3/40: 00:01:02 -> 00:01:40".
+
+    Args:
+        row_data (Dict[str, Any]): The segment row.
+
+    Returns:
+        str: The label.
+    """
+    start_time = row_data["start_time"].strftime("%H:%M:%S")
+    end_time = row_data["end_time"].strftime("%H:%M:%S")
+    return f"Segment {row_data['segment']}/{row_data['total_segments']}: {start_time} -> {end_time}"
+
+
+def iterate_workspace_rows(
+    alignment: List[Dict],
+    gather_subtitles: Callable[[Dict], Dict[str, Dict[str, List]]],
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily produces the Subtitle Workspace's rows from an alignment, with a segment header row before each segment.
+
+    Segment timings are worked out up front (which is quick), so each segment row is complete when it's produced,
+    but subtitles are only gathered as their rows are needed.
+
+    Args:
+        alignment (List[Dict]): The alignment entries, with timings and segment numbers.
+        gather_subtitles (Callable[[Dict], Dict[str, Dict[str, List]]]): Gathers an entry's subtitle indices and texts by language.
+
+    Yields:
+        Dict[str, Any]: The rows, see `SubtitleTableModel`.
+    """
+    if not alignment:
+        return
+
+    segment_end_times = {}
+    for entry in alignment:
+        segment_end_times[entry["segment"]] = entry["timings"][1]
+
+    total_segments = alignment[-1]["segment"]
+    current_segment = None
+    for entry_index, entry in enumerate(alignment):
+        if entry["segment"] != current_segment:
+            current_segment = entry["segment"]
+            yield {
+                "type": SEGMENT_ROW,
+                "segment": current_segment,
+                "total_segments": total_segments,
+                "start_time": entry["timings"][0],
+                "end_time": segment_end_times[current_segment],
+            }
+        yield {
+            "type": ENTRY_ROW,
+            "entry": entry_index,
+            "subtitles": gather_subtitles(entry),
+        }
+
+
+def build_workspace_rows(
+    alignment: List[Dict],
+    gather_subtitles: Callable[[Dict], Dict[str, Dict[str, List]]],
+) -> List[Dict[str, Any]]:
+    """
+    Builds every row of the Subtitle Workspace from an alignment at once, see `iterate_workspace_rows`.
+
+    Args:
+        alignment (List[Dict]): The alignment entries, with timings and segment numbers.
+        gather_subtitles (Callable[[Dict], Dict[str, Dict[str, List]]]): Gathers an entry's subtitle indices and texts by language.
+
+    Returns:
+        List[Dict[str, Any]]: The rows, see `SubtitleTableModel`.
+    """
+    return list(iterate_workspace_rows(alignment, gather_subtitles))
@@ -0,0 +1,306 @@
+"""
+Benchmarks the media export path on synthetic videos.
+
+Runs MediaExporter.export_media (and so process_files) for every combination of segmenting, interleaving and
+file combination the Media Exporter window allows, on synthetic videos of various lengths and cue densities,
+and records throughput as seconds of output audio per wall second.
+
+Example:
+    python scripts/benchmarks/benchmark_export.py --durations 60 600 --cues-per-minute 10 30 --output results.json
+    python scripts/benchmarks/benchmark_export.py --baseline results.json  # Fails if throughput regressed
+"""
+
+import argparse
+import itertools
+import json
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import ffmpeg
+
+# The app modules import each other relative to the app folder
+REPOSITORY_FOLDER = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPOSITORY_FOLDER / "app"))
+
+from media_exporter.media_exporter import MediaExporter  # noqa: E402
+from synthetic_media import create_fixture  # noqa: E402
+
+DEFAULT_WORK_FOLDER = REPOSITORY_FOLDER / "temp" / "benchmarks"
+DEFAULT_SEGMENT_LENGTH = 15
+DEFAULT_SUBTITLE_PADDING = 0.2
+# Fraction of the baseline throughput that may be lost before failing
+DEFAULT_REGRESSION_TOLERANCE = 0.2
+
+
+def export_combinations() -> List[Dict]:
+    """
+    Lists every combination of export options the Media Exporter window allows.
+
+    Interleaving needs segmenting, and combining interleaved segments needs interleaving.
+
+    Returns:
+        List[Dict]: The "segmenting", "interleaving" and "file_combination" options of each combination.
+    """
+    combinations = []
+    for (
+        segmenting,
+        interleaving,
+        combine_interleaved,
+        file_combination,
+    ) in itertools.product(
+        [False, True],
+        [False, True],
+        [False, True],
+        ["combine_everything", "separate_files"],
+    ):
+        if interleaving and not segmenting:
+            continue
+        if combine_interleaved and not interleaving:
+            continue
+        combinations.append(
+            {
+                "segmenting": {
+                    "enabled": segmenting,
+                    "segment_length": DEFAULT_SEGMENT_LENGTH if segmenting else None,
+                },
+                "interleaving": {
+                    "enabled": interleaving,
+                    "combine_interleaved_segments": combine_interleaved,
+                },
+                "file_combination": file_combination,
+            }
+        )
+    return combinations
+
+
+def combination_name(combination: Dict) -> str:
+    """
+    Names a combination of export options, to match benchmark results between runs.
+
+    Args:
+        combination (Dict): The options, see `export_combinations`.
+
+    Returns:
+        str: E.g. "segmented-interleaved-combined-separate_files".
+    """
+    parts = []
+    if combination["segmenting"]["enabled"]:
+        parts.append("segmented")
+    if combination["interleaving"]["enabled"]:
+        parts.append("interleaved")
+    if combination["interleaving"]["combine_interleaved_segments"]:
+        parts.append("combined")
+    parts.append(combination["file_combination"])
+    return "-".join(parts)
+
+
+def output_seconds(files: List[Path]) -> float:
+    """
+    Measures the total length of the exported audio.
+
+    Args:
+        files (List[Path]): The exported files.
+
+    Returns:
+        float: The total duration in seconds.
+    """
+    return sum(float(ffmpeg.probe(str(file))["format"]["duration"]) for file in files)
+
+
+def run_benchmarks(args: argparse.Namespace) -> List[Dict]:
+    """
+    Runs every export combination on every fixture.
+
+    Args:
+        args (argparse.Namespace): The command line arguments.
+
+    Returns:
+        List[Dict]: One result per fixture and combination, with the best of the repeated runs.
+    """
+    fixture_folder = args.work_folder / "fixtures"
+    output_folder = args.work_folder / "output"
+    language_options = [
+        {"audio_track": audio_track, "speed": speed}
+        for audio_track, speed in zip(args.audio_tracks, itertools.cycle(args.speeds))
+    ]
+
+    results = []
+    for duration, cues_per_minute in itertools.product(
+        args.durations, args.cues_per_minute
+    ):
+        video_file, subtitle_file = create_fixture(
+            fixture_folder, duration, cues_per_minute, args.audio_tracks, args.seed
+        )
+
+        for combination in export_combinations():
+            name = f"{video_file.stem}/{combination_name(combination)}"
+            runs = []
+            for _ in range(args.repeat):
+                shutil.rmtree(output_folder, ignore_errors=True)
+                output_folder.mkdir(parents=True)
+                media_exporter = MediaExporter(
+                    temporary_audio_folder=args.work_folder / "temp",
+                    avi_practice_audio_folder=output_folder,
+                )
+                options = {
+                    "video_file": video_file,
+                    "reference_subtitle_file": subtitle_file,
+                    "subtitle_padding": DEFAULT_SUBTITLE_PADDING,
+                    "language_options": language_options,
+                    **combination,
+                }
+
+                start = time.perf_counter()
+                files = media_exporter.export_media(options)
+                wall_seconds = time.perf_counter() - start
+
+                audio_seconds = output_seconds(files)
+                runs.append(
+                    {
+                        "wall_seconds": wall_seconds,
+                        "output_audio_seconds": audio_seconds,
+                        "throughput": audio_seconds / wall_seconds,
+                        "output_files": len(files),
+                        "profile": media_exporter.profiler.report(),
+                    }
+                )
+
+            best_run = max(runs, key=lambda run: run["throughput"])
+            results.append(
+                {
+                    "name": name,
+                    "duration_seconds": duration,
+                    "cues_per_minute": cues_per_minute,
+                    "combination": combination_name(combination),
+                    **best_run,
+                }
+            )
+            print(
+                f"{name}: {best_run['throughput']:.1f}x real time "
+                f"({best_run['output_audio_seconds']:.0f}s of audio in {best_run['wall_seconds']:.2f}s)"
+            )
+
+    return results
+
+
+def find_regressions(
+    results: List[Dict], baseline: List[Dict], tolerance: float
+) -> List[str]:
+    """
+    Compares benchmark results with a baseline run.
+
+    Args:
+        results (List[Dict]): The new results.
+        baseline (List[Dict]): The baseline results.
+        tolerance (float): The fraction of the baseline throughput that may be lost.
+
+    Returns:
+        List[str]: A description of each benchmark that got slower than allowed.
+    """
+    baseline_throughputs = {result["name"]: result["throughput"] for result in baseline}
+    regressions = []
+    for result in results:
+        baseline_throughput = baseline_throughputs.get(result["name"])
+        if baseline_throughput is None:
+            continue
+        if result["throughput"] < baseline_throughput * (1 - tolerance):
+            regressions.append(
+                f"{result['name']}: {result['throughput']:.1f}x real time, baseline {baseline_throughput:.1f}x"
+            )
+    return regressions
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+
+    Returns:
+        argparse.Namespace: The benchmark settings.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the media export path.")
+    parser.add_argument(
+        "--durations",
+        type=float,
+        nargs="+",
+        default=[60, 600],
+        help="Lengths of the synthetic videos in seconds.",
+    )
+    parser.add_argument(
+        "--cues-per-minute",
+        type=float,
+        nargs="+",
+        default=[10, 30],
+        help="Average numbers of subtitles per minute.",
+    )
+    parser.add_argument(
+        "--audio-tracks",
+        nargs="+",
+        default=["eng", "spa", "ita"],
+        help="Language tags of the audio tracks to create and export.",
+    )
+    parser.add_argument(
+        "--speeds",
+        type=float,
+        nargs="+",
+        default=[1.0, 1.25],
+        help="Playback speeds, cycled over the audio tracks.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Runs per benchmark, the best is kept."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the subtitles.")
+    parser.add_argument(
+        "--work-folder",
+        type=Path,
+        default=DEFAULT_WORK_FOLDER,
+        help="Folder for fixtures and exported files.",
+    )
+    parser.add_argument(
+        "--output", type=Path, help="Where to save the results as JSON."
+    )
+    parser.add_argument(
+        "--baseline", type=Path, help="Results of an earlier run to compare against."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_REGRESSION_TOLERANCE,
+        help="Fraction of baseline throughput that may be lost before failing.",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Runs the benchmarks, saves the results and compares them with a baseline if given.
+
+    Returns:
+        int: The exit code, 1 if throughput regressed.
+    """
+    args = parse_arguments()
+    results = run_benchmarks(args)
+
+    if args.output:
+        with args.output.open("w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"Saved results to {args.output}")
+
+    if args.baseline:
+        with args.baseline.open(encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print("Throughput regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No throughput regressions.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import random
+import subprocess
+from datetime import timedelta
+from pathlib import Path
+from typing import List, Tuple
+
+# A distinct tone per audio track, so mixed up tracks are easy to hear in the output
+TRACK_FREQUENCIES = [220, 330, 440, 550, 660, 770, 880, 990]
+
+MINIMUM_CUE_SECONDS = 0.8
+MAXIMUM_CUE_SECONDS = 4.0
+
+
+def create_synthetic_video(
+    video_file: Path,
+    duration_seconds: float,
+    audio_tracks: List[str],
+    include_silent_track: bool = True,
+) -> None:
+    """
+    Creates a small test video with one audio track per language, using ffmpeg's lavfi sources.
+
+    Every language track is a sine tone (`sine`) at its own pitch. Real videos often have extra tracks,
+    e.g. commentary, so a silent track (`anullsrc`) tagged "und" is added first by default to check
+    that the exporter picks audio streams by language rather than by position.
+
+    Args:
+        video_file (Path): Where to save the video. Should end in ".mkv" or ".mp4".
+        duration_seconds (float): The length of the video.
+        audio_tracks (List[str]): The language tag of each audio track, e.g. ["eng", "spa"].
+        include_silent_track (bool, optional): Whether to add a silent "und" track before the language tracks. Defaults to True.
+    """
+    inputs = [
+        "-f",
+        "lavfi",
+        "-i",
+        f"color=c=black:s=160x90:r=5:d={duration_seconds}",
+    ]
+    track_tags = []
+
+    if include_silent_track:
+        inputs += [
+            "-f",
+            "lavfi",
+            "-t",
+            str(duration_seconds),
+            "-i",
+            "anullsrc=r=48000:cl=stereo",
+        ]
+        track_tags.append("und")
+
+    for track_number, audio_track in enumerate(audio_tracks):
+        frequency = TRACK_FREQUENCIES[track_number % len(TRACK_FREQUENCIES)]
+        inputs += [
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency={frequency}:sample_rate=48000:duration={duration_seconds}",
+        ]
+        track_tags.append(audio_track)
+
+    command = ["ffmpeg", "-y", "-loglevel", "error"] + inputs
+    for input_index in range(len(track_tags) + 1):
+        command += ["-map", str(input_index)]
+    command += ["-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-b:a", "96k"]
+    for audio_index, track_tag in enumerate(track_tags):
+        command += [f"-metadata:s:a:{audio_index}", f"language={track_tag}"]
+    command.append(str(video_file))
+
+    subprocess.run(command, check=True)
+
+
+def create_synthetic_cues(
+    duration_seconds: float, cues_per_minute: float, seed: int = 0
+) -> List[Tuple[float, float]]:
+    """
+    Creates random but reproducible subtitle timings.
+
+    Args:
+        duration_seconds (float): The length of the video.
+        cues_per_minute (float): The average number of subtitles per minute.
+        seed (int, optional): The random seed. Defaults to 0.
+
+    Returns:
+        List[Tuple[float, float]]: The start and end time of each cue in seconds.
+    """
+    rng = random.Random(seed)
+    average_spacing = 60 / cues_per_minute
+
+    cues = []
+    time = rng.uniform(0, average_spacing)
+    while True:
+        cue_length = min(
+            rng.uniform(MINIMUM_CUE_SECONDS, MAXIMUM_CUE_SECONDS), average_spacing
+        )
+        if time + cue_length > duration_seconds:
+            break
+        cues.append((time, time + cue_length))
+        # Keep the average spacing, with at least a short pause between cues
+        time += max(rng.expovariate(1 / average_spacing), cue_length + 0.1)
+
+    return cues
+
+
+def format_srt_time(seconds: float) -> str:
+    """
+    Formats a time for an SRT file.
+
+    Args:
+        seconds (float): The time in seconds.
+
+    Returns:
+        str: The time as "HH:MM:SS,mmm".
+    """
+    time = timedelta(milliseconds=round(seconds * 1000))
+    hours, remainder = divmod(time.seconds, 3600)
+    minutes, whole_seconds = divmod(remainder, 60)
+    return f"{hours:02}:{minutes:02}:{whole_seconds:02},{time.microseconds // 1000:03}"
+
+
+def write_srt(subtitle_file: Path, cues: List[Tuple[float, float]]) -> None:
+    """
+    Writes subtitle timings to an SRT file, with placeholder text.
+
+    Args:
+        subtitle_file (Path): Where to save the subtitles.
+        cues (List[Tuple[float, float]]): The start and end time of each cue in seconds.
+    """
+    with subtitle_file.open("w", encoding="utf-8") as f:
+        for cue_number, (start, end) in enumerate(cues, start=1):
+            f.write(f"{cue_number}\n")
+            f.write(f"{format_srt_time(start)} --> {format_srt_time(end)}\n")
+            f.write(f"Line {cue_number}\n\n")
+
+
+def create_fixture(
+    fixture_folder: Path,
+    duration_seconds: float,
+    cues_per_minute: float,
+    audio_tracks: List[str],
+    seed: int = 0,
+) -> Tuple[Path, Path]:
+    """
+    Creates (or reuses) a synthetic video and its matching subtitles.
+
+    Fixtures are named after their parameters, so a fixture that already exists is not created again.
+
+    Args:
+        fixture_folder (Path): The folder to keep fixtures in.
+        duration_seconds (float): The length of the video.
+        cues_per_minute (float): The average number of subtitles per minute.
+        audio_tracks (List[str]): The language tag of each audio track.
+        seed (int, optional): The random seed for the subtitle timings. Defaults to 0.
+
+    Returns:
+        Tuple[Path, Path]: The video file and the subtitle file.
+    """
+    fixture_folder.mkdir(parents=True, exist_ok=True)
+    name = f"synthetic-{int(duration_seconds)}s-{cues_per_minute:g}cpm-{'_'.join(audio_tracks)}-seed{seed}"
+    video_file = fixture_folder / f"{name}.mkv"
+    subtitle_file = fixture_folder / f"{name}.srt"
+
+    if not video_file.exists():
+        print(f"Creating {video_file.name}")
+        # Only give the video its final name once complete, so an interrupted run isn't reused
+        partial_file = fixture_folder / f"{name}.partial.mkv"
+        create_synthetic_video(partial_file, duration_seconds, audio_tracks)
+        partial_file.replace(video_file)
+    if not subtitle_file.exists():
+        write_srt(
+            subtitle_file,
+            create_synthetic_cues(duration_seconds, cues_per_minute, seed),
+        )
+
+    return video_file, subtitle_file
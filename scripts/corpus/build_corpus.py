@@ -0,0 +1,92 @@
+"""
+Builds a concordance index over every episode of a series, and looks up phrases in it.
+
+Each episode's subtitles are paired by name (e.g. "Pilot.es.srt" and "[English] Pilot.srt" next to "Pilot.mp4"),
+aligned in a process pool, and stored in an SQLite full-text index. Rebuilding only re-aligns changed episodes.
+
+Example:
+    python scripts/corpus/build_corpus.py "C:/Stuff/Gilmore Girls" --languages Spanish:es English:en
+    python scripts/corpus/build_corpus.py "C:/Stuff/Gilmore Girls" --query "qué pasa" --language Spanish
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# The app modules import each other relative to the app folder
+REPOSITORY_FOLDER = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPOSITORY_FOLDER / "app"))
+
+from avi_utils.episode_pairing import pair_episodes  # noqa: E402
+from model.corpus_index import CorpusIndex  # noqa: E402
+
+DEFAULT_INDEX_FILE_NAME = "corpus.sqlite"
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+
+    Returns:
+        argparse.Namespace: The folder, languages, and optional query.
+    """
+    parser = argparse.ArgumentParser(
+        description="Build and query a series' subtitle concordance."
+    )
+    parser.add_argument("folder", type=Path, help="The folder holding the series.")
+    parser.add_argument(
+        "--languages",
+        nargs="+",
+        default=["Spanish:es", "English:en"],
+        help="Each language and the tags marking its subtitle files, e.g. Spanish:es:spa.",
+    )
+    parser.add_argument(
+        "--untagged-language", help="The language of subtitles with no tag."
+    )
+    parser.add_argument(
+        "--index", type=Path, help="The index file. Defaults to one in the folder."
+    )
+    parser.add_argument("--processes", type=int, help="Worker processes for aligning.")
+    parser.add_argument("--query", help="A word or phrase to look up after building.")
+    parser.add_argument("--language", default="Spanish", help="The query's language.")
+    parser.add_argument("--limit", type=int, default=20, help="The most occurrences.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    arguments = parse_arguments()
+
+    language_tags = {}
+    for language_argument in arguments.languages:
+        language, *tags = language_argument.split(":")
+        language_tags[language] = [language] + tags
+
+    index = CorpusIndex(arguments.index or arguments.folder / DEFAULT_INDEX_FILE_NAME)
+
+    start = time.perf_counter()
+    episodes = pair_episodes(
+        arguments.folder, language_tags, arguments.untagged_language
+    )
+    counts = index.build(episodes, arguments.processes)
+    print(f"{counts} in {time.perf_counter() - start:.1f}s")
+
+    if arguments.query:
+        start = time.perf_counter()
+        hits = index.concordance(
+            arguments.query, arguments.language, limit=arguments.limit
+        )
+        print(
+            f"{len(hits)} occurrences in {1000 * (time.perf_counter() - start):.1f}ms"
+        )
+        for hit in hits:
+            print(f"{hit['episode']} {hit['start_time']:%H:%M:%S}  {hit['text']}")
+            for language, text in hit["aligned_texts"].items():
+                print(f"    {language}: {text}")
+
+    index.close()
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from avi_utils.episode_pairing import (
+    find_episode_subtitles,
+    pair_episodes,
+    split_subtitle_name,
+)
+
+LANGUAGE_TAGS = {"Spanish": ["es", "Spanish"], "English": ["en", "English"]}
+
+
+class TestEpisodePairing(unittest.TestCase):
+    def test_subtitle_names_are_split(self):
+        self.assertEqual(
+            split_subtitle_name(Path("Pilot.es.srt"), LANGUAGE_TAGS),
+            ("Pilot", "Spanish"),
+        )
+        self.assertEqual(
+            split_subtitle_name(Path("[english] Pilot.srt"), LANGUAGE_TAGS),
+            ("Pilot", "English"),
+        )
+        self.assertEqual(
+            split_subtitle_name(Path("1x01 - El retorno.srt"), LANGUAGE_TAGS),
+            ("1x01 - El retorno", None),
+        )
+        self.assertIsNone(split_subtitle_name(Path("[Dutch] Pilot.srt"), LANGUAGE_TAGS))
+
+    def test_episodes_are_paired_across_subfolders(self):
+        with tempfile.TemporaryDirectory() as folder:
+            folder = Path(folder)
+            for file_name in [
+                "S01/Pilot.mp4",
+                "S01/Pilot.es.srt",
+                "S01/[English] Pilot.srt",
+                "S01/Pilot.fr.srt",
+                "S02/Return.srt",
+                "S02/Extras.mp4",
+            ]:
+                (folder / file_name).parent.mkdir(parents=True, exist_ok=True)
+                (folder / file_name).touch()
+
+            episodes = pair_episodes(folder, LANGUAGE_TAGS, untagged_language="Spanish")
+
+        self.assertEqual(list(episodes), ["S01/Pilot", "S02/Return"])
+        self.assertEqual(episodes["S01/Pilot"]["Video File"], folder / "S01/Pilot.mp4")
+        self.assertEqual(
+            episodes["S01/Pilot"]["Subtitle Files"],
+            {
+                "Spanish": folder / "S01/Pilot.es.srt",
+                "English": folder / "S01/[English] Pilot.srt",
+            },
+        )
+        self.assertIsNone(episodes["S02/Return"]["Video File"])
+
+    def test_video_subtitles_are_found_by_name(self):
+        subtitle_files = [
+            "Pilot.srt",
+            "Pilot.es.srt",
+            "Pilot.spa.srt",
+            "[English] Pilot.srt",
+            "Pilot.fr.srt",
+            "Return.es.srt",
+        ]
+        self.assertEqual(
+            find_episode_subtitles(
+                "Pilot.mp4", subtitle_files, untagged_language="Reference"
+            ),
+            {
+                "Reference": "Pilot.srt",
+                "Spanish": "Pilot.es.srt",
+                "English": "[English] Pilot.srt",
+                "French": "Pilot.fr.srt",
+            },
+        )
+        self.assertEqual(
+            find_episode_subtitles("Pilot.mp4", subtitle_files, LANGUAGE_TAGS),
+            {"Spanish": "Pilot.es.srt", "English": "[English] Pilot.srt"},
+        )
+
+    def test_tags_that_are_not_languages_are_part_of_the_name(self):
+        self.assertEqual(
+            split_subtitle_name(Path("Oceans.Ten.srt"), LANGUAGE_TAGS),
+            ("Oceans.Ten", None),
+        )
+        self.assertEqual(
+            find_episode_subtitles(
+                "[HorribleSubs] Show - 01.mp4",
+                ["[HorribleSubs] Show - 01.srt", "[HorribleSubs] Show - 01.es.srt"],
+                untagged_language="Reference",
+            ),
+            {
+                "Reference": "[HorribleSubs] Show - 01.srt",
+                "Spanish": "[HorribleSubs] Show - 01.es.srt",
+            },
+        )
+        self.assertEqual(
+            find_episode_subtitles(
+                "Oceans.Ten.mp4", ["Oceans.Ten.srt"], untagged_language="Reference"
+            ),
+            {"Reference": "Oceans.Ten.srt"},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
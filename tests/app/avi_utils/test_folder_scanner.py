@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from PyQt5.QtCore import QCoreApplication
+
+from avi_utils.folder_scan_worker import FolderScanner
+from avi_utils.folder_scanner import FolderScanCache, FolderScanCancelled
+
+
+class TestFolderScanCache(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.folder = Path(self.temporary_directory.name)
+        for file_name in ["Pilot.mp4", "Pilot.es.srt", "Return.MP4", "notes.txt"]:
+            (self.folder / file_name).touch()
+        (self.folder / "Extras.srt").mkdir()
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_files_are_reported_in_batches(self):
+        batches = []
+        video_files, subtitle_files = FolderScanCache().scan(
+            str(self.folder),
+            batch_callback=lambda videos, subtitles: batches.append(
+                (videos, subtitles)
+            ),
+            batch_size=1,
+        )
+
+        self.assertEqual(sorted(video_files), ["Pilot.mp4", "Return.MP4"])
+        self.assertEqual(subtitle_files, ["Pilot.es.srt"])
+        self.assertEqual(len(batches), 3)
+        self.assertEqual(
+            sorted(
+                name for videos, subtitles in batches for name in videos + subtitles
+            ),
+            ["Pilot.es.srt", "Pilot.mp4", "Return.MP4"],
+        )
+
+    def test_unchanged_folders_are_not_read_again(self):
+        cache = FolderScanCache()
+        cache.scan(str(self.folder))
+        batches = []
+        cache.scan(
+            str(self.folder),
+            batch_callback=lambda videos, subtitles: batches.append(
+                (videos, subtitles)
+            ),
+        )
+        self.assertEqual(cache.scan_count, 1)
+        self.assertEqual(len(batches), 1)
+
+        (self.folder / "Return.es.srt").touch()
+        # Make sure the folder's modification time moves on, whatever the file system's resolution
+        status = os.stat(self.folder)
+        os.utime(self.folder, ns=(status.st_atime_ns, status.st_mtime_ns + 10**9))
+        _, subtitle_files = cache.scan(str(self.folder))
+        self.assertEqual(cache.scan_count, 2)
+        self.assertEqual(sorted(subtitle_files), ["Pilot.es.srt", "Return.es.srt"])
+
+    def test_scans_can_be_cancelled(self):
+        cache = FolderScanCache()
+        with self.assertRaises(FolderScanCancelled):
+            cache.scan(str(self.folder), should_stop=lambda: True)
+        self.assertIsNone(cache.get_listing(str(self.folder)))
+
+
+class TestFolderScanner(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def test_cancelled_scans_pass_no_more_files_on(self):
+        scanner = FolderScanner(cache=FolderScanCache())
+        found = []
+        scanner.files_found_signal.connect(
+            lambda video_files, subtitle_files: found.append(video_files)
+        )
+        generation = scanner.generation
+        scanner.files_found(generation, ["Pilot.mp4"], [])
+
+        # E.g. the folder box was emptied, while batches of the last scan were still queued
+        scanner.cancel()
+        scanner.files_found(generation, ["Return.mp4"], [])
+        self.assertEqual(found, [["Pilot.mp4"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from avi_utils.media_encoder import (
+    MAX_ATTEMPTS,
+    MediaEncodingQueue,
+    audio_encode_command,
+    image_encode_command,
+)
+
+
+class FakeEncoder:
+    """Copies the input file to the output file, optionally failing or blocking until released."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.commands = []
+        self.released = threading.Event()
+        self.released.set()
+
+    def __call__(self, command):
+        self.released.wait(5)
+        self.commands.append(command)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("Encoding failed")
+        source = command[command.index("-i") + 1]
+        shutil.copy(source, command[-1])
+
+
+class TestMediaEncodingQueue(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.root = Path(self.folder.name)
+        self.clip = self.root / "clip.mp3"
+        self.clip.write_bytes(b"audio")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def open_queue(self, encoder, **options):
+        return MediaEncodingQueue(
+            self.root / "queue.sqlite3",
+            self.root / "staging",
+            run_command=encoder,
+            **options,
+        )
+
+    def test_media_is_encoded_in_the_background(self):
+        queue = self.open_queue(FakeEncoder())
+        queue.start()
+        destination = self.root / "out" / ("clip" + queue.audio_extension)
+        queue.enqueue_audio(self.clip, destination)
+        queue.enqueue_image(
+            lambda path: path.write_bytes(b"image"), self.root / "out" / "shot.webp"
+        )
+
+        self.assertTrue(queue.wait_until_idle(5))
+        queue.close()
+        self.assertEqual(destination.read_bytes(), b"audio")
+        self.assertEqual((self.root / "out" / "shot.webp").read_bytes(), b"image")
+        self.assertEqual(list((self.root / "staging").iterdir()), [])
+
+    def test_unfinished_jobs_survive_a_restart(self):
+        destination = self.root / "out" / "clip.mp3"
+        queue = self.open_queue(FakeEncoder(failures=MAX_ATTEMPTS))
+        queue.start()
+        queue.enqueue_audio(self.clip, destination)
+        self.clip.unlink()  # E.g. the temporary audio folder being emptied
+
+        self.assertTrue(queue.wait_until_idle(5))
+        queue.close()
+        self.assertFalse(destination.exists())
+
+        queue = self.open_queue(FakeEncoder())
+        self.assertEqual(queue.pending_job_count(), 1)
+        queue.start()
+        self.assertTrue(queue.wait_until_idle(5))
+        queue.close()
+        self.assertEqual(destination.read_bytes(), b"audio")
+
+    def test_close_waits_for_queued_jobs(self):
+        encoder = FakeEncoder()
+        encoder.released.clear()
+        queue = self.open_queue(encoder)
+        queue.start()
+        for number in range(3):
+            queue.enqueue_audio(self.clip, self.root / "out" / f"{number}.mp3")
+
+        encoder.released.set()
+        queue.close()
+        self.assertEqual(len(list((self.root / "out").iterdir())), 3)
+
+    def test_media_is_found_until_discarded(self):
+        encoder = FakeEncoder()
+        encoder.released.clear()
+        queue = self.open_queue(encoder)
+        queue.start()
+        kept = self.root / "out" / "kept.mp3"
+        discarded = self.root / "out" / "discarded.mp3"
+        queue.enqueue_audio(self.clip, kept)
+        queue.enqueue_audio(self.clip, discarded)
+
+        # Still being encoded, so the staged file holds it
+        staged_file = queue.media_file(discarded)
+        self.assertEqual(staged_file.parent, self.root / "staging")
+        self.assertEqual(staged_file.read_bytes(), b"audio")
+        queue.discard(discarded)
+        self.assertFalse(staged_file.exists())
+
+        encoder.released.set()
+        self.assertTrue(queue.wait_until_idle(5))
+        self.assertEqual(queue.media_file(kept), kept)
+        self.assertFalse(discarded.exists())
+        self.assertIsNone(queue.media_file(discarded))
+
+        queue.discard(kept)
+        self.assertFalse(kept.exists())
+        queue.close()
+
+    def test_encode_commands(self):
+        command = image_encode_command(Path("a.bmp"), Path("a.webp"), "webp", 640, 75)
+        self.assertIn("scale='min(640,iw)':-2", command)
+        self.assertIn("libwebp", command)
+
+        command = audio_encode_command(
+            Path("a.mp3"), Path("a.opus"), "opus", "32k", trim_silence=True
+        )
+        self.assertIn("libopus", command)
+        self.assertTrue(any("silenceremove" in part for part in command))
+
+        with self.assertRaises(ValueError):
+            image_encode_command(Path("a.bmp"), Path("a.gif"), "gif", 640, 75)
+
+
+if __name__ == "__main__":
+    unittest.main()
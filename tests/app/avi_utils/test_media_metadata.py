@@ -0,0 +1,92 @@
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from avi_utils.media_metadata import MediaMetadataCache
+
+PROBE_RESULT = {
+    "streams": [
+        {"codec_type": "video", "codec_name": "h264"},
+        {"codec_type": "audio", "codec_name": "aac", "tags": {"language": "spa"}},
+        {"codec_type": "audio", "codec_name": "aac"},
+        {"codec_type": "audio", "codec_name": "aac", "tags": {"language": "eng"}},
+    ],
+    "format": {"duration": "1320.5"},
+}
+
+
+class FakeProbe:
+    """Returns the same probe result for every file, counting the files probed."""
+
+    def __init__(self):
+        self.probed = []
+        self.lock = threading.Lock()
+
+    def __call__(self, path):
+        with self.lock:
+            self.probed.append(path)
+        return PROBE_RESULT
+
+
+class TestMediaMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.temporary_folder = tempfile.TemporaryDirectory()
+        self.folder = Path(self.temporary_folder.name)
+        self.cache_file = self.folder / "media_metadata.sqlite3"
+        self.video_file = self.folder / "Pilot.mp4"
+        self.video_file.write_bytes(b"video")
+        self.probe = FakeProbe()
+        self.cache = MediaMetadataCache(self.cache_file, probe=self.probe)
+
+    def tearDown(self):
+        self.cache.close()
+        self.temporary_folder.cleanup()
+
+    def test_streams_are_described(self):
+        self.assertEqual(
+            self.cache.get_audio_tracks(self.video_file), ["spa", "und", "eng"]
+        )
+        self.assertEqual(self.cache.find_audio_stream_index(self.video_file, "eng"), 2)
+        self.assertEqual(self.cache.get_duration(self.video_file), 1320.5)
+        with self.assertRaises(ValueError):
+            self.cache.find_audio_stream_index(self.video_file, "ita")
+
+    def test_files_are_probed_once_until_they_change(self):
+        self.cache.get_audio_tracks(self.video_file)
+        self.cache.get_duration(str(self.video_file))
+        self.assertEqual(len(self.probe.probed), 1)
+
+        # The results are kept across runs
+        other_probe = FakeProbe()
+        other_cache = MediaMetadataCache(self.cache_file, probe=other_probe)
+        other_cache.get_audio_tracks(self.video_file)
+        self.assertEqual(other_probe.probed, [])
+
+        self.video_file.write_bytes(b"a different video")
+        other_cache.get_audio_tracks(self.video_file)
+        self.assertEqual(other_probe.probed, [os.path.abspath(self.video_file)])
+        other_cache.close()
+
+    def test_folders_are_probed_in_the_background(self):
+        video_files = []
+        for episode in range(8):
+            video_file = self.folder / f"Episode {episode}.mp4"
+            video_file.write_bytes(b"video")
+            video_files.append(video_file)
+
+        futures = self.cache.probe_in_background(video_files)
+        for future in futures:
+            self.assertEqual(future.result(), PROBE_RESULT)
+
+        self.assertEqual(len(self.probe.probed), 8)
+        self.assertEqual(
+            self.cache.get_audio_tracks(video_files[3]), ["spa", "und", "eng"]
+        )
+        self.assertEqual(len(self.probe.probed), 8)
+        self.assertEqual(self.cache.pending, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
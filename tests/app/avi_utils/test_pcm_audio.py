@@ -0,0 +1,47 @@
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from avi_utils.pcm_audio import (
+    SAMPLE_DTYPE,
+    SAMPLE_RATE,
+    decode_command,
+    join_with_gaps,
+    slice_lines,
+)
+
+START = datetime(1900, 1, 1)
+
+
+class TestPcmAudio(unittest.TestCase):
+    def test_lines_are_sliced_at_the_track_speed(self):
+        samples = np.arange(10 * SAMPLE_RATE, dtype=np.int32)
+        timings = [(START + timedelta(seconds=2), START + timedelta(seconds=4))]
+
+        (line,) = slice_lines(samples, timings)
+        self.assertEqual((line[0], len(line)), (2 * SAMPLE_RATE, 2 * SAMPLE_RATE))
+
+        # A track decoded at double speed has every line at half the time
+        (line,) = slice_lines(samples, timings, speed=2.0)
+        self.assertEqual((line[0], len(line)), (SAMPLE_RATE, SAMPLE_RATE))
+
+    def test_segments_are_decoded_by_seeking_in_the_input(self):
+        command = decode_command("track.mp3", start_seconds=2, duration_seconds=1.5)
+        # Seeking before the input skips decoding everything before the segment
+        self.assertLess(command.index("-ss"), command.index("-i"))
+        self.assertEqual(command[command.index("-ss") + 1], "2.000")
+        self.assertEqual(command[command.index("-t") + 1], "1.500")
+
+    def test_pieces_are_joined_with_silent_gaps(self):
+        pieces = [np.full(3, 7, dtype=SAMPLE_DTYPE), np.full(2, 9, dtype=SAMPLE_DTYPE)]
+
+        joined = join_with_gaps(pieces, gap_seconds=2 / SAMPLE_RATE)
+
+        self.assertEqual(joined.tolist(), [7, 7, 7, 0, 0, 9, 9])
+        self.assertEqual(join_with_gaps(pieces).tolist(), [7, 7, 7, 9, 9])
+        self.assertEqual(len(join_with_gaps([], gap_seconds=1)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+import random
+import unittest
+
+from deep_l.resilience import (
+    CircuitBreaker,
+    MAX_LATENCY_SAMPLES,
+    CircuitOpenError,
+    ResilientBackend,
+    TokenBucket,
+    TranslationMetrics,
+    backoff_delay,
+)
+from deep_l.stand_in_server import DeepLStandInServer
+from deep_l.translation_backends import DeepLBackend
+from deep_l.translator import Translator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FailingBackend:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.calls = 0
+
+    def translate(self, texts, *args):
+        self.calls += 1
+        error = RuntimeError("failed")
+        error.http_status_code = self.status_code
+        raise error
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_allows_bursts_then_limits_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+        for _ in range(3):
+            self.assertEqual(bucket.acquire(), 0)
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+        self.assertAlmostEqual(clock.now, 0.5)
+
+
+class TestBackoff(unittest.TestCase):
+    def test_delay_is_capped(self):
+        rng = random.Random(0)
+        for attempt in range(10):
+            delay = backoff_delay(attempt, base_delay=1, max_delay=8, rng=rng)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(8, 2**attempt))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_then_tries_again(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=clock)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow_request())
+
+        clock.sleep(10)
+        self.assertTrue(breaker.allow_request())  # The trial request
+        self.assertFalse(breaker.allow_request())
+        breaker.record_success()
+        self.assertTrue(breaker.allow_request())
+
+    def test_rate_limited_trial_leaves_circuit_open(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10, clock=clock)
+        breaker.record_failure()
+        clock.sleep(10)
+        self.assertTrue(breaker.allow_request())
+        breaker.release_trial()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(breaker.consecutive_failures, 1)
+        # Another trial is let through straight away
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+
+
+class TestResilientBackend(unittest.TestCase):
+    def create_backend(self, backend, **kwargs):
+        return ResilientBackend(
+            backend,
+            rate_limiter=TokenBucket(rate=1000, capacity=1000),
+            sleep=lambda seconds: None,
+            seed=0,
+            **kwargs,
+        )
+
+    def test_permanent_errors_are_not_retried(self):
+        failing_backend = FailingBackend(status_code=403)
+        backend = self.create_backend(failing_backend)
+        with self.assertRaises(RuntimeError):
+            backend.translate(["hola"], "ES", "EN-GB", "off", "default")
+        self.assertEqual(failing_backend.calls, 1)
+
+    def test_circuit_opens_per_language_pair(self):
+        backend = self.create_backend(
+            FailingBackend(status_code=503), max_retries=0, failure_threshold=2
+        )
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                backend.translate(["hola"], "ES", "EN-GB", "off", "default")
+        with self.assertRaises(CircuitOpenError):
+            backend.translate(["hola"], "ES", "EN-GB", "off", "default")
+        # Other language pairs are unaffected
+        with self.assertRaises(RuntimeError):
+            backend.translate(["ciao"], "IT", "EN-GB", "off", "default")
+        self.assertEqual(backend.metrics.report()["ES->EN-GB"]["rejected"], 1)
+
+    def test_latencies_are_bounded(self):
+        metrics = TranslationMetrics()
+        for milliseconds in range(MAX_LATENCY_SAMPLES + 10):
+            metrics.record_latency(("ES", "EN-GB"), milliseconds / 1000)
+        self.assertEqual(
+            len(metrics.pairs["ES->EN-GB"]["latencies"]), MAX_LATENCY_SAMPLES
+        )
+
+    def test_caller_sees_failure_when_retries_run_out(self):
+        for failure_status in [429, 503]:
+            with DeepLStandInServer(
+                failure_rate=1, failure_status=failure_status
+            ) as server:
+                backend = self.create_backend(
+                    DeepLBackend(
+                        "stand-in-key", server_url=server.url, max_sdk_retries=0
+                    ),
+                    max_retries=2,
+                )
+                translator = Translator(backend=backend)
+                with self.assertRaises(Exception) as raised:
+                    translator.translate_text(["hola"], "Spanish", "English")
+                self.assertEqual(
+                    getattr(raised.exception, "http_status_code", None), failure_status
+                )
+                self.assertEqual(server.request_count, 3)
+
+    def test_bulk_translation_survives_transient_failures(self):
+        with DeepLStandInServer(failure_rate=0.4, failure_status=503, seed=1) as server:
+            backend = self.create_backend(
+                DeepLBackend("stand-in-key", server_url=server.url, max_sdk_retries=0),
+                max_retries=10,
+            )
+            translator = Translator(backend=backend)
+            texts = [f"línea {number}" for number in range(300)]
+
+            translations = translator.translate_text(texts, "Spanish", "English")
+
+        self.assertEqual(translations, [f"[EN-GB] {text}" for text in texts])
+        metrics = backend.metrics.report()["ES->EN-GB"]
+        self.assertGreater(metrics["retries"], 0)
+        self.assertEqual(metrics["successes"], 6)
+        self.assertEqual(
+            metrics["requests"], metrics["successes"] + metrics["failures"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
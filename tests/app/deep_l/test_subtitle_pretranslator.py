@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from deep_l.subtitle_pretranslator import (
+    PretranslationCancelled,
+    deduplicate_texts,
+    pretranslate_subtitles,
+)
+from model.model import SubtitleModel
+
+SUBTITLES = """1
+00:00:01,000 --> 00:00:02,500
+¿Qué?
+
+2
+00:00:03,000 --> 00:00:04,000
+Vamos a la playa.
+
+3
+00:00:05,000 --> 00:00:06,000
+¿Qué?
+
+"""
+
+
+class FakeTranslator:
+    def __init__(self):
+        self.requests = []
+
+    def translate_text(self, texts, source_lang, target_lang):
+        self.requests.append(list(texts))
+        return [f"{target_lang}: {text}" for text in texts]
+
+
+class TestDeduplicateTexts(unittest.TestCase):
+    def test_repeated_texts_share_a_position(self):
+        unique_texts, positions = deduplicate_texts(["Sí.", "No", " Sí. ", "No"])
+        self.assertEqual(unique_texts, ["Sí.", "No"])
+        self.assertEqual(positions, [0, 1, 0, 1])
+
+
+class TestPretranslateSubtitles(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.subtitle_file = Path(self.folder.name) / "episode.srt"
+        self.subtitle_file.write_text(SUBTITLES, encoding="utf-8")
+        self.subtitles = SubtitleModel("Spanish", self.subtitle_file).subtitles
+        self.output_file = Path(self.folder.name) / "translated" / "episode.srt"
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_writes_translated_srt_with_same_timings(self):
+        translator = FakeTranslator()
+        progress = []
+        pretranslate_subtitles(
+            self.subtitles,
+            translator,
+            "Spanish",
+            "English",
+            self.output_file,
+            progress_callback=lambda done, total: progress.append((done, total)),
+        )
+
+        self.assertEqual(translator.requests, [["¿Qué?", "Vamos a la playa."]])
+        self.assertEqual(progress[-1], (2, 2))
+
+        translated = SubtitleModel("English", self.output_file).subtitles
+        self.assertEqual(
+            [subtitle.text for subtitle in translated],
+            ["English: ¿Qué?", "English: Vamos a la playa.", "English: ¿Qué?"],
+        )
+        self.assertEqual(
+            [(s.start_time, s.end_time) for s in translated],
+            [(s.start_time, s.end_time) for s in self.subtitles],
+        )
+
+    def test_cancelling_writes_nothing(self):
+        with self.assertRaises(PretranslationCancelled):
+            pretranslate_subtitles(
+                self.subtitles,
+                FakeTranslator(),
+                "Spanish",
+                "English",
+                self.output_file,
+                should_stop=lambda: True,
+            )
+        self.assertFalse(self.output_file.parent.exists())
+
+    def test_failed_translation_writes_nothing(self):
+        translator = FakeTranslator()
+        translator.translate_text = MagicMock(side_effect=RuntimeError("429"))
+        with self.assertRaisesRegex(RuntimeError, "429"):
+            pretranslate_subtitles(
+                self.subtitles, translator, "Spanish", "English", self.output_file
+            )
+        self.assertFalse(self.output_file.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
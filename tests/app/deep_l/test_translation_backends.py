@@ -0,0 +1,62 @@
+import unittest
+
+from deep_l.stand_in_server import DeepLStandInServer
+from deep_l.translation_backends import (
+    DeepLBackend,
+    GlossaryBackend,
+    translate_with_glossary,
+)
+from deep_l.translation_cache import TranslationCache
+from deep_l.translator import Translator
+
+GLOSSARY = {"hola": "hello", "buenos días": "good morning", "playa": "beach"}
+
+
+class TestGlossaryBackend(unittest.TestCase):
+    def test_translates_words_and_phrases(self):
+        self.assertEqual(
+            translate_with_glossary("¡Hola! Buenos días, playa.", GLOSSARY),
+            "¡Hello! Good morning, beach.",
+        )
+
+    def test_keeps_unknown_words(self):
+        self.assertEqual(translate_with_glossary("hola amigo", GLOSSARY), "hello amigo")
+
+    def test_missing_glossary_keeps_texts(self):
+        backend = GlossaryBackend("missing_folder")
+        self.assertEqual(
+            backend.translate(["hola"], "ES", "EN-GB", "off", "default"), ["hola"]
+        )
+
+
+class TestDeepLStandInServer(unittest.TestCase):
+    def test_translator_through_sdk(self):
+        with DeepLStandInServer() as server:
+            translator = Translator(
+                backend=DeepLBackend("stand-in-key", server_url=server.url),
+                cache=TranslationCache(":memory:"),
+            )
+            texts = [f"línea {number}" for number in range(120)] + ["línea 0"]
+
+            translations = translator.translate_text(texts, "Spanish", "English")
+            self.assertEqual(translations[0], "[EN-GB] línea 0")
+            self.assertEqual(translations[-1], "[EN-GB] línea 0")
+            self.assertEqual(server.text_count, 120)
+            self.assertLessEqual(server.max_texts_per_request, 50)
+
+            # Cached translations aren't requested again
+            requests = server.request_count
+            translator.translate_text(texts[:10], "Spanish", "English")
+            self.assertEqual(server.request_count, requests)
+
+    def test_failed_requests_raise(self):
+        with DeepLStandInServer(failure_rate=1, failure_status=400) as server:
+            translator = Translator(
+                backend=DeepLBackend("stand-in-key", server_url=server.url)
+            )
+            with self.assertRaises(Exception):
+                translator.translate_text(["hola"], "Spanish", "English")
+
+
+if __name__ == "__main__":
+    unittest.main()
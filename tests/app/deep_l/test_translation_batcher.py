@@ -0,0 +1,114 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from deep_l.translation_batcher import (
+    MAX_TEXTS_PER_REQUEST,
+    TranslationBatcher,
+    chunk_texts,
+)
+from deep_l.translator import Translator
+
+
+class MockTextResult:
+    def __init__(self, text):
+        self.text = text
+
+
+def make_translator():
+    translator = Translator("dummy_key")
+    translator.backend.translator = MagicMock()
+    translator.backend.translator.translate_text.side_effect = lambda text, **kwargs: [
+        MockTextResult(t.upper()) for t in text
+    ]
+    return translator
+
+
+class TestChunking(unittest.TestCase):
+    def test_chunks_respect_text_count(self):
+        texts = [f"line {i}" for i in range(120)]
+        chunks = chunk_texts(texts)
+        self.assertEqual([len(chunk) for chunk in chunks], [50, 50, 20])
+        self.assertEqual([text for chunk in chunks for text in chunk], texts)
+
+    def test_chunks_respect_size(self):
+        texts = ["a" * 40, "b" * 40, "c" * 40, "d" * 200]
+        chunks = chunk_texts(texts, max_bytes=100)
+        # Each text adds 46 bytes ("&text=" and the text), and an oversized text still gets its own chunk
+        self.assertEqual(chunks, [["a" * 40, "b" * 40], ["c" * 40], ["d" * 200]])
+
+    def test_translate_text_chunks_and_keeps_order(self):
+        translator = make_translator()
+        texts = [f"line {i}" for i in range(2 * MAX_TEXTS_PER_REQUEST + 1)]
+        translations = translator.translate_text(texts, "Spanish", "English")
+        self.assertEqual(translations, [text.upper() for text in texts])
+        self.assertEqual(translator.backend.translator.translate_text.call_count, 3)
+
+    def test_failed_chunk_fails_the_translation(self):
+        translator = make_translator()
+
+        def fail_second_chunk(text, **kwargs):
+            if text[0] == "line 50":
+                raise RuntimeError("timeout")
+            return [MockTextResult(t.upper()) for t in text]
+
+        translator.backend.translator.translate_text.side_effect = fail_second_chunk
+        with self.assertRaisesRegex(RuntimeError, "timeout"):
+            translator.translate_text(
+                [f"line {i}" for i in range(60)], "Spanish", "English"
+            )
+
+
+class TestTranslationBatcher(unittest.TestCase):
+    def test_concurrent_requests_are_coalesced(self):
+        translator = make_translator()
+        batcher = TranslationBatcher(translator, window_seconds=0.1)
+
+        futures = [
+            batcher.submit([f"uno {i}", f"dos {i}"], "Spanish", "English")
+            for i in range(5)
+        ]
+        german = batcher.submit(["tres"], "Spanish", "German")
+        results = [future.result(timeout=5) for future in futures]
+
+        self.assertEqual(results[3], ["UNO 3", "DOS 3"])
+        self.assertEqual(german.result(timeout=5), ["TRES"])
+        # One request for the English batch and one for the German one
+        self.assertEqual(translator.backend.translator.translate_text.call_count, 2)
+        batcher.close()
+
+    def test_cancelled_requests_are_dropped(self):
+        translator = make_translator()
+        batcher = TranslationBatcher(translator, window_seconds=0.1)
+
+        stale = batcher.submit(["uno"], "Spanish", "English")
+        current = batcher.submit(["dos"], "Spanish", "English")
+        stale.cancel()
+
+        self.assertEqual(current.result(timeout=5), ["DOS"])
+        self.assertEqual(
+            translator.backend.translator.translate_text.call_args.kwargs["text"],
+            ["dos"],
+        )
+        batcher.close()
+
+    def test_translate_from_threads(self):
+        translator = make_translator()
+        batcher = TranslationBatcher(translator)
+        results = {}
+
+        def translate(i):
+            results[i] = batcher.translate([f"line {i}"], "Spanish", "English")
+
+        threads = [threading.Thread(target=translate, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, {i: [f"LINE {i}"] for i in range(8)})
+        batcher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
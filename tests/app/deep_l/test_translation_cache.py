@@ -0,0 +1,106 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from deep_l.translation_cache import TranslationCache, normalise_text
+from deep_l.translator import Translator
+
+
+class MockTextResult:
+    def __init__(self, text):
+        self.text = text
+
+
+def mock_backend():
+    """A stand-in for deepl.Translator that upper-cases texts and records every request."""
+    backend = MagicMock()
+    backend.translate_text.side_effect = lambda text, **kwargs: [
+        MockTextResult(t.upper()) for t in text
+    ]
+    return backend
+
+
+class TestTranslationCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.database_file = Path(self.folder.name) / "cache.sqlite3"
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def make_translator(self, cache):
+        translator = Translator("dummy_key", cache=cache)
+        translator.backend.translator = mock_backend()
+        return translator
+
+    def test_normalise_text(self):
+        self.assertEqual(normalise_text("  ¿Cómo\n  estás?­ "), "¿Cómo estás?")
+
+    def test_repeated_texts_only_requested_once(self):
+        cache = TranslationCache(self.database_file)
+        translator = self.make_translator(cache)
+
+        result = translator.translate_text(["uno", "dos", "uno"], "Spanish", "English")
+        self.assertEqual(result, ["UNO", "DOS", "UNO"])
+        self.assertEqual(
+            translator.backend.translator.translate_text.call_args.kwargs["text"],
+            ["uno", "dos"],
+        )
+
+        result = translator.translate_text([" uno ", "tres"], "Spanish", "English")
+        self.assertEqual(result, ["UNO", "TRES"])
+        self.assertEqual(
+            translator.backend.translator.translate_text.call_args.kwargs["text"],
+            ["tres"],
+        )
+        cache.close()
+
+    def test_key_includes_options(self):
+        translator = self.make_translator(TranslationCache(":memory:"))
+        translator.translate_text(["uno"], "Spanish", "English")
+        translator.translate_text(["uno"], "Spanish", "English", formality="more")
+        translator.translate_text(["uno"], "Spanish", "German")
+        self.assertEqual(translator.backend.translator.translate_text.call_count, 3)
+
+    def test_persists_between_sessions(self):
+        cache = TranslationCache(self.database_file)
+        self.make_translator(cache).translate_text(["uno"], "Spanish", "English")
+        cache.close()
+
+        cache = TranslationCache(self.database_file)
+        translator = self.make_translator(cache)
+        self.assertEqual(
+            translator.translate_text(["uno"], "Spanish", "English"), ["UNO"]
+        )
+        translator.backend.translator.translate_text.assert_not_called()
+        cache.close()
+
+    def test_failed_translations_not_cached(self):
+        translator = self.make_translator(TranslationCache(":memory:"))
+        translator.backend.translator.translate_text.side_effect = RuntimeError(
+            "offline"
+        )
+        with self.assertRaises(RuntimeError):
+            translator.translate_text(["uno"], "Spanish", "English")
+
+        translator.backend.translator = mock_backend()
+        self.assertEqual(
+            translator.translate_text(["uno"], "Spanish", "English"), ["UNO"]
+        )
+
+    def test_memory_layer_is_bounded(self):
+        cache = TranslationCache(":memory:", memory_cache_size=2)
+        translator = self.make_translator(cache)
+        translator.translate_text(["uno", "dos", "tres"], "Spanish", "English")
+        self.assertEqual(len(cache.memory_cache), 2)
+
+        # Evicted translations are still found in the database
+        self.assertEqual(
+            translator.translate_text(["uno"], "Spanish", "English"), ["UNO"]
+        )
+        self.assertEqual(translator.backend.translator.translate_text.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from PyQt5.QtCore import QCoreApplication
+
+from deep_l.translation_service import TranslationService
+
+
+def wait_for(condition, timeout=5):
+    """Processes Qt events until the condition holds."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+        time.sleep(0.005)
+
+
+class TestTranslationService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.translator = MagicMock()
+        self.translator.translate_text.side_effect = lambda texts, **kwargs: [
+            text.upper() for text in texts
+        ]
+        self.service = TranslationService(self.translator)
+
+    def tearDown(self):
+        self.service.close()
+
+    def test_callback_runs_on_gui_thread(self):
+        results = []
+        self.service.translate(
+            "workspace",
+            ["uno"],
+            "Spanish",
+            "English",
+            callback=lambda translations: results.append(
+                (translations, threading.current_thread())
+            ),
+        )
+        wait_for(lambda: results)
+        self.assertEqual(results, [(["UNO"], threading.main_thread())])
+        self.assertFalse(self.service.is_pending("workspace"))
+
+    def test_stale_requests_are_ignored(self):
+        results = []
+        for text in ["uno", "dos", "tres"]:
+            self.service.translate(
+                "workspace", [text], "Spanish", "English", callback=results.append
+            )
+        other_results = []
+        self.service.translate(
+            "entry", ["cuatro"], "Spanish", "English", callback=other_results.append
+        )
+
+        wait_for(lambda: results and other_results)
+        QCoreApplication.processEvents()
+        self.assertEqual(results, [["TRES"]])
+        self.assertEqual(other_results, [["CUATRO"]])
+
+    def test_errors_reach_error_callback(self):
+        self.translator.translate_text.side_effect = ValueError("Invalid language")
+        errors = []
+        self.service.translate(
+            "workspace",
+            ["uno"],
+            "Spanish",
+            "Klingon",
+            callback=lambda translations: self.fail("No translation expected"),
+            error_callback=errors.append,
+        )
+        wait_for(lambda: errors)
+        self.assertIsInstance(errors[0], ValueError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 from unittest.mock import patch, MagicMock
-from app.deep_l.translator import Translator
+from deep_l.translator import Translator
 
 
 class MockTextResult:
@@ -26,7 +26,7 @@ def mock_translate_text(text, source_lang, target_lang, *args, **kwargs):
 
 
 class TestTranslator(unittest.TestCase):
-    @patch("app.deep_l.translator.Translator.translate_text")
+    @patch("deep_l.translator.Translator.translate_text")
     def test_translate_text(self, mock_translate):
         mock_translate.side_effect = mock_translate_text
 
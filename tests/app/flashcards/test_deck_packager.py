@@ -0,0 +1,135 @@
+import json
+import sqlite3
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from flashcards.deck_packager import DeckPackager
+from flashcards.flashcard_store import FlashcardStore
+
+FIELDS = ["Question Text", "Answer Text", "Picture", "Audio"]
+
+
+class TestDeckPackager(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        folder = Path(self.folder.name)
+        self.image_folder = folder / "images"
+        self.audio_folder = folder / "audio"
+        self.image_folder.mkdir()
+        self.audio_folder.mkdir()
+
+        self.store = FlashcardStore(
+            folder / "flashcards.sqlite3",
+            media_folders={"Picture": self.image_folder, "Audio": self.audio_folder},
+        )
+        self.packager = DeckPackager(
+            self.store, FIELDS, package_folder=folder / "packages"
+        )
+
+    def tearDown(self):
+        self.store.close()
+        self.folder.cleanup()
+
+    def add_card(self, question, picture=b"", audio=b""):
+        card = {
+            "Question Text": question,
+            "Answer Text": "A",
+            "Picture": "",
+            "Audio": "",
+        }
+        if picture:
+            (self.image_folder / f"{question}.jpg").write_bytes(picture)
+            card["Picture"] = f"{question}.jpg"
+        if audio:
+            (self.audio_folder / f"{question}.mp3").write_bytes(audio)
+            card["Audio"] = f"[sound:{question}.mp3]"
+        return self.store.add_flashcard("Easy", card)
+
+    def read_notes(self, anki_deck_name="Easy"):
+        connection = sqlite3.connect(str(self.packager.collection_file(anki_deck_name)))
+        try:
+            return [
+                row[0].split("\x1f")
+                for row in connection.execute("SELECT flds FROM notes ORDER BY id")
+            ]
+        finally:
+            connection.close()
+
+    def test_package_contains_collection_and_deduplicated_media(self):
+        self.add_card("Uno", picture=b"same picture", audio=b"uno")
+        self.add_card("Dos", picture=b"same picture")
+
+        package_file = self.packager.build_package("Easy", "(AVI) Languages Easy")
+
+        with zipfile.ZipFile(package_file) as package:
+            media = json.loads(package.read("media"))
+            self.assertEqual(len(media), 2)
+            self.assertIn("collection.anki2", package.namelist())
+            contents = {media[index]: package.read(index) for index in media}
+
+        notes = self.read_notes("(AVI) Languages Easy")
+        self.assertEqual(notes[0][2], notes[1][2])
+        self.assertEqual(contents[notes[0][2]], b"same picture")
+        self.assertRegex(notes[0][3], r"^\[sound:_languages_\w+\.mp3\]$")
+
+    def test_rebuilds_add_new_and_edited_flashcards(self):
+        first_id = self.add_card("Uno")
+        second_id = self.add_card("Dos")
+        self.packager.build_package("Easy")
+
+        self.store.update_flashcard(first_id, {"Question Text": "Uno!"})
+        self.store.delete_flashcard(second_id)
+        self.add_card("Tres", audio=b"tres")
+        package_file = self.packager.build_package("Easy")
+
+        self.assertEqual([note[0] for note in self.read_notes()], ["Uno!", "Tres"])
+        with zipfile.ZipFile(package_file) as package:
+            self.assertEqual(len(json.loads(package.read("media"))), 1)
+
+    def test_flashcards_missing_media_are_packaged_again_once_it_appears(self):
+        # E.g. the audio is still waiting to be encoded
+        self.store.add_flashcard(
+            "Easy",
+            {
+                "Question Text": "Uno",
+                "Answer Text": "A",
+                "Picture": "",
+                "Audio": "[sound:Uno.mp3]",
+            },
+        )
+        self.packager.build_package("Easy")
+        self.assertEqual(self.read_notes()[0][3], "")
+
+        (self.audio_folder / "Uno.mp3").write_bytes(b"uno")
+        package_file = self.packager.build_package("Easy")
+
+        self.assertRegex(self.read_notes()[0][3], r"^\[sound:_languages_\w+\.mp3\]$")
+        with zipfile.ZipFile(package_file) as package:
+            self.assertEqual(len(json.loads(package.read("media"))), 1)
+
+    def test_each_anki_deck_has_its_own_collection(self):
+        self.add_card("Uno")
+        for anki_deck_name in ["(AVI) Languages Easy", "(Text) Languages Easy"]:
+            package_file = self.packager.build_package("Easy", anki_deck_name)
+            self.assertEqual(package_file.stem, anki_deck_name)
+
+            connection = sqlite3.connect(
+                str(self.packager.collection_file(anki_deck_name))
+            )
+            try:
+                decks = json.loads(
+                    connection.execute("SELECT decks FROM col").fetchone()[0]
+                )
+                deck_ids = [
+                    row[0] for row in connection.execute("SELECT did FROM cards")
+                ]
+            finally:
+                connection.close()
+            self.assertEqual(len(deck_ids), 1)
+            self.assertEqual(decks[str(deck_ids[0])]["name"], anki_deck_name)
+
+
+if __name__ == "__main__":
+    unittest.main()
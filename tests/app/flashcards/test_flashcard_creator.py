@@ -0,0 +1,52 @@
+import csv
+import tempfile
+import unittest
+from pathlib import Path
+
+from flashcards.flashcard_creator import FlashcardCreator
+
+
+class TestFlashcardCreator(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.creator = FlashcardCreator(
+            "Test", ["Question Text", "Answer Text"], self.folder.name
+        )
+
+    def tearDown(self):
+        self.creator.close()
+        self.folder.cleanup()
+
+    def read_rows(self):
+        with open(self.creator.file_path, encoding="utf-8", newline="") as f:
+            return list(csv.reader(f))
+
+    def test_cards_are_written_and_counted(self):
+        self.creator.add_flashcard(
+            {"Question Text": 'Dijo "hola",\ny se fue.', "Answer Text": "Hi"}
+        )
+        self.creator.add_flashcard({"Question Text": "Adiós", "Answer Text": ""})
+
+        self.assertEqual(self.creator.number_of_flashcards_created(), 2)
+        self.assertEqual(
+            self.read_rows(),
+            [['Dijo "hola",\ny se fue.', "Hi"], ["Adiós", ""]],
+        )
+
+    def test_uncommitted_cards_are_written_on_close(self):
+        for number in range(3):
+            self.creator.add_flashcard(
+                {"Question Text": str(number), "Answer Text": ""}, commit=False
+            )
+        self.creator.close()
+        self.assertEqual(len(self.read_rows()), 3)
+
+    def test_empty_deck_can_be_deleted(self):
+        self.assertEqual(self.creator.number_of_flashcards_created(), 0)
+        self.assertTrue(self.creator.delete_deck())
+        self.assertFalse(Path(self.creator.file_path).exists())
+        self.assertEqual(self.creator.number_of_flashcards_created(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import csv
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from avi_utils.media_encoder import MediaEncodingQueue
+from flashcards.flashcard_store import (
+    DuplicateFlashcardError,
+    FlashcardStore,
+    hash_files,
+    question_key,
+)
+
+
+class TestFlashcardStore(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.audio_folder = Path(self.folder.name) / "audio"
+        self.audio_folder.mkdir()
+        self.store = FlashcardStore(
+            Path(self.folder.name) / "flashcards.sqlite3",
+            media_folders={"Audio": self.audio_folder},
+        )
+
+    def tearDown(self):
+        self.store.close()
+        self.folder.cleanup()
+
+    def write_audio(self, file_name, content):
+        (self.audio_folder / file_name).write_bytes(content)
+        return f"[sound:{file_name}]"
+
+    def test_question_key_ignores_formatting(self):
+        self.assertEqual(
+            question_key({"Question Text": "<b>¿Qué</b>  PASA?"}),
+            question_key({"Question Text": "¿qué pasa?"}),
+        )
+        self.assertIsNone(question_key({"Question Text": " <br> "}))
+
+    def test_duplicate_questions_are_rejected_per_deck(self):
+        first_id = self.store.add_flashcard("Spanish", {"Question Text": "Hola"})
+
+        with self.assertRaises(DuplicateFlashcardError) as context:
+            self.store.add_flashcard("Spanish", {"Question Text": "<i>hola</i>"})
+        self.assertEqual(context.exception.flashcard_id, first_id)
+
+        self.store.add_flashcard("French", {"Question Text": "Hola"})
+        self.assertEqual(self.store.count_flashcards("Spanish"), 1)
+        self.assertEqual(self.store.count_flashcards("French"), 1)
+
+    def test_duplicate_media_is_rejected(self):
+        first_audio = self.write_audio("a.mp3", b"same audio")
+        copied_audio = self.write_audio("b.mp3", b"same audio")
+        other_audio = self.write_audio("c.mp3", b"other audio")
+
+        self.store.add_flashcard("Spanish", {"Question Text": "", "Audio": first_audio})
+        with self.assertRaises(DuplicateFlashcardError):
+            self.store.add_flashcard(
+                "Spanish", {"Question Text": "", "Audio": copied_audio}
+            )
+        self.store.add_flashcard("Spanish", {"Question Text": "", "Audio": other_audio})
+        self.assertEqual(self.store.count_flashcards("Spanish"), 2)
+
+    def test_duplicate_media_is_rejected_before_it_is_encoded(self):
+        # Not started, so nothing is encoded and the cards' media files don't exist yet
+        queue = MediaEncodingQueue(
+            Path(self.folder.name) / "queue.sqlite3",
+            Path(self.folder.name) / "staging",
+        )
+        self.addCleanup(queue.close)
+
+        def add_screenshot_card(file_name):
+            staged_file = queue.stage_image(
+                lambda path: path.write_bytes(b"same screenshot"),
+                Path(self.folder.name) / "images" / file_name,
+            )
+            return self.store.add_flashcard(
+                "Spanish",
+                {"Question Text": "", "Image": file_name},
+                media_hash=hash_files([staged_file]),
+            )
+
+        add_screenshot_card("a.webp")
+        with self.assertRaises(DuplicateFlashcardError):
+            add_screenshot_card("b.webp")
+        self.assertEqual(self.store.count_flashcards("Spanish"), 1)
+
+    def test_flashcards_are_edited_in_place(self):
+        first_id = self.store.add_flashcard("Spanish", {"Question Text": "Hola"})
+        second_id = self.store.add_flashcard("Spanish", {"Question Text": "Adiós"})
+
+        self.store.update_flashcard(
+            second_id, {"Question Text": "Adiós", "Answer Text": "Bye"}, deck="French"
+        )
+        self.assertEqual(
+            self.store.get_flashcard(second_id),
+            ("French", {"Question Text": "Adiós", "Answer Text": "Bye"}),
+        )
+
+        # Editing a card to match another in its deck is rejected, but matching itself is fine
+        self.store.update_flashcard(first_id, {"Question Text": "HOLA"})
+        with self.assertRaises(DuplicateFlashcardError):
+            self.store.update_flashcard(second_id, {"Question Text": "Hola"}, "Spanish")
+
+    def test_previous_flashcards_are_found_in_order(self):
+        old_id = self.store.add_flashcard("Spanish", {"Question Text": "Uno"})
+        self.assertIsNone(self.store.previous_flashcard_id(since=time.time() + 60))
+
+        second_id = self.store.add_flashcard("Spanish", {"Question Text": "Dos"})
+        third_id = self.store.add_flashcard("French", {"Question Text": "Tres"})
+
+        self.assertEqual(self.store.previous_flashcard_id(), third_id)
+        self.assertEqual(
+            self.store.previous_flashcard_id(before_id=third_id), second_id
+        )
+        self.assertEqual(self.store.previous_flashcard_id(before_id=second_id), old_id)
+        self.assertIsNone(self.store.previous_flashcard_id(before_id=old_id))
+
+    def test_export_csv_only_exports_new_flashcards(self):
+        self.store.add_flashcard(
+            "Spanish", {"Question Text": "Hola", "Answer Text": "Hi"}
+        )
+        file_path = Path(self.folder.name) / "Spanish.csv"
+
+        fields = ["Question Text", "Answer Text"]
+        self.assertEqual(self.store.export_csv("Spanish", file_path, fields), 1)
+        self.store.add_flashcard("Spanish", {"Question Text": "Adiós"})
+        self.assertEqual(
+            self.store.export_csv("Spanish", file_path, fields, only_unexported=True),
+            1,
+        )
+
+        with open(file_path, encoding="utf-8", newline="") as f:
+            self.assertEqual(list(csv.reader(f)), [["Adiós", ""]])
+        self.assertFalse(file_path.with_name("Spanish.csv.part").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from media_exporter.export_profiler import ExportProfiler
+
+
+class TestExportProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = ExportProfiler()
+
+    def test_nested_stages_are_summed_by_name(self):
+        with self.profiler.stage("export"):
+            for audio_track in ["spa", "eng"]:
+                with self.profiler.stage("decode_track", audio_track=audio_track):
+                    pass
+
+        self.assertEqual(list(self.profiler.stages), ["decode_track", "export"])
+        self.assertEqual(self.profiler.stages["decode_track"]["calls"], 2)
+        self.assertEqual(self.profiler.stages["export"]["calls"], 1)
+        # The outer stage lasts as long as the stages nested in it
+        self.assertGreaterEqual(
+            self.profiler.stages["export"]["wall_seconds"],
+            self.profiler.stages["decode_track"]["wall_seconds"],
+        )
+
+        events = {
+            event["args"].get("audio_track"): event
+            for event in self.profiler.trace_events
+        }
+        export_event = events[None]
+        for audio_track in ["spa", "eng"]:
+            event = events[audio_track]
+            self.assertGreaterEqual(event["ts"], export_event["ts"])
+            self.assertLessEqual(
+                event["ts"] + event["dur"], export_event["ts"] + export_event["dur"]
+            )
+
+    def test_io_is_counted(self):
+        chunks = [b"abc", bytearray(b"de")]
+        self.assertEqual(list(self.profiler.count_piped_input(chunks)), chunks)
+        self.profiler.record_ffmpeg(bytes_piped_out=10)
+        self.profiler.record_ffmpeg()
+        self.profiler.record_ffprobe()
+        with tempfile.TemporaryDirectory() as folder:
+            output_file = Path(folder) / "out.mp3"
+            output_file.write_bytes(b"1234")
+            self.profiler.record_file_written(output_file)
+
+        report = self.profiler.report()
+        self.assertEqual(report["bytes_piped_in"], 5)
+        self.assertEqual(report["bytes_piped_out"], 10)
+        self.assertEqual(report["ffmpeg_invocations"], 2)
+        self.assertEqual(report["ffprobe_invocations"], 1)
+        self.assertEqual(report["bytes_written"], 4)
+
+        self.profiler.reset()
+        self.assertEqual(self.profiler.report()["ffmpeg_invocations"], 0)
+        self.assertEqual(self.profiler.stages, {})
+
+    def test_report_and_trace_are_written_as_json(self):
+        with self.profiler.stage("encode_output", file="out.mp3"):
+            pass
+
+        with tempfile.TemporaryDirectory() as folder:
+            report_file = Path(folder) / "profile.json"
+            trace_file = Path(folder) / "trace.json"
+            self.profiler.write_report(report_file)
+            self.profiler.write_trace(trace_file)
+            report = json.loads(report_file.read_text(encoding="utf-8"))
+            trace = json.loads(trace_file.read_text(encoding="utf-8"))
+
+        self.assertEqual(
+            set(report),
+            {
+                "total_wall_seconds",
+                "ffmpeg_invocations",
+                "ffprobe_invocations",
+                "bytes_piped_in",
+                "bytes_piped_out",
+                "bytes_written",
+                "stages",
+            },
+        )
+        self.assertEqual(
+            set(report["stages"]["encode_output"]),
+            {"calls", "wall_seconds", "cpu_seconds", "child_cpu_seconds"},
+        )
+
+        self.assertEqual(trace["displayTimeUnit"], "ms")
+        (event,) = trace["traceEvents"]
+        self.assertEqual(event["name"], "encode_output")
+        self.assertEqual(event["ph"], "X")
+        self.assertEqual(event["args"]["file"], "out.mp3")
+        for key in ["ts", "dur", "pid", "tid"]:
+            self.assertIn(key, event)
+
+
+if __name__ == "__main__":
+    unittest.main()
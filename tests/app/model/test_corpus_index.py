@@ -0,0 +1,92 @@
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from model.corpus_index import CorpusIndex, flashcard_fields
+
+SPANISH = """1
+00:00:01,000 --> 00:00:02,500
+¿Qué pasa, Rory?
+
+2
+00:00:04,000 --> 00:00:05,000
+Nada. ¿Y tú?
+
+"""
+
+ENGLISH = """1
+00:00:01,100 --> 00:00:02,400
+What's up, Rory?
+
+2
+00:00:04,100 --> 00:00:05,100
+Nothing. And you?
+
+"""
+
+
+class TestCorpusIndex(unittest.TestCase):
+    def setUp(self):
+        self.temporary_folder = tempfile.TemporaryDirectory()
+        self.folder = Path(self.temporary_folder.name)
+        self.episodes = {}
+        for name in ["S01E01", "S01E02"]:
+            subtitle_files = {}
+            for language, text in [("Spanish", SPANISH), ("English", ENGLISH)]:
+                subtitle_file = self.folder / f"{name}.{language}.srt"
+                subtitle_file.write_text(text, encoding="utf-8")
+                subtitle_files[language] = subtitle_file
+            self.episodes[name] = {
+                "Video File": self.folder / f"{name}.mp4",
+                "Subtitle Files": subtitle_files,
+            }
+        self.index = CorpusIndex(self.folder / "corpus.sqlite")
+
+    def tearDown(self):
+        self.index.close()
+        self.temporary_folder.cleanup()
+
+    def test_occurrences_come_with_their_aligned_lines(self):
+        counts = self.index.build(self.episodes, processes=1)
+        self.assertEqual(counts["indexed"], 2)
+
+        hits = self.index.concordance("que PASA", "Spanish")
+
+        self.assertEqual([hit["episode"] for hit in hits], ["S01E01", "S01E02"])
+        self.assertEqual(hits[0]["text"], "¿Qué pasa, Rory?")
+        self.assertEqual(hits[0]["aligned_texts"], {"English": "What's up, Rory?"})
+        self.assertEqual(hits[0]["start_time"], datetime(1900, 1, 1, 0, 0, 1))
+        self.assertEqual(hits[0]["end_time"], datetime(1900, 1, 1, 0, 0, 2, 500000))
+        self.assertEqual(
+            flashcard_fields(hits[0], "English")["Answer Text"], "What's up, Rory?"
+        )
+
+        self.assertEqual(self.index.concordance("pasa", "English"), [])
+        self.assertEqual(len(self.index.concordance("Na", "Spanish", prefix=True)), 2)
+        self.assertEqual(self.index.concordance("?", "Spanish"), [])
+
+    def test_only_changed_episodes_are_reindexed(self):
+        self.index.build(self.episodes, processes=1)
+
+        spanish_file = self.episodes["S01E02"]["Subtitle Files"]["Spanish"]
+        spanish_file.write_text(SPANISH.replace("Nada", "Nadie"), encoding="utf-8")
+        del self.episodes["S01E01"]
+        counts = self.index.build(self.episodes, processes=1)
+
+        self.assertEqual(
+            counts, {"indexed": 1, "unchanged": 0, "removed": 1, "failed": 0}
+        )
+        self.assertEqual(self.index.episode_names(), ["S01E02"])
+        self.assertEqual(self.index.concordance("nada", "Spanish"), [])
+        self.assertEqual(len(self.index.concordance("nadie", "Spanish")), 1)
+
+    def test_episodes_are_aligned_in_worker_processes(self):
+        counts = self.index.build(self.episodes, processes=2)
+
+        self.assertEqual(counts["indexed"], 2)
+        self.assertEqual(len(self.index.concordance("you", "English")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
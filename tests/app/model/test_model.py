@@ -0,0 +1,72 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from model.model import AVIModel
+
+
+def subtitle_file_text(timings):
+    return "".join(
+        f"{number}\n00:00:{start:02},000 --> 00:00:{end:02},000\nLine {number}\n\n"
+        for number, (start, end) in enumerate(timings, start=1)
+    )
+
+
+class TestAVIModel(unittest.TestCase):
+    def setUp(self):
+        self.temporary_folder = tempfile.TemporaryDirectory()
+        folder = Path(self.temporary_folder.name)
+        subtitle_files = {}
+        for language, timings in [
+            ("Spanish", [(1, 2), (3, 4), (20, 21), (22, 23)]),
+            # The third English subtitle overlaps no Spanish one, so gets an entry of its own
+            ("English", [(1, 2), (3, 4), (10, 11), (20, 21), (22, 23)]),
+        ]:
+            subtitle_files[language] = folder / f"{language}.srt"
+            subtitle_files[language].write_text(
+                subtitle_file_text(timings), encoding="utf-8"
+            )
+        self.model = AVIModel(subtitle_files)
+
+    def tearDown(self):
+        self.temporary_folder.cleanup()
+
+    def test_subtitles_map_to_their_entries(self):
+        self.assertEqual(self.model.get_entry_index("Spanish", 2), 3)
+        self.assertEqual(self.model.get_entry_index("English", 2), 2)
+        self.assertEqual(self.model.get_entry_index("English", 4), 4)
+        self.assertIsNone(self.model.get_entry_index("English", 5))
+        self.assertEqual(
+            self.model.get_aligned_subtitles("English", 3),
+            {"Spanish": [2], "English": [3]},
+        )
+        self.assertEqual(
+            self.model.get_aligned_subtitles("English", 2),
+            {"Spanish": [], "English": [2]},
+        )
+        self.assertEqual(
+            self.model.get_aligned_subtitles("Reference", 2),
+            {"Spanish": [2], "English": [3], "Reference": [2]},
+        )
+
+    def test_segments_follow_re_segmenting(self):
+        self.assertEqual(self.model.get_segment("English", 4), 1)
+        self.assertEqual(self.model.get_segment_entries(1), range(0, 5))
+
+        self.model.create_segments(maximum_seconds_between_segments=5)
+
+        self.assertEqual(self.model.get_segment("English", 1), 1)
+        self.assertEqual(self.model.get_segment("English", 2), 2)
+        self.assertEqual(self.model.get_segment("Spanish", 3), 3)
+        self.assertEqual(self.model.get_segment_entries(1), range(0, 2))
+        self.assertEqual(self.model.get_segment_entries(3), range(3, 5))
+        self.assertEqual(self.model.get_segment_entries(4), range(0))
+
+        self.model.create_segments(maximum_seconds_between_segments=float("inf"))
+
+        self.assertEqual(self.model.get_segment("Spanish", 3), 1)
+        self.assertEqual(self.model.get_segment_entries(1), range(0, 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from model import segmentation
+
+
+def timing(start_seconds, end_seconds):
+    zero_time = datetime(1900, 1, 1)
+    return (
+        zero_time + timedelta(seconds=start_seconds),
+        zero_time + timedelta(seconds=end_seconds),
+    )
+
+
+def loop_segment_by_speech_length(timings, segment_length):
+    # The original loop used by MediaExporter.segment_subtitle_timings
+    segments, current_segment, cumulative_length = [], [], 0
+    for i, (start_time, end_time) in enumerate(timings):
+        if cumulative_length > segment_length:
+            segments.append(current_segment)
+            current_segment, cumulative_length = [], 0
+        current_segment.append(i)
+        cumulative_length += (end_time - start_time).total_seconds()
+    if current_segment:
+        segments.append(current_segment)
+    return segments
+
+
+class TestSegmentation(unittest.TestCase):
+    def setUp(self):
+        # Four lines of 2s speech, with a long silence before the third
+        self.timings = [
+            timing(0, 2),
+            timing(3, 5),
+            timing(20, 22),
+            timing(23, 25),
+        ]
+
+    def test_timings_to_milliseconds(self):
+        starts, ends = segmentation.timings_to_milliseconds([timing(1.5, 2.25)])
+        self.assertEqual(starts.tolist(), [1500])
+        self.assertEqual(ends.tolist(), [2250])
+
+    def test_speech_length_matches_original_loop(self):
+        rng = np.random.default_rng(0)
+        starts = np.cumsum(rng.uniform(0.5, 6, 300))
+        timings = [
+            timing(round(start, 3), round(start + duration, 3))
+            for start, duration in zip(starts, rng.uniform(0.3, 4, 300))
+        ]
+        for segment_length in [0, 5, 15, 60, 10_000]:
+            segment_ids = segmentation.segment_timings(
+                timings, segmentation.SPEECH_LENGTH, segment_length
+            )
+            self.assertEqual(
+                segmentation.group_segments(segment_ids),
+                loop_segment_by_speech_length(timings, segment_length),
+            )
+
+    def test_silence_gap(self):
+        segment_ids = segmentation.segment_timings(
+            self.timings, segmentation.SILENCE_GAP, 3
+        )
+        self.assertEqual(segment_ids.tolist(), [0, 0, 1, 1])
+
+    def test_segment_count(self):
+        segment_ids = segmentation.segment_timings(
+            self.timings, segmentation.SEGMENT_COUNT, 2
+        )
+        self.assertEqual(segment_ids.tolist(), [0, 0, 1, 1])
+
+        segment_ids = segmentation.segment_timings(
+            self.timings, segmentation.SEGMENT_COUNT, 10
+        )
+        self.assertEqual(segment_ids.tolist(), [0, 1, 2, 3])
+
+    def test_scene_cuts(self):
+        segment_ids = segmentation.segment_timings(
+            self.timings, segmentation.SCENE_CUTS, scene_cuts=[2.5, 10, 15]
+        )
+        # The scenes between 10s and 15s have no subtitles, so no segment
+        self.assertEqual(segment_ids.tolist(), [0, 1, 2, 2])
+
+    def test_diff_segment_starts(self):
+        self.assertEqual(
+            segmentation.diff_segment_starts([0, 0, 1, 1, 2], [0, 1, 1, 1, 2]),
+            ([1], [2]),
+        )
+        self.assertEqual(
+            segmentation.diff_segment_starts([0, 0, 0], [0, 1, 2]), ([1, 2], [])
+        )
+        self.assertEqual(segmentation.diff_segment_starts([], []), ([], []))
+
+    def test_empty_and_invalid(self):
+        self.assertEqual(
+            segmentation.group_segments(
+                segmentation.segment_timings([], segmentation.SPEECH_LENGTH, 10)
+            ),
+            [],
+        )
+        with self.assertRaises(ValueError):
+            segmentation.segment_timings(self.timings, "unknown", 1)
+        with self.assertRaises(ValueError):
+            segmentation.segment_timings(self.timings, segmentation.SCENE_CUTS)
+
+
+if __name__ == "__main__":
+    unittest.main()
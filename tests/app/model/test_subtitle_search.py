@@ -0,0 +1,50 @@
+import unittest
+
+from model.subtitle_search import SubtitleSearchIndex, tokenise
+
+
+class TestSubtitleSearch(unittest.TestCase):
+    def setUp(self):
+        self.index = SubtitleSearchIndex()
+        self.index.add_subtitles(
+            "Spanish", ["¿Qué pasa?", "No pasa nada.", "Pásame la sal, por favor."]
+        )
+        self.index.add_subtitles(
+            "English", ["What's up?", "Nothing's happening.", "Pass the salt, please."]
+        )
+
+    def test_tokenise_ignores_case_accents_and_punctuation(self):
+        self.assertEqual(tokenise("¿QUÉ pasa, Señor?"), ["que", "pasa", "senor"])
+
+    def test_words_match_as_prefixes_in_any_language(self):
+        self.assertEqual(
+            self.index.search("pas"),
+            [("Spanish", 0), ("Spanish", 1), ("Spanish", 2), ("English", 2)],
+        )
+        # "Pásame" starts with "pasa" once the accent is ignored
+        self.assertEqual(
+            self.index.search("PASA"), [("Spanish", 0), ("Spanish", 1), ("Spanish", 2)]
+        )
+        self.assertEqual(
+            self.index.search("pas", languages=["English"]), [("English", 2)]
+        )
+        self.assertEqual(self.index.search("pas", limit=1), [("Spanish", 0)])
+
+    def test_phrases_match_consecutive_words(self):
+        self.assertEqual(self.index.search("que pa"), [("Spanish", 0)])
+        self.assertEqual(self.index.search("pasa que"), [])
+        self.assertEqual(self.index.search("the sal"), [("English", 2)])
+
+    def test_short_words_only_match_whole_words(self):
+        self.assertEqual(self.index.search("l"), [])
+        self.assertEqual(self.index.search("la"), [("Spanish", 2)])
+        self.assertEqual(self.index.search("  ?! "), [])
+
+    def test_added_subtitles_are_found(self):
+        self.assertEqual(self.index.search("pasta"), [])
+        self.index.add_subtitles("Italian", ["Mangiamo la pasta."])
+        self.assertEqual(self.index.search("pasta"), [("Italian", 0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+from datetime import datetime, timedelta
+
+from PyQt5.QtCore import QCoreApplication
+
+from model import segmentation
+
+from ui.subtitle_table import (
+    ENTRY_ROW,
+    FIRST_CHUNK_ROWS,
+    SEGMENT_ROW,
+    SUBTITLES_ROLE,
+    SubtitleTableModel,
+    build_workspace_rows,
+    iterate_workspace_rows,
+)
+
+START = datetime(1900, 1, 1)
+
+
+def entry(number, segment):
+    start_time = START + timedelta(seconds=3 * number)
+    return {
+        "timings": (start_time, start_time + timedelta(seconds=2)),
+        "segment": segment,
+        "number": number,
+    }
+
+
+def gather_subtitles(alignment_entry):
+    number = alignment_entry["number"]
+    return {"Spanish": {"indices": [number], "texts": [f"Línea {number}"]}}
+
+
+class TestSubtitleTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def test_segment_rows_come_before_their_entries(self):
+        alignment = [entry(0, 1), entry(1, 1), entry(2, 2)]
+
+        rows = build_workspace_rows(alignment, gather_subtitles)
+
+        self.assertEqual(
+            [row["type"] for row in rows],
+            [SEGMENT_ROW, ENTRY_ROW, ENTRY_ROW, SEGMENT_ROW, ENTRY_ROW],
+        )
+        self.assertEqual(rows[0]["total_segments"], 2)
+        self.assertEqual(rows[0]["start_time"], START)
+        self.assertEqual(rows[0]["end_time"], START + timedelta(seconds=5))
+        self.assertEqual(build_workspace_rows([], gather_subtitles), [])
+
+    def test_model_gives_subtitles_per_language(self):
+        rows = build_workspace_rows([entry(0, 1)], gather_subtitles)
+        model = SubtitleTableModel()
+        model.set_rows(rows, ["Spanish", "English"], ["Spanish"])
+
+        self.assertEqual(model.rowCount(), 2)
+        self.assertEqual(model.columnCount(), 2)
+        self.assertTrue(model.has_audio_track(0))
+        self.assertFalse(model.has_audio_track(1))
+        self.assertEqual(model.index(1, 0).data(SUBTITLES_ROLE), [(0, "Línea 0")])
+        self.assertEqual(model.index(1, 1).data(SUBTITLES_ROLE), [])
+        self.assertEqual(model.index(0, 0).data(SUBTITLES_ROLE), [])
+
+    def test_rows_stream_in_after_the_first_chunk(self):
+        gathered = []
+
+        def gather_and_count(alignment_entry):
+            gathered.append(alignment_entry["number"])
+            return gather_subtitles(alignment_entry)
+
+        alignment = [entry(number, number // 10 + 1) for number in range(500)]
+        model = SubtitleTableModel()
+        finished = []
+        model.population_finished_signal.connect(lambda: finished.append(True))
+        model.set_rows(
+            iterate_workspace_rows(alignment, gather_and_count), ["Spanish"], []
+        )
+
+        # Only the first chunk has been gathered and shown
+        self.assertEqual(model.rowCount(), FIRST_CHUNK_ROWS)
+        self.assertLess(len(gathered), len(alignment))
+        self.assertTrue(model.is_populating())
+
+        inserted = []
+        model.rowsInserted.connect(lambda _, first, last: inserted.append(first))
+        while model.is_populating():
+            QCoreApplication.processEvents()
+
+        self.assertEqual(finished, [True])
+        self.assertEqual(inserted[0], FIRST_CHUNK_ROWS)
+        self.assertEqual(model.rows, build_workspace_rows(alignment, gather_subtitles))
+
+    def test_segments_are_updated_in_place(self):
+        alignment = [entry(number, 1) for number in range(12)]
+        model = SubtitleTableModel()
+        model.set_rows(
+            build_workspace_rows(alignment, gather_subtitles), ["Spanish"], []
+        )
+        entry_rows = [row for row in model.rows if row["type"] == ENTRY_ROW]
+
+        for segments in (
+            [1, 1, 2, 2, 2, 3, 3, 4, 4, 4, 4, 5],
+            [1, 2, 2, 2, 3, 3, 3, 3, 3, 4, 4, 4],
+        ):
+            old_segments = [alignment_entry["segment"] for alignment_entry in alignment]
+            for alignment_entry, segment in zip(alignment, segments):
+                alignment_entry["segment"] = segment
+            added, removed = segmentation.diff_segment_starts(old_segments, segments)
+
+            self.assertTrue(model.update_segments(alignment, added, removed))
+            self.assertEqual(
+                model.rows, build_workspace_rows(alignment, gather_subtitles)
+            )
+
+        # The entry rows themselves were kept
+        self.assertTrue(
+            all(
+                row is entry_row
+                for row, entry_row in zip(
+                    [row for row in model.rows if row["type"] == ENTRY_ROW], entry_rows
+                )
+            )
+        )
+
+    def test_entry_rows_are_found(self):
+        alignment = [entry(number, number // 3 + 1) for number in range(10)]
+        model = SubtitleTableModel()
+        model.set_rows(
+            build_workspace_rows(alignment, gather_subtitles), ["Spanish"], []
+        )
+
+        for number in range(10):
+            row = model.entry_row(number)
+            self.assertEqual(model.rows[row]["entry"], number)
+        self.assertIsNone(model.entry_row(10))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# The app imports its modules from its own folder (e.g. `from model.segmentation import ...`), as it's run from there,
+# so the tests import them the same way, and each module is only loaded once
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))